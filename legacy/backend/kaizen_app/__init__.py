@@ -2,6 +2,10 @@ import os
 from flask import Flask, request, jsonify
 from .config import config_by_name
 from .extensions import db, migrate, jwt, cors
+from .audit_log import init_audit_log
+from .instrumentation import init_instrumentation
+from .photo_storage import init_photo_storage
+from .request_logging import init_request_logging
 
 
 def create_app(config_name='development'):
@@ -29,13 +33,13 @@ def create_app(config_name='development'):
         except (TypeError, ValueError):
             return True
 
-        from .models import Usuario
-        usuario = db.session.get(Usuario, user_id_int)
-        if not usuario:
+        from . import session_cache
+        estado = session_cache.obter_estado_sessao(user_id_int)
+        if not estado:
             return True
 
-        if usuario.session_token:
-            return session_token != usuario.session_token
+        if estado['session_token']:
+            return session_token != estado['session_token']
 
         return False
 
@@ -95,57 +99,17 @@ def create_app(config_name='development'):
             response.headers['Access-Control-Max-Age'] = '86400'
             return response
 
-    # Middleware para log de todas as requisições
-    @app.before_request
-    def log_request_info():
-        print("\n" + "=" * 30)
-        print(f"[FLASK] Nova requisicao recebida!")
-        print(f"[FLASK] Metodo: {request.method}")
-        print(f"[FLASK] URL: {request.url}")
-        print(f"[FLASK] Path: {request.path}")
-        print(f"[FLASK] Endpoint: {request.endpoint}")
-        print(f"[FLASK] View Args: {request.view_args}")
-        print(f"[FLASK] Headers:")
-        for header, value in request.headers:
-            if header.lower() != 'authorization':
-                print(f"         {header}: {value}")
-            else:
-                has_auth = 'Bearer' in value
-                print(f"         {header}: Bearer ... (presente: {has_auth})")
-
-        if request.method in ['POST', 'PUT', 'PATCH']:
-            try:
-                print(f"[FLASK] Content-Type: {request.content_type}")
-                print(f"[FLASK] Content-Length: {request.content_length}")
-
-                data = request.get_json(force=True, silent=False)
-                if data:
-                    print(f"[FLASK] Body (JSON) PARSED: {data}")
-                    print(f"[FLASK] Tipo do body: {type(data)}")
-                else:
-                    print(f"[FLASK] Body: {request.data.decode('utf-8') if request.data else 'vazio'}")
-            except Exception as e:
-                print(f"[ERRO] [FLASK] ERRO ao ler body: {type(e).__name__}: {e}")
-                import traceback
-                traceback.print_exc()
-        print("=" * 30 + "\n")
+    # Log estruturado e amostrado das requisições (ver request_logging)
+    init_request_logging(app)
 
-    @app.after_request
-    def log_response_info(response):
-        print("\n" + "=" * 30)
-        print(f"[FLASK] Resposta sendo enviada")
-        print(f"[FLASK] Status: {response.status}")
-        print(f"[FLASK] Path: {request.path}")
-
-        if response.status_code >= 400:
-            try:
-                data = response.get_json()
-                print(f"[FLASK] Corpo da resposta de erro: {data}")
-            except:
-                print(f"[FLASK] Corpo da resposta (texto): {response.get_data(as_text=True)[:200]}")
-
-        print("=" * 30 + "\n")
-        return response
+    # Latência e SQL por endpoint (opcional, ver instrumentation)
+    init_instrumentation(app)
+
+    # Logs de auditoria gravados em lote fora da transação (AUDIT_LOG_MODE=async)
+    init_audit_log(app)
+
+    # Fotos de evidência dos POPs (armazenamento por conteúdo + miniaturas)
+    init_photo_storage(app)
 
     def resolve_app_version():
         for key in (
@@ -237,4 +201,7 @@ def create_app(config_name='development'):
         app.register_blueprint(public_bp)
         app.register_blueprint(supplier_bp)
 
+        from .commands import register_commands
+        register_commands(app)
+
         return app
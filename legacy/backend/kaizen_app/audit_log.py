@@ -0,0 +1,328 @@
+"""
+Gravação assíncrona e em lote dos logs de auditoria (app_logs).
+
+`services.log_event` roda em quase todo serviço de escrita. No modo padrão
+(AUDIT_LOG_MODE=sync) o AppLog entra na transação do chamador, como sempre.
+No modo `async`:
+
+1. `log_event` monta o registro (IP, user agent e claims do JWT são lidos na
+   requisição) e o guarda em `session.info`; nada é gravado no banco dentro da
+   transação do chamador.
+2. No commit da sessão os registros são entregues ao gravador do processo;
+   no rollback são descartados (mesma semântica do modo síncrono).
+3. O gravador anexa os registros a um arquivo de spool local (NDJSON, um
+   segmento por vez, em AUDIT_LOG_SPOOL_DIR) e uma thread de fundo grava os
+   segmentos fechados com INSERT multi-linha quando há AUDIT_LOG_BATCH_SIZE
+   registros pendentes ou a cada AUDIT_LOG_FLUSH_INTERVAL_SECONDS.
+4. O segmento só é apagado depois do commit do lote. Segmentos de um worker
+   que morreu (pid no nome do arquivo) são assumidos e gravados pelos demais.
+
+Como a gravação sai da transação original, o lote replica o que o banco
+faria: referências a usuários/restaurantes já removidos viram NULL (as FKs
+são ON DELETE SET NULL) e os logins alimentam o rollup diário.
+`criado_em` é definido no momento do evento, então `listar_logs` mantém a
+ordenação e os filtros; os registros aparecem após o próximo flush.
+"""
+import atexit
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import Session, scoped_session
+
+from .extensions import db
+from .models import AppLog, Restaurante, Usuario
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = 'audit_log'
+
+MODO_SINCRONO = 'sync'
+MODO_ASSINCRONO = 'async'
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL_SECONDS = 1.0
+
+_SESSION_KEY = 'audit_log_pendentes'
+
+_RE_SEGMENTO = re.compile(r'^audit-(\d+)-(\d+)\.ndjson$')
+
+
+def modo_assincrono(app=None):
+    app = app or current_app
+    return app.config.get('AUDIT_LOG_MODE', MODO_SINCRONO) == MODO_ASSINCRONO
+
+
+def registrar(session, dados):
+    """Guarda o registro na sessão; ele segue para o gravador no commit."""
+    if isinstance(session, scoped_session):
+        session = session()
+    if not session.in_transaction():
+        # Amarra o registro a uma transação para que o rollback o descarte
+        session.begin()
+    session.info.setdefault(_SESSION_KEY, []).append(dados)
+
+
+def _serializar(dados):
+    linha = dict(dados)
+    if isinstance(linha.get('criado_em'), datetime):
+        linha['criado_em'] = linha['criado_em'].isoformat()
+    return json.dumps(linha, ensure_ascii=False, default=str)
+
+
+def _desserializar(linha):
+    dados = json.loads(linha)
+    if dados.get('criado_em'):
+        dados['criado_em'] = datetime.fromisoformat(dados['criado_em'])
+    dados.setdefault('meta', {})
+    return dados
+
+
+def _pid_ativo(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _ids_existentes(connection, coluna, ids):
+    ids = {i for i in ids if i is not None}
+    if not ids:
+        return set()
+    return set(connection.execute(select(coluna).where(coluna.in_(ids))).scalars())
+
+
+def _anular_referencias_orfas(connection, rows):
+    """Replica o ON DELETE SET NULL para linhas removidas antes do flush."""
+    usuarios = _ids_existentes(
+        connection, Usuario.id,
+        [r.get('usuario_id') for r in rows] + [r.get('impersonator_id') for r in rows]
+    )
+    restaurantes = _ids_existentes(connection, Restaurante.id, [r.get('restaurante_id') for r in rows])
+    for row in rows:
+        for campo in ('usuario_id', 'impersonator_id'):
+            if row.get(campo) not in usuarios:
+                row[campo] = None
+        if row.get('restaurante_id') not in restaurantes:
+            row['restaurante_id'] = None
+
+
+def _deltas_de_login(rows):
+    from .rollups import METRICA_LOGINS
+
+    deltas = defaultdict(int)
+    for row in rows:
+        if row.get('acao') == 'login':
+            deltas[(row.get('restaurante_id'), row['criado_em'].date(), METRICA_LOGINS)] += 1
+    return deltas
+
+
+def gravar_lote(connection, rows):
+    """INSERT multi-linha dos registros (e rollup de logins) na conexão informada."""
+    if not rows:
+        return 0
+    _anular_referencias_orfas(connection, rows)
+    colunas = {coluna.key for coluna in AppLog.__table__.columns} - {'id'}
+    connection.execute(insert(AppLog.__table__), [
+        {chave: valor for chave, valor in row.items() if chave in colunas}
+        for row in rows
+    ])
+    from .rollups import aplicar_deltas
+    aplicar_deltas(connection, _deltas_de_login(rows))
+    return len(rows)
+
+
+class GravadorAuditoria:
+    """Spool local + thread de fundo que grava os registros em lote."""
+
+    def __init__(self, app, spool_dir, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL_SECONDS, fsync=False):
+        self.app = app
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        os.makedirs(spool_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._arquivo = None
+        self._seq = 0
+        self._pendentes = 0
+        self.gravados = 0
+        self.falhas = 0
+
+    # --- Produção (threads das requisições) ---
+
+    def enviar(self, registros):
+        """Anexa os registros ao spool; acorda a thread ao atingir o lote."""
+        linhas = ''.join(_serializar(dados) + '\n' for dados in registros)
+        with self._lock:
+            if self._arquivo is None:
+                self._arquivo = open(self._novo_caminho(), 'a', encoding='utf-8')
+            self._arquivo.write(linhas)
+            self._arquivo.flush()
+            if self.fsync:
+                os.fsync(self._arquivo.fileno())
+            self._pendentes += len(registros)
+            cheio = self._pendentes >= self.batch_size
+        self._garantir_thread()
+        if cheio:
+            self._acordar.set()
+
+    def _novo_caminho(self):
+        self._seq += 1
+        return os.path.join(self.spool_dir, f'audit-{os.getpid()}-{self._seq:08d}.ndjson')
+
+    # --- Consumo ---
+
+    def _fechar_segmento(self):
+        """Fecha o segmento atual e lista os segmentos prontos para gravar."""
+        with self._lock:
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
+            self._pendentes = 0
+
+            pid = os.getpid()
+            prontos = []
+            for nome in sorted(os.listdir(self.spool_dir)):
+                match = _RE_SEGMENTO.match(nome)
+                if not match:
+                    continue
+                caminho = os.path.join(self.spool_dir, nome)
+                dono = int(match.group(1))
+                if dono == pid:
+                    prontos.append(caminho)
+                elif not _pid_ativo(dono):
+                    # Segmento de um worker que morreu: assume (rename é atômico)
+                    assumido = self._novo_caminho()
+                    try:
+                        os.rename(caminho, assumido)
+                    except OSError:
+                        continue
+                    prontos.append(assumido)
+            return prontos
+
+    def _ler_segmento(self, caminho):
+        rows = []
+        with open(caminho, encoding='utf-8') as arquivo:
+            for numero, linha in enumerate(arquivo, start=1):
+                if not linha.strip():
+                    continue
+                try:
+                    rows.append(_desserializar(linha))
+                except (ValueError, TypeError):
+                    # Última linha truncada por uma queda durante a escrita
+                    logger.warning("Registro de auditoria inválido em %s:%d descartado", caminho, numero)
+        return rows
+
+    def drenar(self):
+        """Grava todos os segmentos prontos. Retorna quantos registros foram gravados."""
+        with self._flush_lock:
+            total = 0
+            for caminho in self._fechar_segmento():
+                rows = self._ler_segmento(caminho)
+                try:
+                    with self.app.app_context():
+                        with db.engine.begin() as connection:
+                            for inicio in range(0, len(rows), self.batch_size):
+                                total += gravar_lote(connection, rows[inicio:inicio + self.batch_size])
+                except Exception as exc:
+                    # O segmento fica no disco e é tentado de novo no próximo ciclo
+                    self.falhas += 1
+                    logger.warning("Falha ao gravar logs de auditoria de %s: %s", caminho, exc)
+                    continue
+                os.remove(caminho)
+            self.gravados += total
+            return total
+
+    def _loop(self):
+        while not self._parar.is_set():
+            self._acordar.wait(self.flush_interval)
+            self._acordar.clear()
+            try:
+                self.drenar()
+            except Exception as exc:
+                logger.warning("Falha no gravador de auditoria: %s", exc)
+
+    def _garantir_thread(self):
+        # A thread não sobrevive a um fork: recria no processo filho
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._loop, name='kaizen-audit-log', daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        """Encerra a thread e grava o que restou no spool."""
+        self._parar.set()
+        self._acordar.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.drenar()
+
+    def stats(self):
+        with self._lock:
+            pendentes = self._pendentes
+        return {"pendentes": pendentes, "gravados": self.gravados, "falhas": self.falhas}
+
+
+def obter_gravador(app=None):
+    """Gravador da app (None no modo síncrono)."""
+    app = app or current_app
+    return app.extensions.get(EXTENSION_KEY)
+
+
+def init_audit_log(app):
+    """Cria o gravador quando AUDIT_LOG_MODE=async."""
+    if not modo_assincrono(app):
+        return None
+    spool_dir = app.config.get('AUDIT_LOG_SPOOL_DIR') or os.path.join(tempfile.gettempdir(), 'kaizen_audit_spool')
+    gravador = GravadorAuditoria(
+        app,
+        spool_dir,
+        batch_size=int(app.config.get('AUDIT_LOG_BATCH_SIZE', DEFAULT_BATCH_SIZE)),
+        flush_interval=float(app.config.get('AUDIT_LOG_FLUSH_INTERVAL_SECONDS', DEFAULT_FLUSH_INTERVAL_SECONDS)),
+        fsync=bool(app.config.get('AUDIT_LOG_SPOOL_FSYNC', False)),
+    )
+    app.extensions[EXTENSION_KEY] = gravador
+    atexit.register(gravador.parar)
+    return gravador
+
+
+@event.listens_for(Session, 'after_commit')
+def _enviar_no_commit(session):
+    registros = session.info.pop(_SESSION_KEY, None)
+    if not registros or not has_app_context():
+        return
+    gravador = obter_gravador()
+    if gravador is not None:
+        gravador.enviar(registros)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _descartar_no_rollback(session, previous_transaction):
+    # after_soft_rollback dispara mesmo sem conexão aberta (nada foi flushado)
+    if previous_transaction.parent is None:
+        session.info.pop(_SESSION_KEY, None)
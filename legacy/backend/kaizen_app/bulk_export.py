@@ -0,0 +1,254 @@
+"""
+Exportação em lote (ZIP com um CSV por tipo de dado) em streaming.
+
+`gerar_zip` é um gerador de bytes: as linhas são lidas em lotes
+(`yield_per`, cursor do lado do servidor no Postgres), cada linha do CSV é
+escrita direto no membro do ZIP (`ZipFile.open(..., 'w')`) e os bytes
+comprimidos saem para o cliente assim que passam de `chunk_bytes`. O ZIP é
+escrito em um destino não-seekable (tamanhos em data descriptors, ZIP64
+ligado), então a memória fica limitada a um lote de linhas + um chunk,
+independente do tamanho das tabelas.
+
+Os nomes relacionados (item, fornecedor, usuário, área) vêm por JOIN na
+própria consulta, sem lazy loads por linha.
+"""
+import csv
+import io
+import zipfile
+
+from sqlalchemy import func, select
+
+from .extensions import db
+from .models import (
+    Area,
+    Cotacao,
+    CotacaoItem,
+    Estoque,
+    Fornecedor,
+    Item,
+    Lista,
+    ListaMaeItem,
+    Pedido,
+    UserRoles,
+    Usuario,
+    lista_colaborador,
+)
+
+DEFAULT_LOTE = 1000
+DEFAULT_CHUNK_BYTES = 64 * 1024
+
+
+class _SaidaZip:
+    """Destino do ZipFile: acumula os bytes até o gerador drená-los."""
+
+    def __init__(self):
+        self._partes = []
+        self.tamanho = 0
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        self.tamanho += len(dados)
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def drenar(self):
+        dados = b''.join(self._partes)
+        self._partes = []
+        self.tamanho = 0
+        return dados
+
+
+def _data(valor):
+    return valor.strftime('%Y-%m-%d %H:%M:%S') if valor else ''
+
+
+def _sim_nao(valor):
+    return 'Sim' if valor else 'Não'
+
+
+def _enum(valor):
+    return valor.value if valor else ''
+
+
+def _stream(stmt, lote):
+    return db.session.execute(stmt.execution_options(yield_per=lote))
+
+
+def _linhas_usuarios(restaurante_id, lote):
+    stmt = select(
+        Usuario.id, Usuario.nome, Usuario.email, Usuario.username, Usuario.role,
+        Usuario.aprovado, Usuario.ativo, Usuario.criado_em
+    ).order_by(Usuario.id)
+    if restaurante_id is not None:
+        stmt = stmt.where(Usuario.role != UserRoles.SUPER_ADMIN, Usuario.restaurante_id == restaurante_id)
+    for row in _stream(stmt, lote):
+        yield [
+            row.id, row.nome, row.email, row.username or '', row.role.value,
+            _sim_nao(row.aprovado), _sim_nao(row.ativo), _data(row.criado_em)
+        ]
+
+
+def _colaboradores_por_lista(lista_ids):
+    nomes = {}
+    rows = db.session.execute(
+        select(lista_colaborador.c.lista_id, Usuario.nome)
+        .join(Usuario, Usuario.id == lista_colaborador.c.usuario_id)
+        .where(lista_colaborador.c.lista_id.in_(lista_ids))
+        .order_by(lista_colaborador.c.lista_id, Usuario.id)
+    )
+    for lista_id, nome in rows:
+        nomes.setdefault(lista_id, []).append(nome)
+    return nomes
+
+
+def _linhas_listas(restaurante_id, lote):
+    stmt = select(Lista.id, Lista.nome, Lista.descricao, Lista.data_criacao).where(
+        Lista.deletado.is_(False)
+    ).order_by(Lista.id)
+    if restaurante_id is not None:
+        stmt = stmt.where(Lista.restaurante_id == restaurante_id)
+    for parte in _stream(stmt, lote).partitions():
+        # Colaboradores em uma consulta por lote de listas
+        colaboradores = _colaboradores_por_lista([row.id for row in parte])
+        for row in parte:
+            yield [
+                row.id, row.nome, row.descricao or '', _data(row.data_criacao),
+                ', '.join(colaboradores.get(row.id, []))
+            ]
+
+
+def _linhas_itens(restaurante_id, lote):
+    stmt = (
+        select(Item.id, Item.nome, Item.unidade_medida, Fornecedor.nome.label('fornecedor'), Item.atualizado_em)
+        .join(Fornecedor, Item.fornecedor_id == Fornecedor.id)
+        .order_by(Item.id)
+    )
+    if restaurante_id is not None:
+        stmt = stmt.where(Fornecedor.restaurante_id == restaurante_id)
+    for row in _stream(stmt, lote):
+        yield [row.id, row.nome, row.unidade_medida, row.fornecedor or '', _data(row.atualizado_em)]
+
+
+def _linhas_fornecedores(restaurante_id, lote):
+    stmt = (
+        select(
+            Fornecedor.id, Fornecedor.nome, Fornecedor.contato, Fornecedor.telefone,
+            Usuario.email, Fornecedor.responsavel, Fornecedor.observacao
+        )
+        .outerjoin(Usuario, Fornecedor.usuario_id == Usuario.id)
+        .order_by(Fornecedor.id)
+    )
+    if restaurante_id is not None:
+        stmt = stmt.where(Fornecedor.restaurante_id == restaurante_id)
+    for row in _stream(stmt, lote):
+        yield [
+            row.id, row.nome, row.contato or '', row.telefone or '', row.email or '',
+            row.responsavel or '', row.observacao or ''
+        ]
+
+
+def _linhas_areas(restaurante_id, lote):
+    for row in _stream(select(Area.id, Area.nome).order_by(Area.id), lote):
+        yield [row.id, row.nome]
+
+
+def _linhas_pedidos(restaurante_id, lote):
+    stmt = (
+        select(
+            Pedido.id, ListaMaeItem.nome.label('item'), Fornecedor.nome.label('fornecedor'),
+            Pedido.quantidade_solicitada, Pedido.status, Usuario.nome.label('usuario'), Pedido.data_pedido
+        )
+        .outerjoin(ListaMaeItem, Pedido.lista_mae_item_id == ListaMaeItem.id)
+        .outerjoin(Fornecedor, Pedido.fornecedor_id == Fornecedor.id)
+        .outerjoin(Usuario, Pedido.usuario_id == Usuario.id)
+        .order_by(Pedido.id)
+    )
+    if restaurante_id is not None:
+        stmt = stmt.where(Fornecedor.restaurante_id == restaurante_id)
+    for row in _stream(stmt, lote):
+        yield [
+            row.id, row.item or '', row.fornecedor or '', row.quantidade_solicitada,
+            _enum(row.status), row.usuario or '', _data(row.data_pedido)
+        ]
+
+
+def _linhas_cotacoes(restaurante_id, lote):
+    totais = (
+        select(CotacaoItem.cotacao_id, func.count(CotacaoItem.id).label('total'))
+        .group_by(CotacaoItem.cotacao_id)
+        .subquery()
+    )
+    stmt = (
+        select(Cotacao.id, Fornecedor.nome.label('fornecedor'), Cotacao.status, Cotacao.data_cotacao, totais.c.total)
+        .outerjoin(Fornecedor, Cotacao.fornecedor_id == Fornecedor.id)
+        .outerjoin(totais, totais.c.cotacao_id == Cotacao.id)
+        .order_by(Cotacao.id)
+    )
+    if restaurante_id is not None:
+        stmt = stmt.where(Fornecedor.restaurante_id == restaurante_id)
+    for row in _stream(stmt, lote):
+        yield [row.id, row.fornecedor or '', _enum(row.status), _data(row.data_cotacao), row.total or 0]
+
+
+def _linhas_estoque(restaurante_id, lote):
+    stmt = (
+        select(
+            Estoque.id, Item.nome.label('item'), Area.nome.label('area'),
+            Estoque.quantidade_atual, Estoque.quantidade_minima
+        )
+        .join(Item, Estoque.item_id == Item.id)
+        .outerjoin(Area, Estoque.area_id == Area.id)
+        .order_by(Estoque.id)
+    )
+    if restaurante_id is not None:
+        stmt = stmt.join(Fornecedor, Item.fornecedor_id == Fornecedor.id).where(
+            Fornecedor.restaurante_id == restaurante_id
+        )
+    for row in _stream(stmt, lote):
+        yield [row.id, row.item or '', row.area or '', row.quantidade_atual, row.quantidade_minima]
+
+
+# tipo -> (arquivo, cabeçalho, gerador de linhas), na ordem em que entram no ZIP
+EXPORTADORES = {
+    'usuarios': ('usuarios.csv', ['ID', 'Nome', 'Email', 'Username', 'Role', 'Aprovado', 'Ativo', 'Data Criação'], _linhas_usuarios),
+    'listas': ('listas.csv', ['ID', 'Nome', 'Descrição', 'Data Criação', 'Colaboradores'], _linhas_listas),
+    'itens': ('itens.csv', ['ID', 'Nome', 'Unidade Medida', 'Fornecedor', 'Atualizado Em'], _linhas_itens),
+    'fornecedores': ('fornecedores.csv', ['ID', 'Nome', 'Contato', 'Telefone', 'Email', 'Responsável', 'Observação'], _linhas_fornecedores),
+    'areas': ('areas.csv', ['ID', 'Nome'], _linhas_areas),
+    'pedidos': ('pedidos.csv', ['ID', 'Item', 'Fornecedor', 'Quantidade', 'Status', 'Usuário', 'Data Pedido'], _linhas_pedidos),
+    'cotacoes': ('cotacoes.csv', ['ID', 'Fornecedor', 'Status', 'Data Cotação', 'Total Itens'], _linhas_cotacoes),
+    'estoque': ('estoque.csv', ['ID', 'Item', 'Área', 'Quantidade Atual', 'Quantidade Mínima'], _linhas_estoque),
+}
+
+
+def gerar_zip(tipos_dados, restaurante_id=None, lote=DEFAULT_LOTE, chunk_bytes=DEFAULT_CHUNK_BYTES,
+              ao_concluir_tipo=None):
+    """
+    Gera o ZIP em pedaços de ~`chunk_bytes`. Tipos desconhecidos são ignorados.
+    `ao_concluir_tipo(concluidos, total)` é chamado a cada CSV fechado.
+    """
+    selecionados = [tipo for tipo in EXPORTADORES if tipo in tipos_dados]
+    saida = _SaidaZip()
+    with zipfile.ZipFile(saida, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for concluidos, tipo in enumerate(selecionados, start=1):
+            arquivo, cabecalho, linhas = EXPORTADORES[tipo]
+            with zip_file.open(arquivo, 'w', force_zip64=True) as membro:
+                texto = io.TextIOWrapper(membro, encoding='utf-8', newline='')
+                writer = csv.writer(texto)
+                writer.writerow(cabecalho)
+                for linha in linhas(restaurante_id, lote):
+                    writer.writerow(linha)
+                    if saida.tamanho >= chunk_bytes:
+                        yield saida.drenar()
+                texto.flush()
+                texto.detach()
+            if ao_concluir_tipo is not None:
+                ao_concluir_tipo(concluidos, len(selecionados))
+            if saida.tamanho >= chunk_bytes:
+                yield saida.drenar()
+    # Diretório central, escrito no fechamento do ZipFile
+    restante = saida.drenar()
+    if restante:
+        yield restante
@@ -0,0 +1,429 @@
+"""
+Camada de cache para payloads caros de montar (ex.: Dashboard Global).
+
+Backends disponíveis:
+- MemoryCache: LRU em processo, com TTL e limite de entradas.
+- SQLiteCache: arquivo SQLite compartilhado entre os workers do gunicorn,
+  também com TTL e limite de entradas (evicção pelo acesso mais antigo).
+  Leituras não escrevem no arquivo: o horário de acesso só é atualizado
+  quando está mais velho que `touch_interval`.
+
+Ambos expõem get/set/delete/clear, contadores de hit/miss e get_or_compute,
+que faz single-flight: misses concorrentes para a mesma chave esperam o
+primeiro cálculo terminar em vez de recalcular o payload em paralelo.
+"""
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class CacheBackend(ABC):
+    """
+    Base comum: contadores, single-flight e get_or_compute. Um backend que
+    não implementa a interface falha ao ser instanciado.
+    """
+
+    name = 'base'
+
+    def __init__(self, default_ttl=60, max_entries=256):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'sets': 0,
+            'evictions': 0,
+            'computes': 0,
+            'coalesced': 0,
+        }
+        self._stats_lock = threading.Lock()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    # --- Interface dos backends ---
+
+    @abstractmethod
+    def _read(self, key):
+        """Valor da chave, ou _MISSING se ausente/expirada."""
+
+    @abstractmethod
+    def _write(self, key, value, expires_at):
+        """Grava o valor até `expires_at` (epoch), evictando o excedente."""
+
+    @abstractmethod
+    def delete(self, key):
+        """Remove a chave."""
+
+    @abstractmethod
+    def clear(self):
+        """Remove todas as chaves do backend."""
+
+    @abstractmethod
+    def __len__(self):
+        """Número de entradas não expiradas."""
+
+    def _acquire_lease(self, key, timeout):
+        """Reserva o cálculo da chave entre processos. Em memória, sempre concede."""
+        return True
+
+    def _release_lease(self, key):
+        pass
+
+    # --- API pública ---
+
+    def get(self, key, default=None):
+        value = self._read(key)
+        if value is _MISSING:
+            self._incr('misses')
+            return default
+        self._incr('hits')
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self._write(key, value, time.time() + ttl)
+        self._incr('sets')
+
+    def get_or_compute(self, key, compute, ttl=None, wait_timeout=30):
+        """
+        Retorna o valor em cache ou calcula via `compute()` uma única vez.
+
+        Enquanto um cálculo está em andamento (neste processo ou, no backend
+        SQLite, em outro worker), as demais chamadas aguardam o resultado.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._key_lock(key):
+            value = self._read(key)
+            if value is not _MISSING:
+                self._incr('coalesced')
+                return value
+
+            leased = self._acquire_lease(key, wait_timeout)
+            if not leased:
+                value, leased = self._wait_for(key, wait_timeout)
+                if value is not _MISSING:
+                    self._incr('coalesced')
+                    return value
+
+            try:
+                self._incr('computes')
+                value = compute()
+                try:
+                    self.set(key, value, ttl)
+                except (TypeError, ValueError, sqlite3.Error) as exc:
+                    logger.warning("Falha ao gravar cache %s: %s", key, exc)
+            finally:
+                if leased:
+                    self._release_lease(key)
+        return value
+
+    def stats(self):
+        with self._stats_lock:
+            data = dict(self._stats)
+        lookups = data['hits'] + data['misses']
+        data['hit_rate'] = round(data['hits'] / lookups * 100, 1) if lookups else 0.0
+        data['backend'] = self.name
+        data['entries'] = len(self)
+        data['max_entries'] = self.max_entries
+        data['default_ttl'] = self.default_ttl
+        return data
+
+    def reset_stats(self):
+        with self._stats_lock:
+            for key in self._stats:
+                self._stats[key] = 0
+
+    # --- Auxiliares ---
+
+    def _incr(self, counter, amount=1):
+        with self._stats_lock:
+            self._stats[counter] += amount
+
+    @contextmanager
+    def _key_lock(self, key):
+        with self._inflight_lock:
+            entry = self._inflight.get(key)
+            if entry is None:
+                entry = self._inflight[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._inflight_lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._inflight.pop(key, None)
+
+    def _wait_for(self, key, timeout, interval=0.05):
+        """Aguarda outro processo gravar a chave. Retorna (valor, lease_obtida)."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            value = self._read(key)
+            if value is not _MISSING:
+                return value, False
+            if self._acquire_lease(key, timeout):
+                # O dono pode ter gravado e liberado entre a leitura e a lease.
+                value = self._read(key)
+                if value is not _MISSING:
+                    self._release_lease(key)
+                    return value, False
+                # O dono anterior desistiu ou expirou; este processo assume.
+                return _MISSING, True
+            time.sleep(interval)
+        return _MISSING, False
+
+
+class MemoryCache(CacheBackend):
+    """LRU em processo baseado em OrderedDict."""
+
+    name = 'memory'
+
+    def __init__(self, default_ttl=60, max_entries=256):
+        super().__init__(default_ttl=default_ttl, max_entries=max_entries)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _read(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def _write(self, key, value, expires_at):
+        now = time.time()
+        evicted = 0
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            for stale_key in [k for k, (exp, _) in self._data.items() if exp <= now]:
+                del self._data[stale_key]
+                evicted += 1
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self._incr('evictions', evicted)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache compartilhado entre processos em um arquivo SQLite (modo WAL).
+
+    Os valores são serializados em JSON. Cada operação abre a própria conexão,
+    o que mantém o backend seguro após o fork dos workers do gunicorn.
+
+    Um acerto é só um SELECT: escritas no SQLite são serializadas entre os
+    workers, então `accessed_at` (usado na evicção por excesso de entradas)
+    só é regravado quando tem mais de `touch_interval` segundos. Com
+    `touch_interval` 0/None a ordem de evicção é a da gravação. Entradas
+    expiradas são removidas em `_write`, não na leitura.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, namespace='default', default_ttl=60, max_entries=256,
+                 lease_seconds=30, touch_interval=30):
+        super().__init__(default_ttl=default_ttl, max_entries=max_entries)
+        self.path = path
+        self.namespace = namespace
+        self.lease_seconds = lease_seconds
+        self.touch_interval = touch_interval
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed"
+                " ON cache_entries (namespace, accessed_at)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_leases ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _read(self, key):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at, accessed_at FROM cache_entries"
+                " WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                return _MISSING
+            if self.touch_interval and now - row[2] >= self.touch_interval:
+                conn.execute(
+                    "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, self.namespace, key)
+                )
+        return json.loads(row[0])
+
+    def _write(self, key, value, expires_at):
+        payload = json.dumps(value)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (self.namespace, key, payload, expires_at, now)
+                )
+                expired = conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+                    (self.namespace, now)
+                ).rowcount
+                overflow = conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                    " SELECT key FROM cache_entries WHERE namespace = ?"
+                    " ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.namespace, self.namespace, self.max_entries)
+                ).rowcount
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        evicted = (expired or 0) + (overflow or 0)
+        if evicted:
+            self._incr('evictions', evicted)
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            )
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+            conn.execute("DELETE FROM cache_leases WHERE namespace = ?", (self.namespace,))
+
+    def __len__(self):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ? AND expires_at > ?",
+                (self.namespace, time.time())
+            ).fetchone()
+        return row[0] if row else 0
+
+    def _acquire_lease(self, key, timeout):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM cache_leases WHERE namespace = ? AND key = ? AND expires_at <= ?",
+                (self.namespace, key, now)
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO cache_leases (namespace, key, expires_at) VALUES (?, ?, ?)",
+                (self.namespace, key, now + min(timeout, self.lease_seconds))
+            )
+            return cursor.rowcount == 1
+
+    def _release_lease(self, key):
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM cache_leases WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            )
+
+
+def build_cache(backend='memory', namespace='default', path=None, default_ttl=60, max_entries=256,
+                touch_interval=30):
+    """Cria um backend de cache a partir do nome ('memory' ou 'sqlite')."""
+    if backend == 'memory':
+        return MemoryCache(default_ttl=default_ttl, max_entries=max_entries)
+    if backend == 'sqlite':
+        path = path or os.path.join(tempfile.gettempdir(), 'kaizen_cache.sqlite3')
+        return SQLiteCache(
+            path, namespace=namespace, default_ttl=default_ttl, max_entries=max_entries,
+            touch_interval=touch_interval
+        )
+    raise ValueError(f"Backend de cache desconhecido: {backend}")
+
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_cache(name, config=None):
+    """
+    Retorna o cache nomeado, criado sob demanda a partir da configuração.
+
+    Lê as chaves `<NAME>_CACHE_BACKEND`, `<NAME>_CACHE_PATH`,
+    `<NAME>_CACHE_TTL_SECONDS`, `<NAME>_CACHE_MAX_ENTRIES` e
+    `<NAME>_CACHE_TOUCH_SECONDS` (só no backend sqlite).
+    """
+    if config is None:
+        config = current_app.config
+    prefix = f"{name.upper()}_CACHE_"
+    options = {
+        'backend': config.get(prefix + 'BACKEND', 'memory'),
+        'path': config.get(prefix + 'PATH'),
+        'default_ttl': config.get(prefix + 'TTL_SECONDS', 60),
+        'max_entries': config.get(prefix + 'MAX_ENTRIES', 256),
+        'touch_interval': config.get(prefix + 'TOUCH_SECONDS', 30),
+    }
+    signature = tuple(sorted(options.items()))
+    with _CACHES_LOCK:
+        entry = _CACHES.get(name)
+        if entry is None or entry[0] != signature:
+            entry = (signature, build_cache(namespace=name, **options))
+            _CACHES[name] = entry
+        return entry[1]
@@ -0,0 +1,306 @@
+"""
+Índice em memória, por restaurante, para a busca de itens do construtor de listas.
+
+O índice reúne o catálogo global (ListaMaeItem) e os itens dos fornecedores do
+restaurante (Item), já serializados no formato de `buscar_itens_para_lista`.
+Nomes são comparados por `normalize_item_nome` (sem acento, minúsculas) e
+indexados por token, permitindo busca por prefixo com ranking:
+
+0. nome igual ao termo
+1. nome começa pelo termo
+2. todos os termos são prefixo de alguma palavra do nome
+3. termo contido no nome (varredura, só quando os grupos anteriores não
+   preenchem o `limit`)
+
+Invalidação: um listener de sessão marca os restaurantes/fornecedores cujos
+itens foram gravados e descarta os índices afetados no commit. Escritas em
+lote fora do ORM chamam `marcar_alteracao`. Como o índice vive em cada
+processo (gunicorn -w 4), o commit também grava uma nova geração do
+restaurante no cache compartilhado `catalog_search` (ver `cache.get_cache`);
+`obter_indice` compara a geração com a do índice local e o reconstrói quando
+outro processo alterou o catálogo. O índice ainda expira após
+CATALOG_SEARCH_TTL_SECONDS; os expirados de outros restaurantes saem do
+registro quando um índice é construído, então o registro só guarda os
+restaurantes buscados no TTL.
+"""
+import bisect
+import heapq
+import threading
+import time
+import uuid
+from collections import namedtuple
+from itertools import chain
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from .cache import get_cache
+from .extensions import db
+from .models import Fornecedor, Item, ListaMaeItem, normalize_item_nome
+
+DEFAULT_TTL_SECONDS = 30
+
+CACHE_NAME = 'catalog_search'
+
+_SESSION_KEY = 'catalogo_alterado'
+
+Entrada = namedtuple('Entrada', ['nome_normalizado', 'payload'])
+
+
+class IndiceCatalogo:
+    """Catálogo de um restaurante ordenado por nome, com índice de tokens."""
+
+    def __init__(self, restaurante_id, entradas, fornecedor_ids, geracao=None):
+        self.restaurante_id = restaurante_id
+        self.fornecedor_ids = frozenset(fornecedor_ids)
+        self.geracao = geracao
+        self.criado_em = time.monotonic()
+        # Ordem por nome normalizado (acentos não jogam o item para o fim);
+        # sort estável: globais antes dos fornecedores em empate
+        self.entradas = sorted(entradas, key=lambda entrada: entrada.nome_normalizado)
+
+        self._postings = {}
+        for posicao, entrada in enumerate(self.entradas):
+            for token in set(entrada.nome_normalizado.split()):
+                self._postings.setdefault(token, []).append(posicao)
+        self._tokens = sorted(self._postings)
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def _posicoes_por_prefixo(self, prefixo):
+        posicoes = set()
+        inicio = bisect.bisect_left(self._tokens, prefixo)
+        for token in self._tokens[inicio:]:
+            if not token.startswith(prefixo):
+                break
+            posicoes.update(self._postings[token])
+        return posicoes
+
+    def _rank(self, posicao, termo):
+        nome = self.entradas[posicao].nome_normalizado
+        if nome == termo:
+            return 0
+        if nome.startswith(termo):
+            return 1
+        return 2
+
+    def buscar(self, termo=None, limit=None):
+        """Retorna os payloads que casam com `termo`, do mais relevante ao menos."""
+        termo = normalize_item_nome(termo)
+        if limit is not None and limit <= 0:
+            return []
+
+        if not termo:
+            selecionadas = self.entradas if limit is None else self.entradas[:limit]
+            return [dict(entrada.payload) for entrada in selecionadas]
+
+        tokens = termo.split()
+        candidatos = self._posicoes_por_prefixo(tokens[0])
+        for token in tokens[1:]:
+            if not candidatos:
+                break
+            candidatos &= self._posicoes_por_prefixo(token)
+
+        ranqueados = [(self._rank(posicao, termo), posicao) for posicao in candidatos]
+        if limit is None or len(ranqueados) < limit:
+            for posicao, entrada in enumerate(self.entradas):
+                if posicao not in candidatos and termo in entrada.nome_normalizado:
+                    ranqueados.append((3, posicao))
+
+        if limit is None:
+            melhores = sorted(ranqueados)
+        else:
+            melhores = heapq.nsmallest(limit, ranqueados)
+        return [dict(self.entradas[posicao].payload) for _, posicao in melhores]
+
+
+def construir_indice(restaurante_id, geracao=None):
+    """Carrega o catálogo do restaurante (duas queries de colunas) e monta o índice."""
+    globais = db.session.query(
+        ListaMaeItem.id, ListaMaeItem.nome, ListaMaeItem.nome_normalizado, ListaMaeItem.unidade
+    ).filter(ListaMaeItem.restaurante_id == restaurante_id).all()
+
+    fornecedores = db.session.query(
+        Fornecedor.id, Fornecedor.nome, Item.id, Item.nome, Item.nome_normalizado, Item.unidade_medida
+    ).outerjoin(
+        Item, Item.fornecedor_id == Fornecedor.id
+    ).filter(Fornecedor.restaurante_id == restaurante_id).all()
+
+    entradas = []
+    nomes_globais = set()
+    for item_id, nome, nome_normalizado, unidade in globais:
+        nome_normalizado = nome_normalizado or normalize_item_nome(nome)
+        nomes_globais.add(nome_normalizado)
+        entradas.append(Entrada(nome_normalizado, {
+            "id": f"global_{item_id}",
+            "nome": nome,
+            "unidade": unidade,
+            "origem": "lista_global",
+            "origem_display": "Lista do Restaurante",
+            "fornecedor_id": None,
+            "fornecedor_nome": None,
+            "ja_na_lista_global": True,
+            "item_fornecedor_id": None
+        }))
+
+    fornecedor_ids = set()
+    for fornecedor_id, fornecedor_nome, item_id, nome, nome_normalizado, unidade in fornecedores:
+        fornecedor_ids.add(fornecedor_id)
+        if item_id is None:
+            continue
+        nome_normalizado = nome_normalizado or normalize_item_nome(nome)
+        entradas.append(Entrada(nome_normalizado, {
+            "id": f"fornecedor_{item_id}",
+            "nome": nome,
+            "unidade": unidade,
+            "origem": "fornecedor",
+            "origem_display": fornecedor_nome,
+            "fornecedor_id": fornecedor_id,
+            "fornecedor_nome": fornecedor_nome,
+            "ja_na_lista_global": nome_normalizado in nomes_globais,
+            "item_fornecedor_id": item_id
+        }))
+
+    return IndiceCatalogo(restaurante_id, entradas, fornecedor_ids, geracao)
+
+
+class _Registro:
+    """Índices de uma app (um por restaurante) e contador de invalidações."""
+
+    def __init__(self):
+        self.indices = {}
+        self.geracao = 0
+        self.lock = threading.Lock()
+
+
+def _registro():
+    return current_app.extensions.setdefault('catalog_search', _Registro())
+
+
+def _cache():
+    return get_cache(CACHE_NAME)
+
+
+def _chave_geracao(restaurante_id):
+    return f"geracao:{restaurante_id}"
+
+
+def obter_indice(restaurante_id):
+    """Índice do restaurante, reconstruído quando ausente, invalidado ou expirado."""
+    registro = _registro()
+    ttl = current_app.config.get('CATALOG_SEARCH_TTL_SECONDS', DEFAULT_TTL_SECONDS)
+    # Lida antes da construção: uma alteração durante a leitura muda a geração
+    geracao_compartilhada = _cache().get(_chave_geracao(restaurante_id))
+
+    indice = registro.indices.get(restaurante_id)
+    if (
+        indice is not None
+        and indice.geracao == geracao_compartilhada
+        and time.monotonic() - indice.criado_em <= ttl
+    ):
+        return indice
+
+    geracao = registro.geracao
+    indice = construir_indice(restaurante_id, geracao_compartilhada)
+    with registro.lock:
+        agora = time.monotonic()
+        for outro_id, outro in list(registro.indices.items()):
+            if agora - outro.criado_em > ttl:
+                del registro.indices[outro_id]
+        # Uma invalidação durante a construção pode ter tornado o índice obsoleto
+        if registro.geracao == geracao:
+            registro.indices[restaurante_id] = indice
+    return indice
+
+
+def invalidar(restaurante_ids=(), fornecedor_ids=()):
+    """
+    Descarta os índices dos restaurantes informados ou que contêm os
+    fornecedores, e publica uma nova geração dos restaurantes para os
+    demais processos.
+    """
+    if not has_app_context():
+        return
+    restaurante_ids = set(restaurante_ids)
+    fornecedor_ids = set(fornecedor_ids)
+    cache = _cache()
+    for restaurante_id in restaurante_ids:
+        # Valor único (não um contador): dois processos invalidando ao mesmo
+        # tempo nunca publicam a mesma geração
+        cache.set(_chave_geracao(restaurante_id), uuid.uuid4().hex)
+    registro = _registro()
+    with registro.lock:
+        registro.geracao += 1
+        for restaurante_id, indice in list(registro.indices.items()):
+            if restaurante_id in restaurante_ids or indice.fornecedor_ids & fornecedor_ids:
+                del registro.indices[restaurante_id]
+
+
+def _marcar(session, restaurante_id=None, fornecedor_id=None):
+    restaurantes, fornecedores = session.info.setdefault(_SESSION_KEY, (set(), set()))
+    if restaurante_id is not None:
+        restaurantes.add(restaurante_id)
+    if fornecedor_id is not None:
+        fornecedores.add(fornecedor_id)
+
+
+def _resolver_restaurantes(session, fornecedor_ids):
+    """Restaurantes dos fornecedores, para publicar a geração entre processos."""
+    if not fornecedor_ids:
+        return
+    restaurantes, _ = session.info[_SESSION_KEY]
+    restaurantes.update(
+        restaurante_id for (restaurante_id,) in session.execute(
+            db.select(Fornecedor.restaurante_id).where(Fornecedor.id.in_(fornecedor_ids))
+        )
+        if restaurante_id is not None
+    )
+
+
+def marcar_alteracao(session, restaurante_id=None, fornecedor_id=None):
+    """Agenda a invalidação para o commit da sessão (escritas em lote fora do ORM)."""
+    _marcar(session, restaurante_id=restaurante_id)
+    if fornecedor_id is not None:
+        _marcar(session, fornecedor_id=fornecedor_id)
+        _resolver_restaurantes(session, {fornecedor_id})
+
+
+def _valores(obj, atributo):
+    """Valor atual e anteriores (histórico) de um atributo."""
+    historico = inspect(obj).attrs[atributo].history
+    return [valor for valor in chain(historico.unchanged, historico.added, historico.deleted) if valor is not None]
+
+
+@event.listens_for(Session, 'after_flush')
+def _coletar_alteracoes(session, flush_context):
+    fornecedores_dos_itens = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, ListaMaeItem):
+            for restaurante_id in _valores(obj, 'restaurante_id'):
+                _marcar(session, restaurante_id=restaurante_id)
+        elif isinstance(obj, Item):
+            for fornecedor_id in _valores(obj, 'fornecedor_id'):
+                _marcar(session, fornecedor_id=fornecedor_id)
+                fornecedores_dos_itens.add(fornecedor_id)
+        elif isinstance(obj, Fornecedor):
+            _marcar(session, fornecedor_id=obj.id)
+            for restaurante_id in _valores(obj, 'restaurante_id'):
+                _marcar(session, restaurante_id=restaurante_id)
+    _resolver_restaurantes(session, fornecedores_dos_itens)
+
+
+@event.listens_for(Session, 'after_commit')
+def _aplicar_invalidacao(session):
+    pendentes = session.info.pop(_SESSION_KEY, None)
+    if pendentes:
+        invalidar(*pendentes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _invalidar_no_rollback(session):
+    # Um índice construído depois do flush pode conter as linhas desfeitas
+    pendentes = session.info.pop(_SESSION_KEY, None)
+    if pendentes:
+        invalidar(*pendentes)
@@ -0,0 +1,113 @@
+"""
+Comandos de manutenção expostos via `flask <comando>`.
+"""
+from datetime import date
+
+import click
+
+
+def _parse_data(value):
+    return date.fromisoformat(value) if value else None
+
+
+def register_commands(app):
+    @app.cli.command('backfill-daily-metrics')
+    @click.option('--desde', help='Data inicial (YYYY-MM-DD). Padrão: todo o histórico.')
+    @click.option('--ate', help='Data final (YYYY-MM-DD). Padrão: hoje.')
+    def backfill_daily_metrics(desde, ate):
+        """Reconstrói a tabela daily_metrics a partir dos dados históricos."""
+        from .rollups import reconstruir_metricas_diarias
+
+        linhas = reconstruir_metricas_diarias(_parse_data(desde), _parse_data(ate))
+        click.echo(f"daily_metrics reconstruída: {linhas} linha(s) gravada(s).")
+
+    @app.cli.command('archive-app-logs')
+    @click.option('--meses-retencao', type=int, default=None,
+                  help='Meses mantidos no banco além do corrente. Padrão: APP_LOGS_RETENTION_MONTHS.')
+    @click.option('--destino', default=None, help='Diretório dos .ndjson.gz. Padrão: APP_LOGS_ARCHIVE_DIR.')
+    @click.option('--dry-run', is_flag=True, help='Só lista os meses e quantidades, sem exportar nem remover.')
+    def archive_app_logs(meses_retencao, destino, dry_run):
+        """Exporta os meses fechados de app_logs para NDJSON comprimido e os remove."""
+        from .retention import arquivar_app_logs, garantir_particoes
+
+        criadas = garantir_particoes()
+        if criadas:
+            click.echo(f"Partições criadas: {', '.join(criadas)}")
+
+        meses_retencao = meses_retencao if meses_retencao is not None else app.config['APP_LOGS_RETENTION_MONTHS']
+        destino = destino or app.config['APP_LOGS_ARCHIVE_DIR']
+        resultado = arquivar_app_logs(destino, retencao_meses=meses_retencao, dry_run=dry_run)
+        if not resultado:
+            click.echo("Nenhum mês fora da retenção.")
+        for mes in resultado:
+            if dry_run:
+                click.echo(f"{mes['mes']}: {mes['exportadas']} log(s) seriam arquivados.")
+            else:
+                click.echo(f"{mes['mes']}: {mes['exportadas']} log(s) exportados para {mes['arquivo']}, {mes['removidas']} removidos.")
+
+    @app.cli.command('prune-navbar-activity')
+    @click.option('--manter', type=int, default=20, help='Atividades mantidas por usuário.')
+    def prune_navbar_activity(manter):
+        """Remove o histórico da navbar além das N atividades mais recentes de cada usuário."""
+        from .extensions import db
+        from .retention import podar_navbar_activities
+
+        removidas = podar_navbar_activities(manter=manter)
+        db.session.commit()
+        click.echo(f"navbar_activities: {removidas} registro(s) removido(s).")
+
+    @app.cli.command('verify-pop-progress')
+    @click.option('--dias', type=int, default=7, help='Execuções com data de referência nos últimos N dias (0 = todas).')
+    @click.option('--dry-run', is_flag=True, help='Só lista as divergências, sem corrigir.')
+    def verify_pop_progress(dias, dry_run):
+        """Confere os contadores incrementais das execuções POP contra os itens e corrige divergências."""
+        from .services import reconciliar_progresso_pop_execucoes
+
+        divergencias = reconciliar_progresso_pop_execucoes(dias=dias or None, corrigir=not dry_run)
+        for divergencia in divergencias:
+            click.echo(f"Execução {divergencia['execucao_id']}: {divergencia['antes']} -> {divergencia['depois']}")
+        acao = 'encontrada(s)' if dry_run else 'corrigida(s)'
+        click.echo(f"{len(divergencias)} execução(ões) divergente(s) {acao}.")
+
+    @app.cli.command('materialize-pop-executions')
+    @click.option('--data', help='Data de referência (YYYY-MM-DD). Padrão: hoje.')
+    @click.option('--restaurante-id', type=int, default=None, help='Só um restaurante. Padrão: todos.')
+    def materialize_pop_executions(data, restaurante_id):
+        """Cria as execuções do dia das listas POP diárias para os colaboradores atribuídos."""
+        from .services import pre_materializar_execucoes_pop
+
+        resultado, _ = pre_materializar_execucoes_pop(restaurante_id, _parse_data(data))
+        click.echo(f"{resultado['data_referencia']}: {resultado['execucoes_criadas']} execução(ões) "
+                   f"e {resultado['itens_criados']} item(ns) criados.")
+
+    @app.cli.command('archive-pop-executions')
+    def archive_pop_executions():
+        """Aplica o auto-arquivamento de execuções POP configurado em cada restaurante."""
+        from .services import arquivar_pop_execucoes_automatico
+
+        resultado = arquivar_pop_execucoes_automatico()
+        for restaurante_id, arquivadas in resultado.items():
+            if arquivadas:
+                click.echo(f"Restaurante {restaurante_id}: {arquivadas} execução(ões) arquivada(s).")
+        click.echo(f"{sum(resultado.values())} execução(ões) POP arquivada(s).")
+
+    @app.cli.command('run-jobs')
+    @click.option('--processos', type=int, default=None, help='Processos worker. Padrão: JOBS_WORKERS.')
+    @click.option('--uma-vez', is_flag=True, help='Executa os jobs pendentes neste processo e sai.')
+    def run_jobs(processos, uma_vez):
+        """Executa os jobs em segundo plano (relatórios, exportação, importações) e as manutenções periódicas."""
+        import os
+
+        from .jobs import executar_manutencoes, iniciar_pool, processar_pendentes, recuperar_travados
+
+        if uma_vez:
+            recuperar_travados()
+            for nome in executar_manutencoes():
+                click.echo(f"Manutenção executada: {nome}.")
+            executados = processar_pendentes()
+            click.echo(f"{executados} job(s) executado(s).")
+            return
+
+        processos = processos or app.config['JOBS_WORKERS']
+        click.echo(f"Iniciando {processos} worker(s) de jobs.")
+        iniciar_pool(os.getenv('FLASK_CONFIG') or 'default', processos)
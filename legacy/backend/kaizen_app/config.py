@@ -23,6 +23,76 @@ class Config:
     # Timezone da aplicação (Horário de Brasília)
     TIMEZONE = 'America/Sao_Paulo'  # BRT/BRST (UTC-3/-2)
 
+    # Cache do Dashboard Global (memory = por processo, sqlite = compartilhado entre workers)
+    SUPER_DASHBOARD_CACHE_BACKEND = os.environ.get('SUPER_DASHBOARD_CACHE_BACKEND', 'memory')
+    SUPER_DASHBOARD_CACHE_PATH = os.environ.get('SUPER_DASHBOARD_CACHE_PATH')
+    SUPER_DASHBOARD_CACHE_TTL_SECONDS = int(os.environ.get('SUPER_DASHBOARD_CACHE_TTL_SECONDS', 60))
+    SUPER_DASHBOARD_CACHE_MAX_ENTRIES = int(os.environ.get('SUPER_DASHBOARD_CACHE_MAX_ENTRIES', 256))
+
+    # Estado de sessão por usuário (blocklist do JWT e supplier_required)
+    SESSION_TOKEN_CACHE_BACKEND = os.environ.get('SESSION_TOKEN_CACHE_BACKEND', 'memory')
+    SESSION_TOKEN_CACHE_PATH = os.environ.get('SESSION_TOKEN_CACHE_PATH')
+    SESSION_TOKEN_CACHE_TTL_SECONDS = int(os.environ.get('SESSION_TOKEN_CACHE_TTL_SECONDS', 10))
+    SESSION_TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get('SESSION_TOKEN_CACHE_MAX_ENTRIES', 4096))
+    # Consultado em toda requisição: no sqlite o acerto não regrava accessed_at
+    # (entradas vivem só o TTL; a evicção segue a ordem de gravação)
+    SESSION_TOKEN_CACHE_TOUCH_SECONDS = int(os.environ.get('SESSION_TOKEN_CACHE_TOUCH_SECONDS', 0))
+
+    # Log de requisições: JSON por linha, amostrado; corpo só nos endpoints de debug
+    REQUEST_LOG_ENABLED = os.environ.get('REQUEST_LOG_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    REQUEST_LOG_SAMPLE_RATE = float(os.environ.get('REQUEST_LOG_SAMPLE_RATE', 1.0))
+    REQUEST_LOG_SLOW_MS = float(os.environ.get('REQUEST_LOG_SLOW_MS', 1000))
+    REQUEST_LOG_BODY_MAX_BYTES = int(os.environ.get('REQUEST_LOG_BODY_MAX_BYTES', 2048))
+    REQUEST_LOG_DEBUG_ENDPOINTS = os.environ.get('REQUEST_LOG_DEBUG_ENDPOINTS', '')
+    REQUEST_LOG_QUEUE_SIZE = int(os.environ.get('REQUEST_LOG_QUEUE_SIZE', 10000))
+
+    # Instrumentação por endpoint (latência, SQL, detector de N+1); desligada por padrão
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    INSTRUMENTATION_N_PLUS_ONE_THRESHOLD = int(os.environ.get('INSTRUMENTATION_N_PLUS_ONE_THRESHOLD', 10))
+    INSTRUMENTATION_N_PLUS_ONE_HISTORY = int(os.environ.get('INSTRUMENTATION_N_PLUS_ONE_HISTORY', 100))
+
+    # Logs de auditoria: sync = na transação do serviço; async = spool local + INSERT em lote
+    AUDIT_LOG_MODE = os.environ.get('AUDIT_LOG_MODE', 'sync')
+    AUDIT_LOG_SPOOL_DIR = os.environ.get('AUDIT_LOG_SPOOL_DIR')
+    AUDIT_LOG_BATCH_SIZE = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 200))
+    AUDIT_LOG_FLUSH_INTERVAL_SECONDS = float(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL_SECONDS', 1.0))
+    AUDIT_LOG_SPOOL_FSYNC = os.environ.get('AUDIT_LOG_SPOOL_FSYNC', 'false').lower() in ('1', 'true', 'yes')
+
+    # Retenção de app_logs: meses mantidos no banco; os anteriores vão para NDJSON (worker ou flask archive-app-logs)
+    APP_LOGS_RETENTION_MONTHS = int(os.environ.get('APP_LOGS_RETENTION_MONTHS', 12))
+    APP_LOGS_ARCHIVE_DIR = os.environ.get('APP_LOGS_ARCHIVE_DIR') or os.path.join(basedir, '..', 'archive', 'app_logs')
+    # Manutenções do worker `run-jobs` (0 desativa): partições futuras e arquivamento dos meses vencidos
+    APP_LOGS_PARTITION_INTERVAL_SECONDS = int(os.environ.get('APP_LOGS_PARTITION_INTERVAL_SECONDS', 86400))
+    APP_LOGS_ARCHIVE_INTERVAL_SECONDS = int(os.environ.get('APP_LOGS_ARCHIVE_INTERVAL_SECONDS', 86400))
+
+    # Jobs em segundo plano (flask run-jobs): fila e arquivos gerados na própria tabela jobs
+    JOBS_RESULT_RETENTION_HOURS = int(os.environ.get('JOBS_RESULT_RETENTION_HOURS', 168))
+    JOBS_RESULT_CLEANUP_INTERVAL_SECONDS = int(os.environ.get('JOBS_RESULT_CLEANUP_INTERVAL_SECONDS', 3600))
+    JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS', 2))
+    JOBS_POLL_INTERVAL_SECONDS = float(os.environ.get('JOBS_POLL_INTERVAL_SECONDS', 2.0))
+    JOBS_HEARTBEAT_SECONDS = int(os.environ.get('JOBS_HEARTBEAT_SECONDS', 30))
+    JOBS_STALE_SECONDS = int(os.environ.get('JOBS_STALE_SECONDS', 300))
+    JOBS_MAX_TENTATIVAS = int(os.environ.get('JOBS_MAX_TENTATIVAS', 3))
+    # Manutenção rodada pelo worker `run-jobs` (0 desativa; `flask archive-pop-executions` roda sob demanda)
+    POP_AUTO_ARCHIVE_INTERVAL_SECONDS = int(os.environ.get('POP_AUTO_ARCHIVE_INTERVAL_SECONDS', 3600))
+
+    # Fotos de evidência das execuções POP (endereçadas por SHA-256) e miniaturas geradas em threads
+    POP_FOTOS_BACKEND = os.environ.get('POP_FOTOS_BACKEND', 'local')
+    POP_FOTOS_DIR = os.environ.get('POP_FOTOS_DIR') or os.path.join(basedir, '..', 'uploads', 'pop_fotos')
+    POP_FOTOS_MAX_BYTES = int(os.environ.get('POP_FOTOS_MAX_BYTES', 10 * 1024 * 1024))
+    POP_FOTOS_THUMB_PX = int(os.environ.get('POP_FOTOS_THUMB_PX', 320))
+    POP_FOTOS_THUMB_WORKERS = int(os.environ.get('POP_FOTOS_THUMB_WORKERS', 2))
+
+    # Índice em memória da busca de itens (por processo; invalidado nas escritas locais)
+    CATALOG_SEARCH_TTL_SECONDS = int(os.environ.get('CATALOG_SEARCH_TTL_SECONDS', 30))
+    # Geração do catálogo por restaurante, compartilhada para invalidar os índices dos outros workers
+    CATALOG_SEARCH_CACHE_BACKEND = os.environ.get('CATALOG_SEARCH_CACHE_BACKEND', 'memory')
+    CATALOG_SEARCH_CACHE_PATH = os.environ.get('CATALOG_SEARCH_CACHE_PATH')
+    CATALOG_SEARCH_CACHE_TTL_SECONDS = int(os.environ.get('CATALOG_SEARCH_CACHE_TTL_SECONDS', 86400))
+    CATALOG_SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get('CATALOG_SEARCH_CACHE_MAX_ENTRIES', 4096))
+    # Lida a cada busca: no sqlite o acerto não regrava accessed_at
+    CATALOG_SEARCH_CACHE_TOUCH_SECONDS = int(os.environ.get('CATALOG_SEARCH_CACHE_TOUCH_SECONDS', 0))
+
 
 class DevelopmentConfig(Config):
     """Configurações para o ambiente de desenvolvimento."""
@@ -46,6 +116,8 @@ class DevelopmentConfig(Config):
 class TestingConfig(Config):
     """Configurações para o ambiente de testes."""
     TESTING = True
+    # Testes leem app_logs logo após o serviço: gravação síncrona
+    AUDIT_LOG_MODE = 'sync'
     # Usar PostgreSQL também nos testes (com database separado)
     database_url = os.environ.get('TEST_DATABASE_URL')
     
@@ -63,6 +135,15 @@ class TestingConfig(Config):
 
 class ProductionConfig(Config):
     """Configurações para o ambiente de produção (Railway)."""
+    # gunicorn -w 4: todos os workers compartilham o mesmo cache do dashboard
+    SUPER_DASHBOARD_CACHE_BACKEND = os.environ.get('SUPER_DASHBOARD_CACHE_BACKEND', 'sqlite')
+    # Invalidação de sessão (novo login, desativação) visível em todos os workers
+    SESSION_TOKEN_CACHE_BACKEND = os.environ.get('SESSION_TOKEN_CACHE_BACKEND', 'sqlite')
+    # Alterações no catálogo invalidam o índice de busca em todos os workers
+    CATALOG_SEARCH_CACHE_BACKEND = os.environ.get('CATALOG_SEARCH_CACHE_BACKEND', 'sqlite')
+    # Tráfego alto: registra 10% das requisições bem-sucedidas (erros e lentas sempre)
+    REQUEST_LOG_SAMPLE_RATE = float(os.environ.get('REQUEST_LOG_SAMPLE_RATE', 0.1))
+
     # Railway fornece DATABASE_URL automaticamente
     database_url = os.environ.get('DATABASE_URL')
     
@@ -1,9 +1,11 @@
-from flask import Blueprint, request, jsonify, send_file
-from . import services
+from flask import Blueprint, request, jsonify, send_file, Response, stream_with_context, current_app, url_for, after_this_request
+from . import services, session_cache
 from .extensions import db
 from .models import Item, Area, Fornecedor, Estoque, ListaMaeItem, Usuario, UserRoles, brasilia_now
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from functools import wraps
+import io
+import json
 
 # Cria um Blueprint para as rotas de autenticação
 auth_bp = Blueprint('auth_bp', __name__, url_prefix='/api/auth')
@@ -76,13 +78,12 @@ def supplier_required():
         @jwt_required()
         def decorator(*args, **kwargs):
             user_id = get_user_id_from_jwt()
-            usuario = db.session.get(Usuario, user_id)
-            if not usuario or not usuario.ativo:
+            estado = session_cache.obter_estado_sessao(user_id)
+            if not estado or not estado['ativo']:
                 return jsonify({"error": "Usuário inválido."}), 403
-            if usuario.role != UserRoles.SUPPLIER:
+            if estado['role'] != UserRoles.SUPPLIER.value:
                 return jsonify({"error": "Acesso restrito a fornecedores."}), 403
-            fornecedor = Fornecedor.query.filter_by(usuario_id=user_id).first()
-            if not fornecedor or not fornecedor.aprovado:
+            if not estado['fornecedor_aprovado']:
                 return jsonify({"error": "Fornecedor aguardando aprovação."}), 403
             return fn(*args, **kwargs)
         return decorator
@@ -438,18 +439,35 @@ def list_pop_execucoes_admin():
         "lista_id": request.args.get('lista_id'),
         "data_inicio": request.args.get('data_inicio'),
         "data_fim": request.args.get('data_fim'),
+        "cursor": request.args.get('cursor'),
+        "limit": request.args.get('limit', type=int),
     }
     include_arquivados = request.args.get('include_arquivados')
     if include_arquivados:
         filtros["include_arquivados"] = include_arquivados.lower() == 'true'
-    response, status_code = services.list_pop_execucoes_admin(
-        restaurante_id,
-        filtros,
-        executor_id=get_user_id_from_jwt()
-    )
+    response, status_code = services.list_pop_execucoes_admin(restaurante_id, filtros)
+    if status_code == 200 and restaurante_id is not None:
+        _arquivar_pop_depois_da_resposta(restaurante_id)
     return jsonify(response), status_code
 
 
+def _arquivar_pop_depois_da_resposta(restaurante_id):
+    """Roda o fallback do auto-arquivamento quando a resposta termina de ser enviada."""
+    app = current_app._get_current_object()
+
+    def arquivar():
+        with app.app_context():
+            try:
+                services.arquivar_pop_execucoes_se_vencido(restaurante_id)
+            finally:
+                db.session.remove()
+
+    @after_this_request
+    def agendar(response):
+        response.call_on_close(arquivar)
+        return response
+
+
 @admin_bp.route('/pop-execucoes/<int:execucao_id>', methods=['GET'])
 @admin_required()
 def get_pop_execucao_admin(execucao_id):
@@ -485,6 +503,15 @@ def unarchive_pop_execucao(execucao_id):
     return jsonify(response), status_code
 
 
+@admin_bp.route('/pop-execucoes/pre-materializar', methods=['POST'])
+@admin_required()
+def pre_materializar_pop_execucoes():
+    data = request.get_json(silent=True) or {}
+    restaurante_id = get_current_restaurante_id()
+    response, status_code = services.pre_materializar_execucoes_pop(restaurante_id, data.get('data_referencia'))
+    return jsonify(response), status_code
+
+
 @admin_bp.route('/pop-execucoes/auto-archive', methods=['POST'])
 @admin_required()
 def run_pop_auto_archive():
@@ -522,7 +549,9 @@ def list_pop_execucoes_colaborador():
     filtros = {
         "status": request.args.get('status'),
         "data_inicio": request.args.get('data_inicio'),
-        "data_fim": request.args.get('data_fim')
+        "data_fim": request.args.get('data_fim'),
+        "cursor": request.args.get('cursor'),
+        "limit": request.args.get('limit', type=int),
     }
     include_arquivados = request.args.get('include_arquivados')
     if include_arquivados:
@@ -559,7 +588,41 @@ def update_pop_execucao_item(execucao_id, item_id):
 @collaborator_bp.route('/pop-execucoes/<int:execucao_id>/itens/<int:item_id>/foto', methods=['POST'])
 @collaborator_required()
 def upload_pop_execucao_foto(execucao_id, item_id):
-    return jsonify({"error": "Upload de foto ainda não está disponível."}), 501
+    """
+    Recebe a foto como corpo binário (Content-Type image/*) ou multipart no
+    campo 'foto'. O corpo é lido em pedaços direto para o armazenamento.
+    """
+    if request.content_length and request.content_length > current_app.config['POP_FOTOS_MAX_BYTES']:
+        return jsonify({"error": "Foto maior que o limite permitido."}), 413
+    if request.mimetype.startswith('multipart/'):
+        foto = request.files.get('foto')
+        if not foto:
+            return jsonify({"error": "Envie a foto no campo 'foto'."}), 400
+        stream = foto.stream
+    else:
+        stream = request.stream
+
+    user_id = get_user_id_from_jwt()
+    foto_url = url_for('collaborator_bp.get_pop_execucao_foto', execucao_id=execucao_id, item_id=item_id)
+    response, status_code = services.salvar_foto_pop_execucao_item(user_id, execucao_id, item_id, stream, foto_url)
+    return jsonify(response), status_code
+
+
+@collaborator_bp.route('/pop-execucoes/<int:execucao_id>/itens/<int:item_id>/foto', methods=['GET'])
+@collaborator_required()
+def get_pop_execucao_foto(execucao_id, item_id):
+    """Serve a foto (ou a miniatura com ?miniatura=1) com ETag e suporte a Range."""
+    miniatura = request.args.get('miniatura', '').lower() in ('1', 'true', 'sim')
+    user_id = get_user_id_from_jwt()
+    response, status_code = services.get_foto_pop_execucao_item(user_id, execucao_id, item_id, miniatura)
+    if status_code != 200:
+        return jsonify(response), status_code
+
+    # Conteúdo imutável por chave: conditional=True responde 304 (If-None-Match) e 206 (Range)
+    resposta = send_file(response['caminho'], mimetype=response['mimetype'], etag=response['etag'], conditional=True)
+    resposta.cache_control.private = True
+    resposta.cache_control.max_age = 86400
+    return resposta
 
 
 @collaborator_bp.route('/pop-execucoes/<int:execucao_id>/finalizar', methods=['POST'])
@@ -835,6 +898,8 @@ def listar_logs_route():
         "end_date": request.args.get('end_date') or None,
         "limit": _parse_int(request.args.get('limit')) or 200,
         "offset": _parse_int(request.args.get('offset')) or 0,
+        "cursor": request.args.get('cursor') or None,
+        "count": request.args.get('count') or None,
     }
     response, status = services.listar_logs(filters)
     return jsonify(response), status
@@ -869,8 +934,18 @@ def resetar_senha_usuario_route(usuario_id):
 @admin_bp.route('/estatisticas', methods=['GET'])
 @admin_required()
 def estatisticas_route():
+    """
+    Estatísticas de itens por lista. Query params opcionais:
+    itens=0 omite o detalhe por item; itens_limit/itens_offset paginam o detalhe.
+    """
     restaurante_id = get_current_restaurante_id()
-    response, status = services.get_estatisticas(restaurante_id)
+    incluir_itens = request.args.get('itens', '1').lower() not in ('0', 'false', 'nao')
+    response, status = services.get_estatisticas(
+        restaurante_id,
+        incluir_itens=incluir_itens,
+        itens_limit=request.args.get('itens_limit', type=int),
+        itens_offset=request.args.get('itens_offset', default=0, type=int),
+    )
     return jsonify(response), status
 
 
@@ -976,6 +1051,122 @@ def export_super_dashboard_excel_route():
     )
 
 
+@admin_bp.route('/super-dashboard/cache-stats', methods=['GET'])
+@super_admin_required()
+def super_dashboard_cache_stats_route():
+    """
+    GET /api/admin/super-dashboard/cache-stats
+    Contadores de hit/miss do cache do Dashboard Global (por worker).
+    """
+    response, status = services.get_super_dashboard_cache_stats()
+    return jsonify(response), status
+
+
+@admin_bp.route('/session-cache/stats', methods=['GET'])
+@super_admin_required()
+def session_cache_stats_route():
+    """
+    GET /api/admin/session-cache/stats
+    Contadores do cache de sessão (consultas ao banco evitadas, por worker).
+    """
+    response, status = services.get_session_cache_stats()
+    return jsonify(response), status
+
+
+@admin_bp.route('/metrics', methods=['GET'])
+@super_admin_required()
+def metricas_instrumentacao_route():
+    """
+    GET /api/admin/metrics
+    Latência (p50/p95/p99) e SQL por endpoint, com casos de N+1 (por worker).
+    """
+    response, status = services.get_metricas_instrumentacao()
+    return jsonify(response), status
+
+
+@admin_bp.route('/metrics/prometheus', methods=['GET'])
+@super_admin_required()
+def metricas_prometheus_route():
+    """
+    GET /api/admin/metrics/prometheus
+    Métricas de instrumentação no formato de texto do Prometheus.
+    """
+    texto, status = services.get_metricas_prometheus()
+    return Response(texto, status=status, mimetype='text/plain; version=0.0.4')
+
+
+# ===== JOBS EM SEGUNDO PLANO =====
+
+@admin_bp.route('/jobs', methods=['POST'])
+@admin_required()
+def submeter_job_route():
+    """
+    POST /api/admin/jobs
+    Enfileira um job: JSON {"tipo", "params"} ou multipart com tipo, params
+    (JSON) e file (vira params.conteudo). Responde 202 com o job.
+    """
+    if request.files:
+        tipo = request.form.get('tipo')
+        try:
+            params = json.loads(request.form.get('params') or '{}')
+        except ValueError:
+            return jsonify({"error": "params inválido."}), 400
+        uploaded = request.files.get('file')
+        if uploaded and isinstance(params, dict):
+            raw = uploaded.read()
+            try:
+                params['conteudo'] = raw.decode('utf-8')
+            except UnicodeDecodeError:
+                params['conteudo'] = raw.decode('latin-1')
+        restaurante_param = request.form.get('restaurante_id')
+    else:
+        data = request.get_json() or {}
+        tipo = data.get('tipo')
+        params = data.get('params') or {}
+        restaurante_param = data.get('restaurante_id')
+
+    restaurante_id = get_current_restaurante_id()
+    if restaurante_id is None and restaurante_param not in (None, ''):
+        try:
+            restaurante_id = int(restaurante_param)
+        except (TypeError, ValueError):
+            return jsonify({"error": "restaurante_id inválido"}), 400
+
+    response, status = services.submeter_job(tipo, params, get_user_id_from_jwt(), restaurante_id)
+    return jsonify(response), status
+
+
+@admin_bp.route('/jobs/<int:job_id>', methods=['GET'])
+@admin_required()
+def get_job_route(job_id):
+    """
+    GET /api/admin/jobs/<id>
+    Status, progresso e resultado do job (polling).
+    """
+    super_admin = get_jwt().get('role') == 'SUPER_ADMIN'
+    response, status = services.get_job(job_id, get_user_id_from_jwt(), super_admin)
+    return jsonify(response), status
+
+
+@admin_bp.route('/jobs/<int:job_id>/download', methods=['GET'])
+@admin_required()
+def download_job_route(job_id):
+    """
+    GET /api/admin/jobs/<id>/download
+    Arquivo gerado pelo job (PDF, Excel ou ZIP).
+    """
+    super_admin = get_jwt().get('role') == 'SUPER_ADMIN'
+    response, status = services.get_job_arquivo(job_id, get_user_id_from_jwt(), super_admin)
+    if status != 200:
+        return jsonify(response), status
+    return send_file(
+        io.BytesIO(response['conteudo']),
+        mimetype=response['mimetype'],
+        as_attachment=True,
+        download_name=response['nome']
+    )
+
+
 # Blueprint para a API principal
 api_bp = Blueprint('api_bp', __name__, url_prefix='/api/v1')
 
@@ -1047,7 +1238,8 @@ def buscar_itens_para_lista_route():
         except ValueError:
             return jsonify({"error": "restaurante_id inválido"}), 400
 
-    result, status = services.buscar_itens_para_lista(restaurante_id, query)
+    limit = request.args.get('limit', type=int)
+    result, status = services.buscar_itens_para_lista(restaurante_id, query, limit)
     return jsonify(result), status
 
 
@@ -1429,12 +1621,29 @@ def merge_submissoes_whatsapp_route():
 @admin_bp.route('/submissoes', methods=['GET'])
 @admin_required()
 def get_all_submissoes_route():
-    """Retorna todas as submissões com filtro opcional por status."""
+    """
+    Retorna as submissões do restaurante com filtro opcional por status.
+
+    Com `limit` e/ou `cursor` retorna uma página keyset
+    ({items, next_cursor, has_more}); sem eles mantém o array completo,
+    montado por inteiro antes da resposta para que uma falha no meio da
+    leitura vire um erro HTTP em vez de um JSON truncado com status 200.
+    """
     status_filter = request.args.get('status')  # PENDENTE, APROVADO, REJEITADO
     arquivadas_param = request.args.get('arquivadas', '').lower()
     arquivadas = arquivadas_param in ('1', 'true', 'sim')
-    submissoes, _ = services.get_all_submissoes(status_filter, arquivadas)
-    return jsonify(submissoes)
+    restaurante_id = get_current_restaurante_id()
+
+    if 'limit' in request.args or 'cursor' in request.args:
+        limit = request.args.get('limit', 50, type=int)
+        response, status = services.get_submissoes_page(
+            status_filter, arquivadas, restaurante_id,
+            limit=limit, cursor=request.args.get('cursor')
+        )
+        return jsonify(response), status
+
+    response, status = services.get_all_submissoes(status_filter, arquivadas, restaurante_id)
+    return jsonify(response), status
 
 
 @admin_bp.route('/submissoes/<int:submissao_id>', methods=['GET'])
@@ -2365,15 +2574,14 @@ def export_bulk_data_route():
     if status != 200:
         return jsonify(result), status
 
-    # result é um BytesIO contendo o ZIP
+    # result é um iterador de bytes: o ZIP vai sendo enviado enquanto é gerado
     timestamp = brasilia_now().strftime('%Y%m%d_%H%M%S')
     filename = f'kaizen_export_{timestamp}.zip'
 
-    return send_file(
-        result,
+    return Response(
+        stream_with_context(result),
         mimetype='application/zip',
-        as_attachment=True,
-        download_name=filename
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
     )
 
 
@@ -0,0 +1,303 @@
+"""
+Instrumentação opcional por endpoint: latência e SQL por requisição.
+
+Ativada por INSTRUMENTATION_ENABLED. Os sinais do Flask (`request_started`,
+`request_finished`, `got_request_exception`) abrem e fecham a medição da
+requisição; os eventos `before/after_cursor_execute` do engine somam os
+statements e o tempo de SQL da requisição corrente.
+
+Por endpoint são agregados: requisições, erros (5xx), histograma de latência
+(buckets fixos, p50/p95/p99 estimados por interpolação), statements SQL e
+tempo de SQL. Tudo em memória e limitado: um registro por endpoint da tabela
+de rotas e buckets fixos; os contadores são por worker do gunicorn, por
+isso toda série exportada para o Prometheus leva o label `worker` (pid) e a
+soma entre workers fica para a consulta (`sum without (worker)`).
+
+Detector de N+1: o statement é normalizado para a sua "forma" (literais e
+listas de IN colapsados); se uma requisição executa a mesma forma mais de
+INSTRUMENTATION_N_PLUS_ONE_THRESHOLD vezes, o caso é registrado em um
+histórico limitado (INSTRUMENTATION_N_PLUS_ONE_HISTORY) e logado.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from functools import lru_cache
+
+from flask import current_app, g, got_request_exception, has_request_context, request, request_finished, request_started
+from sqlalchemy import event
+
+from .extensions import db
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = 'instrumentation'
+
+# Limites superiores dos buckets de latência (ms); o último é +Inf
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+DEFAULT_N_PLUS_ONE_THRESHOLD = 10
+DEFAULT_N_PLUS_ONE_HISTORY = 100
+
+_SEM_ENDPOINT = '<sem endpoint>'
+
+_RE_LISTA_IN = re.compile(r'\bIN\s*\((?:[^()]|\([^()]*\))*\)', re.IGNORECASE)
+_RE_LITERAL_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMERO = re.compile(r'\b\d+(?:\.\d+)?\b')
+_RE_ESPACOS = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def forma_statement(statement):
+    """Normaliza o SQL para agrupar execuções do mesmo statement."""
+    forma = _RE_LISTA_IN.sub('IN (...)', statement)
+    forma = _RE_LITERAL_TEXTO.sub('?', forma)
+    forma = _RE_NUMERO.sub('?', forma)
+    return _RE_ESPACOS.sub(' ', forma).strip()
+
+
+class EstatisticaEndpoint:
+    """Agregados de um endpoint."""
+
+    __slots__ = ('requisicoes', 'erros', 'buckets', 'latencia_total_ms', 'latencia_max_ms', 'sql_statements', 'sql_tempo_ms')
+
+    def __init__(self):
+        self.requisicoes = 0
+        self.erros = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latencia_total_ms = 0.0
+        self.latencia_max_ms = 0.0
+        self.sql_statements = 0
+        self.sql_tempo_ms = 0.0
+
+    def registrar(self, duracao_ms, status, sql_statements, sql_tempo_ms):
+        self.requisicoes += 1
+        if status >= 500:
+            self.erros += 1
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, duracao_ms)] += 1
+        self.latencia_total_ms += duracao_ms
+        self.latencia_max_ms = max(self.latencia_max_ms, duracao_ms)
+        self.sql_statements += sql_statements
+        self.sql_tempo_ms += sql_tempo_ms
+
+    def percentil(self, p):
+        """Estimativa do percentil `p` (0-100) interpolando dentro do bucket."""
+        if not self.requisicoes:
+            return 0.0
+        alvo = self.requisicoes * p / 100
+        acumulado = 0
+        for indice, quantidade in enumerate(self.buckets):
+            if quantidade and acumulado + quantidade >= alvo:
+                inferior = LATENCY_BUCKETS_MS[indice - 1] if indice else 0.0
+                if indice == len(LATENCY_BUCKETS_MS):
+                    return round(self.latencia_max_ms, 2)
+                superior = LATENCY_BUCKETS_MS[indice]
+                fracao = (alvo - acumulado) / quantidade
+                return round(min(inferior + (superior - inferior) * fracao, self.latencia_max_ms), 2)
+            acumulado += quantidade
+        return round(self.latencia_max_ms, 2)
+
+    def to_dict(self):
+        requisicoes = self.requisicoes or 1
+        return {
+            "requisicoes": self.requisicoes,
+            "erros": self.erros,
+            "latencia_media_ms": round(self.latencia_total_ms / requisicoes, 2),
+            "latencia_max_ms": round(self.latencia_max_ms, 2),
+            "p50_ms": self.percentil(50),
+            "p95_ms": self.percentil(95),
+            "p99_ms": self.percentil(99),
+            "sql_statements": self.sql_statements,
+            "sql_statements_por_requisicao": round(self.sql_statements / requisicoes, 2),
+            "sql_tempo_ms": round(self.sql_tempo_ms, 2),
+        }
+
+
+class Registro:
+    """Agregados de uma app: estatísticas por endpoint e casos de N+1."""
+
+    def __init__(self, n_plus_one_threshold=DEFAULT_N_PLUS_ONE_THRESHOLD, n_plus_one_history=DEFAULT_N_PLUS_ONE_HISTORY):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.endpoints = {}
+        self.n_plus_one = deque(maxlen=n_plus_one_history)
+        self.n_plus_one_total = 0
+        self.lock = threading.Lock()
+
+    def registrar(self, endpoint, duracao_ms, status, medicao):
+        suspeitos = [
+            (forma, quantidade) for forma, quantidade in medicao.formas.items()
+            if quantidade > self.n_plus_one_threshold
+        ]
+        with self.lock:
+            estatistica = self.endpoints.get(endpoint)
+            if estatistica is None:
+                estatistica = self.endpoints[endpoint] = EstatisticaEndpoint()
+            estatistica.registrar(duracao_ms, status, medicao.statements, medicao.sql_tempo_ms)
+            for forma, quantidade in suspeitos:
+                self.n_plus_one_total += 1
+                self.n_plus_one.append({
+                    "endpoint": endpoint,
+                    "statement": forma,
+                    "execucoes": quantidade,
+                    "request_id": g.get('request_id'),
+                })
+        for forma, quantidade in suspeitos:
+            logger.warning("Possível N+1 em %s: %d execuções de %s", endpoint, quantidade, forma[:200])
+
+    def snapshot(self):
+        with self.lock:
+            endpoints = {nome: estatistica.to_dict() for nome, estatistica in self.endpoints.items()}
+            n_plus_one = list(self.n_plus_one)
+            total = self.n_plus_one_total
+        return {
+            "endpoints": dict(sorted(endpoints.items(), key=lambda item: -item[1]["p95_ms"])),
+            "n_plus_one": {
+                "threshold": self.n_plus_one_threshold,
+                "total": total,
+                "recentes": n_plus_one,
+            },
+        }
+
+    def reset(self):
+        with self.lock:
+            self.endpoints.clear()
+            self.n_plus_one.clear()
+            self.n_plus_one_total = 0
+
+
+class _Medicao:
+    """SQL executado pela requisição corrente."""
+
+    __slots__ = ('inicio', 'statements', 'sql_tempo_ms', 'formas', 'status')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.statements = 0
+        self.sql_tempo_ms = 0.0
+        self.formas = Counter()
+        self.status = None
+
+
+def obter_registro(app=None):
+    """Registro da app (None quando a instrumentação está desligada)."""
+    app = app or current_app
+    return app.extensions.get(EXTENSION_KEY)
+
+
+def _medicao_corrente():
+    if not has_request_context():
+        return None
+    return g.get('_instrumentacao')
+
+
+def _antes_do_statement(conn, cursor, statement, parameters, context, executemany):
+    if _medicao_corrente() is not None:
+        conn.info.setdefault('_instrumentacao_inicio', []).append(time.perf_counter())
+
+
+def _depois_do_statement(conn, cursor, statement, parameters, context, executemany):
+    medicao = _medicao_corrente()
+    if medicao is None:
+        return
+    inicios = conn.info.get('_instrumentacao_inicio')
+    if inicios:
+        medicao.sql_tempo_ms += (time.perf_counter() - inicios.pop()) * 1000
+    medicao.statements += 1
+    medicao.formas[forma_statement(statement)] += 1
+
+
+def _iniciar_medicao(sender, **extra):
+    g._instrumentacao = _Medicao()
+
+
+def _marcar_excecao(sender, exception, **extra):
+    medicao = _medicao_corrente()
+    if medicao is not None:
+        medicao.status = 500
+
+
+def _finalizar_medicao(sender, response, **extra):
+    medicao = g.pop('_instrumentacao', None)
+    registro = obter_registro(sender)
+    if medicao is None or registro is None:
+        return
+    duracao_ms = (time.perf_counter() - medicao.inicio) * 1000
+    status = medicao.status or response.status_code
+    registro.registrar(request.endpoint or _SEM_ENDPOINT, duracao_ms, status, medicao)
+
+
+def init_instrumentation(app):
+    """Liga a instrumentação na app quando INSTRUMENTATION_ENABLED está ativo."""
+    if not app.config.get('INSTRUMENTATION_ENABLED'):
+        return None
+
+    registro = Registro(
+        n_plus_one_threshold=int(app.config.get('INSTRUMENTATION_N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD)),
+        n_plus_one_history=int(app.config.get('INSTRUMENTATION_N_PLUS_ONE_HISTORY', DEFAULT_N_PLUS_ONE_HISTORY)),
+    )
+    app.extensions[EXTENSION_KEY] = registro
+
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, 'before_cursor_execute', _antes_do_statement):
+        event.listen(engine, 'before_cursor_execute', _antes_do_statement)
+        event.listen(engine, 'after_cursor_execute', _depois_do_statement)
+
+    request_started.connect(_iniciar_medicao, app)
+    got_request_exception.connect(_marcar_excecao, app)
+    request_finished.connect(_finalizar_medicao, app)
+    return registro
+
+
+def _escapar_label(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def exportar_prometheus(registro):
+    """
+    Agregados no formato de texto do Prometheus (exposition format 0.0.4).
+
+    Cada scrape atinge um único worker; o label `worker` (pid) distingue as
+    séries de cada processo.
+    """
+    worker = f'worker="{os.getpid()}"'
+    with registro.lock:
+        endpoints = [
+            (nome, list(estatistica.buckets), estatistica.latencia_total_ms / 1000, estatistica.requisicoes,
+             estatistica.erros, estatistica.sql_statements, estatistica.sql_tempo_ms / 1000)
+            for nome, estatistica in sorted(registro.endpoints.items())
+        ]
+        n_plus_one_total = registro.n_plus_one_total
+
+    linhas = [
+        '# HELP kaizen_http_request_duration_seconds Latência das requisições por endpoint.',
+        '# TYPE kaizen_http_request_duration_seconds histogram',
+    ]
+    for nome, buckets, total_s, requisicoes, _, _, _ in endpoints:
+        label = f'endpoint="{_escapar_label(nome)}",{worker}'
+        acumulado = 0
+        for limite, quantidade in zip(LATENCY_BUCKETS_MS, buckets):
+            acumulado += quantidade
+            linhas.append(f'kaizen_http_request_duration_seconds_bucket{{{label},le="{limite / 1000:g}"}} {acumulado}')
+        linhas.append(f'kaizen_http_request_duration_seconds_bucket{{{label},le="+Inf"}} {requisicoes}')
+        linhas.append(f'kaizen_http_request_duration_seconds_sum{{{label}}} {total_s:.6f}')
+        linhas.append(f'kaizen_http_request_duration_seconds_count{{{label}}} {requisicoes}')
+
+    contadores = (
+        ('kaizen_http_request_errors_total', 'Requisições com status 5xx por endpoint.', 4),
+        ('kaizen_sql_statements_total', 'Statements SQL executados por endpoint.', 5),
+        ('kaizen_sql_duration_seconds_total', 'Tempo gasto em SQL por endpoint.', 6),
+    )
+    for metrica, ajuda, indice in contadores:
+        linhas.append(f'# HELP {metrica} {ajuda}')
+        linhas.append(f'# TYPE {metrica} counter')
+        for linha in endpoints:
+            linhas.append(f'{metrica}{{endpoint="{_escapar_label(linha[0])}",{worker}}} {linha[indice]:g}')
+
+    linhas.append('# HELP kaizen_n_plus_one_total Requisições sinalizadas pelo detector de N+1.')
+    linhas.append('# TYPE kaizen_n_plus_one_total counter')
+    linhas.append(f'kaizen_n_plus_one_total{{{worker}}} {n_plus_one_total}')
+    return '\n'.join(linhas) + '\n'
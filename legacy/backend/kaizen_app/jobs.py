@@ -0,0 +1,486 @@
+"""
+Execução de tarefas pesadas fora das requisições (tabela `jobs`).
+
+Relatórios do Dashboard Global (PDF/Excel), exportação em lote e as
+importações CSV/texto prendem um dos poucos workers do gunicorn durante toda
+a execução. Aqui elas viram jobs:
+
+1. `submeter` grava o job como PENDENTE (tipo + parâmetros JSON) e a API
+   responde 202 com o id; o cliente acompanha por polling.
+2. `flask run-jobs` sobe um pool de processos worker. Cada um consulta a
+   tabela (sem broker externo), reivindica o job PENDENTE mais antigo com um
+   UPDATE condicional (só um worker vence) e executa a tarefa registrada.
+3. Tarefas de arquivo gravam o resultado no próprio job
+   (`arquivo_conteudo`), que a web serve no download sem depender de disco
+   compartilhado com o worker; as de importação guardam a resposta do
+   serviço em `resultado`. Arquivos mais velhos que
+   JOBS_RESULT_RETENTION_HOURS são descartados por uma manutenção.
+4. Enquanto roda, o worker atualiza `atualizado_em` (heartbeat). Jobs
+   EXECUTANDO sem heartbeat há JOBS_STALE_SECONDS (worker morto) voltam para
+   a fila até JOBS_MAX_TENTATIVAS.
+5. O primeiro processo do pool também roda as manutenções periódicas
+   registradas com `@manutencao` (auto-arquivamento das execuções POP,
+   partições futuras e arquivamento dos meses vencidos de app_logs), cada
+   uma no intervalo da sua chave de configuração. O pool é, portanto, o
+   agendador dessas tarefas: no Railway o startCommand (railway.json) o sobe
+   ao lado do gunicorn; em plataformas com Procfile, o processo `worker`.
+
+Os endpoints síncronos continuam existindo como fallback.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import select, update
+
+from .extensions import db
+from .models import Job, JobStatus, brasilia_now
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL_SECONDS = 2.0
+DEFAULT_HEARTBEAT_SECONDS = 30
+DEFAULT_STALE_SECONDS = 300
+DEFAULT_MAX_TENTATIVAS = 3
+DEFAULT_RESULT_RETENTION_HOURS = 168
+
+TAREFAS = {}
+MANUTENCOES = {}
+
+
+class JobErro(Exception):
+    """Falha esperada da tarefa (ex.: serviço respondeu 4xx); vira status ERRO."""
+
+    def __init__(self, mensagem, resultado=None):
+        super().__init__(mensagem)
+        self.resultado = resultado
+
+
+def tarefa(tipo, obrigatorios=()):
+    """Registra `fn(contexto, params)` como executora do tipo de job."""
+    def registrar(fn):
+        TAREFAS[tipo] = (fn, tuple(obrigatorios))
+        return fn
+    return registrar
+
+
+def manutencao(nome, chave_intervalo, intervalo_padrao):
+    """
+    Registra `fn()` para rodar no laço do worker a cada `chave_intervalo`
+    segundos (config; 0 desativa). A função faz o próprio commit.
+    """
+    def registrar(fn):
+        MANUTENCOES[nome] = (fn, chave_intervalo, intervalo_padrao)
+        return fn
+    return registrar
+
+
+def validar(tipo, params):
+    """Mensagem de erro para tipo/parâmetros inválidos, ou None."""
+    if tipo not in TAREFAS:
+        return f"Tipo de job desconhecido: {tipo}."
+    faltando = [campo for campo in TAREFAS[tipo][1] if params.get(campo) in (None, '')]
+    if faltando:
+        return f"Parâmetros obrigatórios ausentes: {', '.join(faltando)}."
+    return None
+
+
+def submeter(tipo, params, usuario_id=None, restaurante_id=None):
+    """Enfileira o job (PENDENTE) e faz commit."""
+    job = Job(
+        tipo=tipo, params=params or {}, usuario_id=usuario_id,
+        restaurante_id=restaurante_id, status=JobStatus.PENDENTE
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def _atualizar(job_id, **valores):
+    valores.setdefault('atualizado_em', brasilia_now())
+    db.session.execute(update(Job.__table__).where(Job.__table__.c.id == job_id).values(**valores))
+    db.session.commit()
+
+
+def _atualizar_fora_da_sessao(job_id, **valores):
+    """Atualização em conexão própria, sem tocar na transação da tarefa."""
+    valores.setdefault('atualizado_em', brasilia_now())
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(update(Job.__table__).where(Job.__table__.c.id == job_id).values(**valores))
+    except Exception as exc:
+        # Heartbeat/progresso são informativos: um lock momentâneo não derruba a tarefa
+        logger.warning("Falha ao atualizar job %s: %s", job_id, exc)
+
+
+class ContextoJob:
+    """O que a tarefa enxerga do job: parâmetros fixos, progresso e arquivo de saída."""
+
+    def __init__(self, job):
+        self.job_id = job.id
+        self.restaurante_id = job.restaurante_id
+        self.usuario_id = job.usuario_id
+        self.arquivo = None
+
+    def progresso(self, percentual):
+        _atualizar_fora_da_sessao(self.job_id, progresso=max(0, min(100, int(percentual))))
+
+    def salvar_arquivo(self, nome, mimetype, pedacos):
+        """Junta os pedaços (bytes); o conteúdo é gravado no job junto com o status CONCLUIDO."""
+        conteudo = b''.join(pedacos)
+        self.arquivo = (conteudo, os.path.basename(nome), mimetype)
+        return len(conteudo)
+
+
+def nome_worker():
+    return f"{socket.gethostname()}:{os.getpid()}"[:100]
+
+
+def reivindicar(worker=None):
+    """Marca o PENDENTE mais antigo como EXECUTANDO para este worker. Retorna o id ou None."""
+    tabela = Job.__table__
+    while True:
+        job_id = db.session.execute(
+            select(tabela.c.id)
+            .where(tabela.c.status == JobStatus.PENDENTE)
+            .order_by(tabela.c.criado_em, tabela.c.id)
+            .limit(1)
+        ).scalar()
+        if job_id is None:
+            db.session.rollback()
+            return None
+        agora = brasilia_now()
+        reivindicado = db.session.execute(
+            update(tabela)
+            .where(tabela.c.id == job_id, tabela.c.status == JobStatus.PENDENTE)
+            .values(
+                status=JobStatus.EXECUTANDO, worker=worker or nome_worker(), iniciado_em=agora,
+                atualizado_em=agora, progresso=0, tentativas=tabela.c.tentativas + 1
+            )
+        ).rowcount
+        db.session.commit()
+        if reivindicado:
+            return job_id
+        # Outro worker levou esse job; tenta o próximo
+
+
+def recuperar_travados(stale_seconds=None, max_tentativas=None):
+    """Devolve à fila (ou marca ERRO) jobs EXECUTANDO sem heartbeat. Retorna quantos."""
+    config = current_app.config
+    stale_seconds = stale_seconds or config.get('JOBS_STALE_SECONDS', DEFAULT_STALE_SECONDS)
+    max_tentativas = max_tentativas or config.get('JOBS_MAX_TENTATIVAS', DEFAULT_MAX_TENTATIVAS)
+    tabela = Job.__table__
+    limite = brasilia_now() - timedelta(seconds=stale_seconds)
+    travado = (tabela.c.status == JobStatus.EXECUTANDO) & (tabela.c.atualizado_em < limite)
+    agora = brasilia_now()
+    esgotados = db.session.execute(
+        update(tabela).where(travado, tabela.c.tentativas >= max_tentativas).values(
+            status=JobStatus.ERRO, erro='Worker interrompido durante a execução.',
+            concluido_em=agora, atualizado_em=agora
+        )
+    ).rowcount
+    devolvidos = db.session.execute(
+        update(tabela).where(travado).values(status=JobStatus.PENDENTE, worker=None, atualizado_em=agora)
+    ).rowcount
+    db.session.commit()
+    return esgotados + devolvidos
+
+
+class _Heartbeat(threading.Thread):
+    def __init__(self, app, job_id, intervalo):
+        super().__init__(name=f'kaizen-job-{job_id}-heartbeat', daemon=True)
+        self.app = app
+        self.job_id = job_id
+        self.intervalo = intervalo
+        self.parar = threading.Event()
+
+    def run(self):
+        while not self.parar.wait(self.intervalo):
+            with self.app.app_context():
+                _atualizar_fora_da_sessao(self.job_id)
+
+
+def executar(job_id):
+    """Executa um job já reivindicado e grava o desfecho."""
+    app = current_app._get_current_object()
+    job = db.session.get(Job, job_id)
+    tipo = job.tipo
+    fn, _ = TAREFAS.get(tipo, (None, ()))
+    if fn is None:
+        _atualizar(job_id, status=JobStatus.ERRO, erro=f"Tipo de job desconhecido: {tipo}.",
+                   concluido_em=brasilia_now())
+        return
+    params = dict(job.params or {})
+    contexto = ContextoJob(job)
+    db.session.commit()
+
+    heartbeat = _Heartbeat(app, job_id, app.config.get('JOBS_HEARTBEAT_SECONDS', DEFAULT_HEARTBEAT_SECONDS))
+    heartbeat.start()
+    try:
+        resultado = fn(contexto, params)
+    except JobErro as exc:
+        db.session.rollback()
+        _atualizar(job_id, status=JobStatus.ERRO, erro=str(exc), resultado=exc.resultado,
+                   concluido_em=brasilia_now())
+        return
+    except Exception as exc:
+        db.session.rollback()
+        logger.exception("Job %s (%s) falhou", job_id, tipo)
+        _atualizar(job_id, status=JobStatus.ERRO, erro=str(exc), concluido_em=brasilia_now())
+        return
+    finally:
+        heartbeat.parar.set()
+        heartbeat.join()
+
+    arquivo = {}
+    if contexto.arquivo is not None:
+        conteudo, nome, mimetype = contexto.arquivo
+        arquivo = {"arquivo_conteudo": conteudo, "arquivo_nome": nome, "arquivo_mimetype": mimetype}
+    _atualizar(job_id, status=JobStatus.CONCLUIDO, progresso=100, resultado=resultado,
+               concluido_em=brasilia_now(), **arquivo)
+
+
+def processar_pendentes(worker=None, limite=None):
+    """Executa jobs PENDENTE até a fila esvaziar (ou `limite`). Retorna quantos rodaram."""
+    executados = 0
+    while limite is None or executados < limite:
+        job_id = reivindicar(worker)
+        if job_id is None:
+            break
+        executar(job_id)
+        executados += 1
+    return executados
+
+
+def executar_manutencoes(ultimas=None):
+    """
+    Roda as manutenções cujo intervalo venceu desde `ultimas` ({nome: monotonic},
+    atualizado no lugar). Falhas são registradas e não interrompem as demais.
+    Retorna os nomes executados.
+    """
+    ultimas = {} if ultimas is None else ultimas
+    config = current_app.config
+    agora = time.monotonic()
+    executadas = []
+    for nome, (fn, chave_intervalo, intervalo_padrao) in MANUTENCOES.items():
+        intervalo = config.get(chave_intervalo, intervalo_padrao)
+        if not intervalo or (nome in ultimas and agora - ultimas[nome] < intervalo):
+            continue
+        ultimas[nome] = agora
+        try:
+            fn()
+            executadas.append(nome)
+        except Exception as exc:
+            db.session.rollback()
+            logger.warning("Falha na manutenção %s: %s", nome, exc)
+    return executadas
+
+
+def loop_worker(app, intervalo=None, parar=None, manutencoes=True):
+    """
+    Laço de um processo worker: recupera travados, roda as manutenções
+    vencidas (se `manutencoes`), executa a fila e dorme.
+    """
+    parar = parar or threading.Event()
+    ultimas_manutencoes = {}
+    with app.app_context():
+        intervalo = intervalo or app.config.get('JOBS_POLL_INTERVAL_SECONDS', DEFAULT_POLL_INTERVAL_SECONDS)
+        worker = nome_worker()
+        logger.info("Worker de jobs %s iniciado", worker)
+        while not parar.is_set():
+            try:
+                recuperar_travados()
+                if manutencoes:
+                    executar_manutencoes(ultimas_manutencoes)
+                if processar_pendentes(worker, limite=1):
+                    continue
+            except Exception as exc:
+                db.session.rollback()
+                logger.warning("Falha no worker de jobs %s: %s", worker, exc)
+            finally:
+                db.session.remove()
+            parar.wait(intervalo)
+
+
+def _processo_worker(config_name, intervalo, manutencoes):
+    from . import create_app
+
+    app = create_app(config_name)
+    loop_worker(app, intervalo, manutencoes=manutencoes)
+
+
+def iniciar_pool(config_name, processos, intervalo=None):
+    """Sobe `processos` workers (spawn: funciona também no Windows) e espera."""
+    import multiprocessing
+    import signal
+
+    def _interromper(signum, frame):
+        raise KeyboardInterrupt
+
+    # SIGTERM (deploy/restart) encerra os filhos em vez de deixá-los órfãos
+    signal.signal(signal.SIGTERM, _interromper)
+    contexto = multiprocessing.get_context('spawn')
+    # Só o primeiro processo roda as manutenções periódicas
+    workers = [
+        contexto.Process(target=_processo_worker, args=(config_name, intervalo, n == 0), name=f'kaizen-jobs-{n}')
+        for n in range(processos)
+    ]
+    for processo in workers:
+        processo.start()
+    try:
+        for processo in workers:
+            processo.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Jobs interrompidos voltam para a fila via recuperar_travados
+        for processo in workers:
+            if processo.is_alive():
+                processo.terminate()
+        for processo in workers:
+            processo.join()
+
+
+# ===== Tarefas =====
+
+def _resposta_servico(resposta, status):
+    """Resposta (dict, status) de um serviço: 4xx/5xx viram JobErro."""
+    if status >= 400:
+        raise JobErro(resposta.get('error') or f"Falha ({status}).", resultado=resposta)
+    return resposta
+
+
+def _timestamp():
+    return brasilia_now().strftime('%Y%m%d_%H%M')
+
+
+@tarefa('super_dashboard_pdf')
+def _super_dashboard_pdf(contexto, params):
+    from . import services
+
+    buffer = services.generate_super_dashboard_pdf(contexto.restaurante_id, int(params.get('period', 30)))
+    contexto.salvar_arquivo(f'dashboard_global_{_timestamp()}.pdf', 'application/pdf', [buffer.getvalue()])
+
+
+@tarefa('super_dashboard_excel')
+def _super_dashboard_excel(contexto, params):
+    from . import services
+
+    buffer = services.generate_super_dashboard_excel(contexto.restaurante_id, int(params.get('period', 30)))
+    contexto.salvar_arquivo(
+        f'dashboard_global_{_timestamp()}.xlsx',
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        [buffer.getvalue()]
+    )
+
+
+@tarefa('export_bulk', obrigatorios=('tipos_dados',))
+def _export_bulk(contexto, params):
+    from . import bulk_export
+
+    pedacos = bulk_export.gerar_zip(
+        params['tipos_dados'], contexto.restaurante_id,
+        ao_concluir_tipo=lambda feitos, total: contexto.progresso(feitos * 100 // total)
+    )
+    contexto.salvar_arquivo(f'kaizen_export_{_timestamp()}.zip', 'application/zip', pedacos)
+
+
+@tarefa('importar_fornecedores_csv', obrigatorios=('conteudo',))
+def _importar_fornecedores_csv(contexto, params):
+    from . import services
+
+    return _resposta_servico(*services.importar_fornecedores_csv(params['conteudo'], contexto.restaurante_id))
+
+
+@tarefa('importar_itens_fornecedor_csv', obrigatorios=('fornecedor_id', 'conteudo'))
+def _importar_itens_fornecedor_csv(contexto, params):
+    from . import services
+
+    return _resposta_servico(*services.importar_itens_fornecedor_csv(
+        int(params['fornecedor_id']), params['conteudo'], contexto.restaurante_id
+    ))
+
+
+@tarefa('importar_itens_fornecedor_texto', obrigatorios=('fornecedor_id', 'conteudo'))
+def _importar_itens_fornecedor_texto(contexto, params):
+    from . import services
+
+    return _resposta_servico(*services.importar_itens_fornecedor_texto(
+        int(params['fornecedor_id']), params['conteudo'], contexto.restaurante_id
+    ))
+
+
+@tarefa('import_lista_csv', obrigatorios=('lista_id', 'conteudo'))
+def _import_lista_csv(contexto, params):
+    from . import services
+
+    return _resposta_servico(*services.import_lista_from_csv(
+        int(params['lista_id']), params['conteudo'], contexto.restaurante_id
+    ))
+
+
+@tarefa('importar_items_em_lote', obrigatorios=('lista_id', 'nomes'))
+def _importar_items_em_lote(contexto, params):
+    from . import services
+
+    return _resposta_servico(*services.importar_items_em_lote(
+        int(params['lista_id']), {"nomes": params['nomes']}, contexto.restaurante_id
+    ))
+
+
+@tarefa('executar_importacao_estoque', obrigatorios=('texto',))
+def _executar_importacao_estoque(contexto, params):
+    from . import services
+
+    return _resposta_servico(*services.executar_importacao_estoque(params, contexto.restaurante_id))
+
+
+# ===== Manutenções periódicas =====
+
+@manutencao('arquivar_pop_execucoes', 'POP_AUTO_ARCHIVE_INTERVAL_SECONDS', 3600)
+def _arquivar_pop_execucoes():
+    from . import services
+
+    resultado = services.arquivar_pop_execucoes_automatico()
+    arquivadas = sum(resultado.values())
+    if arquivadas:
+        logger.info("Auto-arquivamento POP: %s execução(ões) arquivada(s)", arquivadas)
+
+
+@manutencao('garantir_particoes_app_logs', 'APP_LOGS_PARTITION_INTERVAL_SECONDS', 86400)
+def _garantir_particoes_app_logs():
+    from . import retention
+
+    criadas = retention.garantir_particoes()
+    if criadas:
+        logger.info("Partições de app_logs criadas: %s", ', '.join(criadas))
+
+
+@manutencao('arquivar_app_logs', 'APP_LOGS_ARCHIVE_INTERVAL_SECONDS', 86400)
+def _arquivar_app_logs():
+    from . import retention
+
+    config = current_app.config
+    for mes in retention.arquivar_app_logs(
+        config['APP_LOGS_ARCHIVE_DIR'], retencao_meses=config['APP_LOGS_RETENTION_MONTHS']
+    ):
+        logger.info("app_logs %s: %s log(s) arquivados em %s", mes['mes'], mes['exportadas'], mes['arquivo'])
+
+
+@manutencao('descartar_resultados_jobs', 'JOBS_RESULT_CLEANUP_INTERVAL_SECONDS', 3600)
+def _descartar_resultados_jobs():
+    tabela = Job.__table__
+    horas = current_app.config.get('JOBS_RESULT_RETENTION_HOURS', DEFAULT_RESULT_RETENTION_HOURS)
+    limite = brasilia_now() - timedelta(hours=horas)
+    descartados = db.session.execute(
+        update(tabela)
+        .where(tabela.c.arquivo_conteudo.is_not(None), tabela.c.concluido_em < limite)
+        .values(arquivo_conteudo=None)
+    ).rowcount
+    db.session.commit()
+    if descartados:
+        logger.info("Resultados de jobs descartados: %s", descartados)
@@ -1,7 +1,11 @@
 from .extensions import db
 from datetime import datetime, timezone, timedelta
+from sqlalchemy import DDL, event
+from sqlalchemy.orm import validates
 import enum
 import decimal
+import re
+import unicodedata
 try:
     from zoneinfo import ZoneInfo
 except ImportError:
@@ -20,6 +24,28 @@ def utc_now():
     """DEPRECATED: Use brasilia_now() ao invés."""
     return brasilia_now()
 
+def normalize_item_nome(value):
+    """Nome sem acentos, em minúsculas e com espaços colapsados (chave de busca)."""
+    if not value:
+        return ""
+    normalized = unicodedata.normalize("NFKD", value)
+    normalized = "".join(char for char in normalized if not unicodedata.combining(char))
+    normalized = re.sub(r"\s+", " ", normalized).strip().lower()
+    return normalized
+
+def _nome_normalizado_default(context):
+    """Default de coluna: cobre também INSERTs em lote (executemany)."""
+    return normalize_item_nome(context.get_current_parameters().get('nome'))
+
+def _contar_por(coluna, ids):
+    """COUNT agrupado por `coluna` restrito a `ids` -> {id: total}; usado pelos `to_dicts` em lote."""
+    if not ids:
+        return {}
+    rows = db.session.execute(
+        db.select(coluna, db.func.count()).where(coluna.in_(ids)).group_by(coluna)
+    )
+    return dict(rows.all())
+
 # Helper para serialização
 class SerializerMixin:
     def to_dict(self):
@@ -132,10 +158,17 @@ class Item(db.Model, SerializerMixin):
     serialize_rules = ('-fornecedor.itens',)  # Evita recursão infinita
     __table_args__ = (
         db.Index('idx_fornecedor_nome', 'fornecedor_id', 'nome'),
+        db.Index('idx_itens_nome_normalizado', 'nome_normalizado'),
+        db.Index('idx_itens_fornecedor_nome_normalizado', 'fornecedor_id', 'nome_normalizado'),
+        db.Index(
+            'idx_itens_nome_normalizado_trgm', 'nome_normalizado',
+            postgresql_using='gin', postgresql_ops={'nome_normalizado': 'gin_trgm_ops'}
+        ),
     )
 
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(100), unique=True, nullable=False)
+    nome_normalizado = db.Column(db.String(100), nullable=True, default=_nome_normalizado_default)
     codigo_fornecedor = db.Column(db.String(50), nullable=True)
     descricao = db.Column(db.Text, nullable=True)
     marca = db.Column(db.String(100), nullable=True)
@@ -145,6 +178,11 @@ class Item(db.Model, SerializerMixin):
     fornecedor_id = db.Column(db.Integer, db.ForeignKey('fornecedores.id'), nullable=False)
     fornecedor = db.relationship('Fornecedor', backref=db.backref('itens', lazy=True))
 
+    @validates('nome')
+    def _sincronizar_nome_normalizado(self, key, value):
+        self.nome_normalizado = normalize_item_nome(value)
+        return value
+
 # Tabela de associação para o relacionamento muitos-para-muitos entre Áreas e Colaboradores
 area_colaborador = db.Table('area_colaborador',
     db.Column('area_id', db.Integer, db.ForeignKey('areas.id', ondelete='CASCADE'), primary_key=True),
@@ -473,17 +511,28 @@ class ListaMaeItem(db.Model, SerializerMixin):
     __tablename__ = "lista_mae_itens"
     __table_args__ = (
         db.UniqueConstraint('restaurante_id', 'nome', name='uq_lista_mae_restaurante_nome'),
+        db.Index('idx_lista_mae_restaurante_nome_normalizado', 'restaurante_id', 'nome_normalizado'),
+        db.Index(
+            'idx_lista_mae_nome_normalizado_trgm', 'nome_normalizado',
+            postgresql_using='gin', postgresql_ops={'nome_normalizado': 'gin_trgm_ops'}
+        ),
     )
 
     id = db.Column(db.Integer, primary_key=True)
     restaurante_id = db.Column(db.Integer, db.ForeignKey('restaurantes.id'), nullable=False, index=True)
     nome = db.Column(db.String(255), nullable=False)
+    nome_normalizado = db.Column(db.String(255), nullable=True, default=_nome_normalizado_default)
     unidade = db.Column(db.String(50), nullable=False, default='un', server_default='un')
     criado_em = db.Column(db.DateTime, default=utc_now)
     atualizado_em = db.Column(db.DateTime, default=utc_now, onupdate=utc_now)
 
     restaurante = db.relationship('Restaurante')
 
+    @validates('nome')
+    def _sincronizar_nome_normalizado(self, key, value):
+        self.nome_normalizado = normalize_item_nome(value)
+        return value
+
     def to_dict(self):
         """Serializa o item do catálogo global."""
         return {
@@ -497,6 +546,15 @@ class ListaMaeItem(db.Model, SerializerMixin):
         }
 
 
+# Índices trigram (busca por substring) dependem da extensão pg_trgm no Postgres.
+# Em outros bancos o índice vira um btree comum sobre nome_normalizado.
+for _tabela in (Item.__table__, ListaMaeItem.__table__):
+    event.listen(
+        _tabela, 'before_create',
+        DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+    )
+
+
 class ListaItemRef(db.Model, SerializerMixin):
     """
     Tabela intermediária que associa Listas a Itens do Catálogo Global.
@@ -957,7 +1015,12 @@ class POPLista(db.Model, SerializerMixin):
         db.UniqueConstraint('restaurante_id', 'nome', name='uq_pop_listas_restaurante_nome'),
     )
 
-    def to_dict(self):
+    def to_dict(self, total_tarefas=None, total_colaboradores=None):
+        """Sem os totais faz um COUNT por relacionamento; para páginas use `to_dicts`."""
+        if total_tarefas is None:
+            total_tarefas = self.tarefas.count() if hasattr(self, 'tarefas') else 0
+        if total_colaboradores is None:
+            total_colaboradores = self.colaboradores.count() if hasattr(self.colaboradores, 'count') else None
         return {
             "id": self.id,
             "restaurante_id": self.restaurante_id,
@@ -976,10 +1039,25 @@ class POPLista(db.Model, SerializerMixin):
             "deletado": self.deletado,
             "criado_em": self.criado_em.isoformat() if self.criado_em else None,
             "atualizado_em": self.atualizado_em.isoformat() if self.atualizado_em else None,
-            "total_tarefas": self.tarefas.count() if hasattr(self, 'tarefas') else 0,
-            "total_colaboradores": self.colaboradores.count() if hasattr(self.colaboradores, 'count') else None
+            "total_tarefas": total_tarefas,
+            "total_colaboradores": total_colaboradores
         }
 
+    @classmethod
+    def to_dicts(cls, listas):
+        """
+        Serializa várias listas com um COUNT agrupado para tarefas e outro para
+        colaboradores. Área e categoria devem vir carregadas pela consulta.
+        """
+        ids = [lista.id for lista in listas]
+        tarefas = _contar_por(POPListaTarefa.lista_id, ids)
+        colaboradores = _contar_por(pop_lista_colaboradores.c.lista_id, ids)
+        return [
+            lista.to_dict(total_tarefas=tarefas.get(lista.id, 0),
+                          total_colaboradores=colaboradores.get(lista.id, 0))
+            for lista in listas
+        ]
+
 
 class POPListaTarefa(db.Model, SerializerMixin):
     """Relacionamento entre lista e templates."""
@@ -1057,6 +1135,11 @@ class POPExecucao(db.Model, SerializerMixin):
     arquivado_por = db.relationship('Usuario', foreign_keys=[arquivado_por_id])
     restaurante = db.relationship('Restaurante')
 
+    __table_args__ = (
+        # Listagens do admin: restaurante + arquivado, paginadas por data_referencia
+        db.Index('idx_pop_execucoes_restaurante_arquivado_data', 'restaurante_id', 'arquivado', 'data_referencia'),
+    )
+
     def to_dict(self, include_itens=False):
         data = {
             "id": self.id,
@@ -1107,6 +1190,9 @@ class POPExecucaoItem(db.Model, SerializerMixin):
 
     valor_medido = db.Column(db.Numeric(10, 2), nullable=True)
     unidade_medicao = db.Column(db.String(50), nullable=True)
+    # Faixa do template copiada no início da execução (sem buscar o template a cada marcação)
+    valor_minimo = db.Column(db.Numeric(10, 2), nullable=True)
+    valor_maximo = db.Column(db.Numeric(10, 2), nullable=True)
     dentro_padrao = db.Column(db.Boolean, nullable=True)
 
     foto_url = db.Column(db.String(500), nullable=True)
@@ -1138,8 +1224,11 @@ class POPExecucaoItem(db.Model, SerializerMixin):
             "concluido_em": self.concluido_em.isoformat() if self.concluido_em else None,
             "valor_medido": float(self.valor_medido) if self.valor_medido is not None else None,
             "unidade_medicao": self.unidade_medicao,
+            "valor_minimo": float(self.valor_minimo) if self.valor_minimo is not None else None,
+            "valor_maximo": float(self.valor_maximo) if self.valor_maximo is not None else None,
             "dentro_padrao": self.dentro_padrao,
             "foto_url": self.foto_url,
+            "foto_miniatura_url": f"{self.foto_url}?miniatura=1" if self.foto_url else None,
             "observacoes": self.observacoes,
             "tem_desvio": self.tem_desvio,
             "descricao_desvio": self.descricao_desvio,
@@ -1309,6 +1398,12 @@ class Notificacao(db.Model, SerializerMixin):
 class AppLog(db.Model, SerializerMixin):
     """Logs de auditoria do sistema."""
     __tablename__ = 'app_logs'
+    __table_args__ = (
+        # Paginação por cursor em (criado_em, id), com e sem os filtros mais comuns
+        db.Index('idx_app_logs_criado_em_id', 'criado_em', 'id'),
+        db.Index('idx_app_logs_restaurante_criado_em', 'restaurante_id', 'criado_em', 'id'),
+        db.Index('idx_app_logs_acao_criado_em', 'acao', 'criado_em', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     criado_em = db.Column(db.DateTime, default=brasilia_now, nullable=False, index=True)
@@ -1345,6 +1440,79 @@ class AppLog(db.Model, SerializerMixin):
         }
 
 
+class DailyMetric(db.Model, SerializerMixin):
+    """
+    Rollup diário de métricas por restaurante (submissões, logins, pedidos).
+    Mantido incrementalmente por kaizen_app.rollups; restaurante_id = 0
+    agrupa eventos sem restaurante (ex.: login de SUPER_ADMIN).
+    """
+    __tablename__ = 'daily_metrics'
+    __table_args__ = (
+        db.UniqueConstraint('restaurante_id', 'dia', 'metrica', name='uq_daily_metrics_restaurante_dia_metrica'),
+        db.Index('idx_daily_metrics_metrica_dia', 'metrica', 'dia'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    restaurante_id = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    dia = db.Column(db.Date, nullable=False)
+    metrica = db.Column(db.String(50), nullable=False)
+    valor = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    atualizado_em = db.Column(db.DateTime, default=brasilia_now, onupdate=brasilia_now, nullable=False)
+
+
+class JobStatus(enum.Enum):
+    PENDENTE = "PENDENTE"
+    EXECUTANDO = "EXECUTANDO"
+    CONCLUIDO = "CONCLUIDO"
+    ERRO = "ERRO"
+
+
+class Job(db.Model, SerializerMixin):
+    """
+    Tarefa pesada (relatórios, exportação, importações) executada fora da
+    requisição pelos workers de kaizen_app.jobs (`flask run-jobs`).
+    """
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        db.Index('idx_jobs_status_criado_em', 'status', 'criado_em'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.Enum(JobStatus), nullable=False, default=JobStatus.PENDENTE)
+    progresso = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    params = db.Column(db.JSON, nullable=False, default=dict, server_default='{}')
+    resultado = db.Column(db.JSON, nullable=True)
+    erro = db.Column(db.Text, nullable=True)
+    # Conteúdo no próprio banco: web e worker podem rodar em containers sem disco em comum.
+    # Deferred: polling e listagens não carregam o arquivo
+    arquivo_conteudo = db.deferred(db.Column(db.LargeBinary, nullable=True))
+    arquivo_nome = db.Column(db.String(255), nullable=True)
+    arquivo_mimetype = db.Column(db.String(120), nullable=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id', ondelete='SET NULL'), nullable=True, index=True)
+    restaurante_id = db.Column(db.Integer, db.ForeignKey('restaurantes.id', ondelete='SET NULL'), nullable=True)
+    worker = db.Column(db.String(100), nullable=True)
+    tentativas = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    criado_em = db.Column(db.DateTime, default=brasilia_now, nullable=False)
+    iniciado_em = db.Column(db.DateTime, nullable=True)
+    concluido_em = db.Column(db.DateTime, nullable=True)
+    atualizado_em = db.Column(db.DateTime, default=brasilia_now, onupdate=brasilia_now, nullable=False)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "tipo": self.tipo,
+            "status": self.status.value,
+            "progresso": self.progresso,
+            "resultado": self.resultado,
+            "erro": self.erro,
+            "arquivo_nome": self.arquivo_nome,
+            "criado_em": self.criado_em.isoformat() if self.criado_em else None,
+            "iniciado_em": self.iniciado_em.isoformat() if self.iniciado_em else None,
+            "concluido_em": self.concluido_em.isoformat() if self.concluido_em else None,
+        }
+
+
 class ConviteToken(db.Model, SerializerMixin):
     """
     Tokens de convite para registro de usuários.
@@ -0,0 +1,218 @@
+"""
+Armazenamento das fotos de evidência das execuções POP.
+
+As fotos são endereçadas pelo conteúdo: a chave é o SHA-256 dos bytes e o
+arquivo fica em <raiz>/<aa>/<bb>/<sha256>. O upload é lido em pedaços
+(`CHUNK_BYTES`), calculando o hash enquanto grava em um temporário; no fim
+o temporário vira o arquivo definitivo, ou é descartado se a chave já
+existe (mesma foto enviada de novo = mesmo arquivo).
+
+As miniaturas (lado máximo POP_FOTOS_THUMB_PX) são geradas fora da request
+por um pool de threads do processo. Enquanto não existem, a rota devolve a
+foto original.
+
+O backend é escolhido por POP_FOTOS_BACKEND entre os registrados em
+BACKENDS; hoje só há o 'local' (sistema de arquivos). Um backend S3
+compatível implementa a mesma interface de ArmazenamentoFotos.
+"""
+import hashlib
+from abc import ABC, abstractmethod
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = 'photo_storage'
+CHUNK_BYTES = 64 * 1024
+CABECALHO_BYTES = 16
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_THUMB_PX = 320
+
+# Assinaturas aceitas -> mimetype (fotos de celular/câmera)
+_ASSINATURAS = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
+
+class FotoInvalida(ValueError):
+    """Conteúdo recusado (formato não suportado ou vazio)."""
+
+
+class FotoGrandeDemais(ValueError):
+    """Upload maior que o limite configurado."""
+
+
+def detectar_mimetype(cabecalho):
+    """Mimetype pelos primeiros bytes, ou None se não for uma imagem aceita."""
+    for assinatura, mimetype in _ASSINATURAS:
+        if cabecalho.startswith(assinatura):
+            return mimetype
+    if cabecalho[:4] == b'RIFF' and cabecalho[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+class ArmazenamentoFotos(ABC):
+    """Interface dos backends de armazenamento; um backend incompleto falha ao ser instanciado."""
+
+    @abstractmethod
+    def salvar(self, stream, max_bytes=DEFAULT_MAX_BYTES):
+        """Grava o stream e retorna (chave, mimetype, tamanho)."""
+
+    @abstractmethod
+    def caminho(self, chave):
+        """Caminho local do original (backends remotos retornam None)."""
+
+    @abstractmethod
+    def caminho_miniatura(self, chave, px):
+        """Caminho local da miniatura de lado máximo `px`."""
+
+    @abstractmethod
+    def gerar_miniatura(self, chave, px):
+        """Gera a miniatura se ainda não existir e retorna o caminho."""
+
+
+class ArmazenamentoLocal(ArmazenamentoFotos):
+    """Fotos em disco, em <raiz>/<aa>/<bb>/<sha256>; miniaturas em <raiz>/miniaturas."""
+
+    def __init__(self, raiz):
+        self.raiz = os.path.abspath(raiz)
+
+    @staticmethod
+    def _validar_chave(chave):
+        if len(chave) != 64 or any(c not in '0123456789abcdef' for c in chave):
+            raise FotoInvalida("Chave de foto inválida.")
+
+    def caminho(self, chave):
+        self._validar_chave(chave)
+        return os.path.join(self.raiz, chave[:2], chave[2:4], chave)
+
+    def caminho_miniatura(self, chave, px):
+        self._validar_chave(chave)
+        return os.path.join(self.raiz, 'miniaturas', chave[:2], f'{chave}_{int(px)}.jpg')
+
+    def salvar(self, stream, max_bytes=DEFAULT_MAX_BYTES):
+        temporarios = os.path.join(self.raiz, 'tmp')
+        os.makedirs(temporarios, exist_ok=True)
+        sha = hashlib.sha256()
+        tamanho = 0
+        mimetype = None
+        cabecalho = b''
+        fd, temporario = tempfile.mkstemp(dir=temporarios)
+        try:
+            with os.fdopen(fd, 'wb') as arquivo:
+                while True:
+                    pedaco = stream.read(CHUNK_BYTES)
+                    if mimetype is None and len(cabecalho) < CABECALHO_BYTES:
+                        # Um read() pode devolver menos bytes que a assinatura:
+                        # o formato só é decidido com o cabeçalho completo (ou no fim)
+                        cabecalho += pedaco[:CABECALHO_BYTES - len(cabecalho)]
+                        if cabecalho and (len(cabecalho) == CABECALHO_BYTES or not pedaco):
+                            mimetype = detectar_mimetype(cabecalho)
+                            if mimetype is None:
+                                raise FotoInvalida("Formato de imagem não suportado. Use JPEG, PNG, GIF ou WebP.")
+                    if not pedaco:
+                        break
+                    tamanho += len(pedaco)
+                    if tamanho > max_bytes:
+                        raise FotoGrandeDemais(f"Foto maior que o limite de {max_bytes // (1024 * 1024)} MB.")
+                    sha.update(pedaco)
+                    arquivo.write(pedaco)
+            if not tamanho:
+                raise FotoInvalida("Arquivo vazio.")
+
+            chave = sha.hexdigest()
+            destino = self.caminho(chave)
+            if os.path.exists(destino):
+                os.remove(temporario)
+            else:
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                os.replace(temporario, destino)
+            return chave, mimetype, tamanho
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+
+    def gerar_miniatura(self, chave, px):
+        """Gera a miniatura JPEG (lado máximo `px`) se ainda não existir. Retorna o caminho."""
+        destino = self.caminho_miniatura(chave, px)
+        if os.path.exists(destino):
+            return destino
+        from PIL import Image, ImageOps
+
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        temporario = f'{destino}.{threading.get_ident()}.tmp'
+        with Image.open(self.caminho(chave)) as imagem:
+            # draft: o decoder JPEG já reduz a escala, sem decodificar a foto inteira
+            imagem.draft('RGB', (px, px))
+            imagem = ImageOps.exif_transpose(imagem)
+            imagem.thumbnail((px, px))
+            imagem.convert('RGB').save(temporario, 'JPEG', quality=80, optimize=True)
+        os.replace(temporario, destino)
+        return destino
+
+
+BACKENDS = {
+    'local': lambda app: ArmazenamentoLocal(app.config['POP_FOTOS_DIR']),
+}
+
+
+class _GeradorMiniaturas:
+    """Pool de threads (por processo) que gera as miniaturas fora da request."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            # Após fork (gunicorn) o pool herdado não tem threads: recria
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='pop-miniaturas')
+                self._pid = os.getpid()
+            return self._pool
+
+    def agendar(self, armazenamento, chave, px):
+        return self._executor().submit(self._gerar, armazenamento, chave, px)
+
+    @staticmethod
+    def _gerar(armazenamento, chave, px):
+        try:
+            return armazenamento.gerar_miniatura(chave, px)
+        except Exception:
+            logger.exception("Falha ao gerar miniatura da foto %s", chave)
+            return None
+
+
+def init_photo_storage(app):
+    """Instancia o backend configurado (POP_FOTOS_BACKEND) e o gerador de miniaturas."""
+    backend = app.config.get('POP_FOTOS_BACKEND', 'local')
+    if backend not in BACKENDS:
+        raise ValueError(f"POP_FOTOS_BACKEND desconhecido: {backend}")
+    app.extensions[EXTENSION_KEY] = (
+        BACKENDS[backend](app),
+        _GeradorMiniaturas(int(app.config.get('POP_FOTOS_THUMB_WORKERS', 2))),
+    )
+
+
+def obter_armazenamento(app=None):
+    app = app or current_app
+    return app.extensions[EXTENSION_KEY][0]
+
+
+def agendar_miniatura(chave, app=None):
+    """Agenda a geração da miniatura; retorna o Future."""
+    app = app or current_app
+    armazenamento, gerador = app.extensions[EXTENSION_KEY]
+    return gerador.agendar(armazenamento, chave, int(app.config.get('POP_FOTOS_THUMB_PX', DEFAULT_THUMB_PX)))
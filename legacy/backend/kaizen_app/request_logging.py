@@ -0,0 +1,189 @@
+"""
+Log estruturado (JSON, uma linha por requisição) com amostragem.
+
+Substitui os hooks com print() que listavam todos os headers e faziam o parse
+de todo corpo POST/PUT/PATCH (imports de CSV/texto saíam inteiros no log).
+
+- Cada requisição gera um registro com método, path, endpoint, status,
+  duração e tamanho; headers e corpo só entram quando o endpoint está em
+  REQUEST_LOG_DEBUG_ENDPOINTS, e o corpo é truncado em
+  REQUEST_LOG_BODY_MAX_BYTES (Authorization/Cookie nunca são gravados).
+- REQUEST_LOG_SAMPLE_RATE define a fração das requisições registradas;
+  erros (status >= 400) e requisições acima de REQUEST_LOG_SLOW_MS são
+  sempre registrados.
+- O logger usa QueueHandler: a requisição só enfileira o registro, e um
+  QueueListener (uma thread por processo) formata e escreve na saída. Com a
+  fila cheia o registro é descartado e contado, sem bloquear a requisição.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from uuid import uuid4
+
+from flask import g, request
+
+LOGGER_NAME = 'kaizen_app.requests'
+
+DEFAULT_QUEUE_SIZE = 10000
+
+_HEADERS_OCULTOS = frozenset({'authorization', 'cookie', 'set-cookie'})
+
+logger = logging.getLogger(LOGGER_NAME)
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata o registro como uma linha JSON (campos em `record.dados`)."""
+
+    def format(self, record):
+        payload = {
+            "ts": self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        payload.update(getattr(record, 'dados', None) or {})
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class DescartandoQueueHandler(QueueHandler):
+    """QueueHandler que descarta (e conta) registros quando a fila está cheia."""
+
+    def __init__(self, fila):
+        super().__init__(fila)
+        self.descartados = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+def _iniciar_listener(queue_size):
+    """Liga o logger à fila e inicia o QueueListener (uma vez por processo)."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return _listener
+        fila = queue.Queue(maxsize=queue_size)
+        saida = logging.StreamHandler(sys.stdout)
+        saida.setFormatter(JsonFormatter())
+        _listener = QueueListener(fila, saida, respect_handler_level=True)
+        logger.addHandler(DescartandoQueueHandler(fila))
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        _listener.start()
+        atexit.register(_parar_listener)
+        return _listener
+
+
+def _parar_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def _endpoints_debug(valor):
+    if not valor:
+        return frozenset()
+    if isinstance(valor, str):
+        valor = valor.split(',')
+    return frozenset(item.strip() for item in valor if item and item.strip())
+
+
+def _debug_ativo(endpoints, endpoint):
+    return '*' in endpoints or (endpoint is not None and endpoint in endpoints)
+
+
+def _truncar(dados, limite):
+    if dados is None:
+        return None
+    texto = dados.decode('utf-8', errors='replace') if isinstance(dados, bytes) else str(dados)
+    if len(texto) > limite:
+        return texto[:limite] + f'... [{len(texto) - limite} caracteres omitidos]'
+    return texto
+
+
+def _headers_visiveis(headers):
+    return {
+        nome: valor for nome, valor in headers
+        if nome.lower() not in _HEADERS_OCULTOS
+    }
+
+
+def init_request_logging(app):
+    """Registra os hooks de log de requisição na app."""
+    config = app.config
+    if not config.get('REQUEST_LOG_ENABLED', True):
+        return
+
+    sample_rate = float(config.get('REQUEST_LOG_SAMPLE_RATE', 1.0))
+    slow_ms = float(config.get('REQUEST_LOG_SLOW_MS', 1000))
+    body_max = int(config.get('REQUEST_LOG_BODY_MAX_BYTES', 2048))
+    debug_endpoints = _endpoints_debug(config.get('REQUEST_LOG_DEBUG_ENDPOINTS'))
+    _iniciar_listener(int(config.get('REQUEST_LOG_QUEUE_SIZE', DEFAULT_QUEUE_SIZE)))
+
+    @app.before_request
+    def _iniciar_log_requisicao():
+        g.request_log_inicio = time.perf_counter()
+        g.request_id = request.headers.get('X-Request-ID') or uuid4().hex
+        g.request_log_amostrada = sample_rate >= 1 or random.random() < sample_rate
+
+    @app.after_request
+    def _registrar_log_requisicao(response):
+        inicio = g.pop('request_log_inicio', None)
+        if inicio is None:
+            return response
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+        request_id = g.get('request_id')
+        response.headers.setdefault('X-Request-ID', request_id)
+
+        status = response.status_code
+        if not (g.get('request_log_amostrada') or status >= 400 or duracao_ms >= slow_ms):
+            return response
+
+        dados = {
+            "request_id": request_id,
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": status,
+            "duration_ms": round(duracao_ms, 2),
+            "request_bytes": request.content_length,
+            "response_bytes": response.calculate_content_length(),
+            "remote_addr": request.headers.get('X-Forwarded-For', request.remote_addr),
+        }
+
+        debug = _debug_ativo(debug_endpoints, request.endpoint)
+        if debug:
+            dados["view_args"] = request.view_args
+            dados["headers"] = _headers_visiveis(request.headers)
+            if request.method in ('POST', 'PUT', 'PATCH'):
+                # Só o que a view já leu (ou o corpo bruto), limitado em tamanho
+                dados["body"] = _truncar(request.get_data(cache=True), body_max)
+            if status >= 400 and not response.is_streamed:
+                dados["response_body"] = _truncar(response.get_data(), body_max)
+
+        if status >= 500:
+            nivel = logging.ERROR
+        elif status >= 400 or duracao_ms >= slow_ms:
+            nivel = logging.WARNING
+        elif debug:
+            nivel = logging.DEBUG
+        else:
+            nivel = logging.INFO
+        logger.log(nivel, "%s %s %s", request.method, request.path, status, extra={"dados": dados})
+        return response
@@ -0,0 +1,240 @@
+"""
+Retenção e arquivamento de app_logs e poda do histórico da navbar.
+
+app_logs
+--------
+No Postgres a tabela é particionada por mês (RANGE em criado_em, migration
+d8e2f6a0b315): `app_logs_pYYYYMM` para cada mês, `app_logs_legacy` com o
+histórico anterior ao particionamento e `app_logs_default` para o que cair
+fora das partições. Consultas no pai (ex.: usuários ativos do Dashboard
+Global, `listar_logs`) continuam iguais e só leem as partições do período.
+
+`arquivar_app_logs` trata os meses fechados mais antigos que a retenção
+(APP_LOGS_RETENTION_MONTHS): exporta cada mês para
+`app_logs-YYYY-MM.ndjson.gz` em APP_LOGS_ARCHIVE_DIR e o remove — DETACH +
+DROP da partição mensal, ou DELETE do intervalo nas partições legacy/default
+e nos bancos sem particionamento (SQLite em dev/testes), onde o arquivo
+NDJSON é o próprio arquivo morto. O worker de jobs (`flask run-jobs`) roda
+`garantir_particoes` e `arquivar_app_logs` como manutenções periódicas
+(APP_LOGS_PARTITION_INTERVAL_SECONDS, APP_LOGS_ARCHIVE_INTERVAL_SECONDS);
+`flask archive-app-logs` faz o mesmo sob demanda. O dia a dia já consolidado em
+daily_metrics não é afetado, mas um backfill posterior de logins só enxerga
+os meses ainda vivos.
+
+navbar_activities
+-----------------
+`podar_navbar_activities` mantém as N atividades mais recentes por usuário
+com um único DELETE, para um usuário (a cada clique) ou para todos (CLI).
+"""
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select, text
+
+from .extensions import db
+from .models import AppLog, NavbarActivity, brasilia_now
+
+NAVBAR_ACTIVITY_LIMITE = 20
+
+DEFAULT_RETENTION_MONTHS = 12
+DEFAULT_MESES_A_FRENTE = 3
+
+
+def inicio_do_mes(valor):
+    return date(valor.year, valor.month, 1)
+
+
+def proximo_mes(inicio):
+    return (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def nome_particao(inicio):
+    return f"app_logs_p{inicio:%Y%m}"
+
+
+def _postgres():
+    return db.engine.dialect.name == 'postgresql'
+
+
+def app_logs_particionada():
+    """True quando app_logs é uma tabela particionada (Postgres após a migration)."""
+    if not _postgres():
+        return False
+    relkind = db.session.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass('app_logs')")
+    ).scalar()
+    return relkind == 'p'
+
+
+def _particao_existe(nome):
+    return db.session.execute(text("SELECT to_regclass(:nome) IS NOT NULL"), {"nome": nome}).scalar()
+
+
+def _fim_particao_legacy():
+    """Limite superior da partição legacy (meses anteriores já estão cobertos)."""
+    limite = db.session.execute(text(
+        "SELECT pg_get_expr(relpartbound, oid) FROM pg_class WHERE oid = to_regclass('app_logs_legacy')"
+    )).scalar()
+    match = re.search(r"TO \('(\d{4}-\d{2}-\d{2})", limite or '')
+    return date.fromisoformat(match.group(1)) if match else None
+
+
+def garantir_particoes(meses_a_frente=DEFAULT_MESES_A_FRENTE, hoje=None):
+    """
+    Cria as partições mensais do mês corrente até `meses_a_frente` meses
+    adiante. Linhas que já caíram na partição default para o mês são movidas
+    para a nova partição antes do ATTACH. Retorna os nomes criados.
+    """
+    if not app_logs_particionada():
+        return []
+    inicio = inicio_do_mes(hoje or brasilia_now().date())
+    fim_legacy = _fim_particao_legacy()
+    criadas = []
+    for _ in range(meses_a_frente + 1):
+        fim = proximo_mes(inicio)
+        nome = nome_particao(inicio)
+        coberto_pela_legacy = fim_legacy is not None and inicio < fim_legacy
+        if not coberto_pela_legacy and not _particao_existe(nome):
+            limites = {"inicio": inicio, "fim": fim}
+            db.session.execute(text(f"CREATE TABLE {nome} (LIKE app_logs INCLUDING DEFAULTS)"))
+            db.session.execute(text(
+                f"WITH movidos AS ("
+                f" DELETE FROM app_logs_default WHERE criado_em >= :inicio AND criado_em < :fim RETURNING *"
+                f") INSERT INTO {nome} SELECT * FROM movidos"
+            ), limites)
+            db.session.execute(text(
+                f"ALTER TABLE app_logs ATTACH PARTITION {nome} "
+                f"FOR VALUES FROM ('{inicio.isoformat()}') TO ('{fim.isoformat()}')"
+            ))
+            criadas.append(nome)
+        inicio = fim
+    db.session.commit()
+    return criadas
+
+
+def meses_para_arquivar(retencao_meses=DEFAULT_RETENTION_MONTHS, hoje=None):
+    """Inícios dos meses com logs anteriores à janela de retenção."""
+    limite = inicio_do_mes(hoje or brasilia_now().date())
+    for _ in range(retencao_meses):
+        limite = (limite - timedelta(days=1)).replace(day=1)
+
+    mais_antigo = db.session.execute(
+        select(func.min(AppLog.criado_em)).where(AppLog.criado_em < limite)
+    ).scalar()
+    if mais_antigo is None:
+        return []
+    meses = []
+    inicio = inicio_do_mes(mais_antigo)
+    while inicio < limite:
+        meses.append(inicio)
+        inicio = proximo_mes(inicio)
+    return meses
+
+
+def _filtro_mes(inicio):
+    fim = proximo_mes(inicio)
+    return (
+        AppLog.criado_em >= datetime.combine(inicio, datetime.min.time()),
+        AppLog.criado_em < datetime.combine(fim, datetime.min.time()),
+    )
+
+
+def _linha_ndjson(row):
+    return json.dumps(
+        {chave: valor.isoformat() if isinstance(valor, datetime) else valor for chave, valor in row.items()},
+        ensure_ascii=False, default=str
+    )
+
+
+def exportar_mes(inicio, destino, lote=1000):
+    """
+    Exporta os logs do mês para `destino/app_logs-YYYY-MM.ndjson.gz`, lendo em
+    lotes (yield_per). O arquivo é escrito em .tmp e renomeado no final.
+    Retorna (caminho, linhas).
+    """
+    os.makedirs(destino, exist_ok=True)
+    caminho = os.path.join(destino, f"app_logs-{inicio:%Y-%m}.ndjson.gz")
+    temporario = caminho + '.tmp'
+    tabela = AppLog.__table__
+    stmt = (
+        select(tabela)
+        .where(*_filtro_mes(inicio))
+        .order_by(tabela.c.criado_em, tabela.c.id)
+        .execution_options(yield_per=lote)
+    )
+    linhas = 0
+    with gzip.open(temporario, 'wt', encoding='utf-8') as arquivo:
+        for row in db.session.execute(stmt).mappings():
+            arquivo.write(_linha_ndjson(row))
+            arquivo.write('\n')
+            linhas += 1
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(temporario, caminho)
+    return caminho, linhas
+
+
+def descartar_mes(inicio):
+    """Remove os logs do mês: DROP da partição mensal ou DELETE do intervalo."""
+    nome = nome_particao(inicio)
+    if app_logs_particionada() and _particao_existe(nome):
+        removidas = db.session.execute(text(f"SELECT count(*) FROM {nome}")).scalar()
+        db.session.execute(text(f"ALTER TABLE app_logs DETACH PARTITION {nome}"))
+        db.session.execute(text(f"DROP TABLE {nome}"))
+    else:
+        removidas = db.session.execute(
+            AppLog.__table__.delete().where(*_filtro_mes(inicio))
+        ).rowcount
+    db.session.commit()
+    return removidas
+
+
+def arquivar_app_logs(destino, retencao_meses=DEFAULT_RETENTION_MONTHS, dry_run=False, hoje=None):
+    """
+    Exporta e remove os meses fechados fora da retenção. Cada mês só é
+    removido depois que o arquivo dele foi gravado por completo.
+    Retorna [{"mes", "arquivo", "exportadas", "removidas"}].
+    """
+    resultado = []
+    for inicio in meses_para_arquivar(retencao_meses, hoje=hoje):
+        if dry_run:
+            total = db.session.execute(
+                select(func.count(AppLog.id)).where(*_filtro_mes(inicio))
+            ).scalar()
+            resultado.append({"mes": f"{inicio:%Y-%m}", "arquivo": None, "exportadas": total, "removidas": 0})
+            continue
+        caminho, exportadas = exportar_mes(inicio, destino)
+        removidas = descartar_mes(inicio)
+        resultado.append({"mes": f"{inicio:%Y-%m}", "arquivo": caminho, "exportadas": exportadas, "removidas": removidas})
+    return resultado
+
+
+def podar_navbar_activities(usuario_id=None, manter=NAVBAR_ACTIVITY_LIMITE):
+    """
+    Mantém as `manter` atividades mais recentes (por usuário) em um único
+    DELETE. Sem `usuario_id`, poda todos os usuários. Não faz commit.
+    """
+    tabela = NavbarActivity.__table__
+    if usuario_id is not None:
+        recentes = (
+            select(tabela.c.id)
+            .where(tabela.c.usuario_id == usuario_id)
+            .order_by(tabela.c.criado_em.desc(), tabela.c.id.desc())
+            .limit(manter)
+        )
+        stmt = tabela.delete().where(
+            tabela.c.usuario_id == usuario_id,
+            tabela.c.id.not_in(recentes.scalar_subquery())
+        )
+    else:
+        posicao = func.row_number().over(
+            partition_by=tabela.c.usuario_id,
+            order_by=(tabela.c.criado_em.desc(), tabela.c.id.desc())
+        ).label('posicao')
+        ranqueadas = select(tabela.c.id, posicao).subquery()
+        excedentes = select(ranqueadas.c.id).where(ranqueadas.c.posicao > manter)
+        stmt = tabela.delete().where(tabela.c.id.in_(excedentes))
+    return db.session.execute(stmt).rowcount
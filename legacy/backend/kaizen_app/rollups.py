@@ -0,0 +1,339 @@
+"""
+Rollup diário de métricas (tabela daily_metrics).
+
+O rollup é mantido de forma incremental por um listener `after_flush`: toda
+submissão, login, pedido e aprovação/rejeição gravados pela sessão geram
+deltas por (restaurante, dia, métrica) que são aplicados com um upsert na
+mesma transação. Os relatórios leem O(dias) linhas em vez de varrer os eventos.
+
+Métricas:
+- submissoes.<STATUS>: submissões não arquivadas, pelo dia da submissão e
+  status atual
+- logins: registros de login em app_logs
+- pedidos: pedidos existentes, pelo dia do pedido
+- pedidos.APROVADO / pedidos.REJEITADO: pedidos com esse status atual, pelo
+  dia do pedido (pedidos não guardam a data da transição; assim o backfill
+  reproduz exatamente os valores incrementais)
+
+Submissões e pedidos contam no restaurante do usuário, como os dashboards
+faziam antes do rollup; logins no restaurante do registro.
+
+Escritas em massa que não passam pelo ORM (query.delete(), CASCADE no banco)
+não geram deltas — a não ser que apliquem os seus com
+`aplicar_deltas_por_origem`, como as transições e as exclusões de pedidos em
+lote; `reconstruir_metricas_diarias` recalcula o período a partir das tabelas
+de origem.
+"""
+from collections import defaultdict
+from datetime import date, datetime
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .extensions import db
+from .models import (
+    AppLog,
+    DailyMetric,
+    Pedido,
+    PedidoStatus,
+    Submissao,
+    Usuario,
+    brasilia_now,
+)
+
+METRICA_LOGINS = 'logins'
+METRICA_PEDIDOS = 'pedidos'
+PREFIXO_SUBMISSOES = 'submissoes.'
+PREFIXO_PEDIDOS = 'pedidos.'
+SEM_RESTAURANTE = 0
+
+_STATUS_PEDIDO_RASTREADOS = (PedidoStatus.APROVADO, PedidoStatus.REJEITADO)
+
+
+def metrica_submissoes(status):
+    return f"{PREFIXO_SUBMISSOES}{status.value}"
+
+
+def metrica_pedidos(status):
+    return f"{PREFIXO_PEDIDOS}{status.value}"
+
+
+def _dia(value):
+    if value is None:
+        return brasilia_now().date()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _valor_anterior(history, atual):
+    """Valor antes do flush; None quando não havia valor carregado."""
+    if history.deleted:
+        return history.deleted[0]
+    if history.added:
+        return None
+    return atual
+
+
+# ---------------------------------------------------------------------------
+# Escrita
+# ---------------------------------------------------------------------------
+
+def aplicar_deltas(connection, deltas):
+    """
+    Soma `deltas` ({(restaurante_id, dia, metrica): delta}) na tabela
+    daily_metrics com upsert (ON CONFLICT) na conexão informada.
+    """
+    agora = brasilia_now()
+    rows = [
+        {
+            'restaurante_id': restaurante_id or SEM_RESTAURANTE,
+            'dia': dia,
+            'metrica': metrica,
+            'valor': delta,
+            'atualizado_em': agora,
+        }
+        for (restaurante_id, dia, metrica), delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+
+    table = DailyMetric.__table__
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['restaurante_id', 'dia', 'metrica'],
+            set_={
+                'valor': table.c.valor + stmt.excluded.valor,
+                'atualizado_em': stmt.excluded.atualizado_em,
+            }
+        )
+        connection.execute(stmt, rows)
+        return
+
+    for row in rows:
+        result = connection.execute(
+            table.update()
+            .where(
+                table.c.restaurante_id == row['restaurante_id'],
+                table.c.dia == row['dia'],
+                table.c.metrica == row['metrica'],
+            )
+            .values(valor=table.c.valor + row['valor'], atualizado_em=row['atualizado_em'])
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert(), [row])
+
+
+def deltas_pedido(usuario_id, data_pedido, status, delta):
+    """Deltas de um pedido: `pedidos` e, se aprovado/rejeitado, pedidos.<STATUS>."""
+    dia = _dia(data_pedido)
+    deltas = [(usuario_id, dia, METRICA_PEDIDOS, delta)]
+    if status in _STATUS_PEDIDO_RASTREADOS:
+        deltas.append((usuario_id, dia, metrica_pedidos(status), delta))
+    return deltas
+
+
+def _coletar_deltas(session):
+    deltas = defaultdict(int)
+    por_usuario = []  # (usuario_id, dia, metrica, delta)
+
+    for obj in session.new:
+        if isinstance(obj, AppLog):
+            if obj.acao == 'login':
+                deltas[(obj.restaurante_id, _dia(obj.criado_em), METRICA_LOGINS)] += 1
+        elif isinstance(obj, Submissao):
+            if not obj.arquivada and obj.status is not None:
+                por_usuario.append((obj.usuario_id, _dia(obj.data_submissao), metrica_submissoes(obj.status), 1))
+        elif isinstance(obj, Pedido):
+            por_usuario.extend(deltas_pedido(obj.usuario_id, obj.data_pedido, obj.status, 1))
+
+    for obj in session.dirty:
+        if isinstance(obj, Submissao):
+            attrs = inspect(obj).attrs
+            historicos = (
+                attrs.arquivada.history, attrs.status.history,
+                attrs.data_submissao.history, attrs.usuario_id.history,
+            )
+            if not any(h.has_changes() for h in historicos):
+                continue
+            arquivada_antes = _valor_anterior(attrs.arquivada.history, obj.arquivada)
+            status_antes = _valor_anterior(attrs.status.history, obj.status)
+            data_antes = _valor_anterior(attrs.data_submissao.history, obj.data_submissao)
+            usuario_antes = _valor_anterior(attrs.usuario_id.history, obj.usuario_id)
+            if arquivada_antes is False and status_antes is not None:
+                por_usuario.append((usuario_antes, _dia(data_antes), metrica_submissoes(status_antes), -1))
+            if not obj.arquivada and obj.status is not None:
+                por_usuario.append((obj.usuario_id, _dia(obj.data_submissao), metrica_submissoes(obj.status), 1))
+        elif isinstance(obj, Pedido):
+            attrs = inspect(obj).attrs
+            historicos = (attrs.status.history, attrs.data_pedido.history, attrs.usuario_id.history)
+            if not any(h.has_changes() for h in historicos):
+                continue
+            status_antes = _valor_anterior(attrs.status.history, obj.status)
+            data_antes = _valor_anterior(attrs.data_pedido.history, obj.data_pedido)
+            usuario_antes = _valor_anterior(attrs.usuario_id.history, obj.usuario_id)
+            if data_antes is not None:
+                por_usuario.extend(deltas_pedido(usuario_antes, data_antes, status_antes, -1))
+                por_usuario.extend(deltas_pedido(obj.usuario_id, obj.data_pedido, obj.status, 1))
+
+    for obj in session.deleted:
+        if isinstance(obj, Submissao):
+            if obj.arquivada is False and obj.status is not None:
+                por_usuario.append((obj.usuario_id, _dia(obj.data_submissao), metrica_submissoes(obj.status), -1))
+        elif isinstance(obj, Pedido):
+            por_usuario.extend(deltas_pedido(obj.usuario_id, obj.data_pedido, obj.status, -1))
+
+    return deltas, por_usuario
+
+
+def _resolver_restaurantes(connection, coluna_id, coluna_restaurante, ids):
+    ids = {i for i in ids if i is not None}
+    if not ids:
+        return {}
+    rows = connection.execute(select(coluna_id, coluna_restaurante).where(coluna_id.in_(ids)))
+    return {row[0]: row[1] for row in rows}
+
+
+def aplicar_deltas_por_origem(connection, deltas=None, por_usuario=()):
+    """
+    Como `aplicar_deltas`, resolvendo o restaurante (o do usuário) dos deltas
+    indexados por usuário ((usuario_id, dia, metrica, delta)). Usado pelo
+    listener e pelas escritas em massa que não passam pelo flush.
+    """
+    deltas = defaultdict(int, deltas or {})
+    restaurantes_usuario = _resolver_restaurantes(
+        connection, Usuario.id, Usuario.restaurante_id, [p[0] for p in por_usuario]
+    )
+    for usuario_id, dia, metrica, delta in por_usuario:
+        deltas[(restaurantes_usuario.get(usuario_id), dia, metrica)] += delta
+
+    aplicar_deltas(connection, deltas)
+
+
+@event.listens_for(Session, 'after_flush')
+def _atualizar_rollup_apos_flush(session, flush_context):
+    deltas, por_usuario = _coletar_deltas(session)
+    if not (deltas or por_usuario):
+        return
+    aplicar_deltas_por_origem(session.connection(), deltas, por_usuario)
+
+
+# ---------------------------------------------------------------------------
+# Backfill
+# ---------------------------------------------------------------------------
+
+def _filtrar_periodo(query, coluna, inicio, fim):
+    if inicio is not None:
+        query = query.where(func.date(coluna) >= inicio.isoformat())
+    if fim is not None:
+        query = query.where(func.date(coluna) <= fim.isoformat())
+    return query
+
+
+def reconstruir_metricas_diarias(inicio=None, fim=None):
+    """
+    Recalcula daily_metrics a partir de submissoes, app_logs e pedidos.
+
+    Apaga as linhas do período [inicio, fim] (ou de todo o histórico) e as
+    recria com agregações agrupadas por restaurante e dia. A migração que cria
+    a tabela faz o mesmo backfill inicial em SQL.
+    Retorna a quantidade de linhas gravadas.
+    """
+    deltas = defaultdict(int)
+
+    submissoes = _filtrar_periodo(
+        select(
+            Usuario.restaurante_id,
+            func.date(Submissao.data_submissao),
+            Submissao.status,
+            func.count(Submissao.id)
+        ).join(Usuario, Submissao.usuario_id == Usuario.id).where(Submissao.arquivada.is_(False)),
+        Submissao.data_submissao, inicio, fim
+    ).group_by(Usuario.restaurante_id, func.date(Submissao.data_submissao), Submissao.status)
+    for restaurante_id, dia, status, total in db.session.execute(submissoes):
+        deltas[(restaurante_id, _dia(dia), metrica_submissoes(status))] += total
+
+    logins = _filtrar_periodo(
+        select(
+            AppLog.restaurante_id,
+            func.date(AppLog.criado_em),
+            func.count(AppLog.id)
+        ).where(AppLog.acao == 'login'),
+        AppLog.criado_em, inicio, fim
+    ).group_by(AppLog.restaurante_id, func.date(AppLog.criado_em))
+    for restaurante_id, dia, total in db.session.execute(logins):
+        deltas[(restaurante_id, _dia(dia), METRICA_LOGINS)] += total
+
+    pedidos = _filtrar_periodo(
+        select(
+            Usuario.restaurante_id,
+            func.date(Pedido.data_pedido),
+            Pedido.status,
+            func.count(Pedido.id)
+        ).join(Usuario, Pedido.usuario_id == Usuario.id),
+        Pedido.data_pedido, inicio, fim
+    ).group_by(Usuario.restaurante_id, func.date(Pedido.data_pedido), Pedido.status)
+    for restaurante_id, dia, status, total in db.session.execute(pedidos):
+        deltas[(restaurante_id, _dia(dia), METRICA_PEDIDOS)] += total
+        if status in _STATUS_PEDIDO_RASTREADOS:
+            deltas[(restaurante_id, _dia(dia), metrica_pedidos(status))] += total
+
+    delete = DailyMetric.__table__.delete()
+    if inicio is not None:
+        delete = delete.where(DailyMetric.dia >= inicio)
+    if fim is not None:
+        delete = delete.where(DailyMetric.dia <= fim)
+    connection = db.session.connection()
+    connection.execute(delete)
+    aplicar_deltas(connection, deltas)
+    db.session.commit()
+    return sum(1 for value in deltas.values() if value)
+
+
+# ---------------------------------------------------------------------------
+# Leitura
+# ---------------------------------------------------------------------------
+
+def _filtro_metricas(query, metricas):
+    if isinstance(metricas, str):
+        if metricas.endswith('.'):
+            return query.where(DailyMetric.metrica.like(f"{metricas}%"))
+        return query.where(DailyMetric.metrica == metricas)
+    return query.where(DailyMetric.metrica.in_(list(metricas)))
+
+
+def somar_por_dia(metricas, inicio=None, fim=None, restaurante_id=None):
+    """
+    Soma as métricas por dia. `metricas` pode ser um nome, um prefixo
+    terminado em '.' (ex.: PREFIXO_SUBMISSOES) ou uma lista de nomes.
+    Retorna {date: total}.
+    """
+    query = _filtro_metricas(select(DailyMetric.dia, func.sum(DailyMetric.valor)), metricas)
+    if inicio is not None:
+        query = query.where(DailyMetric.dia >= inicio)
+    if fim is not None:
+        query = query.where(DailyMetric.dia <= fim)
+    if restaurante_id is not None:
+        query = query.where(DailyMetric.restaurante_id == restaurante_id)
+    rows = db.session.execute(query.group_by(DailyMetric.dia))
+    return {_dia(dia): int(total or 0) for dia, total in rows}
+
+
+def somar_por_metrica(metricas, inicio=None, fim=None, restaurante_id=None):
+    """Soma o período por métrica. Retorna {metrica: total}."""
+    query = _filtro_metricas(select(DailyMetric.metrica, func.sum(DailyMetric.valor)), metricas)
+    if inicio is not None:
+        query = query.where(DailyMetric.dia >= inicio)
+    if fim is not None:
+        query = query.where(DailyMetric.dia <= fim)
+    if restaurante_id is not None:
+        query = query.where(DailyMetric.restaurante_id == restaurante_id)
+    rows = db.session.execute(query.group_by(DailyMetric.metrica))
+    return {metrica: int(total or 0) for metrica, total in rows}
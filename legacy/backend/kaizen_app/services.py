@@ -1,22 +1,22 @@
-from .models import Usuario, Restaurante, UserRoles, Item, Area, Fornecedor, FornecedorItemCodigo, Estoque, Cotacao, CotacaoStatus, CotacaoItem, Pedido, PedidoStatus, Lista, ListaMaeItem, ListaItemRef, Submissao, SubmissaoStatus, SugestaoItem, SugestaoStatus, ListaRapida, ListaRapidaItem, StatusListaRapida, PrioridadeItem, ConviteToken, ConviteRestaurante, Checklist, ChecklistStatus, ChecklistItem, POPConfiguracao, POPCategoria, POPTemplate, POPLista, POPListaTarefa, POPExecucao, POPExecucaoItem, TipoVerificacao, CriticidadeTarefa, RecorrenciaLista, StatusExecucao, Notificacao, TipoNotificacao, AppLog, ConviteFornecedor, ItemPrecoHistorico, brasilia_now
+from .models import Usuario, Restaurante, UserRoles, Item, Area, Fornecedor, FornecedorItemCodigo, Estoque, Cotacao, CotacaoStatus, CotacaoItem, Pedido, PedidoStatus, Lista, ListaMaeItem, ListaItemRef, Submissao, SubmissaoStatus, SugestaoItem, SugestaoStatus, ListaRapida, ListaRapidaItem, StatusListaRapida, PrioridadeItem, ConviteToken, ConviteRestaurante, Checklist, ChecklistStatus, ChecklistItem, POPConfiguracao, POPCategoria, POPTemplate, POPLista, POPListaTarefa, POPExecucao, POPExecucaoItem, TipoVerificacao, CriticidadeTarefa, RecorrenciaLista, StatusExecucao, Notificacao, TipoNotificacao, AppLog, ConviteFornecedor, ItemPrecoHistorico, Job, JobStatus, brasilia_now, normalize_item_nome
 from .extensions import db
-from . import repositories
+from . import audit_log, bulk_export, catalog_search, instrumentation, jobs, photo_storage, repositories, retention, rollups, session_cache
+from .cache import get_cache
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token, get_jwt
 from uuid import uuid4
 from datetime import datetime, timedelta, timezone
-import time
 from io import StringIO
 import csv
-from sqlalchemy import func, or_
+from sqlalchemy import case, delete, func, insert, or_, select, true, update
 from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError
 from flask import current_app, request
 import re
+import json
+import base64
 import unicodedata
-
-_SUPER_DASHBOARD_CACHE = {}
-_SUPER_DASHBOARD_CACHE_TTL_SECONDS = 60
+import itertools
 
 def _is_admin_or_super_admin(usuario):
     """Verifica se o usuário possui privilégios de administrador."""
@@ -25,6 +25,9 @@ def _is_admin_or_super_admin(usuario):
 def _get_super_dashboard_cache_key(restaurante_id, period):
     return f"{restaurante_id or 'all'}:{period}"
 
+def _get_super_dashboard_cache():
+    return get_cache('super_dashboard')
+
 def _get_restaurante_padrao_id():
     restaurante = Restaurante.query.filter_by(slug='kzn', deletado=False).first()
     if restaurante:
@@ -113,7 +116,7 @@ def log_event(acao, entidade=None, entidade_id=None, mensagem=None, usuario_id=N
         except Exception:
             pass
 
-        log = AppLog(
+        dados = dict(
             acao=acao,
             entidade=entidade,
             entidade_id=entidade_id,
@@ -125,13 +128,90 @@ def log_event(acao, entidade=None, entidade_id=None, mensagem=None, usuario_id=N
             ip_address=ip_address,
             user_agent=user_agent
         )
+        if audit_log.modo_assincrono():
+            # Gravado em lote pelo gravador após o commit (ver audit_log)
+            dados['criado_em'] = brasilia_now()
+            audit_log.registrar(db.session, dados)
+            return None
+
+        log = AppLog(**dados)
         db.session.add(log)
         return log
     except Exception as e:
         current_app.logger.warning(f"[LOG] Falha ao registrar log: {str(e)}")
         return None
 
+_LOGS_PAGE_LIMIT_MAX = 500
+
+_LOGS_CONTAGEM_MODOS = ('estimated', 'exact', 'none')
+
+
+def _encode_logs_cursor(criado_em, log_id):
+    raw = json.dumps([criado_em.isoformat(), log_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def _decode_logs_cursor(cursor):
+    try:
+        criado_em, log_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(criado_em), int(log_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Cursor inválido.")
+
+
+def _estimar_total(query):
+    """
+    Total aproximado pelo planner do Postgres (EXPLAIN), sem varrer a tabela.
+    Em outros bancos (SQLite nos testes/dev) usa o COUNT exato.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return query.order_by(None).count(), False
+    compilado = query.order_by(None).statement.compile(dialect=db.engine.dialect)
+    plano = db.session.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compilado}", compilado.params
+    ).scalar()
+    if isinstance(plano, str):
+        plano = json.loads(plano)
+    return int(plano[0]["Plan"]["Plan Rows"]), True
+
+
+def _carregar_relacionados_logs(logs):
+    """Usuários (autor e impersonador) e restaurantes da página: uma query cada."""
+    usuario_ids = {log.usuario_id for log in logs} | {log.impersonator_id for log in logs}
+    usuario_ids.discard(None)
+    restaurante_ids = {log.restaurante_id for log in logs if log.restaurante_id is not None}
+
+    usuarios = {}
+    if usuario_ids:
+        for usuario_id, nome, email, role in db.session.query(
+            Usuario.id, Usuario.nome, Usuario.email, Usuario.role
+        ).filter(Usuario.id.in_(usuario_ids)):
+            usuarios[usuario_id] = {
+                "id": usuario_id,
+                "nome": nome,
+                "email": email,
+                "role": role.value if hasattr(role, 'value') else role,
+            }
+
+    restaurantes = {}
+    if restaurante_ids:
+        for restaurante_id, nome, slug in db.session.query(
+            Restaurante.id, Restaurante.nome, Restaurante.slug
+        ).filter(Restaurante.id.in_(restaurante_ids)):
+            restaurantes[restaurante_id] = {"id": restaurante_id, "nome": nome, "slug": slug}
+
+    return usuarios, restaurantes
+
+
 def listar_logs(filters):
+    """
+    Lista logs de auditoria, do mais recente ao mais antigo.
+
+    Paginação por cursor em (criado_em, id): `cursor` vem de `next_cursor` da
+    página anterior; sem cursor, `offset` continua aceito (legado). `count`
+    controla o total: 'estimated' (padrão; estimativa do planner no
+    Postgres), 'exact' (COUNT) ou 'none' (não calcula).
+    """
     query = AppLog.query
 
     restaurante_id = filters.get('restaurante_id')
@@ -158,37 +238,61 @@ def listar_logs(filters):
     if end_date:
         query = query.filter(AppLog.criado_em <= end_date)
 
-    total = query.count()
-
-    limit = filters.get('limit', 200)
-    offset = filters.get('offset', 0)
-    query = query.order_by(AppLog.criado_em.desc()).offset(offset).limit(limit)
-
+    cursor = filters.get('cursor')
+    try:
+        posicao = _decode_logs_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    modo_contagem = filters.get('count') or 'estimated'
+    if modo_contagem not in _LOGS_CONTAGEM_MODOS:
+        return {"error": f"count deve ser um de: {', '.join(_LOGS_CONTAGEM_MODOS)}."}, 400
+
+    total, total_estimado = None, False
+    if modo_contagem == 'exact':
+        total = query.order_by(None).count()
+    elif modo_contagem == 'estimated':
+        total, total_estimado = _estimar_total(query)
+
+    limit = max(1, min(int(filters.get('limit') or 200), _LOGS_PAGE_LIMIT_MAX))
+    if posicao:
+        criado_em, log_id = posicao
+        query = query.filter(or_(
+            AppLog.criado_em < criado_em,
+            (AppLog.criado_em == criado_em) & (AppLog.id < log_id)
+        ))
+    query = query.order_by(AppLog.criado_em.desc(), AppLog.id.desc())
+    if not posicao and filters.get('offset'):
+        query = query.offset(filters['offset'])
+
+    pagina = query.limit(limit + 1).all()
+    has_more = len(pagina) > limit
+    pagina = pagina[:limit]
+
+    usuarios, restaurantes = _carregar_relacionados_logs(pagina)
     logs = []
-    for log in query.all():
+    for log in pagina:
         log_dict = log.to_dict()
-        if log.usuario:
-            log_dict['usuario'] = {
-                "id": log.usuario.id,
-                "nome": log.usuario.nome,
-                "email": log.usuario.email,
-                "role": log.usuario.role.value if hasattr(log.usuario.role, 'value') else log.usuario.role,
-            }
-        if log.restaurante:
-            log_dict['restaurante'] = {
-                "id": log.restaurante.id,
-                "nome": log.restaurante.nome,
-                "slug": log.restaurante.slug,
-            }
-        if log.impersonator:
+        if log.usuario_id in usuarios:
+            log_dict['usuario'] = usuarios[log.usuario_id]
+        if log.restaurante_id in restaurantes:
+            log_dict['restaurante'] = restaurantes[log.restaurante_id]
+        if log.impersonator_id in usuarios:
+            impersonator = usuarios[log.impersonator_id]
             log_dict['impersonator'] = {
-                "id": log.impersonator.id,
-                "nome": log.impersonator.nome,
-                "email": log.impersonator.email,
+                "id": impersonator["id"],
+                "nome": impersonator["nome"],
+                "email": impersonator["email"],
             }
         logs.append(log_dict)
 
-    return {"logs": logs, "total": total}, 200
+    return {
+        "logs": logs,
+        "total": total,
+        "total_estimado": total_estimado,
+        "next_cursor": _encode_logs_cursor(pagina[-1].criado_em, pagina[-1].id) if has_more else None,
+        "has_more": has_more,
+    }, 200
 
 def register_user(data):
     """Cria um novo usuário no sistema."""
@@ -330,6 +434,7 @@ def iniciar_impersonacao(super_admin_id, usuario_id):
         metadata={"impersonated_by": super_admin.id},
         impersonator_id=super_admin.id
     )
+    session_cache.marcar_alteracao(db.session, usuario.id)
     db.session.commit()
 
     return {"access_token": access_token}, 200
@@ -364,6 +469,7 @@ def encerrar_impersonacao(super_admin_id):
         usuario_id=super_admin.id,
         impersonator_id=super_admin.id
     )
+    session_cache.marcar_alteracao(db.session, super_admin.id)
     db.session.commit()
 
     return {"access_token": access_token}, 200
@@ -862,7 +968,7 @@ def create_item_fornecedor(fornecedor_id, data, restaurante_id=None):
 
     item_existente = Item.query.filter(
         Item.fornecedor_id == fornecedor_id,
-        func.lower(Item.nome) == func.lower(nome)
+        _filtro_nome_igual(Item, nome)
     ).first()
     if item_existente:
         return {"error": f"Item '{nome}' já existe no catálogo deste fornecedor."}, 409
@@ -925,7 +1031,7 @@ def update_item_fornecedor(item_id, data, restaurante_id=None):
         nome = data['nome'].strip()
         duplicado = Item.query.filter(
             Item.fornecedor_id == item.fornecedor_id,
-            func.lower(Item.nome) == func.lower(nome),
+            _filtro_nome_igual(Item, nome),
             Item.id != item_id
         ).first()
         if duplicado:
@@ -1016,7 +1122,46 @@ def _normalize_unidade_csv(value):
     return mapping.get(upper, raw)
 
 
+_IMPORTACAO_CHUNK_SIZE = 500
+
+
+def _em_lotes(valores, tamanho=_IMPORTACAO_CHUNK_SIZE):
+    valores = list(valores)
+    for inicio in range(0, len(valores), tamanho):
+        yield valores[inicio:inicio + tamanho]
+
+
+def _carregar_itens_por_nome(nomes):
+    """
+    Pré-carrega itens (todos os fornecedores) pelo nome normalizado.
+
+    Retorna {nome_normalizado: {"ref", "id", "unidade_medida", "fornecedor_id"}};
+    em nomes que colidem após a normalização prevalece o menor id.
+    """
+    itens = {}
+    for lote in _em_lotes({normalize_item_nome(nome) for nome in nomes}):
+        rows = db.session.query(
+            Item.id, Item.nome_normalizado, Item.unidade_medida, Item.fornecedor_id
+        ).filter(Item.nome_normalizado.in_(lote)).order_by(Item.id).all()
+        for item_id, nome_normalizado, unidade, item_fornecedor_id in rows:
+            itens.setdefault(nome_normalizado, {
+                "ref": item_id,
+                "id": item_id,
+                "unidade_medida": unidade,
+                "fornecedor_id": item_fornecedor_id,
+            })
+    return itens
+
+
 def importar_itens_fornecedor_csv(fornecedor_id, csv_content, restaurante_id=None):
+    """
+    Importa itens e códigos de um fornecedor a partir de CSV (codigo;descricao;unidade).
+
+    O CSV é lido em uma passada; itens (por nome normalizado) e códigos
+    existentes são pré-carregados em dicionários e os conflitos resolvidos em memória, linha a linha, com a
+    mesma semântica da importação sequencial. As escritas saem em lote no final
+    (INSERT/UPDATE executemany), em vez de até quatro queries por linha.
+    """
     fornecedor = Fornecedor.query.filter_by(id=fornecedor_id).first()
     if not fornecedor:
         return {"error": "Fornecedor não encontrado."}, 404
@@ -1026,7 +1171,6 @@ def importar_itens_fornecedor_csv(fornecedor_id, csv_content, restaurante_id=Non
     if not csv_content or not csv_content.strip():
         return {"error": "Conteúdo CSV vazio."}, 400
 
-    reader = csv.reader(StringIO(csv_content), delimiter=';')
     itens_criados = 0
     itens_atualizados = 0
     codigos_criados = 0
@@ -1035,7 +1179,9 @@ def importar_itens_fornecedor_csv(fornecedor_id, csv_content, restaurante_id=Non
     linhas_sem_codigo = 0
     erros = []
 
-    for idx, row in enumerate(reader, start=1):
+    # 1) Parse em uma única passada
+    linhas = []
+    for idx, row in enumerate(csv.reader(StringIO(csv_content), delimiter=';'), start=1):
         if not row:
             linhas_ignoradas += 1
             continue
@@ -1051,75 +1197,119 @@ def importar_itens_fornecedor_csv(fornecedor_id, csv_content, restaurante_id=Non
         if codigo.lower() == 'codigo' or descricao.lower() == 'descricao':
             continue
 
-        unidade_normalizada = _normalize_unidade_csv(unidade)
-
-        item = Item.query.filter(func.lower(Item.nome) == func.lower(descricao)).first()
+        linhas.append((idx, codigo, descricao, _normalize_unidade_csv(unidade)))
+
+    # 2) Pré-carga de itens (por nome) e códigos do fornecedor
+    itens_por_nome = _carregar_itens_por_nome({descricao for _, _, descricao, _ in linhas})
+    codigo_por_item = {}
+    item_por_codigo = {}
+    for codigo_id, item_id, codigo in db.session.query(
+        FornecedorItemCodigo.id, FornecedorItemCodigo.item_id, FornecedorItemCodigo.codigo
+    ).filter(FornecedorItemCodigo.fornecedor_id == fornecedor_id):
+        codigo_por_item[item_id] = {"id": codigo_id, "codigo": codigo}
+        item_por_codigo[codigo] = item_id
+
+    # 3) Resolução em memória, na ordem das linhas
+    novos_itens = []
+    unidades_atualizadas = {}
+    novos_codigos = []
+    codigos_alterados = []
+
+    for idx, codigo, descricao, unidade_normalizada in linhas:
+        chave = normalize_item_nome(descricao)
+        item = itens_por_nome.get(chave)
         if item:
-            if item.fornecedor_id != fornecedor_id:
+            if item["fornecedor_id"] != fornecedor_id:
                 erros.append({
                     "linha": idx,
                     "descricao": descricao,
                     "error": "Item já pertence a outro fornecedor."
                 })
                 continue
-            if unidade_normalizada and item.unidade_medida != unidade_normalizada:
-                item.unidade_medida = unidade_normalizada
+            if unidade_normalizada and item["unidade_medida"] != unidade_normalizada:
+                item["unidade_medida"] = unidade_normalizada
+                if item["id"] is not None:
+                    unidades_atualizadas[item["id"]] = unidade_normalizada
                 itens_atualizados += 1
         else:
-            item = Item(
-                nome=descricao,
-                unidade_medida=unidade_normalizada,
-                fornecedor_id=fornecedor_id
-            )
-            db.session.add(item)
-            db.session.flush()
+            item = {
+                "ref": ("novo", chave),
+                "id": None,
+                "nome": descricao,
+                "unidade_medida": unidade_normalizada,
+                "fornecedor_id": fornecedor_id,
+            }
+            itens_por_nome[chave] = item
+            novos_itens.append(item)
             itens_criados += 1
 
         if not codigo:
             linhas_sem_codigo += 1
             continue
 
-        codigo_existente = FornecedorItemCodigo.query.filter_by(
-            fornecedor_id=fornecedor_id,
-            item_id=item.id
-        ).first()
+        ref = item["ref"]
+        dono_codigo = item_por_codigo.get(codigo)
+        if dono_codigo is not None and dono_codigo != ref:
+            erros.append({
+                "linha": idx,
+                "descricao": descricao,
+                "error": f"Código {codigo} já está associado a outro item."
+            })
+            continue
 
+        codigo_existente = codigo_por_item.get(ref)
         if codigo_existente:
-            if codigo_existente.codigo != codigo:
-                codigo_conflito = FornecedorItemCodigo.query.filter_by(
-                    fornecedor_id=fornecedor_id,
-                    codigo=codigo
-                ).first()
-                if codigo_conflito and codigo_conflito.item_id != item.id:
-                    erros.append({
-                        "linha": idx,
-                        "descricao": descricao,
-                        "error": f"Código {codigo} já está associado a outro item."
-                    })
-                    continue
-                codigo_existente.codigo = codigo
+            if codigo_existente["codigo"] != codigo:
+                item_por_codigo.pop(codigo_existente["codigo"], None)
+                item_por_codigo[codigo] = ref
+                codigo_existente["codigo"] = codigo
+                if codigo_existente["id"] is not None:
+                    # Mantém a ordem das alterações: um código liberado por uma
+                    # linha anterior pode ser reaproveitado por outro item.
+                    codigos_alterados.append({"id": codigo_existente["id"], "codigo": codigo})
                 codigos_atualizados += 1
         else:
-            codigo_conflito = FornecedorItemCodigo.query.filter_by(
-                fornecedor_id=fornecedor_id,
-                codigo=codigo
-            ).first()
-            if codigo_conflito and codigo_conflito.item_id != item.id:
-                erros.append({
-                    "linha": idx,
-                    "descricao": descricao,
-                    "error": f"Código {codigo} já está associado a outro item."
-                })
-                continue
-            novo_codigo = FornecedorItemCodigo(
-                fornecedor_id=fornecedor_id,
-                item_id=item.id,
-                codigo=codigo
-            )
-            db.session.add(novo_codigo)
+            novo_codigo = {"id": None, "item": item, "codigo": codigo}
+            codigo_por_item[ref] = novo_codigo
+            item_por_codigo[codigo] = ref
+            novos_codigos.append(novo_codigo)
             codigos_criados += 1
 
+    # 4) Escrita em lote
+    catalog_search.marcar_alteracao(db.session, fornecedor_id=fornecedor_id)
     try:
+        if novos_itens:
+            for lote in _em_lotes(novos_itens):
+                rows = db.session.execute(
+                    insert(Item).returning(Item.id, Item.nome),
+                    [
+                        {
+                            "nome": item["nome"],
+                            "unidade_medida": item["unidade_medida"],
+                            "fornecedor_id": fornecedor_id,
+                        }
+                        for item in lote
+                    ]
+                ).all()
+                ids_por_nome = {nome: item_id for item_id, nome in rows}
+                for item in lote:
+                    item["id"] = ids_por_nome[item["nome"]]
+        if unidades_atualizadas:
+            db.session.execute(update(Item), [
+                {"id": item_id, "unidade_medida": unidade}
+                for item_id, unidade in unidades_atualizadas.items()
+            ])
+        if codigos_alterados:
+            db.session.execute(update(FornecedorItemCodigo), codigos_alterados)
+        if novos_codigos:
+            db.session.execute(insert(FornecedorItemCodigo), [
+                {
+                    "fornecedor_id": fornecedor_id,
+                    "item_id": novo_codigo["item"]["id"],
+                    "codigo": novo_codigo["codigo"],
+                }
+                for novo_codigo in novos_codigos
+            ])
         db.session.commit()
     except IntegrityError:
         db.session.rollback()
@@ -1160,7 +1350,7 @@ def importar_itens_fornecedor_texto(fornecedor_id, texto, restaurante_id=None):
         if normalize_item_nome(nome) == 'produto':
             continue
 
-        item = Item.query.filter(func.lower(Item.nome) == func.lower(nome)).first()
+        item = Item.query.filter(_filtro_nome_igual(Item, nome)).first()
         if item:
             if item.fornecedor_id != fornecedor_id:
                 erros.append({
@@ -1530,6 +1720,8 @@ def get_pedidos_fornecedor_por_lista(fornecedor_id, restaurante_id=None):
 def get_pedidos_fornecedor_consolidado(fornecedor_id, restaurante_id=None):
     """
     Retorna todos os pedidos de um fornecedor consolidados (sem separação por lista).
+    Pedidos, itens e usuários vêm em uma única consulta com JOIN; o total por
+    item é somado no banco (GROUP BY).
     """
     fornecedor = Fornecedor.query.filter_by(id=fornecedor_id)
     if restaurante_id is not None:
@@ -1538,40 +1730,85 @@ def get_pedidos_fornecedor_consolidado(fornecedor_id, restaurante_id=None):
     if not fornecedor:
         return {"error": "Fornecedor não encontrado"}, 404
 
-    # Busca todos os itens desse fornecedor
-    itens_fornecedor = Item.query.filter_by(fornecedor_id=fornecedor_id).all()
-
-    pedidos_consolidados = []
-    for item in itens_fornecedor:
-        # Busca todos os pedidos pendentes para esse item
-        pedidos_item = Pedido.query.filter_by(
-            item_id=item.id,
-            fornecedor_id=fornecedor_id,
-            status='PENDENTE'
-        ).all()
+    filtros = (Pedido.fornecedor_id == fornecedor.id, Pedido.status == PedidoStatus.PENDENTE)
+    rows = db.session.execute(
+        select(
+            ListaMaeItem.nome.label('item_nome'), ListaMaeItem.unidade, Pedido.quantidade_solicitada,
+            Pedido.data_pedido, Usuario.nome.label('usuario_nome')
+        )
+        .join(ListaMaeItem, Pedido.lista_mae_item_id == ListaMaeItem.id)
+        .outerjoin(Usuario, Pedido.usuario_id == Usuario.id)
+        .where(*filtros)
+        .order_by(ListaMaeItem.id, Pedido.id)
+    ).all()
+    pedidos_consolidados = [
+        {
+            'item_nome': row.item_nome,
+            'quantidade': float(row.quantidade_solicitada),
+            'unidade': row.unidade,
+            'data_pedido': row.data_pedido.isoformat(),
+            'usuario': row.usuario_nome or 'N/A'
+        }
+        for row in rows
+    ]
 
-        for pedido in pedidos_item:
-            pedidos_consolidados.append({
-                'item_nome': item.nome,
-                'quantidade': float(pedido.quantidade_solicitada),
-                'unidade': item.unidade_medida,
-                'data_pedido': pedido.data_pedido.isoformat(),
-                'usuario': pedido.usuario.nome if pedido.usuario else 'N/A'
-            })
+    totais = db.session.execute(
+        select(
+            ListaMaeItem.id, ListaMaeItem.nome, ListaMaeItem.unidade,
+            func.sum(Pedido.quantidade_solicitada).label('quantidade_total'),
+            func.count(Pedido.id).label('total_pedidos')
+        )
+        .join(ListaMaeItem, Pedido.lista_mae_item_id == ListaMaeItem.id)
+        .where(*filtros)
+        .group_by(ListaMaeItem.id, ListaMaeItem.nome, ListaMaeItem.unidade)
+        .order_by(ListaMaeItem.id)
+    ).all()
 
     return {
         'fornecedor_nome': fornecedor.nome,
         'fornecedor_contato': fornecedor.contato,
         'fornecedor_meio_envio': fornecedor.meio_envio,
         'total_pedidos': len(pedidos_consolidados),
-        'pedidos': pedidos_consolidados
+        'pedidos': pedidos_consolidados,
+        'itens_consolidados': [
+            {
+                'item_id': row.id,
+                'item_nome': row.nome,
+                'unidade': row.unidade,
+                'quantidade_total': float(row.quantidade_total or 0),
+                'total_pedidos': row.total_pedidos
+            }
+            for row in totais
+        ]
     }, 200
 
 
 # --- Serviços de Cotação ---
 
+def _faltas_estoque_fornecedor(fornecedor_id):
+    """{item_id: soma de (mínimo - atual)} dos estoques abaixo do mínimo dos itens do fornecedor."""
+    falta = func.sum(case(
+        (Estoque.quantidade_atual < Estoque.quantidade_minima,
+         Estoque.quantidade_minima - Estoque.quantidade_atual),
+        else_=0
+    ))
+    rows = db.session.execute(
+        select(Estoque.item_id, falta.label('total_a_pedir'))
+        .join(Item, Estoque.item_id == Item.id)
+        .where(Item.fornecedor_id == fornecedor_id)
+        .group_by(Estoque.item_id)
+        .having(falta > 0)
+        .order_by(Estoque.item_id)
+    ).all()
+    return {row.item_id: row.total_a_pedir for row in rows}
+
+
 def create_quotation_from_stock(fornecedor_id, restaurante_id=None):
-    """Cria uma nova Cotação com base na necessidade de estoque para um fornecedor."""
+    """
+    Cria uma nova Cotação com base na necessidade de estoque para um fornecedor.
+    As faltas são somadas no banco (um GROUP BY) e os itens da cotação entram
+    em um único INSERT em lote.
+    """
     fornecedor = Fornecedor.query.filter_by(id=fornecedor_id)
     if restaurante_id is not None:
         fornecedor = fornecedor.filter_by(restaurante_id=restaurante_id)
@@ -1579,37 +1816,32 @@ def create_quotation_from_stock(fornecedor_id, restaurante_id=None):
     if not fornecedor:
         return {"error": "Fornecedor não encontrado"}, 404
 
-    pedidos = {}
-    for item in fornecedor.itens:
-        total_a_pedir = 0
-        estoques_do_item = Estoque.query.filter_by(item_id=item.id).all()
-        for estoque in estoques_do_item:
-            if estoque.quantidade_atual < estoque.quantidade_minima:
-                total_a_pedir += (estoque.quantidade_minima - estoque.quantidade_atual)
-        
-        if total_a_pedir > 0:
-            pedidos[item] = total_a_pedir
-
+    pedidos = _faltas_estoque_fornecedor(fornecedor.id)
     if not pedidos:
         return {"message": f"Nenhum item precisa de reposição para o fornecedor {fornecedor.nome}."}, 200
 
-    # Cria a Cotação
-    nova_cotacao = Cotacao(fornecedor_id=fornecedor_id)
-    repositories.add_instance(nova_cotacao)
+    # Cria a Cotação e seus itens na mesma transação
+    nova_cotacao = Cotacao(fornecedor_id=fornecedor.id)
+    db.session.add(nova_cotacao)
+    db.session.flush()
+    cotacao_id = nova_cotacao.id
 
-    # Adiciona os itens na cotação
-    for item, quantidade in pedidos.items():
-        cotacao_item = CotacaoItem(
-            cotacao_id=nova_cotacao.id,
-            item_id=item.id,
-            quantidade=quantidade,
-            preco_unitario=0  # Preço a ser preenchido pelo admin
-        )
-        db.session.add(cotacao_item)
-    
+    db.session.execute(insert(CotacaoItem), [
+        {
+            'cotacao_id': cotacao_id,
+            'item_id': item_id,
+            'quantidade': quantidade,
+            'preco_unitario': 0  # Preço a ser preenchido pelo admin
+        }
+        for item_id, quantidade in pedidos.items()
+    ])
     db.session.commit()
 
-    return nova_cotacao.to_dict(), 201
+    cotacao = Cotacao.query.options(
+        selectinload(Cotacao.itens).selectinload(CotacaoItem.item),
+        db.joinedload(Cotacao.fornecedor)
+    ).filter_by(id=cotacao_id).populate_existing().one()
+    return cotacao.to_dict(), 201
 
 
 def get_all_cotacoes():
@@ -2124,7 +2356,7 @@ def _validar_dados_item(data, fornecedor_id, item_id=None):
     if not nome or not unidade:
         return None, {"error": "Nome e unidade de medida são obrigatórios."}, 400
 
-    duplicado = Item.query.filter(func.lower(Item.nome) == func.lower(nome)).first()
+    duplicado = Item.query.filter(_filtro_nome_igual(Item, nome)).first()
     if duplicado and duplicado.id != item_id:
         return None, {"error": f"Item '{nome}' já existe no sistema."}, 409
 
@@ -2479,76 +2711,73 @@ def criar_login_fornecedor(admin_id, fornecedor_id, data):
     }, 201
 
 
-def get_all_submissoes(status_filter=None, arquivadas=False):
-    """
-    Retorna todas as submissões (admin) com pedidos agrupados.
-    Inclui tanto listas tradicionais quanto listas rápidas.
+_SUBMISSOES_PAGE_LIMIT_MAX = 200
+# Desempate na ordenação combinada: no mesmo instante, tradicionais vêm antes.
+_SUBMISSAO_TIPO_TRADICIONAL = 1
+_SUBMISSAO_TIPO_RAPIDA = 0
 
-    Args:
-        status_filter: PENDENTE, APROVADO, REJEITADO, PARCIALMENTE_APROVADO ou None
-        arquivadas: quando True, retorna apenas submissões arquivadas
-    """
-    from .models import ListaRapida, StatusListaRapida, ListaRapidaItem
 
-    resultado = []
+def _encode_submissoes_cursor(chave):
+    data, tipo, item_id = chave
+    raw = json.dumps([data.isoformat(), tipo, item_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def _decode_submissoes_cursor(cursor):
+    try:
+        data, tipo, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(data), int(tipo), int(item_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Cursor inválido.")
+
+
+def _chave_submissao(data, tipo, item_id):
+    return (data.replace(tzinfo=None), tipo, item_id)
+
+
+def _keyset_depois_do_cursor(coluna_data, coluna_id, tipo, posicao):
+    """Filtro keyset para ordem decrescente de (data, tipo, id)."""
+    data, tipo_cursor, id_cursor = posicao
+    if tipo == tipo_cursor:
+        return or_(coluna_data < data, (coluna_data == data) & (coluna_id < id_cursor))
+    if tipo > tipo_cursor:
+        return coluna_data < data
+    return coluna_data <= data
+
 
-    # 1. BUSCAR SUBMISSÕES TRADICIONAIS
+def _buscar_pagina_submissoes_tradicionais(status_filter, arquivadas, restaurante_id, posicao, limit):
     query = Submissao.query.options(
         db.joinedload(Submissao.lista),
         db.joinedload(Submissao.usuario),
-        db.joinedload(Submissao.pedidos).joinedload(Pedido.item)
-    )
-
-    if arquivadas:
-        query = query.filter_by(arquivada=True)
-    else:
-        query = query.filter_by(arquivada=False)
+        selectinload(Submissao.pedidos).joinedload(Pedido.item)
+    ).filter(Submissao.arquivada.is_(bool(arquivadas)))
 
     if status_filter:
-        query = query.filter_by(status=status_filter)
+        query = query.filter(Submissao.status == status_filter)
 
-    submissoes = query.all()
+    if restaurante_id is not None:
+        query = query.join(Lista, Submissao.lista_id == Lista.id).filter(
+            Lista.restaurante_id == restaurante_id
+        )
 
-    for sub in submissoes:
-        sub_dict = {
-            "id": sub.id,
-            "lista_id": sub.lista_id,
-            "lista_nome": sub.lista.nome if sub.lista else "N/A",
-            "usuario_id": sub.usuario_id,
-            "usuario_nome": sub.usuario.nome if sub.usuario else "N/A",
-            "data_submissao": sub.data_submissao.isoformat(),
-            "status": sub.status.value,
-            "arquivada": sub.arquivada,
-            "total_pedidos": sub.total_pedidos,
-            "tipo_lista": "LISTA_TRADICIONAL",
-            "pedidos": [
-                {
-                    "id": p.id,
-                    "item_id": p.lista_mae_item_id,
-                    "item_nome": p.item.nome if p.item else "N/A",
-                    "quantidade_solicitada": float(p.quantidade_solicitada),
-                    "status": p.status.value,
-                    "unidade": p.item.unidade if p.item else ""
-                }
-                for p in sub.pedidos
-            ]
-        }
-        resultado.append(sub_dict)
+    if posicao is not None:
+        query = query.filter(_keyset_depois_do_cursor(
+            Submissao.data_submissao, Submissao.id, _SUBMISSAO_TIPO_TRADICIONAL, posicao
+        ))
+
+    return query.order_by(Submissao.data_submissao.desc(), Submissao.id.desc()).limit(limit).all()
 
-    # 2. BUSCAR LISTAS RÁPIDAS (exceto RASCUNHO)
-    query_rapidas = ListaRapida.query.filter(
+
+def _buscar_pagina_listas_rapidas(status_filter, arquivadas, restaurante_id, posicao, limit):
+    data_ordem = func.coalesce(ListaRapida.submetido_em, ListaRapida.criado_em)
+    query = ListaRapida.query.filter(
         ListaRapida.status != StatusListaRapida.RASCUNHO,
-        ListaRapida.deletado == False
+        ListaRapida.deletado == False,
+        ListaRapida.arquivada.is_(bool(arquivadas))
     ).options(
         db.joinedload(ListaRapida.usuario)
-        # Nota: itens usa lazy='dynamic', não pode usar joinedload
     )
 
-    if arquivadas:
-        query_rapidas = query_rapidas.filter(ListaRapida.arquivada == True)
-    else:
-        query_rapidas = query_rapidas.filter(ListaRapida.arquivada == False)
-
     # Aplicar filtro de status se fornecido
     if status_filter:
         # Mapear status de submissão para status de lista rápida
@@ -2558,53 +2787,169 @@ def get_all_submissoes(status_filter=None, arquivadas=False):
             "REJEITADO": StatusListaRapida.REJEITADA
         }
         if status_filter in status_map:
-            query_rapidas = query_rapidas.filter_by(status=status_map[status_filter])
+            query = query.filter(ListaRapida.status == status_map[status_filter])
 
-    listas_rapidas = query_rapidas.all()
+    if restaurante_id is not None:
+        query = query.join(Usuario, ListaRapida.usuario_id == Usuario.id).filter(
+            Usuario.restaurante_id == restaurante_id
+        )
 
-    # Mapear listas rápidas para formato de submissão
-    for lista in listas_rapidas:
-        # Mapear status de lista rápida para formato de submissão
-        status_normalizado = {
-            StatusListaRapida.PENDENTE: "PENDENTE",
-            StatusListaRapida.APROVADA: "APROVADO",
-            StatusListaRapida.REJEITADA: "REJEITADO"
-        }.get(lista.status, "PENDENTE")
+    if posicao is not None:
+        query = query.filter(_keyset_depois_do_cursor(
+            data_ordem, ListaRapida.id, _SUBMISSAO_TIPO_RAPIDA, posicao
+        ))
 
-        # Buscar itens da lista rápida
-        itens_lista = lista.itens.all()
+    return query.order_by(data_ordem.desc(), ListaRapida.id.desc()).limit(limit).all()
 
-        lista_dict = {
-            "id": lista.id,  # ID numérico da lista rápida
-            "lista_id": lista.id,
-            "lista_nome": lista.nome,
-            "usuario_id": lista.usuario_id,
-            "usuario_nome": lista.usuario.nome if lista.usuario else "N/A",
-            "data_submissao": lista.submetido_em.isoformat() if lista.submetido_em else lista.criado_em.isoformat(),
-            "status": status_normalizado,
-            "arquivada": lista.arquivada,
-            "total_pedidos": len(itens_lista),
-            "tipo_lista": "LISTA_RAPIDA",
-            "pedidos": [
-                {
-                    "id": item.id,
-                    "item_id": item.item_global_id,
-                    "item_nome": item.item_global.nome if item.item_global else "N/A",
-                    "quantidade_solicitada": 1.0,  # Listas rápidas não têm quantidade explícita
-                    "status": status_normalizado,
-                    "unidade": item.item_global.unidade if item.item_global else "",
-                    "prioridade": item.prioridade.value if item.prioridade else "precisa_comprar",
-                    "observacao": item.observacao
-                }
-                for item in itens_lista
-            ]
-        }
-        resultado.append(lista_dict)
 
-    # 3. ORDENAR POR DATA DE SUBMISSÃO (mais recentes primeiro)
-    resultado.sort(key=lambda x: x["data_submissao"], reverse=True)
+def _serializar_submissao_admin(sub):
+    return {
+        "id": sub.id,
+        "lista_id": sub.lista_id,
+        "lista_nome": sub.lista.nome if sub.lista else "N/A",
+        "usuario_id": sub.usuario_id,
+        "usuario_nome": sub.usuario.nome if sub.usuario else "N/A",
+        "data_submissao": sub.data_submissao.isoformat(),
+        "status": sub.status.value,
+        "arquivada": sub.arquivada,
+        "total_pedidos": sub.total_pedidos,
+        "tipo_lista": "LISTA_TRADICIONAL",
+        "pedidos": [
+            {
+                "id": p.id,
+                "item_id": p.lista_mae_item_id,
+                "item_nome": p.item.nome if p.item else "N/A",
+                "quantidade_solicitada": float(p.quantidade_solicitada),
+                "status": p.status.value,
+                "unidade": p.item.unidade if p.item else ""
+            }
+            for p in sub.pedidos
+        ]
+    }
+
 
-    return resultado, 200
+def _serializar_lista_rapida_admin(lista, itens_lista):
+    # Mapear status de lista rápida para formato de submissão
+    status_normalizado = {
+        StatusListaRapida.PENDENTE: "PENDENTE",
+        StatusListaRapida.APROVADA: "APROVADO",
+        StatusListaRapida.REJEITADA: "REJEITADO"
+    }.get(lista.status, "PENDENTE")
+
+    return {
+        "id": lista.id,  # ID numérico da lista rápida
+        "lista_id": lista.id,
+        "lista_nome": lista.nome,
+        "usuario_id": lista.usuario_id,
+        "usuario_nome": lista.usuario.nome if lista.usuario else "N/A",
+        "data_submissao": lista.submetido_em.isoformat() if lista.submetido_em else lista.criado_em.isoformat(),
+        "status": status_normalizado,
+        "arquivada": lista.arquivada,
+        "total_pedidos": len(itens_lista),
+        "tipo_lista": "LISTA_RAPIDA",
+        "pedidos": [
+            {
+                "id": item.id,
+                "item_id": item.item_global_id,
+                "item_nome": item.item_global.nome if item.item_global else "N/A",
+                "quantidade_solicitada": 1.0,  # Listas rápidas não têm quantidade explícita
+                "status": status_normalizado,
+                "unidade": item.item_global.unidade if item.item_global else "",
+                "prioridade": item.prioridade.value if item.prioridade else "precisa_comprar",
+                "observacao": item.observacao
+            }
+            for item in itens_lista
+        ]
+    }
+
+
+def get_submissoes_page(status_filter=None, arquivadas=False, restaurante_id=None, limit=50, cursor=None):
+    """
+    Página de submissões (admin), combinando listas tradicionais e rápidas.
+
+    Paginação keyset sobre (data_submissao, tipo, id) em ordem decrescente:
+    cada fonte busca no máximo `limit + 1` linhas depois do cursor, o merge é
+    feito em memória e os itens das listas rápidas da página são carregados
+    em uma única query.
+
+    Returns:
+        {"items": [...], "next_cursor": str | None, "has_more": bool}
+    """
+    try:
+        posicao = _decode_submissoes_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    limit = max(1, min(int(limit or 50), _SUBMISSOES_PAGE_LIMIT_MAX))
+
+    tradicionais = _buscar_pagina_submissoes_tradicionais(
+        status_filter, arquivadas, restaurante_id, posicao, limit + 1
+    )
+    rapidas = _buscar_pagina_listas_rapidas(
+        status_filter, arquivadas, restaurante_id, posicao, limit + 1
+    )
+
+    combinados = [
+        (_chave_submissao(sub.data_submissao, _SUBMISSAO_TIPO_TRADICIONAL, sub.id), sub)
+        for sub in tradicionais
+    ] + [
+        (_chave_submissao(lista.submetido_em or lista.criado_em, _SUBMISSAO_TIPO_RAPIDA, lista.id), lista)
+        for lista in rapidas
+    ]
+    combinados.sort(key=lambda entry: entry[0], reverse=True)
+    pagina = combinados[:limit]
+    has_more = len(combinados) > limit
+
+    # Itens das listas rápidas da página em uma única query (itens é lazy='dynamic')
+    rapidas_ids = [obj.id for chave, obj in pagina if chave[1] == _SUBMISSAO_TIPO_RAPIDA]
+    itens_por_lista = {lista_id: [] for lista_id in rapidas_ids}
+    if rapidas_ids:
+        itens = ListaRapidaItem.query.options(
+            db.joinedload(ListaRapidaItem.item_global)
+        ).filter(
+            ListaRapidaItem.lista_rapida_id.in_(rapidas_ids)
+        ).order_by(ListaRapidaItem.id).all()
+        for item in itens:
+            itens_por_lista[item.lista_rapida_id].append(item)
+
+    items = []
+    for chave, obj in pagina:
+        if chave[1] == _SUBMISSAO_TIPO_TRADICIONAL:
+            items.append(_serializar_submissao_admin(obj))
+        else:
+            items.append(_serializar_lista_rapida_admin(obj, itens_por_lista[obj.id]))
+
+    return {
+        "items": items,
+        "next_cursor": _encode_submissoes_cursor(pagina[-1][0]) if has_more and pagina else None,
+        "has_more": has_more
+    }, 200
+
+
+def iter_submissoes(status_filter=None, arquivadas=False, restaurante_id=None, page_size=_SUBMISSOES_PAGE_LIMIT_MAX):
+    """Percorre todas as submissões (admin) página a página, na ordem da listagem."""
+    cursor = None
+    while True:
+        page, status = get_submissoes_page(status_filter, arquivadas, restaurante_id, page_size, cursor)
+        if status != 200:
+            return
+        yield from page["items"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return
+
+
+def get_all_submissoes(status_filter=None, arquivadas=False, restaurante_id=None):
+    """
+    Retorna todas as submissões (admin) com pedidos agrupados.
+    Inclui tanto listas tradicionais quanto listas rápidas, mais recentes primeiro.
+
+    Args:
+        status_filter: PENDENTE, APROVADO, REJEITADO, PARCIALMENTE_APROVADO ou None
+        arquivadas: quando True, retorna apenas submissões arquivadas
+        restaurante_id: filtra pelo restaurante (None = todos, SUPER_ADMIN)
+    """
+    return list(iter_submissoes(status_filter, arquivadas, restaurante_id)), 200
 
 
 def get_submissao_by_id(submissao_id):
@@ -2650,14 +2995,16 @@ def aprovar_submissao(submissao_id):
     submissao = repositories.get_by_id(Submissao, submissao_id)
     if not submissao:
         return {"error": "Submissão não encontrada."}, 404
-    
-    # Aprovar todos os pedidos
-    for pedido in submissao.pedidos:
-        pedido.status = PedidoStatus.APROVADO
-    
+
+    # Aprovar todos os pedidos (um UPDATE; a submissão é recalculada junto)
+    _transicionar_pedidos(
+        PedidoStatus.APROVADO, Pedido.submissao_id == submissao.id,
+        origem=(PedidoStatus.PENDENTE, PedidoStatus.REJEITADO)
+    )
+    # Submissão sem pedidos não passa pelo recálculo
     submissao.status = SubmissaoStatus.APROVADO
     db.session.commit()
-    
+
     return {"message": f"Submissão #{submissao_id} aprovada com sucesso!"}, 200
 
 
@@ -2666,11 +3013,12 @@ def rejeitar_submissao(submissao_id):
     submissao = repositories.get_by_id(Submissao, submissao_id)
     if not submissao:
         return {"error": "Submissão não encontrada."}, 404
-    
-    # Rejeitar todos os pedidos
-    for pedido in submissao.pedidos:
-        pedido.status = PedidoStatus.REJEITADO
-    
+
+    # Rejeitar todos os pedidos (um UPDATE; a submissão é recalculada junto)
+    _transicionar_pedidos(
+        PedidoStatus.REJEITADO, Pedido.submissao_id == submissao.id,
+        origem=(PedidoStatus.PENDENTE, PedidoStatus.APROVADO)
+    )
     submissao.status = SubmissaoStatus.REJEITADO
     db.session.commit()
     
@@ -2741,7 +3089,7 @@ def deletar_submissao_permanente(submissao_id):
     if not submissao.arquivada:
         return {"error": "Apenas submissões arquivadas podem ser excluídas permanentemente."}, 400
 
-    Pedido.query.filter_by(submissao_id=submissao_id).delete()
+    _excluir_pedidos(Pedido.submissao_id == submissao_id)
     db.session.delete(submissao)
     db.session.commit()
 
@@ -2814,7 +3162,7 @@ def editar_quantidades_submissao(submissao_id, pedidos_data):
         print(f"[editar_quantidades_submissao] {itens_atualizados} itens atualizados")
         
         # Deletar pedidos antigos desta submissão
-        Pedido.query.filter_by(submissao_id=submissao_id).delete()
+        _excluir_pedidos(Pedido.submissao_id == submissao_id)
         
         # Recriar pedidos com base nas novas quantidades
         pedidos_criados = 0
@@ -3011,75 +3359,176 @@ def rejeitar_pedido(pedido_id):
     return {"message": "Pedido rejeitado com sucesso.", "pedido": pedido.to_dict()}, 200
 
 
-def aprovar_pedidos_lote(pedido_ids):
-    """Aprova múltiplos pedidos em lote."""
-    if not pedido_ids or not isinstance(pedido_ids, list):
-        return {"error": "Lista de IDs inválida."}, 400
+def _status_submissao_agregado(pendentes, aprovados, rejeitados):
+    """Mesma regra de `_recalcular_status_submissao`, a partir das contagens."""
+    if pendentes:
+        return SubmissaoStatus.PENDENTE
+    if aprovados and rejeitados:
+        return SubmissaoStatus.PARCIALMENTE_APROVADO
+    if aprovados:
+        return SubmissaoStatus.APROVADO
+    if rejeitados:
+        return SubmissaoStatus.REJEITADO
+    return None
 
-    aprovados = 0
-    erros = []
-    submissao_ids = set()
 
-    for pedido_id in pedido_ids:
-        pedido = repositories.get_by_id(Pedido, pedido_id)
+def _recalcular_status_submissoes(submissao_ids):
+    """
+    Recalcula o status de várias submissões com um agregado agrupado e um
+    UPDATE por status resultante. Mantém o rollup diário (a escrita não passa
+    pelo flush). Não faz commit.
+    """
+    submissao_ids = {i for i in submissao_ids if i is not None}
+    if not submissao_ids:
+        return
 
-        if not pedido:
-            erros.append(f"Pedido {pedido_id} não encontrado")
-            continue
+    def _contar(status):
+        return func.sum(case((Pedido.status == status, 1), else_=0))
 
-        if pedido.status != PedidoStatus.PENDENTE:
-            erros.append(f"Pedido {pedido_id} não está pendente")
+    contagens = (
+        select(
+            Pedido.submissao_id.label('submissao_id'),
+            _contar(PedidoStatus.PENDENTE).label('pendentes'),
+            _contar(PedidoStatus.APROVADO).label('aprovados'),
+            _contar(PedidoStatus.REJEITADO).label('rejeitados'),
+        )
+        .where(Pedido.submissao_id.in_(submissao_ids))
+        .group_by(Pedido.submissao_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(
+            Submissao.id, Submissao.status, Submissao.arquivada, Submissao.usuario_id, Submissao.data_submissao,
+            contagens.c.pendentes, contagens.c.aprovados, contagens.c.rejeitados,
+        ).join(contagens, contagens.c.submissao_id == Submissao.id)
+    ).all()
+
+    por_status = {}
+    por_usuario = []
+    for row in rows:
+        novo = _status_submissao_agregado(row.pendentes, row.aprovados, row.rejeitados)
+        if novo is None or novo == row.status:
             continue
+        por_status.setdefault(novo, []).append(row.id)
+        if not row.arquivada:
+            dia = row.data_submissao.date()
+            por_usuario.append((row.usuario_id, dia, rollups.metrica_submissoes(row.status), -1))
+            por_usuario.append((row.usuario_id, dia, rollups.metrica_submissoes(novo), 1))
 
-        pedido.status = PedidoStatus.APROVADO
-        aprovados += 1
-        if pedido.submissao_id:
-            submissao_ids.add(pedido.submissao_id)
+    for status, ids in por_status.items():
+        db.session.execute(update(Submissao).where(Submissao.id.in_(ids)).values(status=status))
+    if por_usuario:
+        rollups.aplicar_deltas_por_origem(db.session.connection(), por_usuario=por_usuario)
 
-    if submissao_ids:
-        submissoes = Submissao.query.filter(Submissao.id.in_(submissao_ids)).all()
-        for submissao in submissoes:
-            _recalcular_status_submissao(submissao)
 
-    db.session.commit()
+def _excluir_pedidos(*criterios):
+    """
+    Exclui os pedidos que atendem `criterios` com um único DELETE ... RETURNING
+    e desconta cada um do rollup (`pedidos` e pedidos.<STATUS>), que o DELETE
+    em massa não alimenta pelo flush. Retorna quantos foram excluídos; não faz
+    commit.
+    """
+    excluidos = db.session.execute(
+        delete(Pedido)
+        .where(*criterios)
+        .returning(Pedido.usuario_id, Pedido.data_pedido, Pedido.status)
+    ).all()
+    if excluidos:
+        rollups.aplicar_deltas_por_origem(
+            db.session.connection(),
+            por_usuario=[
+                delta
+                for row in excluidos
+                for delta in rollups.deltas_pedido(row.usuario_id, row.data_pedido, row.status, -1)
+            ]
+        )
+    return len(excluidos)
 
-    return {
-        "message": f"{aprovados} pedido(s) aprovado(s) com sucesso.",
-        "aprovados": aprovados,
-        "erros": erros if erros else None
-    }, 200
 
+def _transicionar_pedidos(novo_status, *criterios, origem=(PedidoStatus.PENDENTE,)):
+    """
+    Move para `novo_status` os pedidos que atendem `criterios` e estão em um
+    dos status de `origem`, com um UPDATE ... RETURNING por status de origem
+    (o rollup precisa do status anterior). Recalcula as submissões tocadas e
+    alimenta o rollup. Retorna os ids alterados; não faz commit.
+    """
+    alterados = []
+    por_usuario = []
+    for status_antes in origem:
+        linhas = db.session.execute(
+            update(Pedido)
+            .where(*criterios, Pedido.status == status_antes)
+            .values(status=novo_status)
+            .returning(Pedido.id, Pedido.usuario_id, Pedido.submissao_id, Pedido.data_pedido)
+        ).all()
+        for row in linhas:
+            por_usuario.extend(rollups.deltas_pedido(row.usuario_id, row.data_pedido, status_antes, -1))
+            por_usuario.extend(rollups.deltas_pedido(row.usuario_id, row.data_pedido, novo_status, 1))
+        alterados.extend(linhas)
+    if not alterados:
+        return []
 
-def rejeitar_pedidos_lote(pedido_ids):
-    """Rejeita múltiplos pedidos em lote."""
-    if not pedido_ids or not isinstance(pedido_ids, list):
-        return {"error": "Lista de IDs inválida."}, 400
+    rollups.aplicar_deltas_por_origem(db.session.connection(), por_usuario=por_usuario)
+    _recalcular_status_submissoes(row.submissao_id for row in alterados)
+    return [row.id for row in alterados]
 
-    rejeitados = 0
-    erros = []
-    submissao_ids = set()
 
+def _transicionar_pedidos_lote(pedido_ids, novo_status):
+    """
+    Transição PENDENTE -> `novo_status` de uma lista de ids. Erros por id no
+    mesmo formato de antes ("não encontrado" / "não está pendente").
+    Retorna (quantidade alterada, erros).
+    """
+    ids_validos = []
     for pedido_id in pedido_ids:
-        pedido = repositories.get_by_id(Pedido, pedido_id)
-
-        if not pedido:
-            erros.append(f"Pedido {pedido_id} não encontrado")
+        try:
+            ids_validos.append(int(pedido_id))
+        except (TypeError, ValueError):
             continue
 
-        if pedido.status != PedidoStatus.PENDENTE:
+    alterados = set(_transicionar_pedidos(novo_status, Pedido.id.in_(ids_validos))) if ids_validos else set()
+    faltantes = set(ids_validos) - alterados
+    existentes = set(
+        db.session.execute(select(Pedido.id).where(Pedido.id.in_(faltantes))).scalars()
+    ) if faltantes else set()
+
+    erros = []
+    vistos = set()
+    for pedido_id in pedido_ids:
+        try:
+            chave = int(pedido_id)
+        except (TypeError, ValueError):
+            chave = None
+        if chave in alterados and chave not in vistos:
+            vistos.add(chave)
+        elif chave in existentes or chave in alterados:
             erros.append(f"Pedido {pedido_id} não está pendente")
-            continue
+        else:
+            erros.append(f"Pedido {pedido_id} não encontrado")
+    return len(alterados), erros
 
-        pedido.status = PedidoStatus.REJEITADO
-        rejeitados += 1
-        if pedido.submissao_id:
-            submissao_ids.add(pedido.submissao_id)
 
-    if submissao_ids:
-        submissoes = Submissao.query.filter(Submissao.id.in_(submissao_ids)).all()
-        for submissao in submissoes:
-            _recalcular_status_submissao(submissao)
+def aprovar_pedidos_lote(pedido_ids):
+    """Aprova múltiplos pedidos em lote."""
+    if not pedido_ids or not isinstance(pedido_ids, list):
+        return {"error": "Lista de IDs inválida."}, 400
+
+    aprovados, erros = _transicionar_pedidos_lote(pedido_ids, PedidoStatus.APROVADO)
+    db.session.commit()
+
+    return {
+        "message": f"{aprovados} pedido(s) aprovado(s) com sucesso.",
+        "aprovados": aprovados,
+        "erros": erros if erros else None
+    }, 200
+
+
+def rejeitar_pedidos_lote(pedido_ids):
+    """Rejeita múltiplos pedidos em lote."""
+    if not pedido_ids or not isinstance(pedido_ids, list):
+        return {"error": "Lista de IDs inválida."}, 400
 
+    rejeitados, erros = _transicionar_pedidos_lote(pedido_ids, PedidoStatus.REJEITADO)
     db.session.commit()
 
     return {
@@ -3201,7 +3650,7 @@ def update_submissao(submissao_id, usuario_id, items_data):
         refs_map = {ref.item_id: ref for ref in refs}
 
     # Deletar pedidos antigos desta submissão
-    Pedido.query.filter_by(submissao_id=submissao_id).delete()
+    _excluir_pedidos(Pedido.submissao_id == submissao_id)
 
     pedidos_criados = []
     refs_atualizados = []
@@ -3491,66 +3940,21 @@ def create_lista(data, restaurante_id=None):
 # SERVIÇO: Busca Unificada de Itens
 # ===============================================
 
-def buscar_itens_para_lista(restaurante_id, query=None):
+def buscar_itens_para_lista(restaurante_id, query=None, limit=None):
     """
     Busca itens de duas fontes para criação de listas:
     1. Lista Global (ListaMaeItem) do próprio restaurante
     2. Catálogo de Fornecedores (Item) da região
+
+    Usa o índice em memória do restaurante (catalog_search): sem termo, retorna
+    o catálogo ordenado por nome; com termo, os itens mais relevantes primeiro.
+    `limit` corta o resultado nos N melhores (autocomplete).
     """
     if not restaurante_id:
         return {"error": "Restaurante é obrigatório."}, 400
 
-    resultado = []
-
-    query_global = ListaMaeItem.query.filter_by(restaurante_id=restaurante_id)
-    if query:
-        query_global = query_global.filter(ListaMaeItem.nome.ilike(f'%{query}%'))
-    itens_globais = query_global.order_by(ListaMaeItem.nome).all()
-
-    nomes_globais = {normalize_item_nome(item.nome) for item in itens_globais}
-
-    for item in itens_globais:
-        resultado.append({
-            "id": f"global_{item.id}",
-            "nome": item.nome,
-            "unidade": item.unidade,
-            "origem": "lista_global",
-            "origem_display": "Lista do Restaurante",
-            "fornecedor_id": None,
-            "fornecedor_nome": None,
-            "ja_na_lista_global": True,
-            "item_fornecedor_id": None
-        })
-
-    fornecedores = Fornecedor.query.filter_by(restaurante_id=restaurante_id).all()
-    fornecedor_ids = [f.id for f in fornecedores]
-
-    if fornecedor_ids:
-        query_fornecedores = db.session.query(Item, Fornecedor).join(
-            Fornecedor, Item.fornecedor_id == Fornecedor.id
-        ).filter(Item.fornecedor_id.in_(fornecedor_ids))
-
-        if query:
-            query_fornecedores = query_fornecedores.filter(Item.nome.ilike(f'%{query}%'))
-
-        itens_fornecedores = query_fornecedores.order_by(Item.nome).all()
-
-        for item, fornecedor in itens_fornecedores:
-            ja_na_global = normalize_item_nome(item.nome) in nomes_globais
-            resultado.append({
-                "id": f"fornecedor_{item.id}",
-                "nome": item.nome,
-                "unidade": item.unidade_medida,
-                "origem": "fornecedor",
-                "origem_display": fornecedor.nome,
-                "fornecedor_id": fornecedor.id,
-                "fornecedor_nome": fornecedor.nome,
-                "ja_na_lista_global": ja_na_global,
-                "item_fornecedor_id": item.id
-            })
-
-    resultado_sorted = sorted(resultado, key=lambda x: x['nome'].lower())
-    return {"itens": resultado_sorted}, 200
+    indice = catalog_search.obter_indice(restaurante_id)
+    return {"itens": indice.buscar(query, limit)}, 200
 
 
 def get_itens_regionais(restaurante_id, query=None):
@@ -3568,7 +3972,7 @@ def get_itens_regionais(restaurante_id, query=None):
     if query:
         termo = f"%{query}%"
         itens_query = itens_query.filter(
-            or_(Item.nome.ilike(termo), Fornecedor.nome.ilike(termo))
+            or_(_filtro_nome_contem(Item, query), Fornecedor.nome.ilike(termo))
         )
 
     itens_query = itens_query.order_by(Item.nome)
@@ -3609,7 +4013,7 @@ def copiar_item_fornecedor_para_global(item_fornecedor_id, restaurante_id):
 
     item_existente = ListaMaeItem.query.filter(
         ListaMaeItem.restaurante_id == restaurante_id,
-        func.lower(ListaMaeItem.nome) == func.lower(item_fornecedor.nome)
+        _filtro_nome_igual(ListaMaeItem, item_fornecedor.nome)
     ).first()
 
     if item_existente:
@@ -3989,70 +4393,102 @@ def get_user_stats(user_id):
     
     return stats_data, 200
 
-def get_estatisticas(restaurante_id):
-    """Retorna estatísticas de itens completos/faltantes por lista e submissões."""
-    listas = Lista.query.filter_by(restaurante_id=restaurante_id, deletado=False).all()
+def get_estatisticas(restaurante_id, incluir_itens=True, itens_limit=None, itens_offset=0):
+    """
+    Retorna estatísticas de itens completos/faltantes por lista e submissões.
 
-    # Pré-carregar catálogo de itens para evitar N+1
-    items_dict = {
-        i.id: i for i in ListaMaeItem.query.filter_by(restaurante_id=restaurante_id).all()
-    }
+    Os contadores por lista saem de um único SELECT agrupado sobre
+    lista_item_ref + listas + areas. O detalhe por item (`itens`) é opcional
+    e pode ser paginado com itens_limit/itens_offset (um SELECT a mais).
+    Itens com quantidade_minima = 0 são ignorados, como na lista mãe.
+    """
+    ref_considerada = ListaItemRef.quantidade_minima > 0
+    item_ok = ListaItemRef.quantidade_atual >= ListaItemRef.quantidade_minima
+
+    agregados = db.session.query(
+        Lista.id,
+        Lista.nome,
+        Lista.area_id,
+        Area.nome,
+        func.count(ListaItemRef.item_id),
+        _count_where(item_ok),
+        _count_where(~item_ok),
+    ).join(
+        ListaItemRef, (ListaItemRef.lista_id == Lista.id) & ref_considerada
+    ).outerjoin(
+        Area, Area.id == Lista.area_id
+    ).filter(
+        Lista.restaurante_id == restaurante_id,
+        Lista.deletado == False
+    ).group_by(
+        Lista.id, Lista.nome, Lista.area_id, Area.nome
+    ).order_by(Lista.id).all()
 
     por_lista = []
     total_ok = 0
     total_faltantes = 0
-    itens_detalhe = []
-
-    for lista in listas:
-        refs_all = ListaItemRef.query.filter_by(lista_id=lista.id).all()
-        # Ignorar itens com quantidade_minima = 0, igual ao comportamento da lista mãe
-        refs = [r for r in refs_all if r.quantidade_minima > 0]
-        if not refs:
-            continue
-        itens_ok = sum(1 for r in refs if r.quantidade_atual >= r.quantidade_minima)
-        itens_faltantes = sum(1 for r in refs if r.quantidade_atual < r.quantidade_minima)
-        total_ok += itens_ok
-        total_faltantes += itens_faltantes
+    for lista_id, lista_nome, area_id, area_nome, total_itens, itens_ok, itens_faltantes in agregados:
+        total_ok += int(itens_ok)
+        total_faltantes += int(itens_faltantes)
         por_lista.append({
-            "lista_id": lista.id,
-            "lista_nome": lista.nome,
-            "area_nome": lista.area.nome if lista.area else None,
-            "area_id": lista.area_id,
-            "total_itens": len(refs),
-            "itens_ok": itens_ok,
-            "itens_faltantes": itens_faltantes,
+            "lista_id": lista_id,
+            "lista_nome": lista_nome,
+            "area_nome": area_nome,
+            "area_id": area_id,
+            "total_itens": int(total_itens),
+            "itens_ok": int(itens_ok),
+            "itens_faltantes": int(itens_faltantes),
         })
 
-        for ref in refs:
-            item = items_dict.get(ref.item_id)
+    itens_detalhe = []
+    if incluir_itens:
+        detalhe_query = db.session.query(
+            ListaItemRef.item_id,
+            ListaMaeItem.nome,
+            ListaMaeItem.unidade,
+            Lista.id,
+            Lista.nome,
+            Lista.area_id,
+            Area.nome,
+            ListaItemRef.quantidade_atual,
+            ListaItemRef.quantidade_minima,
+        ).join(
+            Lista, Lista.id == ListaItemRef.lista_id
+        ).outerjoin(
+            Area, Area.id == Lista.area_id
+        ).outerjoin(
+            ListaMaeItem, ListaMaeItem.id == ListaItemRef.item_id
+        ).filter(
+            Lista.restaurante_id == restaurante_id,
+            Lista.deletado == False,
+            ref_considerada
+        ).order_by(Lista.id, ListaItemRef.item_id)
+
+        if itens_limit is not None:
+            detalhe_query = detalhe_query.offset(itens_offset or 0).limit(itens_limit)
+
+        for (item_id, item_nome, unidade, lista_id, lista_nome, area_id, area_nome,
+             quantidade_atual, quantidade_minima) in detalhe_query:
             itens_detalhe.append({
-                "item_id": ref.item_id,
-                "item_nome": item.nome if item else f"Item #{ref.item_id}",
-                "unidade": item.unidade if item else "",
-                "lista_id": lista.id,
-                "lista_nome": lista.nome,
-                "area_id": lista.area_id,
-                "area_nome": lista.area.nome if lista.area else None,
-                "quantidade_atual": float(ref.quantidade_atual),
-                "quantidade_minima": float(ref.quantidade_minima),
+                "item_id": item_id,
+                "item_nome": item_nome if item_nome is not None else f"Item #{item_id}",
+                "unidade": unidade if unidade is not None else "",
+                "lista_id": lista_id,
+                "lista_nome": lista_nome,
+                "area_id": area_id,
+                "area_nome": area_nome,
+                "quantidade_atual": float(quantidade_atual),
+                "quantidade_minima": float(quantidade_minima),
             })
 
-    # Submissões por status — últimos 30 dias
-    cutoff = brasilia_now() - timedelta(days=30)
-    lista_ids = [l.id for l in listas]
-    submissoes_raw = (
-        db.session.query(Submissao.status, func.count(Submissao.id))
-        .filter(
-            Submissao.lista_id.in_(lista_ids),
-            Submissao.data_submissao >= cutoff,
-            Submissao.arquivada == False,
-        )
-        .group_by(Submissao.status)
-        .all()
+    # Submissões por status — últimos 30 dias (rollup diário)
+    cutoff = brasilia_now().date() - timedelta(days=30)
+    submissoes_raw = rollups.somar_por_metrica(
+        rollups.PREFIXO_SUBMISSOES, inicio=cutoff, restaurante_id=restaurante_id
     )
     status_dict = {"PENDENTE": 0, "APROVADO": 0, "REJEITADO": 0, "PARCIALMENTE_APROVADO": 0}
-    for status, count in submissoes_raw:
-        status_dict[status.value] = count
+    for metrica, count in submissoes_raw.items():
+        status_dict[metrica[len(rollups.PREFIXO_SUBMISSOES):]] = count
 
     return {
         "resumo": {
@@ -4064,6 +4500,12 @@ def get_estatisticas(restaurante_id):
         "por_lista": sorted(por_lista, key=lambda x: x["itens_faltantes"], reverse=True),
         "submissoes_por_status": status_dict,
         "itens": itens_detalhe,
+        "itens_paginacao": {
+            # total_itens do resumo = total de linhas do detalhe
+            "total": total_ok + total_faltantes,
+            "limit": itens_limit,
+            "offset": itens_offset or 0,
+        },
     }, 200
 
 
@@ -4121,10 +4563,8 @@ def get_activity_summary():
     today = brasilia_now().date()
     dates = [today - timedelta(days=i) for i in range(6, -1, -1)] # Últimos 7 dias
 
-    activity_data = []
-    for d in dates:
-        count = Pedido.query.filter(func.date(Pedido.data_pedido) == d).count()
-        activity_data.append(count)
+    pedidos_por_dia = rollups.somar_por_dia(rollups.METRICA_PEDIDOS, inicio=dates[0], fim=today)
+    activity_data = [pedidos_por_dia.get(d, 0) for d in dates]
 
     labels = [d.strftime('%d/%m') for d in dates]
 
@@ -4358,7 +4798,7 @@ def criar_item_catalogo_global(data, restaurante_id=None):
     # Verifica duplicação (case-insensitive)
     item_existente = ListaMaeItem.query.filter(
         ListaMaeItem.restaurante_id == restaurante_id,
-        func.lower(ListaMaeItem.nome) == func.lower(nome)
+        _filtro_nome_igual(ListaMaeItem, nome)
     ).first()
 
     if item_existente:
@@ -4389,62 +4829,85 @@ def get_listas_status_submissoes(restaurante_id=None):
     - Quantidade de pedidos pendentes
     
     Também inclui listas rápidas pendentes.
+
+    Tudo sai de dois SELECTs (listas comuns e listas rápidas) com agregados
+    agrupados por lista, independentemente da quantidade de listas.
     """
     resultado = []
-    
-    # 1. Listas comuns com pedidos pendentes
-    listas_query = Lista.query.filter_by(deletado=False)
-    if restaurante_id is not None:
-        listas_query = listas_query.filter_by(restaurante_id=restaurante_id)
-    listas = listas_query.all()
 
-    for lista in listas:
-        estoques = Estoque.query.filter_by(lista_id=lista.id).all()
-        if not estoques:
-            continue
-
-        datas_submissao = [e.data_ultima_submissao for e in estoques if e.data_ultima_submissao]
-        ultima_submissao = max(datas_submissao) if datas_submissao else None
+    listas_ids = select(Lista.id).where(Lista.deletado == False)
+    if restaurante_id is not None:
+        listas_ids = listas_ids.where(Lista.restaurante_id == restaurante_id)
+
+    # 1. Listas comuns com pedidos pendentes (pedidos ligados à lista pela submissão)
+    pendentes = db.session.query(
+        Submissao.lista_id.label("lista_id"),
+        func.count(Pedido.id).label("pendentes"),
+        func.max(Submissao.data_submissao).label("ultima_submissao"),
+    ).join(
+        Pedido, Pedido.submissao_id == Submissao.id
+    ).filter(
+        Pedido.status == PedidoStatus.PENDENTE,
+        Submissao.lista_id.in_(listas_ids)
+    ).group_by(Submissao.lista_id).subquery()
 
-        item_ids = {e.item_id for e in estoques if e.item_id}
-        if not item_ids:
-            continue
+    ultima_estoque = db.session.query(
+        Estoque.lista_id.label("lista_id"),
+        func.max(Estoque.data_ultima_submissao).label("ultima_submissao"),
+    ).filter(
+        Estoque.lista_id.in_(listas_ids)
+    ).group_by(Estoque.lista_id).subquery()
+
+    listas = db.session.query(
+        Lista.id,
+        Lista.nome,
+        func.coalesce(ultima_estoque.c.ultima_submissao, pendentes.c.ultima_submissao),
+        pendentes.c.pendentes,
+    ).join(
+        pendentes, pendentes.c.lista_id == Lista.id
+    ).outerjoin(
+        ultima_estoque, ultima_estoque.c.lista_id == Lista.id
+    ).order_by(Lista.id).all()
 
-        pedidos_pendentes = Pedido.query.filter(
-            Pedido.item_id.in_(item_ids),
-            Pedido.status == PedidoStatus.PENDENTE
-        ).count()
+    for lista_id, lista_nome, ultima_submissao, pedidos_pendentes in listas:
+        resultado.append({
+            "id": lista_id,
+            "nome": lista_nome,
+            "area": lista_nome,
+            "tipo": "lista_comum",
+            "last_submission": ultima_submissao.isoformat() if ultima_submissao else None,
+            "pending_submissions": pedidos_pendentes
+        })
 
-        if pedidos_pendentes > 0:
-            resultado.append({
-                "id": lista.id,
-                "nome": lista.nome,
-                "area": lista.nome,
-                "tipo": "lista_comum",
-                "last_submission": ultima_submissao.isoformat() if ultima_submissao else None,
-                "pending_submissions": pedidos_pendentes
-            })
-    
-    # 2. Listas rápidas pendentes
-    listas_rapidas_query = ListaRapida.query.filter_by(
-        deletado=False,
-        status=StatusListaRapida.PENDENTE
+    # 2. Listas rápidas pendentes (contagem de itens como subquery correlacionada)
+    total_itens = select(func.count(ListaRapidaItem.id)).where(
+        ListaRapidaItem.lista_rapida_id == ListaRapida.id
+    ).scalar_subquery()
+    listas_rapidas_query = db.session.query(
+        ListaRapida.id,
+        ListaRapida.nome,
+        ListaRapida.submetido_em,
+        Usuario.nome,
+        total_itens,
+    ).outerjoin(
+        Usuario, ListaRapida.usuario_id == Usuario.id
+    ).filter(
+        ListaRapida.deletado == False,
+        ListaRapida.status == StatusListaRapida.PENDENTE
     )
     if restaurante_id is not None:
-        listas_rapidas_query = listas_rapidas_query.join(Usuario).filter(
+        listas_rapidas_query = listas_rapidas_query.filter(
             Usuario.restaurante_id == restaurante_id
         )
-    listas_rapidas_pendentes = listas_rapidas_query.all()
-    
-    for lista_rapida in listas_rapidas_pendentes:
-        total_itens = lista_rapida.itens.count()
+
+    for lista_id, lista_nome, submetido_em, usuario_nome, itens in listas_rapidas_query.order_by(ListaRapida.id):
         resultado.append({
-            "id": lista_rapida.id,
-            "nome": lista_rapida.nome,
-            "area": f"Lista Rápida - {lista_rapida.usuario.nome if lista_rapida.usuario else 'Usuário'}",
+            "id": lista_id,
+            "nome": lista_nome,
+            "area": f"Lista Rápida - {usuario_nome or 'Usuário'}",
             "tipo": "lista_rapida",
-            "last_submission": lista_rapida.submetido_em.isoformat() if lista_rapida.submetido_em else None,
-            "pending_submissions": total_itens
+            "last_submission": submetido_em.isoformat() if submetido_em else None,
+            "pending_submissions": itens
         })
 
     return resultado, 200
@@ -4457,28 +4920,19 @@ def aprovar_todos_pedidos_lista(lista_id, restaurante_id=None):
     if not lista:
         return {"error": "Lista não encontrada."}, 404
 
-    estoques = Estoque.query.filter_by(lista_id=lista_id).all()
-    item_ids = {e.item_id for e in estoques if e.item_id}
-
-    if not item_ids:
-        return {"error": "Lista não possui itens."}, 404
-
-    pedidos_pendentes = Pedido.query.filter(
-        Pedido.item_id.in_(item_ids),
-        Pedido.status == PedidoStatus.PENDENTE
-    ).all()
+    # Pedidos chegam à lista pelas submissões dela
+    submissoes_da_lista = select(Submissao.id).where(Submissao.lista_id == lista.id)
+    aprovados = _transicionar_pedidos(PedidoStatus.APROVADO, Pedido.submissao_id.in_(submissoes_da_lista))
 
-    if not pedidos_pendentes:
+    if not aprovados:
+        db.session.rollback()
         return {"error": "Nenhum pedido pendente encontrado para esta lista."}, 404
 
-    for pedido in pedidos_pendentes:
-        pedido.status = PedidoStatus.APROVADO
-
     db.session.commit()
 
     return {
-        "message": f"Todos os {len(pedidos_pendentes)} pedidos pendentes foram aprovados com sucesso!",
-        "pedidos_aprovados": len(pedidos_pendentes),
+        "message": f"Todos os {len(aprovados)} pedidos pendentes foram aprovados com sucesso!",
+        "pedidos_aprovados": len(aprovados),
         "lista_nome": lista.nome
     }, 200
 
@@ -4530,6 +4984,20 @@ def get_collaborator_dashboard_summary(user_id):
 
     return summary_data, 200
 
+def _agregados_estoque_por_lista(lista_ids):
+    """{lista_id: (última submissão, itens abaixo do mínimo)} em um SELECT agrupado."""
+    if not lista_ids:
+        return {}
+    rows = db.session.query(
+        Estoque.lista_id,
+        func.max(Estoque.data_ultima_submissao),
+        _count_where(Estoque.quantidade_atual < Estoque.quantidade_minima),
+    ).filter(
+        Estoque.lista_id.in_(lista_ids)
+    ).group_by(Estoque.lista_id).all()
+    return {lista_id: (ultima, int(pendentes)) for lista_id, ultima, pendentes in rows}
+
+
 def get_minhas_listas_status(user_id):
     """
     Retorna status das listas atribuídas ao colaborador.
@@ -4552,18 +5020,12 @@ def get_minhas_listas_status(user_id):
             for lista in usuario.listas_atribuidas
             if not lista.deletado and lista.restaurante_id == usuario.restaurante_id
         ]
+
+    agregados = _agregados_estoque_por_lista([lista.id for lista in listas])
     resultado = []
 
     for lista in listas:
-        estoques = Estoque.query.filter_by(lista_id=lista.id).all()
-        datas_submissao = [e.data_ultima_submissao for e in estoques if e.data_ultima_submissao]
-        ultima_submissao = max(datas_submissao) if datas_submissao else None
-
-        pending_items = sum(
-            1 for estoque in estoques
-            if float(estoque.quantidade_atual) < float(estoque.quantidade_minima)
-        )
-
+        ultima_submissao, pending_items = agregados.get(lista.id, (None, 0))
         resultado.append({
             "id": lista.id,
             "nome": lista.nome,
@@ -4576,42 +5038,37 @@ def get_minhas_listas_status(user_id):
 def get_minhas_areas_status(user_id):
     """
     Retorna status das áreas atribuídas ao colaborador.
+
+    Agrupa os pedidos do usuário pela lista da submissão em um único SELECT
+    (última data de pedido e quantidade de pendentes por lista).
     """
     usuario = repositories.get_by_id(Usuario, user_id)
     if not usuario:
         return {"error": "Usuário não encontrado."}, 404
 
-    pedidos = Pedido.query.filter_by(usuario_id=user_id).all()
-    areas_status = {}
-
-    for pedido in pedidos:
-        if pedido.submissao and pedido.submissao.lista:
-            lista = pedido.submissao.lista
-            area_id = lista.id
-            area_nome = lista.nome
-
-            if area_id not in areas_status:
-                areas_status[area_id] = {
-                    "id": area_id,
-                    "area": area_nome,
-                    "last_submission": None,
-                    "pending_items": 0
-                }
-
-            if pedido.data_pedido:
-                if not areas_status[area_id]["last_submission"] or pedido.data_pedido > areas_status[area_id]["last_submission"]:
-                    areas_status[area_id]["last_submission"] = pedido.data_pedido
-
-            if pedido.status == PedidoStatus.PENDENTE:
-                areas_status[area_id]["pending_items"] += 1
+    rows = db.session.query(
+        Lista.id,
+        Lista.nome,
+        func.max(Pedido.data_pedido),
+        _count_where(Pedido.status == PedidoStatus.PENDENTE),
+    ).select_from(Pedido).join(
+        Submissao, Pedido.submissao_id == Submissao.id
+    ).join(
+        Lista, Submissao.lista_id == Lista.id
+    ).filter(
+        Pedido.usuario_id == user_id
+    ).group_by(
+        Lista.id, Lista.nome
+    ).order_by(func.min(Pedido.id)).all()
 
     resultado = []
-    for area_status in areas_status.values():
-        if area_status["last_submission"]:
-            area_status["last_submission"] = area_status["last_submission"].strftime("%Y-%m-%d %H:%M")
-        else:
-            area_status["last_submission"] = "Nunca"
-        resultado.append(area_status)
+    for lista_id, lista_nome, ultima, pendentes in rows:
+        resultado.append({
+            "id": lista_id,
+            "area": lista_nome,
+            "last_submission": ultima.strftime("%Y-%m-%d %H:%M") if ultima else "Nunca",
+            "pending_items": int(pendentes)
+        })
 
     return resultado, 200
 
@@ -4719,23 +5176,32 @@ def adicionar_itens_na_lista(lista_id, items_data, restaurante_id=None):
     itens_adicionados = []
     itens_atualizados = []
 
-    for item_data in items_data:
-        item_id = item_data.get('item_id')
-        quantidade_minima = item_data.get('quantidade_minima', 0)
+    entradas = [
+        (int(item_data['item_id']), item_data.get('quantidade_minima', 0))
+        for item_data in items_data
+        if str(item_data.get('item_id') or '').isdigit()
+    ]
+    item_ids = {item_id for item_id, _ in entradas}
 
-        if not item_id:
-            continue
+    # Itens e estoques da lista carregados uma vez; novos estoques saem em lote no commit
+    itens = {}
+    estoques = {}
+    if item_ids:
+        itens = {item.id: item for item in Item.query.filter(Item.id.in_(item_ids)).all()}
+        estoques = {
+            estoque.item_id: estoque
+            for estoque in Estoque.query.filter(
+                Estoque.lista_id == lista_id,
+                Estoque.item_id.in_(item_ids)
+            ).all()
+        }
 
-        item = repositories.get_by_id(Item, item_id)
+    for item_id, quantidade_minima in entradas:
+        item = itens.get(item_id)
         if not item:
             continue
 
-        # Verifica se o estoque já existe
-        estoque_existente = Estoque.query.filter_by(
-            lista_id=lista_id,
-            item_id=item_id
-        ).first()
-
+        estoque_existente = estoques.get(item_id)
         if estoque_existente:
             # Atualiza quantidade mínima
             estoque_existente.quantidade_minima = quantidade_minima
@@ -4751,6 +5217,7 @@ def adicionar_itens_na_lista(lista_id, items_data, restaurante_id=None):
                 pedido=0
             )
             db.session.add(novo_estoque)
+            estoques[item_id] = novo_estoque
             itens_adicionados.append(item.nome)
 
     log_event(
@@ -4827,13 +5294,100 @@ def remover_item_da_lista(lista_id, item_id, restaurante_id=None):
 
 # ===== LISTA MAE ITENS (Nova Funcionalidade) =====
 
-def normalize_item_nome(value):
-    if not value:
-        return ""
-    normalized = unicodedata.normalize("NFKD", value)
-    normalized = "".join(char for char in normalized if not unicodedata.combining(char))
-    normalized = re.sub(r"\s+", " ", normalized).strip().lower()
-    return normalized
+def _filtro_nome_igual(model, nome):
+    """Igualdade por nome normalizado (usa os índices de nome_normalizado)."""
+    return model.nome_normalizado == normalize_item_nome(nome)
+
+
+def _filtro_nome_contem(model, termo):
+    """Busca por substring em nome_normalizado (índice trigram no Postgres)."""
+    termo = normalize_item_nome(termo).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return model.nome_normalizado.like(f'%{termo}%', escape='\\')
+
+
+def _carregar_indice_catalogo(restaurante_id):
+    """Índice {nome normalizado: id} do catálogo global do restaurante (menor id prevalece)."""
+    indice = {}
+    rows = db.session.query(ListaMaeItem.id, ListaMaeItem.nome_normalizado).filter(
+        ListaMaeItem.restaurante_id == restaurante_id
+    ).order_by(ListaMaeItem.id)
+    for item_id, nome_normalizado in rows:
+        indice.setdefault(nome_normalizado, item_id)
+    return indice
+
+
+def _vincular_nomes_a_lista(lista_id, restaurante_id, entradas):
+    """
+    Vincula itens à lista pelo nome, criando no catálogo global os que faltam.
+
+    O catálogo do restaurante e os vínculos atuais da lista são carregados uma
+    única vez; os itens novos saem em um INSERT multi-linha e os vínculos em
+    outro. Nomes são comparados via normalize_item_nome, e nomes repetidos (ou
+    já vinculados) contam como duplicados.
+
+    entradas: iterável de dicts com "nome" e, opcionalmente, "unidade",
+    "quantidade_atual" e "quantidade_minima".
+
+    Retorna {"criados": int, "vinculados": int, "duplicados": int}.
+    """
+    indice = _carregar_indice_catalogo(restaurante_id)
+    vinculados_ids = {
+        item_id for (item_id,) in db.session.query(ListaItemRef.item_id).filter(
+            ListaItemRef.lista_id == lista_id
+        )
+    }
+
+    novos_itens = {}
+    novos_refs = []
+    vinculados_chaves = set()
+    duplicados = 0
+
+    for entrada in entradas:
+        nome = entrada["nome"]
+        chave = normalize_item_nome(nome)
+        if not chave:
+            continue
+
+        item_id = indice.get(chave)
+        if item_id is None and chave not in novos_itens:
+            novos_itens[chave] = {
+                "nome": nome,
+                "unidade": entrada.get("unidade") or 'un',
+                "restaurante_id": restaurante_id,
+            }
+
+        if chave in vinculados_chaves or (item_id is not None and item_id in vinculados_ids):
+            duplicados += 1
+            continue
+        vinculados_chaves.add(chave)
+        novos_refs.append((chave, entrada))
+
+    if novos_itens:
+        catalog_search.marcar_alteracao(db.session, restaurante_id=restaurante_id)
+        rows = db.session.execute(
+            insert(ListaMaeItem).returning(ListaMaeItem.id, ListaMaeItem.nome),
+            list(novos_itens.values())
+        ).all()
+        ids_por_nome = {nome: item_id for item_id, nome in rows}
+        for chave, dados in novos_itens.items():
+            indice[chave] = ids_por_nome[dados["nome"]]
+
+    if novos_refs:
+        db.session.execute(insert(ListaItemRef), [
+            {
+                "lista_id": lista_id,
+                "item_id": indice[chave],
+                "quantidade_atual": entrada.get("quantidade_atual", 0),
+                "quantidade_minima": entrada.get("quantidade_minima", 1.0),
+            }
+            for chave, entrada in novos_refs
+        ])
+
+    return {
+        "criados": len(novos_itens),
+        "vinculados": len(novos_refs),
+        "duplicados": duplicados,
+    }
 
 def sync_lista_mae_itens_para_estoque(lista_id):
     """
@@ -4937,7 +5491,7 @@ def adicionar_item_lista_mae(lista_id, data, restaurante_id=None):
         item_criado = False
         item = ListaMaeItem.query.filter(
             ListaMaeItem.restaurante_id == restaurante_id,
-            func.lower(ListaMaeItem.nome) == func.lower(nome)
+            _filtro_nome_igual(ListaMaeItem, nome)
         ).first()
 
         if not item:
@@ -5053,7 +5607,7 @@ def editar_item_lista_mae(lista_id, item_id, data, restaurante_id=None):
             # Busca case-insensitive por item com o mesmo nome
             item_existente = ListaMaeItem.query.filter(
                 ListaMaeItem.restaurante_id == restaurante_id,
-                db.func.lower(ListaMaeItem.nome) == nome_novo.lower()
+                _filtro_nome_igual(ListaMaeItem, nome_novo)
             ).first()
             
             if item_existente:
@@ -5621,52 +6175,14 @@ def importar_items_em_lote(lista_id, data, restaurante_id=None):
         if restaurante_id is None:
             return {"error": "Restaurante é obrigatório"}, 400
 
-        items_criados = 0
-        items_vinculados = 0
-        items_duplicados = 0
-
-        for nome in nomes:
-            nome_limpo = nome.strip()
-
-            if len(nome_limpo) < 2:
-                continue
-
-            # Buscar item no catálogo global (case-insensitive)
-            item = ListaMaeItem.query.filter(
-                ListaMaeItem.restaurante_id == restaurante_id,
-                func.lower(ListaMaeItem.nome) == func.lower(nome_limpo)
-            ).first()
-
-            if not item:
-                # Criar novo item no catálogo global
-                item = ListaMaeItem(
-                    nome=nome_limpo,
-                    unidade='un',
-                    restaurante_id=restaurante_id
-                )
-                db.session.add(item)
-                db.session.flush()
-                items_criados += 1
-
-            # Verificar se já está vinculado a esta lista
-            ref_existe = ListaItemRef.query.filter_by(
-                lista_id=lista_id,
-                item_id=item.id
-            ).first()
-
-            if ref_existe:
-                items_duplicados += 1
-                continue
-
-            # Criar referência
-            ref = ListaItemRef(
-                lista_id=lista_id,
-                item_id=item.id,
-                quantidade_atual=0,
-                quantidade_minima=1.0
-            )
-            db.session.add(ref)
-            items_vinculados += 1
+        resultado = _vincular_nomes_a_lista(lista_id, restaurante_id, (
+            {"nome": nome.strip()}
+            for nome in nomes
+            if isinstance(nome, str) and len(nome.strip()) >= 2
+        ))
+        items_criados = resultado["criados"]
+        items_vinculados = resultado["vinculados"]
+        items_duplicados = resultado["duplicados"]
 
         log_event(
             acao="update",
@@ -6005,6 +6521,10 @@ def clear_database_except_users(user_id, data):
         Pedido.query.delete()
         print("✅ Pedidos removidos")
 
+        # Rollup diário: sem as submissões e pedidos, o histórico agregado perde a origem
+        db.session.execute(db.text('DELETE FROM daily_metrics'))
+        print("✅ Métricas diárias removidas")
+
         Estoque.query.delete()
         print("✅ Estoques removidos")
 
@@ -6039,6 +6559,7 @@ def clear_database_except_users(user_id, data):
                 "cotacao_itens",
                 "cotacoes",
                 "pedidos",
+                "daily_metrics",
                 "estoques",
                 "lista_mae_itens",
                 "listas",
@@ -6230,7 +6751,7 @@ def populate_database_with_mock_data(restaurante_id=None):
                 # Buscar ou criar item no catálogo global
                 item = ListaMaeItem.query.filter(
                     ListaMaeItem.restaurante_id == restaurante_id,
-                    func.lower(ListaMaeItem.nome) == func.lower(item_data["nome"])
+                    _filtro_nome_igual(ListaMaeItem, item_data["nome"])
                 ).first()
 
                 if not item:
@@ -6456,40 +6977,19 @@ def import_lista_from_csv(lista_id, csv_file, restaurante_id=None):
         # Remover vínculos existentes da lista (não os itens globais)
         ListaItemRef.query.filter_by(lista_id=lista_id).delete()
 
-        itens_importados = 0
-        itens_criados = 0
-
+        entradas = []
         for row in csv_reader:
             try:
                 nome = row['nome'].strip()
                 if not nome:
                     continue
 
-                # Buscar ou criar item no catálogo global
-                item = ListaMaeItem.query.filter(
-                    ListaMaeItem.restaurante_id == restaurante_id,
-                    func.lower(ListaMaeItem.nome) == func.lower(nome)
-                ).first()
-
-                if not item:
-                    item = ListaMaeItem(
-                        nome=nome,
-                        unidade=row['unidade'].strip() if row['unidade'] else 'un',
-                        restaurante_id=restaurante_id
-                    )
-                    db.session.add(item)
-                    db.session.flush()
-                    itens_criados += 1
-
-                # Criar referência
-                ref = ListaItemRef(
-                    lista_id=lista_id,
-                    item_id=item.id,
-                    quantidade_atual=float(row['quantidade_atual']) if row['quantidade_atual'] else 0,
-                    quantidade_minima=float(row['quantidade_minima']) if row['quantidade_minima'] else 1.0
-                )
-                db.session.add(ref)
-                itens_importados += 1
+                entradas.append({
+                    "nome": nome,
+                    "unidade": row['unidade'].strip() if row['unidade'] else 'un',
+                    "quantidade_atual": float(row['quantidade_atual']) if row['quantidade_atual'] else 0,
+                    "quantidade_minima": float(row['quantidade_minima']) if row['quantidade_minima'] else 1.0
+                })
 
             except (ValueError, KeyError) as e:
                 db.session.rollback()
@@ -6497,6 +6997,9 @@ def import_lista_from_csv(lista_id, csv_file, restaurante_id=None):
                     "error": f"Erro ao processar linha do CSV: {str(e)}"
                 }, 400
 
+        resultado = _vincular_nomes_a_lista(lista_id, restaurante_id, entradas)
+        itens_importados = resultado["vinculados"]
+        itens_criados = resultado["criados"]
         db.session.commit()
 
         return {
@@ -6556,35 +7059,7 @@ def create_lista_from_csv(nome, descricao, csv_file, restaurante_id=None):
             if 'nome' in first_line_lower.split(','):
                 is_csv_format = True
 
-        itens_vinculados = 0
-        itens_criados = 0
-
-        def find_or_create_item_and_ref(nome_item, unidade='un', quantidade_atual=0, quantidade_minima=1.0):
-            """Helper para buscar/criar item global e criar referência"""
-            nonlocal itens_criados, itens_vinculados
-
-            # Buscar item no catálogo global
-            item = ListaMaeItem.query.filter(
-                ListaMaeItem.restaurante_id == restaurante_id,
-                func.lower(ListaMaeItem.nome) == func.lower(nome_item)
-            ).first()
-
-            if not item:
-                item = ListaMaeItem(nome=nome_item, unidade=unidade, restaurante_id=restaurante_id)
-                db.session.add(item)
-                db.session.flush()
-                itens_criados += 1
-
-            # Criar referência
-            ref = ListaItemRef(
-                lista_id=nova_lista.id,
-                item_id=item.id,
-                quantidade_atual=quantidade_atual,
-                quantidade_minima=quantidade_minima
-            )
-            db.session.add(ref)
-            itens_vinculados += 1
-
+        entradas = []
         if is_csv_format:
             csv_reader = csv.DictReader(StringIO(content))
 
@@ -6621,7 +7096,12 @@ def create_lista_from_csv(nome, descricao, csv_file, restaurante_id=None):
                         except ValueError:
                             pass
 
-                    find_or_create_item_and_ref(nome_item, unidade, quantidade_atual, quantidade_minima)
+                    entradas.append({
+                        "nome": nome_item,
+                        "unidade": unidade,
+                        "quantidade_atual": quantidade_atual,
+                        "quantidade_minima": quantidade_minima
+                    })
 
                 except Exception as e:
                     db.session.rollback()
@@ -6632,12 +7112,11 @@ def create_lista_from_csv(nome, descricao, csv_file, restaurante_id=None):
                 if not line:
                     continue
 
-                try:
-                    find_or_create_item_and_ref(line, 'un', 0, 1.0)
-                except Exception as e:
-                    db.session.rollback()
-                    return {"error": f"Erro ao processar linha: {str(e)}"}, 400
+                entradas.append({"nome": line})
 
+        resultado = _vincular_nomes_a_lista(nova_lista.id, restaurante_id, entradas)
+        itens_vinculados = resultado["vinculados"]
+        itens_criados = resultado["criados"]
         db.session.commit()
 
         return {
@@ -6662,202 +7141,13 @@ def export_data_bulk(tipos_dados, restaurante_id=None):
                     ['usuarios', 'listas', 'itens', 'fornecedores', 'areas', 'pedidos', 'cotacoes', 'estoque']
 
     Returns:
-        BytesIO contendo o arquivo ZIP, ou erro
+        Iterador de bytes com o ZIP (streaming, ver bulk_export), ou erro.
+        O primeiro pedaço já é gerado aqui para que falhas iniciais virem 500.
     """
-    import io
-    import zipfile
-    import csv
-
     try:
-        # Criar arquivo ZIP em memória
-        zip_buffer = io.BytesIO()
-
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-
-            # Exportar Usuários
-            if 'usuarios' in tipos_dados:
-                usuarios_query = Usuario.query
-                if restaurante_id is not None:
-                    usuarios_query = usuarios_query.filter(
-                        Usuario.role != UserRoles.SUPER_ADMIN,
-                        Usuario.restaurante_id == restaurante_id
-                    )
-                usuarios = usuarios_query.all()
-                csv_buffer = io.StringIO()
-                csv_writer = csv.writer(csv_buffer)
-                csv_writer.writerow(['ID', 'Nome', 'Email', 'Username', 'Role', 'Aprovado', 'Ativo', 'Data Criação'])
-
-                for user in usuarios:
-                    csv_writer.writerow([
-                        user.id,
-                        user.nome,
-                        user.email,
-                        user.username or '',
-                        user.role.value,
-                        'Sim' if user.aprovado else 'Não',
-                        'Sim' if user.ativo else 'Não',
-                        user.data_criacao.strftime('%Y-%m-%d %H:%M:%S') if user.data_criacao else ''
-                    ])
-
-                zip_file.writestr('usuarios.csv', csv_buffer.getvalue())
-
-            # Exportar Listas
-            if 'listas' in tipos_dados:
-                listas_query = Lista.query.filter_by(deletado=False)
-                if restaurante_id is not None:
-                    listas_query = listas_query.filter_by(restaurante_id=restaurante_id)
-                listas = listas_query.all()
-                csv_buffer = io.StringIO()
-                csv_writer = csv.writer(csv_buffer)
-                csv_writer.writerow(['ID', 'Nome', 'Descrição', 'Data Criação', 'Colaboradores'])
-
-                for lista in listas:
-                    colaboradores_nomes = ', '.join([c.nome for c in lista.colaboradores])
-                    csv_writer.writerow([
-                        lista.id,
-                        lista.nome,
-                        lista.descricao or '',
-                        lista.data_criacao.strftime('%Y-%m-%d %H:%M:%S'),
-                        colaboradores_nomes
-                    ])
-
-                zip_file.writestr('listas.csv', csv_buffer.getvalue())
-
-            # Exportar Itens
-            if 'itens' in tipos_dados:
-                itens_query = Item.query
-                if restaurante_id is not None:
-                    itens_query = itens_query.join(Fornecedor).filter(Fornecedor.restaurante_id == restaurante_id)
-                itens = itens_query.all()
-                csv_buffer = io.StringIO()
-                csv_writer = csv.writer(csv_buffer)
-                csv_writer.writerow(['ID', 'Nome', 'Unidade Medida', 'Fornecedor', 'Data Criação'])
-
-                for item in itens:
-                    csv_writer.writerow([
-                        item.id,
-                        item.nome,
-                        item.unidade_medida,
-                        item.fornecedor.nome if item.fornecedor else '',
-                        item.data_criacao.strftime('%Y-%m-%d %H:%M:%S') if item.data_criacao else ''
-                    ])
-
-                zip_file.writestr('itens.csv', csv_buffer.getvalue())
-
-            # Exportar Fornecedores
-            if 'fornecedores' in tipos_dados:
-                fornecedores_query = Fornecedor.query
-                if restaurante_id is not None:
-                    fornecedores_query = fornecedores_query.filter_by(restaurante_id=restaurante_id)
-                fornecedores = fornecedores_query.all()
-                csv_buffer = io.StringIO()
-                csv_writer = csv.writer(csv_buffer)
-                csv_writer.writerow(['ID', 'Nome', 'Contato', 'Telefone', 'Email', 'Responsável', 'Observação'])
-
-                for fornecedor in fornecedores:
-                    csv_writer.writerow([
-                        fornecedor.id,
-                        fornecedor.nome,
-                        fornecedor.contato or '',
-                        fornecedor.telefone or '',
-                        fornecedor.email or '',
-                        fornecedor.responsavel or '',
-                        fornecedor.observacao or ''
-                    ])
-
-                zip_file.writestr('fornecedores.csv', csv_buffer.getvalue())
-
-            # Exportar Áreas
-            if 'areas' in tipos_dados:
-                areas = Area.query.all()
-                csv_buffer = io.StringIO()
-                csv_writer = csv.writer(csv_buffer)
-                csv_writer.writerow(['ID', 'Nome', 'Descrição'])
-
-                for area in areas:
-                    csv_writer.writerow([
-                        area.id,
-                        area.nome,
-                        area.descricao or ''
-                    ])
-
-                zip_file.writestr('areas.csv', csv_buffer.getvalue())
-
-            # Exportar Pedidos
-            if 'pedidos' in tipos_dados:
-                pedidos_query = Pedido.query
-                if restaurante_id is not None:
-                    pedidos_query = pedidos_query.join(
-                        Fornecedor, Pedido.fornecedor_id == Fornecedor.id
-                    ).filter(Fornecedor.restaurante_id == restaurante_id)
-                pedidos = pedidos_query.all()
-                csv_buffer = io.StringIO()
-                csv_writer = csv.writer(csv_buffer)
-                csv_writer.writerow(['ID', 'Item', 'Fornecedor', 'Quantidade', 'Status', 'Usuário', 'Data Pedido'])
-
-                for pedido in pedidos:
-                    csv_writer.writerow([
-                        pedido.id,
-                        pedido.item.nome if pedido.item else '',
-                        pedido.fornecedor.nome if pedido.fornecedor else '',
-                        pedido.quantidade_solicitada,
-                        pedido.status.value if pedido.status else '',
-                        pedido.usuario.nome if pedido.usuario else '',
-                        pedido.data_pedido.strftime('%Y-%m-%d %H:%M:%S') if pedido.data_pedido else ''
-                    ])
-
-                zip_file.writestr('pedidos.csv', csv_buffer.getvalue())
-
-            # Exportar Cotações
-            if 'cotacoes' in tipos_dados:
-                cotacoes_query = Cotacao.query
-                if restaurante_id is not None:
-                    cotacoes_query = cotacoes_query.join(
-                        Fornecedor, Cotacao.fornecedor_id == Fornecedor.id
-                    ).filter(Fornecedor.restaurante_id == restaurante_id)
-                cotacoes = cotacoes_query.all()
-                csv_buffer = io.StringIO()
-                csv_writer = csv.writer(csv_buffer)
-                csv_writer.writerow(['ID', 'Fornecedor', 'Status', 'Data Criação', 'Total Itens'])
-
-                for cotacao in cotacoes:
-                    csv_writer.writerow([
-                        cotacao.id,
-                        cotacao.fornecedor.nome if cotacao.fornecedor else '',
-                        cotacao.status.value if cotacao.status else '',
-                        cotacao.data_criacao.strftime('%Y-%m-%d %H:%M:%S') if cotacao.data_criacao else '',
-                        len(cotacao.itens) if cotacao.itens else 0
-                    ])
-
-                zip_file.writestr('cotacoes.csv', csv_buffer.getvalue())
-
-            # Exportar Estoque
-            if 'estoque' in tipos_dados:
-                estoques_query = Estoque.query
-                if restaurante_id is not None:
-                    estoques_query = estoques_query.join(Item).join(Fornecedor).filter(
-                        Fornecedor.restaurante_id == restaurante_id
-                    )
-                estoques = estoques_query.all()
-                csv_buffer = io.StringIO()
-                csv_writer = csv.writer(csv_buffer)
-                csv_writer.writerow(['ID', 'Item', 'Área', 'Quantidade Atual', 'Quantidade Mínima'])
-
-                for estoque in estoques:
-                    csv_writer.writerow([
-                        estoque.id,
-                        estoque.item.nome if estoque.item else '',
-                        estoque.area.nome if estoque.area else '',
-                        estoque.quantidade_atual,
-                        estoque.quantidade_minima
-                    ])
-
-                zip_file.writestr('estoque.csv', csv_buffer.getvalue())
-
-        # Resetar posição do buffer para o início
-        zip_buffer.seek(0)
-
-        return zip_buffer, 200
+        gerador = bulk_export.gerar_zip(tipos_dados, restaurante_id)
+        primeiro = next(gerador, b'')
+        return itertools.chain([primeiro], gerador), 200
 
     except Exception as e:
         print(f"❌ Erro ao exportar dados em lote: {str(e)}")
@@ -7215,19 +7505,9 @@ def log_navbar_activity(user_id, data):
     else:
         activity = NavbarActivity(usuario_id=user_id, item_key=item_key, criado_em=timestamp)
         db.session.add(activity)
-
-    db.session.flush()
-
-    # Manter apenas os registros mais recentes para este usuário (máximo 20)
-    excess_activities = (
-        NavbarActivity.query
-        .filter_by(usuario_id=user_id)
-        .order_by(NavbarActivity.criado_em.desc())
-        .offset(20)
-        .all()
-    )
-    for old in excess_activities:
-        db.session.delete(old)
+        db.session.flush()
+        # Só uma inserção pode passar do limite: poda em um único DELETE
+        retention.podar_navbar_activities(user_id)
 
     db.session.commit()
     return {"message": "Atividade registrada."}, 200
@@ -7319,7 +7599,7 @@ def criar_sugestao_item(user_id, data, restaurante_id=None):
     # Verifica se item já existe no catálogo global
     item_existente = ListaMaeItem.query.filter(
         ListaMaeItem.restaurante_id == restaurante_id,
-        func.lower(ListaMaeItem.nome) == func.lower(nome_item)
+        _filtro_nome_igual(ListaMaeItem, nome_item)
     ).first()
     if item_existente:
         return {"error": f"Item '{nome_item}' já existe no catálogo global."}, 409
@@ -7416,7 +7696,7 @@ def aprovar_sugestao(sugestao_id, admin_id, data, restaurante_id=None):
 
         item_global = ListaMaeItem.query.filter(
             ListaMaeItem.restaurante_id == restaurante_sugestao_id,
-            func.lower(ListaMaeItem.nome) == func.lower(sugestao.nome_item)
+            _filtro_nome_igual(ListaMaeItem, sugestao.nome_item)
         ).first()
         item_criado = False
         if not item_global:
@@ -8917,9 +9197,9 @@ def deletar_restaurante(restaurante_id):
         lista_mae_itens_ids = [item.id for item in ListaMaeItem.query.filter_by(restaurante_id=restaurante_id).all()]
 
         if fornecedores_ids:
-            Pedido.query.filter(Pedido.fornecedor_id.in_(fornecedores_ids)).delete(synchronize_session=False)
+            _excluir_pedidos(Pedido.fornecedor_id.in_(fornecedores_ids))
         if lista_mae_itens_ids:
-            Pedido.query.filter(Pedido.lista_mae_item_id.in_(lista_mae_itens_ids)).delete(synchronize_session=False)
+            _excluir_pedidos(Pedido.lista_mae_item_id.in_(lista_mae_itens_ids))
 
         # 2. Deletar Estoques dos Itens que pertencem aos Fornecedores do restaurante
         if fornecedores_ids:
@@ -10077,117 +10357,206 @@ def rejeitar_solicitacao_restaurante(solicitacao_id, admin_id, motivo):
 
 # ===== SUPER ADMIN DASHBOARD =====
 
-def get_super_dashboard_data(restaurante_id=None, period=30):
+def _count_where(condition):
     """
-    Retorna dados completos para o Dashboard Global do Super Admin.
+    Contagem condicional para agregações em uma única passada.
+    Postgres usa COUNT(*) FILTER (WHERE ...); os demais bancos, SUM(CASE ...).
+    """
+    if db.engine.name in ("postgresql", "postgres"):
+        return func.count().filter(condition)
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
 
-    Args:
-        restaurante_id: Filtrar por restaurante específico (None = todos)
-        period: Número de dias para dados temporais (default 30)
 
-    Returns:
-        Dicionário com todos os dados do dashboard
+def _get_super_dashboard_summary_counts(restaurante_id=None):
     """
-    cache_key = _get_super_dashboard_cache_key(restaurante_id, period)
-    cached = _SUPER_DASHBOARD_CACHE.get(cache_key)
-    if cached and cached.get("expires_at", 0) > time.time():
-        return cached["data"], 200
+    Calcula os contadores do resumo do Dashboard Global em um único SELECT.
 
-    today = brasilia_now().date()
-    max_days = max(period, 35)
-    max_period_start = today - timedelta(days=max_days)
-    max_period_start_dt = datetime.combine(max_period_start, datetime.min.time())
-    period_end_dt = datetime.combine(today + timedelta(days=1), datetime.min.time())
+    Cada tabela vira uma subquery agregada de uma linha (com contagem
+    condicional para os recortes por role/status) e as subqueries são
+    combinadas no mesmo statement, evitando um round-trip por métrica.
+    """
+    restaurantes_sq = select(
+        func.count(Restaurante.id).label('total_restaurantes')
+    ).where(Restaurante.deletado.is_(False), Restaurante.ativo.is_(True))
+    if restaurante_id:
+        restaurantes_sq = restaurantes_sq.where(Restaurante.id == restaurante_id)
+
+    usuarios_sq = select(
+        func.count(Usuario.id).label('total_users'),
+        _count_where(Usuario.role == UserRoles.SUPER_ADMIN).label('users_super_admin'),
+        _count_where(Usuario.role == UserRoles.ADMIN).label('users_admin'),
+        _count_where(Usuario.role == UserRoles.COLLABORATOR).label('users_collaborator'),
+        _count_where(Usuario.aprovado.is_(False)).label('pending_approvals')
+    ).where(Usuario.ativo.is_(True))
+    if restaurante_id:
+        usuarios_sq = usuarios_sq.where(Usuario.restaurante_id == restaurante_id)
 
-    # ===== SUMMARY =====
-    # Total de restaurantes
+    listas_sq = select(func.count(Lista.id).label('total_listas')).where(Lista.deletado.is_(False))
     if restaurante_id:
-        total_restaurantes = Restaurante.query.filter_by(
-            id=restaurante_id,
-            deletado=False,
-            ativo=True
-        ).count()
-    else:
-        total_restaurantes = Restaurante.query.filter_by(deletado=False, ativo=True).count()
+        listas_sq = listas_sq.where(Lista.restaurante_id == restaurante_id)
 
-    # Usuários
-    users_query = Usuario.query.filter(Usuario.ativo == True)
+    itens_sq = select(func.count(ListaMaeItem.id).label('total_itens'))
     if restaurante_id:
-        users_query = users_query.filter_by(restaurante_id=restaurante_id)
+        itens_sq = itens_sq.where(ListaMaeItem.restaurante_id == restaurante_id)
 
-    total_users = users_query.count()
-
-    # Usuários por role
-    users_by_role = {
-        'super_admin': users_query.filter_by(role=UserRoles.SUPER_ADMIN).count(),
-        'admin': users_query.filter_by(role=UserRoles.ADMIN).count(),
-        'collaborator': users_query.filter_by(role=UserRoles.COLLABORATOR).count()
-    }
-
-    # Usuários pendentes de aprovação
-    pending_approvals = users_query.filter_by(aprovado=False).count()
-
-    # Listas
-    listas_query = Lista.query.filter_by(deletado=False)
-    if restaurante_id:
-        listas_query = listas_query.filter_by(restaurante_id=restaurante_id)
-    total_listas = listas_query.count()
-
-    # Itens no catálogo
-    itens_query = ListaMaeItem.query
-    if restaurante_id:
-        itens_query = itens_query.filter_by(restaurante_id=restaurante_id)
-    total_itens = itens_query.count()
-
-    # Submissões (pedidos agregados)
-    submissoes_query = Submissao.query.filter(Submissao.arquivada.is_(False))
+    submissoes_sq = select(
+        func.count(Submissao.id).label('total_submissoes')
+    ).where(Submissao.arquivada.is_(False))
     if restaurante_id:
-        submissoes_query = submissoes_query.join(Usuario, Submissao.usuario_id == Usuario.id).filter(
+        submissoes_sq = submissoes_sq.join(Usuario, Submissao.usuario_id == Usuario.id).where(
             Usuario.restaurante_id == restaurante_id
         )
-    total_submissoes = submissoes_query.count()
 
-    # Cotações
-    cotacoes_query = Cotacao.query
+    cotacoes_sq = select(
+        _count_where(Cotacao.status == CotacaoStatus.PENDENTE).label('pending_cotacoes'),
+        _count_where(Cotacao.status == CotacaoStatus.CONCLUIDA).label('completed_cotacoes')
+    )
     if restaurante_id:
-        cotacoes_query = cotacoes_query.join(Fornecedor).filter(
+        cotacoes_sq = cotacoes_sq.join(Fornecedor, Cotacao.fornecedor_id == Fornecedor.id).where(
             Fornecedor.restaurante_id == restaurante_id
         )
-    pending_cotacoes = cotacoes_query.filter(Cotacao.status == CotacaoStatus.PENDENTE).count()
-    completed_cotacoes = cotacoes_query.filter(Cotacao.status == CotacaoStatus.CONCLUIDA).count()
+
+    subqueries = [
+        restaurantes_sq.subquery('restaurantes_agg'),
+        usuarios_sq.subquery('usuarios_agg'),
+        listas_sq.subquery('listas_agg'),
+        itens_sq.subquery('itens_agg'),
+        submissoes_sq.subquery('submissoes_agg'),
+        cotacoes_sq.subquery('cotacoes_agg'),
+    ]
+    # Cada subquery tem uma única linha: o JOIN ON TRUE só as coloca lado a lado.
+    combined = subqueries[0]
+    for subquery in subqueries[1:]:
+        combined = combined.join(subquery, true())
+    row = db.session.execute(select(*subqueries).select_from(combined)).mappings().one()
+    return {key: int(value or 0) for key, value in row.items()}
+
+
+def get_super_dashboard_data(restaurante_id=None, period=30):
+    """
+    Retorna dados completos para o Dashboard Global do Super Admin.
+
+    Args:
+        restaurante_id: Filtrar por restaurante específico (None = todos)
+        period: Número de dias para dados temporais (default 30)
+
+    Returns:
+        Dicionário com todos os dados do dashboard
+
+    O payload é compartilhado via cache (ver `cache.get_cache`), com
+    single-flight para que acessos simultâneos não recalculem o dashboard.
+    """
+    cache_key = _get_super_dashboard_cache_key(restaurante_id, period)
+    data = _get_super_dashboard_cache().get_or_compute(
+        cache_key,
+        lambda: _build_super_dashboard_data(restaurante_id, period)
+    )
+    return data, 200
+
+
+def get_super_dashboard_cache_stats():
+    """Retorna os contadores de hit/miss do cache do Dashboard Global."""
+    return _get_super_dashboard_cache().stats(), 200
+
+
+def get_session_cache_stats():
+    """Retorna os contadores do cache de sessão (consultas ao banco evitadas)."""
+    return session_cache.estatisticas(), 200
+
+
+def get_metricas_instrumentacao():
+    """Latência e SQL por endpoint deste worker (INSTRUMENTATION_ENABLED)."""
+    registro = instrumentation.obter_registro()
+    if registro is None:
+        return {"error": "Instrumentação desativada (INSTRUMENTATION_ENABLED)."}, 404
+    return registro.snapshot(), 200
+
+
+def get_metricas_prometheus():
+    """Mesmas métricas de `get_metricas_instrumentacao` no formato do Prometheus."""
+    registro = instrumentation.obter_registro()
+    if registro is None:
+        return "# instrumentação desativada\n", 404
+    return instrumentation.exportar_prometheus(registro), 200
+
+
+# ===== JOBS EM SEGUNDO PLANO =====
+
+def submeter_job(tipo, params, usuario_id, restaurante_id=None):
+    """Enfileira um job (relatório, exportação ou importação) para `flask run-jobs`."""
+    params = params or {}
+    if not isinstance(params, dict):
+        return {"error": "params deve ser um objeto."}, 400
+    erro = jobs.validar(tipo, params)
+    if erro:
+        return {"error": erro}, 400
+    job = jobs.submeter(tipo, params, usuario_id=usuario_id, restaurante_id=restaurante_id)
+    return {"job": job.to_dict()}, 202
+
+
+def _get_job_visivel(job_id, usuario_id, super_admin):
+    job = db.session.get(Job, job_id)
+    if job is None or (not super_admin and job.usuario_id != usuario_id):
+        return None
+    return job
+
+
+def get_job(job_id, usuario_id, super_admin=False):
+    """Status e progresso do job (apenas o autor ou SUPER_ADMIN)."""
+    job = _get_job_visivel(job_id, usuario_id, super_admin)
+    if job is None:
+        return {"error": "Job não encontrado."}, 404
+    return {"job": job.to_dict()}, 200
+
+
+def get_job_arquivo(job_id, usuario_id, super_admin=False):
+    """Conteúdo, nome e mimetype do arquivo gerado pelo job."""
+    job = _get_job_visivel(job_id, usuario_id, super_admin)
+    if job is None:
+        return {"error": "Job não encontrado."}, 404
+    if job.status != JobStatus.CONCLUIDO or not job.arquivo_nome:
+        return {"error": "Resultado ainda não disponível.", "status": job.status.value}, 409
+    if job.arquivo_conteudo is None:
+        return {"error": "Arquivo de resultado expirado."}, 410
+    return {"conteudo": job.arquivo_conteudo, "nome": job.arquivo_nome, "mimetype": job.arquivo_mimetype}, 200
+
+
+def _build_super_dashboard_data(restaurante_id, period):
+    """Monta o payload do Dashboard Global sem passar pelo cache."""
+    today = brasilia_now().date()
+    max_days = max(period, 35)
+    max_period_start = today - timedelta(days=max_days)
+
+    # ===== SUMMARY =====
+    summary_counts = _get_super_dashboard_summary_counts(restaurante_id)
 
     # ===== TEMPORAL DATA =====
-    # Submissões por dia
+    # Submissões por dia (rollup diário: O(dias) linhas)
     dates = [today - timedelta(days=i) for i in range(period - 1, -1, -1)]
-    extended_dates = [today - timedelta(days=i) for i in range(max_days - 1, -1, -1)]
-    submissions_day_query = db.session.query(
-        func.date(Submissao.data_submissao).label('day'),
-        func.count(Submissao.id)
-    ).filter(
-        Submissao.arquivada.is_(False),
-        Submissao.data_submissao >= max_period_start_dt,
-        Submissao.data_submissao < period_end_dt
+    submissions_by_day = rollups.somar_por_dia(
+        rollups.PREFIXO_SUBMISSOES,
+        inicio=max_period_start,
+        fim=today,
+        restaurante_id=restaurante_id
     )
-    if restaurante_id:
-        submissions_day_query = submissions_day_query.join(Usuario, Submissao.usuario_id == Usuario.id).filter(
-            Usuario.restaurante_id == restaurante_id
-        )
-    submissions_day_rows = submissions_day_query.group_by(func.date(Submissao.data_submissao)).all()
-    submissions_by_day = {str(day): count for day, count in submissions_day_rows}
-    submissions_per_day_data = [submissions_by_day.get(d.isoformat(), 0) for d in dates]
-    submissoes_hoje = submissions_by_day.get(today.isoformat(), 0)
+    submissions_per_day_data = [submissions_by_day.get(d, 0) for d in dates]
+    submissoes_hoje = submissions_by_day.get(today, 0)
 
     summary = {
-        'total_restaurantes': total_restaurantes,
-        'total_users': total_users,
-        'users_by_role': users_by_role,
-        'pending_approvals': pending_approvals,
-        'total_listas': total_listas,
-        'total_itens': total_itens,
-        'total_submissoes': total_submissoes,
+        'total_restaurantes': summary_counts['total_restaurantes'],
+        'total_users': summary_counts['total_users'],
+        'users_by_role': {
+            'super_admin': summary_counts['users_super_admin'],
+            'admin': summary_counts['users_admin'],
+            'collaborator': summary_counts['users_collaborator']
+        },
+        'pending_approvals': summary_counts['pending_approvals'],
+        'total_listas': summary_counts['total_listas'],
+        'total_itens': summary_counts['total_itens'],
+        'total_submissoes': summary_counts['total_submissoes'],
         'submissoes_hoje': submissoes_hoje,
-        'pending_cotacoes': pending_cotacoes,
-        'completed_cotacoes': completed_cotacoes
+        'pending_cotacoes': summary_counts['pending_cotacoes'],
+        'completed_cotacoes': summary_counts['completed_cotacoes']
     }
     submissions_per_day = {
         'labels': [d.strftime('%d/%m') for d in dates],
@@ -10199,11 +10568,7 @@ def get_super_dashboard_data(restaurante_id=None, period=30):
     weeks_labels = []
     for i in range(4, -1, -1):
         week_end = today - timedelta(days=i * 7)
-        week_start = week_end - timedelta(days=6)
-        count = 0
-        for d in extended_dates:
-            if week_start <= d <= week_end:
-                count += submissions_by_day.get(d.isoformat(), 0)
+        count = sum(submissions_by_day.get(week_end - timedelta(days=j), 0) for j in range(7))
         weeks_data.append(count)
         weeks_labels.append(f'Sem {5-i}')
     submissions_per_week = {
@@ -10274,29 +10639,20 @@ def get_super_dashboard_data(restaurante_id=None, period=30):
         'data': active_users_data
     }
 
-    # Distribuição de status de submissões
-    status_query = db.session.query(
-        Submissao.status, func.count(Submissao.id)
-    ).filter(Submissao.arquivada.is_(False))
-    if restaurante_id:
-        status_query = status_query.join(Usuario, Submissao.usuario_id == Usuario.id).filter(
-            Usuario.restaurante_id == restaurante_id
-        )
-    status_counts = status_query.group_by(Submissao.status).all()
-
+    # Distribuição de status de submissões (rollup, submissões não arquivadas)
+    status_counts = rollups.somar_por_metrica(rollups.PREFIXO_SUBMISSOES, restaurante_id=restaurante_id)
     submission_status_distribution = {
         'labels': ['Pendente', 'Parcial', 'Aprovado', 'Rejeitado'],
-        'data': [0, 0, 0, 0]
+        'data': [
+            status_counts.get(rollups.metrica_submissoes(status), 0)
+            for status in (
+                SubmissaoStatus.PENDENTE,
+                SubmissaoStatus.PARCIALMENTE_APROVADO,
+                SubmissaoStatus.APROVADO,
+                SubmissaoStatus.REJEITADO
+            )
+        ]
     }
-    for status, count in status_counts:
-        if status == SubmissaoStatus.PENDENTE:
-            submission_status_distribution['data'][0] = count
-        elif status == SubmissaoStatus.PARCIALMENTE_APROVADO:
-            submission_status_distribution['data'][1] = count
-        elif status == SubmissaoStatus.APROVADO:
-            submission_status_distribution['data'][2] = count
-        elif status == SubmissaoStatus.REJEITADO:
-            submission_status_distribution['data'][3] = count
 
     temporal = {
         'submissions_per_day': submissions_per_day,
@@ -10508,8 +10864,8 @@ def get_super_dashboard_data(restaurante_id=None, period=30):
 
     # Status de cotações
     quotation_status = {
-        'pendente': pending_cotacoes,
-        'concluida': completed_cotacoes
+        'pendente': summary['pending_cotacoes'],
+        'concluida': summary['completed_cotacoes']
     }
 
     # Valor médio de cotações
@@ -10654,17 +11010,13 @@ def get_super_dashboard_data(restaurante_id=None, period=30):
         'meta': meta
     }
 
-    _SUPER_DASHBOARD_CACHE[cache_key] = {
-        "expires_at": time.time() + _SUPER_DASHBOARD_CACHE_TTL_SECONDS,
-        "data": response
-    }
-
-    return response, 200
+    return response
 
 
 def generate_super_dashboard_pdf(restaurante_id=None, period=30):
     """
     Gera PDF do dashboard do super admin.
+    Reaproveita o payload em cache de get_super_dashboard_data.
     """
     from io import BytesIO
     from reportlab.lib import colors
@@ -10755,6 +11107,7 @@ def generate_super_dashboard_pdf(restaurante_id=None, period=30):
 def generate_super_dashboard_excel(restaurante_id=None, period=30):
     """
     Gera Excel com dados do dashboard do super admin.
+    Reaproveita o payload em cache de get_super_dashboard_data.
     """
     from io import BytesIO
     from openpyxl import Workbook
@@ -10910,32 +11263,75 @@ def _user_can_access_pop_lista(usuario, lista):
     return lista.colaboradores.filter_by(id=usuario.id).first() is not None
 
 
-def _apply_pop_auto_archive(restaurante_id, executed_by_id=None):
-    config = _get_pop_config(restaurante_id)
+_POP_AUTO_ARCHIVE_INTERVALO = timedelta(days=7)
+
+
+def _auto_arquivamento_vencido(config, now):
+    """True se o auto-arquivamento está ativo e o último rodou há mais de uma semana."""
     if not config.auto_arquivar:
-        return 0
+        return False
+    if not config.ultimo_auto_arquivamento_em:
+        return True
+    # A coluna não guarda o fuso: volta do banco como horário de Brasília sem tzinfo
+    delta = now.replace(tzinfo=None) - config.ultimo_auto_arquivamento_em.replace(tzinfo=None)
+    return delta >= _POP_AUTO_ARCHIVE_INTERVALO
+
 
+def _apply_pop_auto_archive(restaurante_id, executed_by_id=None):
+    config = _get_pop_config(restaurante_id)
     now = brasilia_now()
-    if config.ultimo_auto_arquivamento_em:
-        delta = now - config.ultimo_auto_arquivamento_em
-        if delta.days < 7:
-            return 0
+    if not _auto_arquivamento_vencido(config, now):
+        return 0
 
     limite = now.date() - timedelta(days=config.periodo_arquivamento_dias)
-    execucoes = POPExecucao.query.filter(
-        POPExecucao.restaurante_id == restaurante_id,
-        POPExecucao.arquivado.is_(False),
-        POPExecucao.data_referencia <= limite
-    ).all()
-
-    for execucao in execucoes:
-        execucao.arquivado = True
-        execucao.arquivado_em = now
-        execucao.arquivado_por_id = executed_by_id
+    resultado = db.session.execute(
+        update(POPExecucao)
+        .where(
+            POPExecucao.restaurante_id == restaurante_id,
+            POPExecucao.arquivado.is_(False),
+            POPExecucao.data_referencia <= limite
+        )
+        .values(arquivado=True, arquivado_em=now, arquivado_por_id=executed_by_id)
+        .execution_options(synchronize_session=False)
+    )
 
     config.ultimo_auto_arquivamento_em = now
     db.session.commit()
-    return len(execucoes)
+    return resultado.rowcount
+
+
+def arquivar_pop_execucoes_automatico():
+    """
+    Manutenção periódica do worker `flask run-jobs` (também disponível como
+    `flask archive-pop-executions`): aplica o auto-arquivamento configurado em
+    cada restaurante com execuções não arquivadas.
+    Retorna {restaurante_id: arquivadas}.
+    """
+    restaurante_ids = db.session.scalars(
+        select(POPExecucao.restaurante_id).where(POPExecucao.arquivado.is_(False)).distinct()
+    ).all()
+    return {
+        restaurante_id: _apply_pop_auto_archive(restaurante_id)
+        for restaurante_id in sorted(restaurante_ids)
+    }
+
+
+def arquivar_pop_execucoes_se_vencido(restaurante_id):
+    """
+    Fallback do worker para o restaurante, chamado depois da resposta da
+    listagem admin (fora da transação de leitura). Só escreve quando o
+    intervalo desde `ultimo_auto_arquivamento_em` venceu; falhas são logadas.
+    """
+    try:
+        config = POPConfiguracao.query.filter_by(restaurante_id=restaurante_id).first()
+        if config is not None and not _auto_arquivamento_vencido(config, brasilia_now()):
+            db.session.rollback()
+            return 0
+        return _apply_pop_auto_archive(restaurante_id)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f"[POP] Falha no auto-arquivamento do restaurante {restaurante_id}: {e}")
+        return 0
 
 
 # ----- Configuracoes POP -----
@@ -11227,8 +11623,10 @@ def list_pop_listas(restaurante_id):
     query = POPLista.query.filter_by(deletado=False)
     if restaurante_id is not None:
         query = query.filter_by(restaurante_id=restaurante_id)
-    listas = query.order_by(POPLista.nome.asc()).all()
-    return [lista.to_dict() for lista in listas], 200
+    listas = query.options(
+        db.joinedload(POPLista.area), db.joinedload(POPLista.categoria)
+    ).order_by(POPLista.nome.asc()).all()
+    return POPLista.to_dicts(listas), 200
 
 
 def get_pop_lista(lista_id, restaurante_id):
@@ -11443,19 +11841,20 @@ def list_pop_listas_colaborador(user_id):
     if not usuario:
         return {"error": "Usuário não encontrado."}, 404
 
+    query = POPLista.query.options(db.joinedload(POPLista.area), db.joinedload(POPLista.categoria))
     if usuario.role == UserRoles.SUPER_ADMIN:
-        listas = POPLista.query.filter_by(deletado=False, ativo=True).all()
+        listas = query.filter_by(deletado=False, ativo=True).all()
     elif _is_admin_or_super_admin(usuario):
-        listas = POPLista.query.filter_by(restaurante_id=usuario.restaurante_id, deletado=False, ativo=True).all()
+        listas = query.filter_by(restaurante_id=usuario.restaurante_id, deletado=False, ativo=True).all()
     else:
-        listas = POPLista.query.filter(
+        listas = query.filter(
             POPLista.deletado.is_(False),
             POPLista.ativo.is_(True),
             POPLista.restaurante_id == usuario.restaurante_id,
             or_(POPLista.publico.is_(True), POPLista.colaboradores.any(id=usuario.id))
         ).all()
 
-    return {"listas": [lista.to_dict() for lista in listas]}, 200
+    return {"listas": POPLista.to_dicts(listas)}, 200
 
 
 def start_pop_execucao(user_id, data):
@@ -11488,42 +11887,145 @@ def start_pop_execucao(user_id, data):
     if existente:
         return {"error": "Execução já criada para esta lista neste dia."}, 400
 
+    tarefas = _tarefas_ativas_pop([lista.id]).get(lista.id)
+    if not tarefas:
+        return {"error": "Lista não possui tarefas ativas."}, 400
+
     execucao = POPExecucao(
         lista_id=lista.id,
         usuario_id=usuario.id,
         restaurante_id=lista.restaurante_id,
         data_referencia=data_ref,
-        status=StatusExecucao.EM_ANDAMENTO
+        status=StatusExecucao.EM_ANDAMENTO,
+        total_tarefas=len(tarefas)
     )
     db.session.add(execucao)
     db.session.flush()
 
-    tarefas = lista.tarefas.order_by(POPListaTarefa.ordem.asc()).all()
-    itens = []
-    for ordem, tarefa in enumerate(tarefas):
-        template = tarefa.template
-        if not template or not template.ativo:
-            continue
-        item = POPExecucaoItem(
-            execucao_id=execucao.id,
-            template_id=template.id,
-            lista_tarefa_id=tarefa.id,
-            titulo=template.titulo,
-            descricao=template.descricao,
-            tipo_verificacao=template.tipo_verificacao,
-            unidade_medicao=template.unidade_medicao,
-            ordem=ordem
-        )
-        itens.append(item)
-        db.session.add(item)
+    # render_nulls mantém todas as linhas no mesmo INSERT multi-VALUES
+    itens = db.session.scalars(
+        insert(POPExecucaoItem).returning(POPExecucaoItem).execution_options(render_nulls=True),
+        _linhas_itens_execucao_pop(execucao.id, tarefas)
+    ).all()
+    itens.sort(key=lambda item: item.ordem)
 
-    if not itens:
-        db.session.rollback()
-        return {"error": "Lista não possui tarefas ativas."}, 400
+    # Resposta montada antes do commit, com os objetos já em memória (sem reler os itens)
+    resposta = execucao.to_dict()
+    resposta["itens"] = [item.to_dict() for item in itens]
+    db.session.commit()
+    return resposta, 201
+
+
+def _tarefas_ativas_pop(lista_ids):
+    """
+    Tarefas com template ativo das listas, em ordem, numa única consulta com
+    JOIN no template -> {lista_id: [(tarefa, template), ...]}.
+    """
+    rows = db.session.execute(
+        select(POPListaTarefa, POPTemplate)
+        .join(POPTemplate, POPListaTarefa.template_id == POPTemplate.id)
+        .where(POPListaTarefa.lista_id.in_(lista_ids), POPTemplate.ativo.is_(True))
+        .order_by(POPListaTarefa.lista_id, POPListaTarefa.ordem.asc(), POPListaTarefa.id)
+    ).all()
+    por_lista = {}
+    for tarefa, template in rows:
+        por_lista.setdefault(tarefa.lista_id, []).append((tarefa, template))
+    return por_lista
 
-    execucao.total_tarefas = len(itens)
+
+def _linhas_itens_execucao_pop(execucao_id, tarefas):
+    """Parâmetros do INSERT em lote dos itens de uma execução (cópia dos dados do template)."""
+    return [
+        {
+            "execucao_id": execucao_id,
+            "template_id": template.id,
+            "lista_tarefa_id": tarefa.id,
+            "titulo": template.titulo,
+            "descricao": template.descricao,
+            "tipo_verificacao": template.tipo_verificacao,
+            "unidade_medicao": template.unidade_medicao,
+            "valor_minimo": template.valor_minimo,
+            "valor_maximo": template.valor_maximo,
+            "ordem": ordem,
+        }
+        for ordem, (tarefa, template) in enumerate(tarefas)
+    ]
+
+
+def pre_materializar_execucoes_pop(restaurante_id=None, data_referencia=None):
+    """
+    Cria de uma vez as execuções do dia para os colaboradores atribuídos às
+    listas POP diárias ativas (abertura de turno sem corrida no start).
+
+    Pares (lista, colaborador) que já têm execução na data são ignorados.
+    Tudo em uma transação: uma consulta de pares, uma de tarefas, uma de
+    execuções existentes e dois INSERTs em lote.
+    """
+    if isinstance(data_referencia, str):
+        try:
+            data_referencia = datetime.fromisoformat(data_referencia).date()
+        except ValueError:
+            return {"error": "data_referencia inválida. Use YYYY-MM-DD."}, 400
+    data_ref = data_referencia or brasilia_now().date()
+
+    stmt = (
+        select(POPLista.id, POPLista.restaurante_id, Usuario.id.label('usuario_id'))
+        .join(POPLista.colaboradores)
+        .where(
+            POPLista.deletado.is_(False),
+            POPLista.ativo.is_(True),
+            POPLista.recorrencia == RecorrenciaLista.DIARIA,
+            Usuario.ativo.is_(True),
+            Usuario.restaurante_id == POPLista.restaurante_id,
+        )
+        .order_by(POPLista.id, Usuario.id)
+    )
+    if restaurante_id is not None:
+        stmt = stmt.where(POPLista.restaurante_id == restaurante_id)
+    pares = db.session.execute(stmt).all()
+
+    lista_ids = sorted({par.id for par in pares})
+    tarefas = _tarefas_ativas_pop(lista_ids) if lista_ids else {}
+    existentes = set(db.session.execute(
+        select(POPExecucao.lista_id, POPExecucao.usuario_id)
+        .where(POPExecucao.data_referencia == data_ref, POPExecucao.lista_id.in_(lista_ids))
+    ).all()) if lista_ids else set()
+
+    novos = [
+        par for par in pares
+        if tarefas.get(par.id) and (par.id, par.usuario_id) not in existentes
+    ]
+    if not novos:
+        return {"data_referencia": data_ref.isoformat(), "execucoes_criadas": 0, "itens_criados": 0}, 200
+
+    agora = brasilia_now()
+    execucoes = db.session.execute(
+        insert(POPExecucao).returning(POPExecucao.id, POPExecucao.lista_id).execution_options(render_nulls=True),
+        [
+            {
+                "lista_id": par.id,
+                "usuario_id": par.usuario_id,
+                "restaurante_id": par.restaurante_id,
+                "data_referencia": data_ref,
+                "status": StatusExecucao.EM_ANDAMENTO,
+                "total_tarefas": len(tarefas[par.id]),
+                "iniciado_em": agora,
+            }
+            for par in novos
+        ]
+    ).all()
+    linhas = [
+        linha
+        for execucao in execucoes
+        for linha in _linhas_itens_execucao_pop(execucao.id, tarefas[execucao.lista_id])
+    ]
+    db.session.execute(insert(POPExecucaoItem).execution_options(render_nulls=True), linhas)
     db.session.commit()
-    return execucao.to_dict(include_itens=True), 201
+    return {
+        "data_referencia": data_ref.isoformat(),
+        "execucoes_criadas": len(execucoes),
+        "itens_criados": len(linhas),
+    }, 201
 
 
 def get_pop_execucao(user_id, execucao_id):
@@ -11538,53 +12040,217 @@ def get_pop_execucao(user_id, execucao_id):
     return execucao.to_dict(include_itens=True), 200
 
 
-def list_pop_execucoes(user_id, filtros=None):
-    usuario = Usuario.query.get(user_id)
-    if not usuario:
-        return {"error": "Usuário não encontrado."}, 404
+_POP_EXECUCOES_PAGE_LIMIT = 100
+_POP_EXECUCOES_PAGE_LIMIT_MAX = 500
 
-    filtros = filtros or {}
-    query = POPExecucao.query
 
-    if usuario.role == UserRoles.SUPER_ADMIN:
-        pass
-    elif _is_admin_or_super_admin(usuario):
-        query = query.filter_by(restaurante_id=usuario.restaurante_id)
-    else:
-        query = query.filter_by(usuario_id=usuario.id)
+def _encode_pop_execucoes_cursor(data_referencia, execucao_id):
+    raw = json.dumps([data_referencia.isoformat(), execucao_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def _decode_pop_execucoes_cursor(cursor):
+    try:
+        data_referencia, execucao_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(data_referencia).date(), int(execucao_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Cursor inválido.")
+
+
+def _parse_data_filtro(valor, campo):
+    if not isinstance(valor, str):
+        return valor
+    try:
+        return datetime.fromisoformat(valor).date()
+    except ValueError:
+        raise ValueError(f"{campo} inválida. Use YYYY-MM-DD.")
+
+
+def _pagina_pop_execucoes(query, filtros):
+    """
+    Aplica os filtros comuns (datas, status, arquivados) e devolve uma página
+    keyset em ordem decrescente de (data_referencia, id), com lista e usuário
+    carregados na mesma consulta.
+
+    `cursor` vem de `next_cursor` da página anterior; `limit` é limitado a
+    _POP_EXECUCOES_PAGE_LIMIT_MAX.
+    """
+    try:
+        if filtros.get('data_inicio'):
+            query = query.filter(POPExecucao.data_referencia >= _parse_data_filtro(filtros['data_inicio'], 'data_inicio'))
+        if filtros.get('data_fim'):
+            query = query.filter(POPExecucao.data_referencia <= _parse_data_filtro(filtros['data_fim'], 'data_fim'))
+        posicao = _decode_pop_execucoes_cursor(filtros['cursor']) if filtros.get('cursor') else None
+        limit = int(filtros.get('limit') or _POP_EXECUCOES_PAGE_LIMIT)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    limit = max(1, min(limit, _POP_EXECUCOES_PAGE_LIMIT_MAX))
 
-    if filtros.get('data_inicio'):
-        data_inicio_raw = filtros.get('data_inicio')
-        if isinstance(data_inicio_raw, str):
-            try:
-                data_inicio = datetime.fromisoformat(data_inicio_raw).date()
-            except ValueError:
-                return {"error": "data_inicio inválida. Use YYYY-MM-DD."}, 400
-        else:
-            data_inicio = data_inicio_raw
-        query = query.filter(POPExecucao.data_referencia >= data_inicio)
-    if filtros.get('data_fim'):
-        data_fim_raw = filtros.get('data_fim')
-        if isinstance(data_fim_raw, str):
-            try:
-                data_fim = datetime.fromisoformat(data_fim_raw).date()
-            except ValueError:
-                return {"error": "data_fim inválida. Use YYYY-MM-DD."}, 400
-        else:
-            data_fim = data_fim_raw
-        query = query.filter(POPExecucao.data_referencia <= data_fim)
     if filtros.get('status'):
         query = query.filter_by(status=filtros.get('status'))
     if not filtros.get('include_arquivados'):
         query = query.filter_by(arquivado=False)
+    if posicao:
+        data_referencia, execucao_id = posicao
+        query = query.filter(or_(
+            POPExecucao.data_referencia < data_referencia,
+            (POPExecucao.data_referencia == data_referencia) & (POPExecucao.id < execucao_id)
+        ))
+
+    pagina = query.options(
+        db.joinedload(POPExecucao.lista),
+        db.joinedload(POPExecucao.usuario)
+    ).order_by(
+        POPExecucao.data_referencia.desc(), POPExecucao.id.desc()
+    ).limit(limit + 1).all()
+    has_more = len(pagina) > limit
+    pagina = pagina[:limit]
+
+    return {
+        "execucoes": [e.to_dict() for e in pagina],
+        "next_cursor": _encode_pop_execucoes_cursor(pagina[-1].data_referencia, pagina[-1].id) if has_more else None,
+        "has_more": has_more,
+    }, 200
+
 
-    execucoes = query.order_by(POPExecucao.data_referencia.desc()).all()
-    return {"execucoes": [e.to_dict() for e in execucoes]}, 200
+def _query_pop_execucoes_visiveis(usuario):
+    """Execuções que o usuário enxerga: todas (SUPER_ADMIN), do restaurante (admin) ou as próprias."""
+    query = POPExecucao.query
+    if usuario.role == UserRoles.SUPER_ADMIN:
+        return query
+    if _is_admin_or_super_admin(usuario):
+        return query.filter_by(restaurante_id=usuario.restaurante_id)
+    return query.filter_by(usuario_id=usuario.id)
+
+
+def list_pop_execucoes(user_id, filtros=None):
+    usuario = Usuario.query.get(user_id)
+    if not usuario:
+        return {"error": "Usuário não encontrado."}, 404
+
+    return _pagina_pop_execucoes(_query_pop_execucoes_visiveis(usuario), filtros or {})
 
 
 def list_pop_execucoes_hoje(user_id):
-    hoje = brasilia_now().date()
-    return list_pop_execucoes(user_id, {"data_inicio": hoje, "data_fim": hoje})
+    """
+    Execuções de hoje, sem paginação: a tela "Minhas listas" cruza todas com
+    as listas do usuário e o dia já limita o volume.
+    """
+    usuario = Usuario.query.get(user_id)
+    if not usuario:
+        return {"error": "Usuário não encontrado."}, 404
+
+    execucoes = _query_pop_execucoes_visiveis(usuario).filter(
+        POPExecucao.data_referencia == brasilia_now().date(),
+        POPExecucao.arquivado.is_(False)
+    ).options(
+        db.joinedload(POPExecucao.lista),
+        db.joinedload(POPExecucao.usuario)
+    ).order_by(POPExecucao.id.desc()).all()
+
+    return {
+        "execucoes": [e.to_dict() for e in execucoes],
+        "next_cursor": None,
+        "has_more": False,
+    }, 200
+
+
+def _item_dentro_padrao(item):
+    """Compara o valor medido com a faixa copiada do template no início da execução."""
+    if item.valor_minimo is None or item.valor_maximo is None:
+        return None
+    try:
+        return float(item.valor_minimo) <= float(item.valor_medido) <= float(item.valor_maximo)
+    except (TypeError, ValueError):
+        return None
+
+
+def _progresso_pop(concluidas, total):
+    """Percentual inteiro (truncado) de tarefas concluídas; funciona com colunas ou números."""
+    return case((total > 0, concluidas * 100 // total), else_=0)
+
+
+def _aplicar_delta_progresso_pop(execucao_id, delta_concluidas, delta_desvios):
+    """
+    Atualiza os contadores da execução pela diferença do item marcado, no
+    próprio UPDATE (duas marcações simultâneas não se sobrescrevem).
+    """
+    concluidas = POPExecucao.tarefas_concluidas + delta_concluidas
+    db.session.execute(
+        update(POPExecucao)
+        .where(POPExecucao.id == execucao_id)
+        .values(
+            tarefas_concluidas=concluidas,
+            tarefas_com_desvio=POPExecucao.tarefas_com_desvio + delta_desvios,
+            progresso=_progresso_pop(concluidas, POPExecucao.total_tarefas),
+        )
+        .execution_options(synchronize_session='fetch')
+    )
+
+
+def reconciliar_progresso_pop_execucoes(dias=None, corrigir=True):
+    """
+    Verificador periódico dos contadores incrementais das execuções POP.
+
+    Recalcula total/concluídas/desvios a partir dos itens em uma consulta
+    agrupada e corrige (se `corrigir`) as execuções divergentes. `dias`
+    limita às execuções com data_referencia nos últimos N dias.
+    Retorna a lista de divergências encontradas.
+    """
+    contagens = (
+        select(
+            POPExecucaoItem.execucao_id,
+            func.count(POPExecucaoItem.id).label('total'),
+            func.sum(case((POPExecucaoItem.concluido.is_(True), 1), else_=0)).label('concluidas'),
+            func.sum(case((POPExecucaoItem.tem_desvio.is_(True), 1), else_=0)).label('desvios'),
+        )
+        .group_by(POPExecucaoItem.execucao_id)
+        .subquery()
+    )
+    total = func.coalesce(contagens.c.total, 0)
+    concluidas = func.coalesce(contagens.c.concluidas, 0)
+    desvios = func.coalesce(contagens.c.desvios, 0)
+    stmt = (
+        select(
+            POPExecucao.id, POPExecucao.total_tarefas, POPExecucao.tarefas_concluidas,
+            POPExecucao.tarefas_com_desvio, POPExecucao.progresso,
+            total.label('total'), concluidas.label('concluidas'), desvios.label('desvios'),
+        )
+        .outerjoin(contagens, contagens.c.execucao_id == POPExecucao.id)
+        .where(or_(
+            POPExecucao.total_tarefas != total,
+            POPExecucao.tarefas_concluidas != concluidas,
+            POPExecucao.tarefas_com_desvio != desvios,
+            POPExecucao.progresso != _progresso_pop(concluidas, total),
+        ))
+        .order_by(POPExecucao.id)
+    )
+    if dias is not None:
+        stmt = stmt.where(POPExecucao.data_referencia >= brasilia_now().date() - timedelta(days=dias))
+
+    divergencias = []
+    for row in db.session.execute(stmt).all():
+        esperado = {
+            'total_tarefas': row.total,
+            'tarefas_concluidas': row.concluidas,
+            'tarefas_com_desvio': row.desvios,
+            'progresso': int(row.concluidas * 100 / row.total) if row.total else 0,
+        }
+        divergencias.append({
+            'execucao_id': row.id,
+            'antes': {
+                'total_tarefas': row.total_tarefas,
+                'tarefas_concluidas': row.tarefas_concluidas,
+                'tarefas_com_desvio': row.tarefas_com_desvio,
+                'progresso': row.progresso,
+            },
+            'depois': esperado,
+        })
+        if corrigir:
+            db.session.execute(update(POPExecucao).where(POPExecucao.id == row.id).values(**esperado))
+    if corrigir and divergencias:
+        db.session.commit()
+    return divergencias
 
 
 def update_pop_execucao_item(user_id, execucao_id, item_id, data):
@@ -11601,19 +12267,11 @@ def update_pop_execucao_item(user_id, execucao_id, item_id, data):
     if not item or item.execucao_id != execucao.id:
         return {"error": "Item não encontrado."}, 404
 
+    concluido_antes, desvio_antes = item.concluido, item.tem_desvio
+
     if 'valor_medido' in data:
         item.valor_medido = data.get('valor_medido')
-        template = POPTemplate.query.get(item.template_id)
-        if template and template.valor_minimo is not None and template.valor_maximo is not None:
-            try:
-                medido = float(item.valor_medido)
-                min_val = float(template.valor_minimo)
-                max_val = float(template.valor_maximo)
-                item.dentro_padrao = min_val <= medido <= max_val
-            except (TypeError, ValueError):
-                item.dentro_padrao = None
-        else:
-            item.dentro_padrao = None
+        item.dentro_padrao = _item_dentro_padrao(item)
 
     if 'observacoes' in data:
         item.observacoes = data.get('observacoes')
@@ -11628,18 +12286,87 @@ def update_pop_execucao_item(user_id, execucao_id, item_id, data):
         item.concluido = bool(data.get('concluido'))
         item.concluido_em = brasilia_now() if item.concluido else None
 
-    total = execucao.total_tarefas or execucao.itens.count()
-    concluidas = execucao.itens.filter_by(concluido=True).count()
-    desvios = execucao.itens.filter_by(tem_desvio=True).count()
-    execucao.total_tarefas = total
-    execucao.tarefas_concluidas = concluidas
-    execucao.tarefas_com_desvio = desvios
-    execucao.progresso = int((concluidas / total) * 100) if total else 0
+    # Contadores por delta do estado do item; reconciliar_progresso_pop_execucoes corrige desvios
+    delta_concluidas = int(item.concluido) - int(concluido_antes)
+    delta_desvios = int(item.tem_desvio) - int(desvio_antes)
+    if delta_concluidas or delta_desvios:
+        _aplicar_delta_progresso_pop(execucao.id, delta_concluidas, delta_desvios)
 
     db.session.commit()
     return item.to_dict(), 200
 
 
+def _pop_execucao_item_do_usuario(user_id, execucao_id, item_id):
+    """Item da execução, se o usuário for o executor ou admin. Retorna (item, erro)."""
+    usuario = db.session.get(Usuario, user_id)
+    if not usuario:
+        return None, ({"error": "Usuário não encontrado."}, 404)
+    execucao = db.session.get(POPExecucao, execucao_id)
+    if not execucao:
+        return None, ({"error": "Execução não encontrada."}, 404)
+    if not _is_admin_or_super_admin(usuario) and execucao.usuario_id != usuario.id:
+        return None, ({"error": "Acesso negado."}, 403)
+    item = db.session.get(POPExecucaoItem, item_id)
+    if not item or item.execucao_id != execucao.id:
+        return None, ({"error": "Item não encontrado."}, 404)
+    return item, None
+
+
+def salvar_foto_pop_execucao_item(user_id, execucao_id, item_id, stream, foto_url):
+    """
+    Grava a foto de evidência do item no armazenamento por conteúdo (lendo o
+    stream em pedaços) e agenda a miniatura. Reenviar a mesma foto reaproveita
+    o arquivo existente.
+    """
+    item, erro = _pop_execucao_item_do_usuario(user_id, execucao_id, item_id)
+    if erro:
+        return erro
+
+    try:
+        chave, _, _ = photo_storage.obter_armazenamento().salvar(
+            stream, max_bytes=current_app.config['POP_FOTOS_MAX_BYTES']
+        )
+    except photo_storage.FotoGrandeDemais as e:
+        return {"error": str(e)}, 413
+    except photo_storage.FotoInvalida as e:
+        return {"error": str(e)}, 400
+
+    item.foto_path = chave
+    item.foto_url = foto_url
+    db.session.commit()
+    photo_storage.agendar_miniatura(chave)
+    return item.to_dict(), 201
+
+
+def get_foto_pop_execucao_item(user_id, execucao_id, item_id, miniatura=False):
+    """
+    Arquivo da foto do item para a rota servir: {"caminho", "mimetype", "etag"}.
+    Sem a miniatura pronta devolve o original (e reagenda a geração).
+    """
+    import os
+
+    item, erro = _pop_execucao_item_do_usuario(user_id, execucao_id, item_id)
+    if erro:
+        return erro
+    if not item.foto_path:
+        return {"error": "Item sem foto."}, 404
+
+    armazenamento = photo_storage.obter_armazenamento()
+    if miniatura:
+        px = current_app.config['POP_FOTOS_THUMB_PX']
+        caminho = armazenamento.caminho_miniatura(item.foto_path, px)
+        if os.path.exists(caminho):
+            return {"caminho": caminho, "mimetype": "image/jpeg", "etag": f"{item.foto_path}-{px}"}, 200
+        photo_storage.agendar_miniatura(item.foto_path)
+
+    caminho = armazenamento.caminho(item.foto_path)
+    if not os.path.exists(caminho):
+        return {"error": "Arquivo da foto não encontrado."}, 404
+    with open(caminho, 'rb') as arquivo:
+        mimetype = photo_storage.detectar_mimetype(arquivo.read(16)) or 'application/octet-stream'
+    return {"caminho": caminho, "mimetype": mimetype, "etag": item.foto_path}, 200
+
+
 def finalizar_pop_execucao(user_id, execucao_id, data):
     usuario = Usuario.query.get(user_id)
     if not usuario:
@@ -11668,17 +12395,17 @@ def finalizar_pop_execucao(user_id, execucao_id, data):
 
 # ----- Auditoria/Admin -----
 
-def list_pop_execucoes_admin(restaurante_id, filtros=None, executor_id=None):
-    if restaurante_id:
-        _apply_pop_auto_archive(restaurante_id, executor_id)
-
+def list_pop_execucoes_admin(restaurante_id, filtros=None):
+    """
+    Listagem (só leitura) das execuções. O auto-arquivamento roda no worker
+    (`flask run-jobs`); a rota ainda chama `arquivar_pop_execucoes_se_vencido`
+    depois da resposta.
+    """
     filtros = filtros or {}
     query = POPExecucao.query
     if restaurante_id is not None:
         query = query.filter_by(restaurante_id=restaurante_id)
 
-    if filtros.get('status'):
-        query = query.filter_by(status=filtros.get('status'))
     if filtros.get('usuario_id'):
         try:
             query = query.filter_by(usuario_id=int(filtros.get('usuario_id')))
@@ -11689,31 +12416,8 @@ def list_pop_execucoes_admin(restaurante_id, filtros=None, executor_id=None):
             query = query.filter_by(lista_id=int(filtros.get('lista_id')))
         except (TypeError, ValueError):
             return {"error": "lista_id inválido."}, 400
-    if filtros.get('data_inicio'):
-        data_inicio_raw = filtros.get('data_inicio')
-        if isinstance(data_inicio_raw, str):
-            try:
-                data_inicio = datetime.fromisoformat(data_inicio_raw).date()
-            except ValueError:
-                return {"error": "data_inicio inválida. Use YYYY-MM-DD."}, 400
-        else:
-            data_inicio = data_inicio_raw
-        query = query.filter(POPExecucao.data_referencia >= data_inicio)
-    if filtros.get('data_fim'):
-        data_fim_raw = filtros.get('data_fim')
-        if isinstance(data_fim_raw, str):
-            try:
-                data_fim = datetime.fromisoformat(data_fim_raw).date()
-            except ValueError:
-                return {"error": "data_fim inválida. Use YYYY-MM-DD."}, 400
-        else:
-            data_fim = data_fim_raw
-        query = query.filter(POPExecucao.data_referencia <= data_fim)
-    if not filtros.get('include_arquivados'):
-        query = query.filter_by(arquivado=False)
 
-    execucoes = query.order_by(POPExecucao.data_referencia.desc()).all()
-    return {"execucoes": [e.to_dict() for e in execucoes]}, 200
+    return _pagina_pop_execucoes(query, filtros)
 
 
 def review_pop_execucao(execucao_id, data, restaurante_id, reviewer_id=None):
@@ -0,0 +1,144 @@
+"""
+Cache do estado de sessão por usuário, consultado a cada requisição autenticada.
+
+O `token_in_blocklist_loader` do JWT e o decorator `supplier_required`
+precisavam ler o usuário (e o fornecedor) no banco em toda requisição. O
+estado necessário para essas verificações — session_token, ativo, role e
+aprovação do fornecedor — fica em um cache por id de usuário (ver
+`cache.get_cache`): `memory` por processo ou `sqlite` compartilhado entre os
+workers do gunicorn. No `sqlite` um acerto é só um SELECT
+(SESSION_TOKEN_CACHE_TOUCH_SECONDS = 0), para que a verificação por requisição
+não vire uma escrita serializada entre os workers.
+
+Invalidação: um listener de sessão coleta os usuários cujo estado de sessão
+mudou (login, desativação, troca de senha, role, fornecedor vinculado) e
+remove as entradas no commit. Impersonação emite tokens sem gravar no
+usuário, por isso `iniciar_impersonacao` e `encerrar_impersonacao` chamam
+`marcar_alteracao` explicitamente. Uma leitura
+concorrente iniciada antes do commit pode regravar o estado antigo; o TTL
+curto (SESSION_TOKEN_CACHE_TTL_SECONDS) limita essa janela.
+"""
+from itertools import chain
+
+from flask import has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from .cache import get_cache
+from .extensions import db
+from .models import Fornecedor, Usuario
+
+CACHE_NAME = 'session_token'
+
+_SESSION_KEY = 'sessoes_alteradas'
+
+# Atributos de Usuario que afetam as verificações de sessão
+_ATRIBUTOS_USUARIO = ('session_token', 'ativo', 'role', 'senha_hash')
+
+
+def _cache():
+    return get_cache(CACHE_NAME)
+
+
+def _chave(usuario_id):
+    return str(usuario_id)
+
+
+def _carregar_estado(usuario_id):
+    """Lê o estado de sessão do usuário em uma única query (usuário + fornecedor)."""
+    row = db.session.query(
+        Usuario.session_token, Usuario.ativo, Usuario.role, Fornecedor.aprovado
+    ).outerjoin(
+        Fornecedor, Fornecedor.usuario_id == Usuario.id
+    ).filter(Usuario.id == usuario_id).first()
+    if row is None:
+        return None
+    session_token, ativo, role, fornecedor_aprovado = row
+    return {
+        "session_token": session_token,
+        "ativo": bool(ativo),
+        "role": role.value if role is not None else None,
+        "fornecedor_aprovado": fornecedor_aprovado,
+    }
+
+
+def obter_estado_sessao(usuario_id):
+    """
+    Estado de sessão do usuário, do cache ou do banco (None se não existe).
+
+    Cada acerto do cache é uma consulta ao banco evitada; ver `estatisticas`.
+    """
+    cache = _cache()
+    estado = cache.get(_chave(usuario_id))
+    if estado is not None:
+        return estado
+
+    estado = _carregar_estado(usuario_id)
+    # Usuário inexistente não é cacheado: um id reaproveitado não herda o "não existe"
+    if estado is not None:
+        cache.set(_chave(usuario_id), estado)
+    return estado
+
+
+def invalidar(*usuario_ids):
+    """Remove do cache o estado de sessão dos usuários informados."""
+    if not has_app_context():
+        return
+    cache = _cache()
+    for usuario_id in usuario_ids:
+        if usuario_id is not None:
+            cache.delete(_chave(usuario_id))
+
+
+def estatisticas():
+    """Contadores do cache, incluindo as consultas ao banco evitadas (por worker)."""
+    stats = _cache().stats()
+    stats['lookups_evitados'] = stats['hits']
+    stats['lookups_banco'] = stats['misses']
+    return stats
+
+
+def marcar_alteracao(session, usuario_id):
+    """Agenda a invalidação do usuário para o commit da sessão."""
+    if usuario_id is not None:
+        session.info.setdefault(_SESSION_KEY, set()).add(usuario_id)
+
+
+def _alterou(obj, atributos):
+    estado = inspect(obj)
+    return any(estado.attrs[atributo].history.has_changes() for atributo in atributos)
+
+
+def _valores(obj, atributo):
+    """Valor atual e anteriores (histórico) de um atributo."""
+    historico = inspect(obj).attrs[atributo].history
+    return [valor for valor in chain(historico.unchanged, historico.added, historico.deleted) if valor is not None]
+
+
+@event.listens_for(Session, 'after_flush')
+def _coletar_alteracoes(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Usuario):
+            if obj in session.dirty and not _alterou(obj, _ATRIBUTOS_USUARIO):
+                continue
+            marcar_alteracao(session, obj.id)
+        elif isinstance(obj, Fornecedor):
+            if obj in session.dirty and not _alterou(obj, ('usuario_id', 'aprovado')):
+                continue
+            for usuario_id in _valores(obj, 'usuario_id'):
+                marcar_alteracao(session, usuario_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _aplicar_invalidacao(session):
+    pendentes = session.info.pop(_SESSION_KEY, None)
+    if pendentes:
+        invalidar(*pendentes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _invalidar_no_rollback(session):
+    # Um estado lido depois do flush pode conter as alterações desfeitas
+    pendentes = session.info.pop(_SESSION_KEY, None)
+    if pendentes:
+        invalidar(*pendentes)
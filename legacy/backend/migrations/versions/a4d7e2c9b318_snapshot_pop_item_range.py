@@ -0,0 +1,35 @@
+"""snapshot template min/max on pop_execucao_itens
+
+Revision ID: a4d7e2c9b318
+Revises: e3b9c4f7a120
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d7e2c9b318'
+down_revision = 'e3b9c4f7a120'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('pop_execucao_itens', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('valor_minimo', sa.Numeric(precision=10, scale=2), nullable=True))
+        batch_op.add_column(sa.Column('valor_maximo', sa.Numeric(precision=10, scale=2), nullable=True))
+
+    # Execuções já existentes herdam a faixa atual do template
+    op.execute("""
+        UPDATE pop_execucao_itens
+        SET valor_minimo = (SELECT t.valor_minimo FROM pop_templates t WHERE t.id = pop_execucao_itens.template_id),
+            valor_maximo = (SELECT t.valor_maximo FROM pop_templates t WHERE t.id = pop_execucao_itens.template_id)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('pop_execucao_itens', schema=None) as batch_op:
+        batch_op.drop_column('valor_maximo')
+        batch_op.drop_column('valor_minimo')
@@ -0,0 +1,115 @@
+"""add daily_metrics rollup table
+
+Revision ID: a7c3e91d2b40
+Revises: c718ca9a2883
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# Tabelas de origem congeladas nesta revisão (só as colunas do backfill)
+usuarios = sa.table('usuarios', sa.column('id'), sa.column('restaurante_id'))
+submissoes = sa.table(
+    'submissoes', sa.column('id'), sa.column('usuario_id'), sa.column('status'),
+    sa.column('arquivada'), sa.column('data_submissao')
+)
+app_logs = sa.table(
+    'app_logs', sa.column('id'), sa.column('restaurante_id'), sa.column('acao'), sa.column('criado_em')
+)
+pedidos = sa.table(
+    'pedidos', sa.column('id'), sa.column('usuario_id'), sa.column('status'), sa.column('data_pedido')
+)
+daily_metrics = sa.table(
+    'daily_metrics', sa.column('restaurante_id'), sa.column('dia'), sa.column('metrica'),
+    sa.column('valor'), sa.column('atualizado_em')
+)
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e91d2b40'
+down_revision = 'c718ca9a2883'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_metrics',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('restaurante_id', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('metrica', sa.String(length=50), nullable=False),
+    sa.Column('valor', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('atualizado_em', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('restaurante_id', 'dia', 'metrica', name='uq_daily_metrics_restaurante_dia_metrica')
+    )
+    with op.batch_alter_table('daily_metrics', schema=None) as batch_op:
+        batch_op.create_index('idx_daily_metrics_metrica_dia', ['metrica', 'dia'], unique=False)
+
+    _backfill()
+
+
+def _agrupado(origem, restaurante, dia, metrica, total, filtros, agrupar_por=()):
+    """SELECT agrupado por (restaurante, dia, *agrupar_por) no formato de daily_metrics."""
+    restaurante = sa.func.coalesce(restaurante, sa.literal_column("0"))
+    return sa.select(
+        restaurante, dia, metrica, total, sa.func.current_timestamp()
+    ).select_from(origem).where(*filtros).group_by(restaurante, dia, *agrupar_por)
+
+
+def _backfill():
+    """
+    Mesmo cálculo de rollups.reconstruir_metricas_diarias, em SQL: submissões
+    não arquivadas por status, logins, pedidos e pedidos aprovados/rejeitados
+    (status atual, dia do pedido). Submissões e pedidos vão para o restaurante
+    do usuário.
+    """
+    # Constantes como SQL literal: parâmetros no SELECT não casam com o GROUP BY no Postgres
+    def constante(valor):
+        return sa.literal_column(f"'{valor}'", sa.String)
+
+    def por_status(prefixo, status):
+        return constante(prefixo).concat(sa.cast(status, sa.String))
+
+    dia_submissao = sa.func.date(submissoes.c.data_submissao)
+    dia_login = sa.func.date(app_logs.c.criado_em)
+    dia_pedido = sa.func.date(pedidos.c.data_pedido)
+    com_usuario_submissao = submissoes.join(usuarios, submissoes.c.usuario_id == usuarios.c.id)
+    com_usuario_pedido = pedidos.join(usuarios, pedidos.c.usuario_id == usuarios.c.id)
+
+    origem = sa.union_all(
+        _agrupado(
+            com_usuario_submissao, usuarios.c.restaurante_id, dia_submissao,
+            por_status('submissoes.', submissoes.c.status), sa.func.count(submissoes.c.id),
+            [submissoes.c.arquivada.is_(False), submissoes.c.status.isnot(None)],
+            agrupar_por=[submissoes.c.status]
+        ),
+        _agrupado(
+            app_logs, app_logs.c.restaurante_id, dia_login, constante('logins'),
+            sa.func.count(app_logs.c.id), [app_logs.c.acao == 'login']
+        ),
+        _agrupado(
+            com_usuario_pedido, usuarios.c.restaurante_id, dia_pedido, constante('pedidos'),
+            sa.func.count(pedidos.c.id), []
+        ),
+        _agrupado(
+            com_usuario_pedido, usuarios.c.restaurante_id, dia_pedido,
+            por_status('pedidos.', pedidos.c.status), sa.func.count(pedidos.c.id),
+            [sa.cast(pedidos.c.status, sa.String).in_(['APROVADO', 'REJEITADO'])],
+            agrupar_por=[pedidos.c.status]
+        ),
+    ).subquery()
+
+    op.execute(daily_metrics.insert().from_select(
+        ['restaurante_id', 'dia', 'metrica', 'valor', 'atualizado_em'],
+        sa.select(*origem.c)
+    ))
+
+
+def downgrade():
+    with op.batch_alter_table('daily_metrics', schema=None) as batch_op:
+        batch_op.drop_index('idx_daily_metrics_metrica_dia')
+
+    op.drop_table('daily_metrics')
@@ -0,0 +1,95 @@
+"""add nome_normalizado to lista_mae_itens and itens
+
+Revision ID: b4e8f2a6c913
+Revises: a7c3e91d2b40
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import re
+import unicodedata
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e8f2a6c913'
+down_revision = 'a7c3e91d2b40'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def normalize_item_nome(value):
+    # Cópia de kaizen_app.models.normalize_item_nome congelada nesta revisão
+    if not value:
+        return ""
+    normalized = unicodedata.normalize("NFKD", value)
+    normalized = "".join(char for char in normalized if not unicodedata.combining(char))
+    normalized = re.sub(r"\s+", " ", normalized).strip().lower()
+    return normalized
+
+
+def _backfill(bind, tabela):
+    table = sa.table(
+        tabela,
+        sa.column('id', sa.Integer),
+        sa.column('nome', sa.String),
+        sa.column('nome_normalizado', sa.String),
+    )
+    rows = bind.execute(sa.select(table.c.id, table.c.nome)).fetchall()
+    update = sa.update(table).where(table.c.id == sa.bindparam('b_id')).values(
+        nome_normalizado=sa.bindparam('b_nome_normalizado')
+    )
+    for inicio in range(0, len(rows), BATCH_SIZE):
+        bind.execute(update, [
+            {'b_id': row.id, 'b_nome_normalizado': normalize_item_nome(row.nome)}
+            for row in rows[inicio:inicio + BATCH_SIZE]
+        ])
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    with op.batch_alter_table('lista_mae_itens', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('nome_normalizado', sa.String(length=255), nullable=True))
+    with op.batch_alter_table('itens', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('nome_normalizado', sa.String(length=100), nullable=True))
+
+    _backfill(bind, 'lista_mae_itens')
+    _backfill(bind, 'itens')
+
+    op.create_index(
+        'idx_lista_mae_restaurante_nome_normalizado', 'lista_mae_itens',
+        ['restaurante_id', 'nome_normalizado']
+    )
+    op.create_index('idx_itens_nome_normalizado', 'itens', ['nome_normalizado'])
+    op.create_index(
+        'idx_itens_fornecedor_nome_normalizado', 'itens',
+        ['fornecedor_id', 'nome_normalizado']
+    )
+
+    # Busca por substring: GIN trigram no Postgres; nos demais bancos, btree simples.
+    if bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'idx_lista_mae_nome_normalizado_trgm', 'lista_mae_itens', ['nome_normalizado'],
+        postgresql_using='gin', postgresql_ops={'nome_normalizado': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'idx_itens_nome_normalizado_trgm', 'itens', ['nome_normalizado'],
+        postgresql_using='gin', postgresql_ops={'nome_normalizado': 'gin_trgm_ops'}
+    )
+
+
+def downgrade():
+    op.drop_index('idx_itens_nome_normalizado_trgm', table_name='itens')
+    op.drop_index('idx_lista_mae_nome_normalizado_trgm', table_name='lista_mae_itens')
+    op.drop_index('idx_itens_fornecedor_nome_normalizado', table_name='itens')
+    op.drop_index('idx_itens_nome_normalizado', table_name='itens')
+    op.drop_index('idx_lista_mae_restaurante_nome_normalizado', table_name='lista_mae_itens')
+
+    with op.batch_alter_table('itens', schema=None) as batch_op:
+        batch_op.drop_column('nome_normalizado')
+    with op.batch_alter_table('lista_mae_itens', schema=None) as batch_op:
+        batch_op.drop_column('nome_normalizado')
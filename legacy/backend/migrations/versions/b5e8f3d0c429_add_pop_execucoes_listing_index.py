@@ -0,0 +1,27 @@
+"""add composite index for pop_execucoes listings
+
+Revision ID: b5e8f3d0c429
+Revises: a4d7e2c9b318
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e8f3d0c429'
+down_revision = 'a4d7e2c9b318'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'idx_pop_execucoes_restaurante_arquivado_data',
+        'pop_execucoes',
+        ['restaurante_id', 'arquivado', 'data_referencia'],
+    )
+
+
+def downgrade():
+    op.drop_index('idx_pop_execucoes_restaurante_arquivado_data', table_name='pop_execucoes')
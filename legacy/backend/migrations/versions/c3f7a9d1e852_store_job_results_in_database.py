@@ -0,0 +1,32 @@
+"""store job result files in the jobs table
+
+Revision ID: c3f7a9d1e852
+Revises: b5e8f3d0c429
+Create Date: 2026-10-18 22:00:00.000000
+
+Os arquivos gerados pelos jobs passam a ficar em jobs.arquivo_conteudo em vez
+de JOBS_RESULT_DIR: web e worker podem rodar em containers diferentes, que
+não compartilham disco (e o disco do container não sobrevive a um deploy).
+Resultados antigos em disco deixam de ser servidos (download responde 410).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f7a9d1e852'
+down_revision = 'b5e8f3d0c429'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('arquivo_conteudo', sa.LargeBinary(), nullable=True))
+        batch_op.drop_column('arquivo_path')
+
+
+def downgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('arquivo_path', sa.String(length=500), nullable=True))
+        batch_op.drop_column('arquivo_conteudo')
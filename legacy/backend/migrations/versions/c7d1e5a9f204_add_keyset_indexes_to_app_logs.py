@@ -0,0 +1,34 @@
+"""add keyset indexes to app_logs
+
+Revision ID: c7d1e5a9f204
+Revises: b4e8f2a6c913
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d1e5a9f204'
+down_revision = 'b4e8f2a6c913'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('idx_app_logs_criado_em_id', ['criado_em', 'id']),
+    ('idx_app_logs_restaurante_criado_em', ['restaurante_id', 'criado_em', 'id']),
+    ('idx_app_logs_acao_criado_em', ['acao', 'criado_em', 'id']),
+)
+
+
+def upgrade():
+    # app_logs é grande: no Postgres os índices são criados sem bloquear escritas
+    with op.get_context().autocommit_block():
+        for nome, colunas in INDEXES:
+            op.create_index(nome, 'app_logs', colunas, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for nome, _ in reversed(INDEXES):
+            op.drop_index(nome, table_name='app_logs', postgresql_concurrently=True)
@@ -0,0 +1,129 @@
+"""partition app_logs by month (postgres)
+
+Revision ID: d8e2f6a0b315
+Revises: c7d1e5a9f204
+Create Date: 2026-10-18 16:00:00.000000
+
+No Postgres, app_logs passa a ser particionada por RANGE (criado_em):
+- a tabela atual vira a partição `app_logs_legacy` (até o fim do mês corrente);
+- partições mensais `app_logs_pYYYYMM` para os próximos meses;
+- `app_logs_default` recebe o que cair fora das partições.
+
+A chave primária passa a ser (id, criado_em), exigência do particionamento.
+O limite da partição legacy é validado antes, fora da transação da migration,
+por um CHECK NOT VALID + VALIDATE CONSTRAINT: o VALIDATE varre a tabela sem
+bloquear escritas e o ATTACH reaproveita o CHECK em vez de varrê-la com a
+tabela travada.
+Em outros bancos (SQLite) a migration não faz nada: a retenção usa DELETE por
+intervalo (ver kaizen_app/retention.py).
+"""
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8e2f6a0b315'
+down_revision = 'c7d1e5a9f204'
+branch_labels = None
+depends_on = None
+
+MESES_A_FRENTE = 3
+
+# Mesmo relógio de kaizen_app.models.brasilia_now (usado por retention.py)
+BRASILIA_TZ = ZoneInfo('America/Sao_Paulo')
+
+LIMITE_LEGACY = 'app_logs_legacy_limite'
+
+INDEXES = (
+    ('ix_app_logs_criado_em', ['criado_em']),
+    ('ix_app_logs_restaurante_id', ['restaurante_id']),
+    ('ix_app_logs_usuario_id', ['usuario_id']),
+    ('ix_app_logs_impersonator_id', ['impersonator_id']),
+    ('ix_app_logs_acao', ['acao']),
+    ('ix_app_logs_entidade', ['entidade']),
+    ('ix_app_logs_entidade_id', ['entidade_id']),
+    ('idx_app_logs_criado_em_id', ['criado_em', 'id']),
+    ('idx_app_logs_restaurante_criado_em', ['restaurante_id', 'criado_em', 'id']),
+    ('idx_app_logs_acao_criado_em', ['acao', 'criado_em', 'id']),
+)
+
+FOREIGN_KEYS = (
+    ('fk_app_logs_restaurante_id', 'restaurante_id', 'restaurantes'),
+    ('fk_app_logs_usuario_id', 'usuario_id', 'usuarios'),
+    ('fk_app_logs_impersonator_id', 'impersonator_id', 'usuarios'),
+)
+
+
+def _proximo_mes(inicio):
+    return (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    sequencia = bind.exec_driver_sql("SELECT pg_get_serial_sequence('app_logs', 'id')").scalar()
+
+    hoje = datetime.now(BRASILIA_TZ).date()
+    inicio = _proximo_mes(date(hoje.year, hoje.month, 1))
+    # Cada statement na sua transação: o ADD NOT VALID trava só por um instante
+    # e o VALIDATE (SHARE UPDATE EXCLUSIVE) varre o histórico com escritas liberadas
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"ALTER TABLE app_logs ADD CONSTRAINT {LIMITE_LEGACY} "
+            f"CHECK (criado_em < '{inicio.isoformat()}') NOT VALID"
+        )
+        op.execute(f"ALTER TABLE app_logs VALIDATE CONSTRAINT {LIMITE_LEGACY}")
+
+    op.execute("ALTER TABLE app_logs RENAME TO app_logs_legacy")
+    for nome, _ in INDEXES:
+        op.execute(f"ALTER INDEX IF EXISTS {nome} RENAME TO {nome}_legacy")
+
+    op.execute("CREATE TABLE app_logs (LIKE app_logs_legacy INCLUDING DEFAULTS) PARTITION BY RANGE (criado_em)")
+    op.execute("ALTER TABLE app_logs ADD CONSTRAINT app_logs_pkey_part PRIMARY KEY (id, criado_em)")
+    if sequencia:
+        # O DROP futuro da partição legacy não pode levar a sequência junto
+        op.execute(f"ALTER SEQUENCE {sequencia} OWNED BY app_logs.id")
+    for nome, colunas in INDEXES:
+        op.create_index(nome, 'app_logs', colunas)
+    for nome, coluna, referencia in FOREIGN_KEYS:
+        op.create_foreign_key(nome, 'app_logs', referencia, [coluna], ['id'], ondelete='SET NULL')
+
+    # Partição legacy: todo o histórico até o fim do mês corrente. O CHECK
+    # validado prova o limite, então o ATTACH não varre a tabela
+    op.execute(
+        f"ALTER TABLE app_logs ATTACH PARTITION app_logs_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{inicio.isoformat()}')"
+    )
+    op.execute(f"ALTER TABLE app_logs_legacy DROP CONSTRAINT {LIMITE_LEGACY}")
+    for _ in range(MESES_A_FRENTE):
+        fim = _proximo_mes(inicio)
+        op.execute(
+            f"CREATE TABLE app_logs_p{inicio:%Y%m} PARTITION OF app_logs "
+            f"FOR VALUES FROM ('{inicio.isoformat()}') TO ('{fim.isoformat()}')"
+        )
+        inicio = fim
+    op.execute("CREATE TABLE app_logs_default PARTITION OF app_logs DEFAULT")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    sequencia = bind.exec_driver_sql("SELECT pg_get_serial_sequence('app_logs', 'id')").scalar()
+
+    op.execute("CREATE TABLE app_logs_plain (LIKE app_logs INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO app_logs_plain SELECT * FROM app_logs")
+    if sequencia:
+        op.execute(f"ALTER SEQUENCE {sequencia} OWNED BY app_logs_plain.id")
+    op.execute("DROP TABLE app_logs CASCADE")
+    op.execute("ALTER TABLE app_logs_plain RENAME TO app_logs")
+    op.execute("ALTER TABLE app_logs ADD PRIMARY KEY (id)")
+    for nome, colunas in INDEXES:
+        op.create_index(nome, 'app_logs', colunas)
+    for nome, coluna, referencia in FOREIGN_KEYS:
+        op.create_foreign_key(nome, 'app_logs', referencia, [coluna], ['id'], ondelete='SET NULL')
@@ -0,0 +1,54 @@
+"""add jobs table for background tasks
+
+Revision ID: e3b9c4f7a120
+Revises: d8e2f6a0b315
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b9c4f7a120'
+down_revision = 'd8e2f6a0b315'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.Enum('PENDENTE', 'EXECUTANDO', 'CONCLUIDO', 'ERRO', name='jobstatus'), nullable=False),
+    sa.Column('progresso', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('params', sa.JSON(), server_default='{}', nullable=False),
+    sa.Column('resultado', sa.JSON(), nullable=True),
+    sa.Column('erro', sa.Text(), nullable=True),
+    sa.Column('arquivo_path', sa.String(length=500), nullable=True),
+    sa.Column('arquivo_nome', sa.String(length=255), nullable=True),
+    sa.Column('arquivo_mimetype', sa.String(length=120), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=True),
+    sa.Column('restaurante_id', sa.Integer(), nullable=True),
+    sa.Column('worker', sa.String(length=100), nullable=True),
+    sa.Column('tentativas', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('criado_em', sa.DateTime(), nullable=False),
+    sa.Column('iniciado_em', sa.DateTime(), nullable=True),
+    sa.Column('concluido_em', sa.DateTime(), nullable=True),
+    sa.Column('atualizado_em', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['restaurante_id'], ['restaurantes.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.create_index('idx_jobs_status_criado_em', ['status', 'criado_em'], unique=False)
+        batch_op.create_index(batch_op.f('ix_jobs_usuario_id'), ['usuario_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_jobs_usuario_id'))
+        batch_op.drop_index('idx_jobs_status_criado_em')
+
+    op.drop_table('jobs')
+    sa.Enum(name='jobstatus').drop(op.get_bind(), checkfirst=True)
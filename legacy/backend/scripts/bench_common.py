@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Utilitários compartilhados pelos scripts de benchmark (scripts/bench_*.py).
+
+Os benchmarks rodam contra um banco descartável: por padrão um SQLite
+temporário, ou o banco apontado por BENCH_DATABASE_URL (ex.: um Postgres local).
+"""
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def create_bench_app():
+    """Cria a app no modo 'testing' apontando para o banco de benchmark."""
+    database_url = os.environ.get('BENCH_DATABASE_URL')
+    if not database_url:
+        fd, path = tempfile.mkstemp(prefix='kaizen_bench_', suffix='.db')
+        os.close(fd)
+        database_url = f'sqlite:///{path}'
+    os.environ['TEST_DATABASE_URL'] = database_url
+
+    from kaizen_app import create_app, db
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+class QueryCounter:
+    """Acumula quantidade e tempo dos statements SQL executados."""
+
+    def __init__(self):
+        self.count = 0
+        self.elapsed = 0.0
+
+    @contextmanager
+    def track(self, engine):
+        from sqlalchemy import event
+
+        def before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('_bench_start', []).append(time.perf_counter())
+
+        def after(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info['_bench_start'].pop()
+            self.count += 1
+            self.elapsed += time.perf_counter() - started
+
+        event.listen(engine, 'before_cursor_execute', before)
+        event.listen(engine, 'after_cursor_execute', after)
+        try:
+            yield self
+        finally:
+            event.remove(engine, 'before_cursor_execute', before)
+            event.remove(engine, 'after_cursor_execute', after)
+
+
+def measure(label, fn, engine, repeat=3):
+    """Executa `fn` algumas vezes e imprime statements e tempo médio."""
+    counter = QueryCounter()
+    started = time.perf_counter()
+    with counter.track(engine):
+        for _ in range(repeat):
+            result = fn()
+    wall = (time.perf_counter() - started) / repeat
+    queries = counter.count // repeat
+    print(f"{label:<40} {queries:>8} queries  {wall * 1000:>10.1f} ms")
+    return result, queries, wall
+
+
+def print_header(title):
+    print()
+    print(title)
+    print('-' * 72)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark das estatísticas do admin (get_estatisticas).
+
+Gera N listas × M itens em um restaurante e compara o cálculo legado (uma
+query de ListaItemRef por lista, área carregada sob demanda) com a
+agregação em um único SELECT agrupado.
+
+Uso:
+    python scripts/bench_estatisticas.py [--listas 40] [--itens 150]
+"""
+import argparse
+
+from bench_common import create_bench_app, measure, print_header
+
+
+def seed(listas, itens):
+    """Fixture N listas × M itens (metade das listas com área)."""
+    from kaizen_app import db
+    from kaizen_app.models import Area, Lista, ListaItemRef, ListaMaeItem, Restaurante
+
+    restaurante = Restaurante(nome='Restaurante Bench', slug='restaurante-bench', ativo=True)
+    db.session.add(restaurante)
+    db.session.flush()
+
+    areas = [Area(nome=f'Área Bench {a}') for a in range(4)]
+    db.session.add_all(areas)
+    catalogo = [
+        ListaMaeItem(nome=f'Item Bench {i}', unidade='un', restaurante_id=restaurante.id)
+        for i in range(itens)
+    ]
+    db.session.add_all(catalogo)
+    db.session.flush()
+
+    for n in range(listas):
+        lista = Lista(
+            nome=f'Lista Bench {n}', restaurante_id=restaurante.id,
+            area_id=areas[n % len(areas)].id if n % 2 == 0 else None
+        )
+        db.session.add(lista)
+        db.session.flush()
+        db.session.add_all([
+            ListaItemRef(
+                lista_id=lista.id, item_id=item.id,
+                quantidade_atual=(i * 7 + n) % 10, quantidade_minima=i % 6
+            )
+            for i, item in enumerate(catalogo)
+        ])
+    db.session.commit()
+    return restaurante.id
+
+
+def legacy_estatisticas(restaurante_id):
+    """Reprodução do cálculo anterior (contadores e detalhe), uma query por lista."""
+    from kaizen_app.models import Lista, ListaItemRef, ListaMaeItem
+
+    listas = Lista.query.filter_by(restaurante_id=restaurante_id, deletado=False).all()
+    items_dict = {i.id: i for i in ListaMaeItem.query.filter_by(restaurante_id=restaurante_id).all()}
+    por_lista = []
+    itens_detalhe = []
+    for lista in listas:
+        refs = [r for r in ListaItemRef.query.filter_by(lista_id=lista.id).all() if r.quantidade_minima > 0]
+        if not refs:
+            continue
+        por_lista.append((
+            lista.id,
+            lista.area.nome if lista.area else None,
+            sum(1 for r in refs if r.quantidade_atual >= r.quantidade_minima),
+            sum(1 for r in refs if r.quantidade_atual < r.quantidade_minima),
+        ))
+        for ref in refs:
+            item = items_dict.get(ref.item_id)
+            itens_detalhe.append((ref.item_id, item.nome if item else None, lista.area.nome if lista.area else None))
+    return por_lista, len(itens_detalhe)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--listas', type=int, default=40)
+    parser.add_argument('--itens', type=int, default=150)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    with app.app_context():
+        from kaizen_app import db, services
+
+        restaurante_id = seed(args.listas, args.itens)
+        engine = db.engine
+
+        print_header(f'Estatísticas ({args.listas} listas × {args.itens} itens, {engine.name})')
+        (legacy, legacy_itens), legacy_q, _ = measure(
+            'legado (query por lista)', lambda: legacy_estatisticas(restaurante_id), engine
+        )
+        # Sessão limpa a cada execução: o legado depende de lazy loads
+        db.session.expire_all()
+        novo, novo_q, _ = measure(
+            'SELECT agrupado + detalhe',
+            lambda: services.get_estatisticas(restaurante_id)[0],
+            engine
+        )
+        measure(
+            'SELECT agrupado (sem detalhe)',
+            lambda: services.get_estatisticas(restaurante_id, incluir_itens=False)[0],
+            engine
+        )
+        assert sorted(legacy) == sorted(
+            (l['lista_id'], l['area_nome'], l['itens_ok'], l['itens_faltantes']) for l in novo['por_lista']
+        )
+        assert legacy_itens == len(novo['itens'])
+        print(f'round-trips: {legacy_q} -> {novo_q}')
+
+
+if __name__ == '__main__':
+    main()
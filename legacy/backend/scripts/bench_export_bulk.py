@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória da exportação em lote (export_data_bulk, tipo 'pedidos').
+
+Gera N pedidos em um restaurante e compara o pico de memória (tracemalloc)
+e o tempo do ZIP montado em memória (.all() + StringIO + BytesIO, como era
+antes) com o ZIP em streaming de bulk_export.gerar_zip.
+
+Uso:
+    python scripts/bench_export_bulk.py [--pedidos 1000000] [--sem-legado]
+"""
+import argparse
+import time
+import tracemalloc
+
+from bench_common import create_bench_app, print_header
+
+LOTE_INSERT = 10000
+
+
+def seed(pedidos):
+    """Fixture com N pedidos (INSERT em lotes) de um fornecedor/usuário."""
+    from sqlalchemy import insert
+
+    from kaizen_app import db
+    from kaizen_app.models import (
+        Fornecedor, ListaMaeItem, Pedido, PedidoStatus, Restaurante, Usuario, UserRoles, brasilia_now
+    )
+
+    restaurante = Restaurante(nome='Restaurante Bench', slug='restaurante-bench', ativo=True)
+    db.session.add(restaurante)
+    db.session.flush()
+    usuario = Usuario(nome='Colab Bench', email='colab-bench@test.com', senha_hash='x',
+                      role=UserRoles.COLLABORATOR, restaurante_id=restaurante.id, aprovado=True)
+    fornecedor = Fornecedor(nome='Fornecedor Bench', restaurante_id=restaurante.id)
+    catalogo = [
+        ListaMaeItem(nome=f'Item Bench {i}', unidade='un', restaurante_id=restaurante.id)
+        for i in range(200)
+    ]
+    db.session.add_all([usuario, fornecedor, *catalogo])
+    db.session.commit()
+
+    agora = brasilia_now()
+    for inicio in range(0, pedidos, LOTE_INSERT):
+        db.session.execute(insert(Pedido), [
+            {
+                'lista_mae_item_id': catalogo[n % len(catalogo)].id,
+                'fornecedor_id': fornecedor.id,
+                'usuario_id': usuario.id,
+                'quantidade_solicitada': n % 50 + 1,
+                'status': PedidoStatus.PENDENTE,
+                'data_pedido': agora,
+            }
+            for n in range(inicio, min(inicio + LOTE_INSERT, pedidos))
+        ])
+        db.session.commit()
+    return restaurante.id
+
+
+def legacy_export(restaurante_id):
+    """Reprodução do export anterior de pedidos: tudo em memória."""
+    import csv
+    import io
+    import zipfile
+
+    from kaizen_app.models import Fornecedor, Pedido
+
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        pedidos = Pedido.query.join(
+            Fornecedor, Pedido.fornecedor_id == Fornecedor.id
+        ).filter(Fornecedor.restaurante_id == restaurante_id).all()
+        csv_buffer = io.StringIO()
+        csv_writer = csv.writer(csv_buffer)
+        csv_writer.writerow(['ID', 'Item', 'Fornecedor', 'Quantidade', 'Status', 'Usuário', 'Data Pedido'])
+        for pedido in pedidos:
+            csv_writer.writerow([
+                pedido.id,
+                pedido.item.nome if pedido.item else '',
+                pedido.fornecedor.nome if pedido.fornecedor else '',
+                pedido.quantidade_solicitada,
+                pedido.status.value if pedido.status else '',
+                pedido.usuario.nome if pedido.usuario else '',
+                pedido.data_pedido.strftime('%Y-%m-%d %H:%M:%S') if pedido.data_pedido else ''
+            ])
+        zip_file.writestr('pedidos.csv', csv_buffer.getvalue())
+    return len(zip_buffer.getvalue())
+
+
+def streaming_export(restaurante_id):
+    """Consome o gerador como o cliente HTTP faria, descartando os bytes."""
+    from kaizen_app import bulk_export
+
+    return sum(len(pedaco) for pedaco in bulk_export.gerar_zip(['pedidos'], restaurante_id))
+
+
+def measure_memory(label, fn):
+    """Executa `fn` uma vez e imprime pico de memória Python e tempo."""
+    from kaizen_app import db
+
+    db.session.expire_all()
+    tracemalloc.start()
+    started = time.perf_counter()
+    tamanho = fn()
+    wall = time.perf_counter() - started
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.session.remove()
+    print(f"{label:<32} pico {pico / 2 ** 20:>9.1f} MiB  {wall:>8.1f} s  zip {tamanho / 2 ** 20:>7.1f} MiB")
+    return pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pedidos', type=int, default=1000000)
+    parser.add_argument('--sem-legado', action='store_true', help='Mede só o streaming (o legado é lento em 1M linhas).')
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    with app.app_context():
+        from kaizen_app import db
+
+        started = time.perf_counter()
+        restaurante_id = seed(args.pedidos)
+        print(f'seed: {args.pedidos} pedidos em {time.perf_counter() - started:.1f} s')
+
+        print_header(f'Exportação de pedidos ({args.pedidos} linhas, {db.engine.name})')
+        novo = measure_memory('streaming (yield_per + chunks)', lambda: streaming_export(restaurante_id))
+        if not args.sem_legado:
+            legado = measure_memory('legado (.all() + BytesIO)', lambda: legacy_export(restaurante_id))
+            print(f'pico de memória: {legado / 2 ** 20:.1f} MiB -> {novo / 2 ** 20:.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark do consolidado de pedidos por fornecedor e da cotação a partir do estoque.
+
+Gera um fornecedor com N itens (estoque em duas áreas, metade abaixo do
+mínimo) e pedidos pendentes, e compara statements e tempo do padrão anterior
+(uma consulta por item + lazy load do usuário por pedido + um INSERT por
+CotacaoItem) com get_pedidos_fornecedor_consolidado / create_quotation_from_stock.
+
+Uso:
+    python scripts/bench_fornecedor_consolidado.py [--itens 1000] [--pedidos-por-item 3]
+"""
+import argparse
+import time
+
+from bench_common import create_bench_app, measure, print_header
+
+
+def seed(itens, pedidos_por_item):
+    from sqlalchemy import insert, select
+
+    from kaizen_app import db
+    from kaizen_app.models import (
+        Area, Estoque, Fornecedor, Item, ListaMaeItem, Pedido, PedidoStatus, Restaurante, Usuario, UserRoles,
+        brasilia_now
+    )
+
+    restaurante = Restaurante(nome='Restaurante Bench', slug='restaurante-bench', ativo=True)
+    db.session.add(restaurante)
+    db.session.flush()
+    usuarios = [
+        Usuario(nome=f'Colab Bench {i}', email=f'colab-bench-{i}@test.com', senha_hash='x',
+                role=UserRoles.COLLABORATOR, restaurante_id=restaurante.id, aprovado=True)
+        for i in range(20)
+    ]
+    fornecedor = Fornecedor(nome='Fornecedor Bench', restaurante_id=restaurante.id)
+    areas = [Area(nome='Cozinha Bench'), Area(nome='Estoque Bench')]
+    db.session.add_all([*usuarios, fornecedor, *areas])
+    db.session.flush()
+
+    db.session.execute(insert(Item), [
+        {'nome': f'Item Bench {i}', 'unidade_medida': 'un', 'fornecedor_id': fornecedor.id} for i in range(itens)
+    ])
+    db.session.execute(insert(ListaMaeItem), [
+        {'nome': f'Mãe Bench {i}', 'unidade': 'kg', 'restaurante_id': restaurante.id} for i in range(itens)
+    ])
+    item_ids = db.session.scalars(select(Item.id).where(Item.fornecedor_id == fornecedor.id)).all()
+    mae_ids = db.session.scalars(select(ListaMaeItem.id).where(ListaMaeItem.restaurante_id == restaurante.id)).all()
+
+    db.session.execute(insert(Estoque), [
+        {'item_id': item_id, 'area_id': area.id, 'quantidade_atual': n % 2, 'quantidade_minima': 1 + j}
+        for n, item_id in enumerate(item_ids) for j, area in enumerate(areas)
+    ])
+    agora = brasilia_now()
+    db.session.execute(insert(Pedido), [
+        {
+            'lista_mae_item_id': mae_id, 'fornecedor_id': fornecedor.id,
+            'usuario_id': usuarios[(n + k) % len(usuarios)].id, 'quantidade_solicitada': k + 1,
+            'status': PedidoStatus.PENDENTE, 'data_pedido': agora,
+        }
+        for n, mae_id in enumerate(mae_ids) for k in range(pedidos_por_item)
+    ])
+    db.session.commit()
+    return fornecedor.id, restaurante.id
+
+
+def legacy_consolidado(fornecedor_id):
+    """Reprodução do consolidado anterior: uma consulta de pedidos por item."""
+    from kaizen_app.models import Fornecedor, ListaMaeItem, Pedido, PedidoStatus
+
+    fornecedor = Fornecedor.query.filter_by(id=fornecedor_id).first()
+    ids = [row.lista_mae_item_id for row in Pedido.query.filter_by(fornecedor_id=fornecedor_id)
+           .with_entities(Pedido.lista_mae_item_id).distinct()]
+    pedidos = []
+    for item in ListaMaeItem.query.filter(ListaMaeItem.id.in_(ids)).all():
+        for pedido in Pedido.query.filter_by(lista_mae_item_id=item.id, fornecedor_id=fornecedor_id,
+                                             status=PedidoStatus.PENDENTE).all():
+            pedidos.append({
+                'item_nome': item.nome,
+                'quantidade': float(pedido.quantidade_solicitada),
+                'unidade': item.unidade,
+                'data_pedido': pedido.data_pedido.isoformat(),
+                'usuario': pedido.usuario.nome if pedido.usuario else 'N/A'
+            })
+    return {'fornecedor_nome': fornecedor.nome, 'total_pedidos': len(pedidos), 'pedidos': pedidos}
+
+
+def legacy_cotacao(fornecedor_id):
+    """Reprodução da cotação anterior: estoque por item e um INSERT por CotacaoItem."""
+    from kaizen_app import db
+    from kaizen_app.models import Cotacao, CotacaoItem, Estoque, Fornecedor
+
+    fornecedor = Fornecedor.query.filter_by(id=fornecedor_id).first()
+    pedidos = {}
+    for item in fornecedor.itens:
+        total = 0
+        for estoque in Estoque.query.filter_by(item_id=item.id).all():
+            if estoque.quantidade_atual < estoque.quantidade_minima:
+                total += estoque.quantidade_minima - estoque.quantidade_atual
+        if total > 0:
+            pedidos[item] = total
+    cotacao = Cotacao(fornecedor_id=fornecedor_id)
+    db.session.add(cotacao)
+    db.session.commit()
+    for item, quantidade in pedidos.items():
+        db.session.add(CotacaoItem(cotacao_id=cotacao.id, item_id=item.id, quantidade=quantidade, preco_unitario=0))
+    db.session.commit()
+    return cotacao.to_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--itens', type=int, default=1000)
+    parser.add_argument('--pedidos-por-item', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    with app.app_context():
+        from kaizen_app import db, services
+
+        started = time.perf_counter()
+        fornecedor_id, restaurante_id = seed(args.itens, args.pedidos_por_item)
+        print(f'seed: {args.itens} itens em {time.perf_counter() - started:.1f} s')
+
+        def rodar(fn):
+            def wrapper():
+                db.session.expire_all()
+                return fn()
+            return wrapper
+
+        print_header(f'Pedidos consolidados ({args.itens} itens, {db.engine.name})')
+        legado, _, _ = measure('legado (consulta por item)', rodar(lambda: legacy_consolidado(fornecedor_id)),
+                               db.engine, args.repeat)
+        (novo, _), _, _ = measure('JOIN + GROUP BY', rodar(
+            lambda: services.get_pedidos_fornecedor_consolidado(fornecedor_id, restaurante_id)
+        ), db.engine, args.repeat)
+        assert novo['pedidos'] == legado['pedidos']
+
+        print_header(f'Cotação a partir do estoque ({args.itens} itens)')
+        legado, _, _ = measure('legado (estoque por item)', rodar(lambda: legacy_cotacao(fornecedor_id)),
+                               db.engine, args.repeat)
+        (novo, _), _, _ = measure('SUM agrupado + INSERT em lote', rodar(
+            lambda: services.create_quotation_from_stock(fornecedor_id, restaurante_id)
+        ), db.engine, args.repeat)
+        quantidades = lambda cotacao: sorted((i['item_id'], i['quantidade']) for i in cotacao['itens'])
+        assert quantidades(novo) == quantidades(legado)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark do resumo do Dashboard Global.
+
+Compara a contagem legada (um .count() por métrica) com a agregação
+condicional em um único statement (_get_super_dashboard_summary_counts)
+sobre uma base multi-tenant gerada.
+
+Uso:
+    python scripts/bench_super_dashboard_summary.py [--restaurantes 20] [--usuarios 50]
+"""
+import argparse
+
+from bench_common import create_bench_app, measure, print_header
+
+
+def seed(restaurantes, usuarios, listas, itens):
+    from kaizen_app import db
+    from kaizen_app.models import (
+        Restaurante, Usuario, UserRoles, Lista, ListaMaeItem,
+        Fornecedor, Cotacao, CotacaoStatus, Submissao, SubmissaoStatus
+    )
+
+    roles = [UserRoles.ADMIN, UserRoles.COLLABORATOR, UserRoles.COLLABORATOR, UserRoles.SUPER_ADMIN]
+    for r in range(restaurantes):
+        restaurante = Restaurante(nome=f'Restaurante {r}', slug=f'restaurante-{r}', ativo=True)
+        db.session.add(restaurante)
+        db.session.flush()
+
+        users = [
+            Usuario(
+                nome=f'User {r}-{u}', email=f'user{r}-{u}@bench.local', senha_hash='x',
+                role=roles[u % len(roles)], aprovado=u % 5 != 0, restaurante_id=restaurante.id
+            )
+            for u in range(usuarios)
+        ]
+        db.session.add_all(users)
+        lists = [Lista(nome=f'Lista {r}-{l}', restaurante_id=restaurante.id) for l in range(listas)]
+        db.session.add_all(lists)
+        db.session.add_all([
+            ListaMaeItem(nome=f'Item {r}-{i}', unidade='un', restaurante_id=restaurante.id)
+            for i in range(itens)
+        ])
+        fornecedor = Fornecedor(nome=f'Fornecedor {r}', restaurante_id=restaurante.id)
+        db.session.add(fornecedor)
+        db.session.flush()
+
+        db.session.add_all([
+            Cotacao(
+                fornecedor_id=fornecedor.id,
+                status=CotacaoStatus.PENDENTE if c % 2 else CotacaoStatus.CONCLUIDA
+            )
+            for c in range(10)
+        ])
+        db.session.add_all([
+            Submissao(
+                lista_id=lists[s % len(lists)].id, usuario_id=users[s % len(users)].id,
+                status=SubmissaoStatus.PENDENTE, arquivada=s % 7 == 0
+            )
+            for s in range(usuarios * 2)
+        ])
+    db.session.commit()
+
+
+def legacy_summary_counts(restaurante_id=None):
+    """Reprodução da contagem anterior, uma query por métrica."""
+    from kaizen_app.models import (
+        Restaurante, Usuario, UserRoles, Lista, ListaMaeItem,
+        Fornecedor, Cotacao, CotacaoStatus, Submissao
+    )
+
+    if restaurante_id:
+        total_restaurantes = Restaurante.query.filter_by(id=restaurante_id, deletado=False, ativo=True).count()
+    else:
+        total_restaurantes = Restaurante.query.filter_by(deletado=False, ativo=True).count()
+    users_query = Usuario.query.filter(Usuario.ativo == True)
+    if restaurante_id:
+        users_query = users_query.filter_by(restaurante_id=restaurante_id)
+    listas_query = Lista.query.filter_by(deletado=False)
+    itens_query = ListaMaeItem.query
+    submissoes_query = Submissao.query.filter(Submissao.arquivada.is_(False))
+    cotacoes_query = Cotacao.query
+    if restaurante_id:
+        listas_query = listas_query.filter_by(restaurante_id=restaurante_id)
+        itens_query = itens_query.filter_by(restaurante_id=restaurante_id)
+        submissoes_query = submissoes_query.join(Usuario, Submissao.usuario_id == Usuario.id).filter(
+            Usuario.restaurante_id == restaurante_id
+        )
+        cotacoes_query = cotacoes_query.join(Fornecedor).filter(Fornecedor.restaurante_id == restaurante_id)
+    return {
+        'total_restaurantes': total_restaurantes,
+        'total_users': users_query.count(),
+        'users_super_admin': users_query.filter_by(role=UserRoles.SUPER_ADMIN).count(),
+        'users_admin': users_query.filter_by(role=UserRoles.ADMIN).count(),
+        'users_collaborator': users_query.filter_by(role=UserRoles.COLLABORATOR).count(),
+        'pending_approvals': users_query.filter_by(aprovado=False).count(),
+        'total_listas': listas_query.count(),
+        'total_itens': itens_query.count(),
+        'total_submissoes': submissoes_query.count(),
+        'pending_cotacoes': cotacoes_query.filter(Cotacao.status == CotacaoStatus.PENDENTE).count(),
+        'completed_cotacoes': cotacoes_query.filter(Cotacao.status == CotacaoStatus.CONCLUIDA).count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--restaurantes', type=int, default=20)
+    parser.add_argument('--usuarios', type=int, default=50)
+    parser.add_argument('--listas', type=int, default=10)
+    parser.add_argument('--itens', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    with app.app_context():
+        from kaizen_app import db, services
+
+        seed(args.restaurantes, args.usuarios, args.listas, args.itens)
+        engine = db.engine
+
+        for restaurante_id in (None, 1):
+            escopo = 'todos' if restaurante_id is None else f'restaurante {restaurante_id}'
+            print_header(f'Resumo do Dashboard Global ({escopo}, {engine.name})')
+            legacy, legacy_q, _ = measure(
+                'legado (.count() por métrica)', lambda: legacy_summary_counts(restaurante_id), engine
+            )
+            novo, novo_q, _ = measure(
+                'agregação condicional',
+                lambda: services._get_super_dashboard_summary_counts(restaurante_id),
+                engine
+            )
+            assert legacy == novo, (legacy, novo)
+            print(f'round-trips: {legacy_q} -> {novo_q}')
+
+
+if __name__ == '__main__':
+    main()
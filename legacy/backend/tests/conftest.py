@@ -1,5 +1,7 @@
 import pytest
 import json
+from contextlib import contextmanager
+from sqlalchemy import event
 from kaizen_app import create_app, db
 from kaizen_app.models import Usuario, UserRoles, Restaurante
 from werkzeug.security import generate_password_hash
@@ -22,6 +24,11 @@ def client(app):
     """Cria um cliente de teste para fazer requisições."""
     return app.test_client()
 
+@pytest.fixture
+def count_queries(app):
+    """Context manager que conta os statements SQL do bloco: `with count_queries() as counter`."""
+    return _contar_queries
+
 # --- Helper Functions ---
 
 def create_user(nome, email, senha, role, aprovado=True, restaurante_id=None):
@@ -51,3 +58,27 @@ def get_auth_token(client, email, senha):
     if response.status_code != 200:
         raise Exception(f"Falha ao obter token para {email}: {response.get_data(as_text=True)}")
     return response.get_json()['access_token']
+
+
+@contextmanager
+def _contar_queries():
+    """Conta os statements SQL executados dentro do bloco (lista de SQL em `.statements`)."""
+    class _Counter:
+        statements = []
+
+        @property
+        def count(self):
+            return len(self.statements)
+
+    counter = _Counter()
+    counter.statements = []
+
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', _before_execute)
@@ -0,0 +1,100 @@
+"""
+Testes do gravador assíncrono de logs de auditoria (kaizen_app/audit_log.py).
+"""
+import json
+import os
+
+import pytest
+
+from kaizen_app import audit_log, create_app, db, rollups, services
+from kaizen_app.config import TestingConfig
+from kaizen_app.models import AppLog, DailyMetric, Restaurante, UserRoles, brasilia_now
+from .conftest import create_user
+
+
+@pytest.fixture
+def app_async(monkeypatch, tmp_path):
+    monkeypatch.setattr(TestingConfig, 'AUDIT_LOG_MODE', 'async')
+    monkeypatch.setattr(TestingConfig, 'AUDIT_LOG_SPOOL_DIR', str(tmp_path), raising=False)
+    # Sem flush por tempo/tamanho durante o teste: o teste chama drenar()
+    monkeypatch.setattr(TestingConfig, 'AUDIT_LOG_FLUSH_INTERVAL_SECONDS', 3600.0)
+    monkeypatch.setattr(TestingConfig, 'AUDIT_LOG_BATCH_SIZE', 10000)
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        db.session.add(Restaurante(nome='Restaurante Teste', slug='restaurante-teste', ativo=True))
+        db.session.commit()
+        yield app
+        audit_log.obter_gravador(app).parar()
+        db.drop_all()
+
+
+def _segmentos(diretorio):
+    return [nome for nome in os.listdir(diretorio) if nome.endswith('.ndjson')]
+
+
+def test_modo_sincrono_nos_testes(app):
+    assert audit_log.obter_gravador(app) is None
+    with app.app_context():
+        create_user('Colab', 'colab-sync@test.com', 'senha123', UserRoles.COLLABORATOR)
+        services.authenticate_user({'email': 'colab-sync@test.com', 'senha': 'senha123'})
+        assert AppLog.query.filter_by(acao='login').count() == 1
+
+
+class TestGravadorAssincrono:
+
+    def test_log_gravado_em_lote_apos_commit(self, app_async, tmp_path):
+        restaurante_id = Restaurante.query.first().id
+        usuario = create_user('Colab', 'colab-async@test.com', 'senha123', UserRoles.COLLABORATOR)
+        usuario_id = usuario.id
+
+        services.authenticate_user({'email': 'colab-async@test.com', 'senha': 'senha123'})
+        services.authenticate_user({'email': 'colab-async@test.com', 'senha': 'senha123'})
+
+        assert AppLog.query.count() == 0
+        assert len(_segmentos(tmp_path)) == 1
+
+        assert audit_log.obter_gravador().drenar() == 2
+        assert _segmentos(tmp_path) == []
+
+        resultado, status = services.listar_logs({'acao': 'login'})
+        assert status == 200
+        assert resultado['total'] == 2
+        assert resultado['logs'][0]['usuario']['id'] == usuario_id
+        metrica = DailyMetric.query.filter_by(
+            restaurante_id=restaurante_id, metrica=rollups.METRICA_LOGINS
+        ).one()
+        assert metrica.valor == 2
+
+    def test_rollback_descarta_registros(self, app_async, tmp_path):
+        services.log_event(acao='teste', mensagem='desfeito')
+        db.session.rollback()
+        services.log_event(acao='teste', mensagem='gravado')
+        db.session.commit()
+
+        audit_log.obter_gravador().drenar()
+
+        assert [log.mensagem for log in AppLog.query.all()] == ['gravado']
+
+    def test_usuario_removido_vira_null(self, app_async):
+        usuario = create_user('Colab', 'colab-del@test.com', 'senha123', UserRoles.COLLABORATOR)
+        services.delete_user(usuario.id, UserRoles.SUPER_ADMIN.value)
+
+        audit_log.obter_gravador().drenar()
+
+        log = AppLog.query.filter_by(acao='delete').one()
+        assert log.usuario_id is None
+
+    def test_recupera_spool_de_worker_morto(self, app_async, tmp_path):
+        pid_morto = 2 ** 22 + 12345
+        linha = json.dumps({
+            'acao': 'orfao', 'mensagem': 'spool antigo', 'meta': {},
+            'criado_em': brasilia_now().isoformat(),
+        })
+        (tmp_path / f'audit-{pid_morto}-00000001.ndjson').write_text(
+            linha + '\n' + '{"acao": "trunc', encoding='utf-8'
+        )
+
+        assert audit_log.obter_gravador().drenar() == 1
+        assert AppLog.query.filter_by(acao='orfao').one().mensagem == 'spool antigo'
+        assert _segmentos(tmp_path) == []
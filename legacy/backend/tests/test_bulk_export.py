@@ -0,0 +1,108 @@
+"""
+Testes da exportação em lote em streaming (kaizen_app/bulk_export.py).
+"""
+import csv
+import io
+import zipfile
+
+from kaizen_app import bulk_export, db
+from kaizen_app.models import (
+    Area,
+    Cotacao,
+    CotacaoItem,
+    Fornecedor,
+    Item,
+    Lista,
+    ListaMaeItem,
+    Pedido,
+    PedidoStatus,
+    Restaurante,
+    UserRoles,
+)
+from .conftest import create_user, get_auth_token
+
+
+def _seed(restaurante, usuario, pedidos=5):
+    fornecedor = Fornecedor(nome='Fornecedor Export', restaurante_id=restaurante.id, contato='Ana')
+    area = Area(nome='Cozinha Export')
+    lista = Lista(nome='Lista Export', restaurante_id=restaurante.id)
+    catalogo = ListaMaeItem(nome='Arroz Export', unidade='kg', restaurante_id=restaurante.id)
+    db.session.add_all([fornecedor, area, lista, catalogo])
+    db.session.flush()
+    lista.colaboradores.append(usuario)
+    item = Item(nome='Arroz 5kg', unidade_medida='un', fornecedor_id=fornecedor.id)
+    db.session.add(item)
+    db.session.flush()
+    cotacao = Cotacao(fornecedor_id=fornecedor.id)
+    db.session.add(cotacao)
+    db.session.flush()
+    db.session.add(CotacaoItem(cotacao_id=cotacao.id, item_id=item.id, quantidade=2, preco_unitario=10))
+    db.session.add_all([
+        Pedido(
+            lista_mae_item_id=catalogo.id, fornecedor_id=fornecedor.id, usuario_id=usuario.id,
+            quantidade_solicitada=i + 1, status=PedidoStatus.PENDENTE
+        )
+        for i in range(pedidos)
+    ])
+    db.session.commit()
+
+
+def _ler_zip(dados):
+    with zipfile.ZipFile(io.BytesIO(dados)) as zip_file:
+        return {
+            nome: list(csv.reader(io.StringIO(zip_file.read(nome).decode('utf-8'))))
+            for nome in zip_file.namelist()
+        }
+
+
+class TestExportacaoEmLote:
+
+    def test_rota_envia_zip_com_csvs(self, app, client):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            admin = create_user('Admin Export', 'admin-export@test.com', 'senha123', UserRoles.ADMIN,
+                                restaurante_id=restaurante.id)
+            _seed(restaurante, admin)
+        token = get_auth_token(client, 'admin-export@test.com', 'senha123')
+
+        resposta = client.post(
+            '/api/admin/database/export-bulk',
+            json={'tipos_dados': ['pedidos', 'listas', 'cotacoes', 'fornecedores', 'itens', 'desconhecido']},
+            headers={'Authorization': f'Bearer {token}'}
+        )
+
+        assert resposta.status_code == 200
+        assert resposta.mimetype == 'application/zip'
+        assert 'attachment; filename=kaizen_export_' in resposta.headers['Content-Disposition']
+        arquivos = _ler_zip(resposta.get_data())
+        assert sorted(arquivos) == ['cotacoes.csv', 'fornecedores.csv', 'itens.csv', 'listas.csv', 'pedidos.csv']
+
+        pedidos = arquivos['pedidos.csv']
+        assert pedidos[0] == ['ID', 'Item', 'Fornecedor', 'Quantidade', 'Status', 'Usuário', 'Data Pedido']
+        assert len(pedidos) == 6
+        assert pedidos[1][1:6] == ['Arroz Export', 'Fornecedor Export', '1.00', 'PENDENTE', 'Admin Export']
+        assert arquivos['listas.csv'][1][1] == 'Lista Export'
+        assert arquivos['listas.csv'][1][4] == 'Admin Export'
+        assert arquivos['cotacoes.csv'][1][4] == '1'
+        assert arquivos['itens.csv'][1][3] == 'Fornecedor Export'
+
+    def test_gera_em_varios_pedacos_e_filtra_restaurante(self, app):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            outro = Restaurante(nome='Outro Export', slug='outro-export', ativo=True)
+            db.session.add(outro)
+            db.session.commit()
+            usuario = create_user('Colab Export', 'colab-export@test.com', 'senha123', UserRoles.COLLABORATOR,
+                                  restaurante_id=restaurante.id)
+            _seed(restaurante, usuario, pedidos=400)
+
+            pedacos = list(bulk_export.gerar_zip(['pedidos', 'usuarios'], outro.id, lote=50, chunk_bytes=1024))
+            vazio = _ler_zip(b''.join(pedacos))
+            assert len(vazio['pedidos.csv']) == 1
+            assert len(vazio['usuarios.csv']) == 1
+
+            pedacos = list(bulk_export.gerar_zip(['pedidos'], restaurante.id, lote=50, chunk_bytes=1024))
+            assert len(pedacos) > 1
+            pedidos = _ler_zip(b''.join(pedacos))['pedidos.csv']
+            assert len(pedidos) == 401
+            assert [int(linha[0]) for linha in pedidos[1:]] == sorted(int(linha[0]) for linha in pedidos[1:])
@@ -0,0 +1,154 @@
+"""
+Testes da camada de cache (kaizen_app/cache.py).
+"""
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from kaizen_app.cache import CacheBackend, MemoryCache, SQLiteCache, build_cache
+
+
+class TestMemoryCache:
+    """Testes do backend LRU em processo"""
+
+    def test_get_set_e_contadores(self):
+        cache = MemoryCache(default_ttl=60, max_entries=10)
+        assert cache.get('a') is None
+        cache.set('a', {'valor': 1})
+        assert cache.get('a') == {'valor': 1}
+
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['entries'] == 1
+
+    def test_expira_por_ttl(self):
+        cache = MemoryCache(default_ttl=60)
+        cache.set('a', 1, ttl=0.01)
+        time.sleep(0.02)
+        assert cache.get('a') is None
+
+    def test_evicta_menos_usado_recentemente(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+        assert cache.get('c') == 3
+        assert cache.stats()['evictions'] == 1
+
+    def test_single_flight_calcula_uma_vez(self):
+        cache = MemoryCache()
+        chamadas = []
+
+        def compute():
+            chamadas.append(1)
+            time.sleep(0.05)
+            return 'payload'
+
+        resultados = []
+        threads = [
+            threading.Thread(target=lambda: resultados.append(cache.get_or_compute('k', compute)))
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert resultados == ['payload'] * 5
+        assert len(chamadas) == 1
+        assert cache.stats()['computes'] == 1
+
+
+class TestSQLiteCache:
+    """Testes do backend compartilhado em arquivo"""
+
+    def test_compartilhado_entre_instancias(self, tmp_path):
+        path = str(tmp_path / 'cache.sqlite3')
+        worker_a = SQLiteCache(path, namespace='dash')
+        worker_b = SQLiteCache(path, namespace='dash')
+
+        worker_a.set('all:30', {'summary': {'total_users': 3}})
+        assert worker_b.get('all:30') == {'summary': {'total_users': 3}}
+
+        outro_namespace = SQLiteCache(path, namespace='outro')
+        assert outro_namespace.get('all:30') is None
+
+    def test_limite_de_entradas(self, tmp_path):
+        cache = SQLiteCache(str(tmp_path / 'cache.sqlite3'), max_entries=2)
+        cache.set('a', 1)
+        time.sleep(0.01)
+        cache.set('b', 2)
+        time.sleep(0.01)
+        cache.set('c', 3)
+
+        assert len(cache) == 2
+        assert cache.get('a') is None
+
+    def test_acerto_nao_escreve_no_arquivo(self, tmp_path):
+        path = str(tmp_path / 'cache.sqlite3')
+        cache = SQLiteCache(path, touch_interval=60)
+        cache.set('a', 1)
+
+        def accessed_at():
+            with sqlite3.connect(path) as conn:
+                return conn.execute("SELECT accessed_at FROM cache_entries WHERE key = 'a'").fetchone()[0]
+
+        antes = accessed_at()
+        time.sleep(0.01)
+        assert cache.get('a') == 1
+        assert accessed_at() == antes
+
+        cache.touch_interval = 0.001
+        assert cache.get('a') == 1
+        assert accessed_at() > antes
+
+    def test_get_or_compute_reaproveita_lease_de_outro_worker(self, tmp_path):
+        path = str(tmp_path / 'cache.sqlite3')
+        worker_a = SQLiteCache(path, namespace='dash')
+        worker_b = SQLiteCache(path, namespace='dash')
+
+        assert worker_a._acquire_lease('k', 5)
+
+        def grava_depois():
+            time.sleep(0.1)
+            worker_a.set('k', 'valor-do-worker-a')
+            worker_a._release_lease('k')
+
+        t = threading.Thread(target=grava_depois)
+        t.start()
+        valor = worker_b.get_or_compute('k', lambda: 'recalculado', wait_timeout=5)
+        t.join()
+
+        assert valor == 'valor-do-worker-a'
+        assert worker_b.stats()['computes'] == 0
+
+
+def test_build_cache_backend_invalido():
+    try:
+        build_cache('redis')
+    except ValueError as exc:
+        assert 'redis' in str(exc)
+    else:
+        raise AssertionError('ValueError esperado')
+
+
+def test_backend_incompleto_falha_ao_instanciar():
+    class SemLimpeza(CacheBackend):
+        def _read(self, key):
+            return None
+
+        def _write(self, key, value, expires_at):
+            pass
+
+        def delete(self, key):
+            pass
+
+    with pytest.raises(TypeError):
+        SemLimpeza()
@@ -0,0 +1,146 @@
+"""
+Testes do índice em memória da busca de itens (kaizen_app/catalog_search.py).
+"""
+from kaizen_app import catalog_search, db, services
+from kaizen_app.models import Fornecedor, Item, ListaMaeItem, Restaurante, normalize_item_nome
+
+
+def _seed(restaurante):
+    fornecedor = Fornecedor(nome='Atacadão', restaurante_id=restaurante.id)
+    db.session.add(fornecedor)
+    db.session.flush()
+    db.session.add_all([
+        ListaMaeItem(nome='Arroz', unidade='kg', restaurante_id=restaurante.id),
+        ListaMaeItem(nome='Feijão Carioca', unidade='kg', restaurante_id=restaurante.id),
+        ListaMaeItem(nome='Farinha de Arroz', unidade='kg', restaurante_id=restaurante.id),
+        Item(nome='Arroz Integral', unidade_medida='kg', fornecedor_id=fornecedor.id),
+        Item(nome='Feijao Preto', unidade_medida='kg', fornecedor_id=fornecedor.id),
+        Item(nome='Biscoito Arrozinho', unidade_medida='pct', fornecedor_id=fornecedor.id),
+    ])
+    db.session.commit()
+    return fornecedor
+
+
+def _nomes(resultado):
+    return [item['nome'] for item in resultado['itens']]
+
+
+class TestBuscaCatalogo:
+
+    def test_ranking_acentos_e_limit(self, app):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            _seed(restaurante)
+
+            resultado, status = services.buscar_itens_para_lista(restaurante.id, 'arroz')
+            assert status == 200
+            # igual > prefixo do nome > prefixo de palavra (por nome)
+            assert _nomes(resultado) == ['Arroz', 'Arroz Integral', 'Biscoito Arrozinho', 'Farinha de Arroz']
+
+            # substring no meio da palavra ainda é encontrada
+            resultado, _ = services.buscar_itens_para_lista(restaurante.id, 'rroz', limit=2)
+            assert _nomes(resultado) == ['Arroz', 'Arroz Integral']
+
+            resultado, _ = services.buscar_itens_para_lista(restaurante.id, 'FEIJAO', limit=1)
+            assert _nomes(resultado) == ['Feijão Carioca']
+
+            resultado, _ = services.buscar_itens_para_lista(restaurante.id, 'fei pre')
+            assert _nomes(resultado) == ['Feijao Preto']
+
+            todos, _ = services.buscar_itens_para_lista(restaurante.id)
+            assert len(todos['itens']) == 6
+            assert _nomes(todos) == sorted(_nomes(todos), key=normalize_item_nome)
+
+    def test_indice_reutilizado_entre_buscas(self, app, count_queries):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            restaurante_id = restaurante.id
+            _seed(restaurante)
+            services.buscar_itens_para_lista(restaurante_id, 'a')
+
+            with count_queries() as counter:
+                services.buscar_itens_para_lista(restaurante_id, 'ar')
+                services.buscar_itens_para_lista(restaurante_id, 'arr', limit=5)
+
+            assert counter.count == 0
+
+    def test_invalidacao_nas_escritas(self, app):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            restaurante_id = restaurante.id
+            fornecedor = _seed(restaurante)
+            fornecedor_id = fornecedor.id
+            services.buscar_itens_para_lista(restaurante_id)
+
+            services.criar_item_catalogo_global({'nome': 'Açúcar', 'unidade': 'kg'}, restaurante_id)
+            resultado, _ = services.buscar_itens_para_lista(restaurante_id, 'acucar')
+            assert _nomes(resultado) == ['Açúcar']
+
+            services.create_item_fornecedor(fornecedor_id, {'nome': 'Açúcar Mascavo', 'unidade_medida': 'kg'})
+            resultado, _ = services.buscar_itens_para_lista(restaurante_id, 'acucar')
+            assert _nomes(resultado) == ['Açúcar', 'Açúcar Mascavo']
+
+            services.importar_itens_fornecedor_csv(fornecedor_id, '1;Açúcar Demerara;KG')
+            resultado, _ = services.buscar_itens_para_lista(restaurante_id, 'acucar d')
+            assert _nomes(resultado) == ['Açúcar Demerara']
+
+    def test_rollback_nao_deixa_indice_obsoleto(self, app):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            restaurante_id = restaurante.id
+            _seed(restaurante)
+
+            db.session.add(ListaMaeItem(nome='Temporário', unidade='un', restaurante_id=restaurante_id))
+            db.session.flush()
+            assert len(catalog_search.obter_indice(restaurante_id)) == 7
+            db.session.rollback()
+
+            assert len(catalog_search.obter_indice(restaurante_id)) == 6
+
+    def test_indices_expirados_saem_do_registro(self, app):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            outro = Restaurante(nome='Outro Restaurante', slug='outro-restaurante', ativo=True)
+            db.session.add(outro)
+            db.session.commit()
+            app.config['CATALOG_SEARCH_TTL_SECONDS'] = 0
+
+            catalog_search.obter_indice(restaurante.id)
+            catalog_search.obter_indice(outro.id)
+
+            assert set(catalog_search._registro().indices) == {outro.id}
+
+    def test_geracao_compartilhada_invalida_indice_de_outro_worker(self, app, tmp_path):
+        from kaizen_app.cache import SQLiteCache
+
+        path = str(tmp_path / 'catalogo.sqlite3')
+        with app.app_context():
+            app.config.update(CATALOG_SEARCH_CACHE_BACKEND='sqlite', CATALOG_SEARCH_CACHE_PATH=path)
+            restaurante = Restaurante.query.first()
+            restaurante_id = restaurante.id
+            _seed(restaurante)
+            assert len(catalog_search.obter_indice(restaurante_id)) == 6
+
+            # Escrita feita por outro worker: nada chega ao registro deste processo
+            db.session.execute(db.insert(ListaMaeItem).values(
+                nome='Sal', nome_normalizado='sal', unidade='kg', restaurante_id=restaurante_id
+            ))
+            db.session.commit()
+            assert len(catalog_search.obter_indice(restaurante_id)) == 6
+
+            outro_worker = SQLiteCache(path, namespace=catalog_search.CACHE_NAME)
+            outro_worker.set(catalog_search._chave_geracao(restaurante_id), 'geracao-do-outro-worker')
+
+            assert len(catalog_search.obter_indice(restaurante_id)) == 7
+
+    def test_commit_publica_geracao_do_restaurante_do_fornecedor(self, app):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            restaurante_id = restaurante.id
+            fornecedor = _seed(restaurante)
+            chave = catalog_search._chave_geracao(restaurante_id)
+            antes = catalog_search._cache().get(chave)
+
+            services.create_item_fornecedor(fornecedor.id, {'nome': 'Sal Grosso', 'unidade_medida': 'kg'})
+
+            assert catalog_search._cache().get(chave) not in (None, antes)
@@ -189,6 +189,46 @@ def test_importar_itens_fornecedor_csv(app):
         assert codigo.codigo == '123'
 
 
+def test_importar_itens_fornecedor_csv_conflitos_em_lote(app, count_queries):
+    with app.app_context():
+        restaurante = Restaurante.query.first()
+        fornecedor = Fornecedor(nome='Fornecedor Lote', restaurante_id=restaurante.id)
+        outro = Fornecedor(nome='Outro Fornecedor', restaurante_id=restaurante.id)
+        db.session.add_all([fornecedor, outro])
+        db.session.flush()
+        existente = Item(nome='Feijao Preto', unidade_medida='un', fornecedor_id=fornecedor.id)
+        alheio = Item(nome='Sal Grosso', unidade_medida='kg', fornecedor_id=outro.id)
+        db.session.add_all([existente, alheio])
+        db.session.flush()
+        db.session.add(FornecedorItemCodigo(fornecedor_id=fornecedor.id, item_id=existente.id, codigo='10'))
+        db.session.commit()
+        fornecedor_id = fornecedor.id
+        existente_id = existente.id
+
+        linhas = ['Codigo;Descricao;Unidade', '11;FEIJAO PRETO;KG', '12;sal grosso;KG', ';Oleo;UN']
+        linhas += [f'{100 + i};Produto {i};CX' for i in range(50)]
+        linhas += ['11;Produto Duplicado;UN', '', '200;Produto 0;FD']
+
+        with count_queries() as counter:
+            result, status = services.importar_itens_fornecedor_csv(fornecedor_id, '\n'.join(linhas))
+
+        assert status == 200
+        assert result['itens_criados'] == 52
+        assert result['itens_atualizados'] == 2
+        assert result['codigos_criados'] == 50
+        assert result['codigos_atualizados'] == 2
+        assert result['linhas_ignoradas'] == 1
+        assert result['linhas_sem_codigo'] == 1
+        assert [e['linha'] for e in result['erros']] == [3, 55]
+        assert counter.count < 15
+
+        assert FornecedorItemCodigo.query.filter_by(item_id=existente_id).one().codigo == '11'
+        assert db.session.get(Item, existente_id).unidade_medida == 'kg'
+        produto = Item.query.filter_by(nome='Produto 0').one()
+        assert produto.unidade_medida == 'fardo'
+        assert FornecedorItemCodigo.query.filter_by(item_id=produto.id).one().codigo == '200'
+
+
 def test_importar_itens_fornecedor_texto_route(client, app):
     with app.app_context():
         create_user('Admin', 'admin_texto_item@example.com', 'senha', UserRoles.ADMIN, aprovado=True)
@@ -0,0 +1,81 @@
+"""
+Testes da instrumentação por endpoint (kaizen_app/instrumentation.py).
+"""
+import os
+
+import pytest
+
+from kaizen_app import create_app, db, instrumentation
+from kaizen_app.config import TestingConfig
+from kaizen_app.models import Restaurante, Usuario, UserRoles
+from .conftest import create_user, get_auth_token
+
+
+@pytest.fixture
+def app_instrumentada(monkeypatch):
+    monkeypatch.setattr(TestingConfig, 'INSTRUMENTATION_ENABLED', True)
+    monkeypatch.setattr(TestingConfig, 'INSTRUMENTATION_N_PLUS_ONE_THRESHOLD', 5)
+    app = create_app('testing')
+
+    @app.route('/_teste/n-mais-um')
+    def _n_mais_um():
+        for usuario_id in range(1, 9):
+            Usuario.query.filter_by(id=usuario_id).first()
+        return {"ok": True}
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(Restaurante(nome='Restaurante Teste', slug='restaurante-teste', ativo=True))
+        db.session.commit()
+        yield app
+        db.drop_all()
+
+
+def test_forma_statement_agrupa_literais_e_listas_in():
+    assert instrumentation.forma_statement(
+        "SELECT * FROM itens WHERE id IN (1, 2, 3) AND nome = 'x'"
+    ) == instrumentation.forma_statement(
+        "SELECT *  FROM itens WHERE id IN (?, ?) AND nome = 'yy'"
+    )
+
+
+def test_desligada_por_padrao(app):
+    assert instrumentation.obter_registro(app) is None
+
+
+class TestInstrumentacao:
+
+    def test_latencia_sql_e_n_mais_um(self, app_instrumentada):
+        client = app_instrumentada.test_client()
+        create_user('Super', 'super-metrics@test.com', 'senha123', UserRoles.SUPER_ADMIN)
+        token = get_auth_token(client, 'super-metrics@test.com', 'senha123')
+        headers = {'Authorization': f'Bearer {token}'}
+
+        for _ in range(3):
+            client.get('/api/v1/health')
+        client.get('/_teste/n-mais-um')
+
+        resposta = client.get('/api/admin/metrics', headers=headers)
+        assert resposta.status_code == 200
+        dados = resposta.get_json()
+
+        health = dados['endpoints']['api_health']
+        assert health['requisicoes'] == 3
+        assert health['sql_statements'] == 0
+        assert health['p50_ms'] <= health['p95_ms'] <= health['p99_ms']
+
+        assert dados['endpoints']['_n_mais_um']['sql_statements'] >= 8
+        casos = dados['n_plus_one']['recentes']
+        assert [caso['endpoint'] for caso in casos] == ['_n_mais_um']
+        assert casos[0]['execucoes'] == 8
+        assert dados['endpoints']['auth_bp.login']['sql_statements'] >= 1
+
+        texto = client.get('/api/admin/metrics/prometheus', headers=headers)
+        assert texto.status_code == 200
+        assert texto.mimetype == 'text/plain'
+        corpo = texto.get_data(as_text=True)
+        worker = f'worker="{os.getpid()}"'
+        assert f'kaizen_http_request_duration_seconds_count{{endpoint="api_health",{worker}}} 3' in corpo
+        assert f'kaizen_n_plus_one_total{{{worker}}} 1' in corpo
+        series = [linha for linha in corpo.splitlines() if linha and not linha.startswith('#')]
+        assert all(worker in linha for linha in series)
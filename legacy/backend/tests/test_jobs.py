@@ -0,0 +1,147 @@
+"""
+Testes dos jobs em segundo plano (kaizen_app/jobs.py).
+"""
+import io
+import zipfile
+from datetime import timedelta
+
+import pytest
+
+from kaizen_app import db, jobs
+from kaizen_app.models import Fornecedor, Job, JobStatus, Restaurante, UserRoles, brasilia_now
+from .conftest import create_user, get_auth_token
+
+
+@pytest.fixture
+def admin_headers(app, client):
+    with app.app_context():
+        create_user('Admin Jobs', 'admin-jobs@test.com', 'senha123', UserRoles.ADMIN)
+    token = get_auth_token(client, 'admin-jobs@test.com', 'senha123')
+    return {'Authorization': f'Bearer {token}'}
+
+
+class TestJobs:
+
+    def test_export_bulk_submeter_executar_e_baixar(self, app, client, admin_headers):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            db.session.add(Fornecedor(nome='Fornecedor Job', restaurante_id=restaurante.id))
+            db.session.commit()
+
+        resposta = client.post('/api/admin/jobs', json={
+            'tipo': 'export_bulk', 'params': {'tipos_dados': ['fornecedores', 'usuarios']}
+        }, headers=admin_headers)
+        assert resposta.status_code == 202
+        job_id = resposta.get_json()['job']['id']
+        assert resposta.get_json()['job']['status'] == 'PENDENTE'
+
+        assert client.get(f'/api/admin/jobs/{job_id}/download', headers=admin_headers).status_code == 409
+
+        with app.app_context():
+            assert jobs.processar_pendentes() == 1
+
+        job = client.get(f'/api/admin/jobs/{job_id}', headers=admin_headers).get_json()['job']
+        assert job['status'] == 'CONCLUIDO'
+        assert job['progresso'] == 100
+        assert job['arquivo_nome'].endswith('.zip')
+
+        download = client.get(f'/api/admin/jobs/{job_id}/download', headers=admin_headers)
+        assert download.status_code == 200
+        with zipfile.ZipFile(io.BytesIO(download.get_data())) as zip_file:
+            assert sorted(zip_file.namelist()) == ['fornecedores.csv', 'usuarios.csv']
+            assert 'Fornecedor Job' in zip_file.read('fornecedores.csv').decode('utf-8')
+
+    def test_importacao_por_upload_guarda_resultado(self, app, client, admin_headers):
+        resposta = client.post('/api/admin/jobs', data={
+            'tipo': 'importar_fornecedores_csv',
+            'file': (io.BytesIO('Nome,Contato\nHortifruti Job,Ana\n'.encode('utf-8')), 'fornecedores.csv'),
+        }, headers=admin_headers, content_type='multipart/form-data')
+        assert resposta.status_code == 202
+        job_id = resposta.get_json()['job']['id']
+
+        with app.app_context():
+            jobs.processar_pendentes()
+            assert Fornecedor.query.filter_by(nome='Hortifruti Job').count() == 1
+
+        job = client.get(f'/api/admin/jobs/{job_id}', headers=admin_headers).get_json()['job']
+        assert job['status'] == 'CONCLUIDO'
+        assert job['resultado']['fornecedores_criados'] == 1
+
+    def test_falha_do_servico_vira_erro(self, app, client, admin_headers):
+        resposta = client.post('/api/admin/jobs', json={
+            'tipo': 'importar_itens_fornecedor_texto', 'params': {'fornecedor_id': 999, 'conteudo': 'Arroz'}
+        }, headers=admin_headers)
+        job_id = resposta.get_json()['job']['id']
+
+        with app.app_context():
+            jobs.processar_pendentes()
+
+        job = client.get(f'/api/admin/jobs/{job_id}', headers=admin_headers).get_json()['job']
+        assert job['status'] == 'ERRO'
+        assert job['erro']
+
+    def test_validacao_e_visibilidade(self, app, client, admin_headers):
+        assert client.post('/api/admin/jobs', json={'tipo': 'nao-existe'}, headers=admin_headers).status_code == 400
+        faltando = client.post('/api/admin/jobs', json={'tipo': 'export_bulk', 'params': {}}, headers=admin_headers)
+        assert faltando.status_code == 400
+        assert 'tipos_dados' in faltando.get_json()['error']
+
+        job_id = client.post('/api/admin/jobs', json={'tipo': 'super_dashboard_pdf'},
+                             headers=admin_headers).get_json()['job']['id']
+        with app.app_context():
+            create_user('Outro Admin', 'outro-admin-jobs@test.com', 'senha123', UserRoles.ADMIN)
+        outro = get_auth_token(client, 'outro-admin-jobs@test.com', 'senha123')
+        assert client.get(f'/api/admin/jobs/{job_id}',
+                          headers={'Authorization': f'Bearer {outro}'}).status_code == 404
+
+    def test_reivindicar_e_recuperar_travados(self, app):
+        with app.app_context():
+            job = jobs.submeter('export_bulk', {'tipos_dados': ['areas']})
+
+            assert jobs.reivindicar('worker-a') == job.id
+            assert jobs.reivindicar('worker-b') is None
+
+            db.session.execute(
+                Job.__table__.update().values(atualizado_em=brasilia_now() - timedelta(hours=1))
+            )
+            db.session.commit()
+            assert jobs.recuperar_travados(stale_seconds=60, max_tentativas=3) == 1
+            db.session.expire_all()
+            assert db.session.get(Job, job.id).status == JobStatus.PENDENTE
+
+            assert jobs.reivindicar('worker-b') == job.id
+            db.session.execute(
+                Job.__table__.update().values(atualizado_em=brasilia_now() - timedelta(hours=1))
+            )
+            db.session.commit()
+            jobs.recuperar_travados(stale_seconds=60, max_tentativas=2)
+            db.session.expire_all()
+            assert db.session.get(Job, job.id).status == JobStatus.ERRO
+
+    def test_arquivo_no_banco_e_descartado_apos_retencao(self, app, client, admin_headers):
+        resposta = client.post('/api/admin/jobs', json={
+            'tipo': 'export_bulk', 'params': {'tipos_dados': ['areas']}
+        }, headers=admin_headers)
+        job_id = resposta.get_json()['job']['id']
+
+        with app.app_context():
+            jobs.processar_pendentes()
+            assert db.session.get(Job, job_id).arquivo_conteudo.startswith(b'PK')
+
+            app.config.update(
+                POP_AUTO_ARCHIVE_INTERVAL_SECONDS=0,
+                APP_LOGS_PARTITION_INTERVAL_SECONDS=0,
+                APP_LOGS_ARCHIVE_INTERVAL_SECONDS=0,
+            )
+            assert jobs.executar_manutencoes() == ['descartar_resultados_jobs']
+            db.session.expire_all()
+            assert db.session.get(Job, job_id).arquivo_conteudo is not None
+
+            db.session.execute(
+                Job.__table__.update().values(concluido_em=brasilia_now() - timedelta(days=8))
+            )
+            db.session.commit()
+            jobs.executar_manutencoes()
+
+        download = client.get(f'/api/admin/jobs/{job_id}/download', headers=admin_headers)
+        assert download.status_code == 410
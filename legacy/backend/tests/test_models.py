@@ -8,7 +8,7 @@ from datetime import datetime
 from kaizen_app.models import (
     Usuario, UserRoles, Item, Area, Fornecedor, Estoque, Restaurante,
     Pedido, PedidoStatus, Cotacao, CotacaoStatus, CotacaoItem,
-    Lista, ListaMaeItem, brasilia_now
+    Lista, ListaMaeItem, POPCategoria, POPLista, POPListaTarefa, POPTemplate, brasilia_now
 )
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -276,3 +276,65 @@ class TestListaMaeItemModel:
             assert item.nome == "Óleo de Soja"
             assert item.unidade == "litro"
             assert item.criado_em is not None
+
+    def test_nome_normalizado_sincronizado(self, app):
+        """nome_normalizado acompanha o nome no ORM e em INSERTs em lote"""
+        with app.app_context():
+            from sqlalchemy import insert
+            from kaizen_app import db
+            restaurante = Restaurante.query.first()
+            item = ListaMaeItem(nome="  Açúcar   Cristal ", unidade="kg", restaurante_id=restaurante.id)
+            db.session.add(item)
+            db.session.commit()
+            assert item.nome_normalizado == "acucar cristal"
+
+            item.nome = "Pão Francês"
+            db.session.commit()
+            assert item.nome_normalizado == "pao frances"
+
+            db.session.execute(insert(ListaMaeItem), [
+                {"nome": "Café Moído", "unidade": "kg", "restaurante_id": restaurante.id},
+                {"nome": "FEIJÃO", "unidade": "kg", "restaurante_id": restaurante.id},
+            ])
+            db.session.commit()
+            normalizados = {
+                i.nome: i.nome_normalizado
+                for i in ListaMaeItem.query.filter(ListaMaeItem.nome.in_(["Café Moído", "FEIJÃO"]))
+            }
+            assert normalizados == {"Café Moído": "cafe moido", "FEIJÃO": "feijao"}
+
+
+class TestPOPListaModel:
+    """Testes para o modelo POPLista"""
+
+    def test_to_dicts_sem_count_por_linha(self, app, count_queries):
+        """Totais de tarefas e colaboradores saem de dois COUNTs agrupados"""
+        with app.app_context():
+            from kaizen_app import db
+            restaurante = Restaurante.query.first()
+            colaborador = Usuario(nome="Colab POP", email="colab-pop@test.com", senha_hash="x",
+                                  role=UserRoles.COLLABORATOR, restaurante_id=restaurante.id)
+            categoria = POPCategoria(nome="Abertura", restaurante_id=restaurante.id)
+            templates = [POPTemplate(titulo=f"Tarefa {i}", restaurante_id=restaurante.id) for i in range(3)]
+            db.session.add_all([colaborador, categoria, *templates])
+            db.session.flush()
+            listas = []
+            for i in range(10):
+                lista = POPLista(nome=f"POP {i}", restaurante_id=restaurante.id, categoria_id=categoria.id)
+                if i % 2 == 0:
+                    lista.colaboradores.append(colaborador)
+                db.session.add(lista)
+                db.session.flush()
+                for template in templates[:i % 4]:
+                    db.session.add(POPListaTarefa(lista_id=lista.id, template_id=template.id))
+                listas.append(lista)
+            db.session.commit()
+
+            esperado = [lista.to_dict() for lista in listas]
+            with count_queries() as contador:
+                serializados = POPLista.to_dicts(listas)
+
+            assert contador.count == 2
+            assert serializados == esperado
+            assert [d["total_tarefas"] for d in serializados[:4]] == [0, 1, 2, 3]
+            assert [d["total_colaboradores"] for d in serializados[:2]] == [1, 0]
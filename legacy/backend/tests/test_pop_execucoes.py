@@ -0,0 +1,408 @@
+"""
+Testes das execuções de POP (checklists diários).
+"""
+import pytest
+
+from kaizen_app import db, services
+from kaizen_app.models import (
+    POPExecucao, POPExecucaoItem, POPLista, POPListaTarefa, POPTemplate, Restaurante, TipoVerificacao, UserRoles
+)
+from .conftest import create_user
+
+
+@pytest.fixture
+def pop_lista(app):
+    """Lista POP com 4 tarefas (a primeira com faixa de temperatura) e um admin."""
+    with app.app_context():
+        restaurante = Restaurante.query.first()
+        admin = create_user('Admin POP', 'admin-pop@test.com', 'senha123', UserRoles.ADMIN,
+                            restaurante_id=restaurante.id)
+        lista = POPLista(nome='Abertura', restaurante_id=restaurante.id)
+        templates = [
+            POPTemplate(titulo='Temperatura câmara', restaurante_id=restaurante.id,
+                        tipo_verificacao=TipoVerificacao.MEDICAO, valor_minimo=0, valor_maximo=5),
+            *[POPTemplate(titulo=f'Tarefa {i}', restaurante_id=restaurante.id) for i in range(3)],
+        ]
+        db.session.add_all([lista, *templates])
+        db.session.flush()
+        for ordem, template in enumerate(templates):
+            db.session.add(POPListaTarefa(lista_id=lista.id, template_id=template.id, ordem=ordem))
+        db.session.commit()
+        return admin.id, lista.id
+
+
+class TestProgressoExecucao:
+
+    def test_contadores_por_delta(self, app, pop_lista, count_queries):
+        with app.app_context():
+            user_id, lista_id = pop_lista
+            execucao, status = services.start_pop_execucao(user_id, {'lista_id': lista_id})
+            assert status == 201
+            execucao_id = execucao['id']
+            itens = [item['id'] for item in execucao['itens']]
+            assert execucao['itens'][0]['valor_minimo'] == 0.0
+            assert execucao['itens'][0]['valor_maximo'] == 5.0
+
+            # A faixa vale a do início da execução, mesmo se o template mudar depois
+            db.session.get(POPTemplate, execucao['itens'][0]['template_id']).valor_maximo = 2
+            db.session.commit()
+            db.session.expire_all()
+
+            with count_queries() as contador:
+                item, status = services.update_pop_execucao_item(
+                    user_id, execucao_id, itens[0], {'valor_medido': 4, 'concluido': True}
+                )
+            assert status == 200
+            assert item['dentro_padrao'] is True
+            assert not any('pop_templates' in sql for sql in contador.statements)
+            assert not any('count(' in sql.lower() for sql in contador.statements)
+
+            services.update_pop_execucao_item(user_id, execucao_id, itens[1], {'concluido': True, 'tem_desvio': True})
+            services.update_pop_execucao_item(user_id, execucao_id, itens[1], {'concluido': True})
+            services.update_pop_execucao_item(user_id, execucao_id, itens[2], {'observacoes': 'ok'})
+            services.update_pop_execucao_item(user_id, execucao_id, itens[0], {'concluido': False})
+
+            db.session.expire_all()
+            execucao = db.session.get(POPExecucao, execucao_id)
+            assert (execucao.total_tarefas, execucao.tarefas_concluidas, execucao.tarefas_com_desvio) == (4, 1, 1)
+            assert execucao.progresso == 25
+            assert services.reconciliar_progresso_pop_execucoes() == []
+
+    def test_verificador_corrige_divergencia(self, app, pop_lista):
+        with app.app_context():
+            user_id, lista_id = pop_lista
+            execucao, _ = services.start_pop_execucao(user_id, {'lista_id': lista_id})
+            for item in execucao['itens'][:3]:
+                services.update_pop_execucao_item(user_id, execucao['id'], item['id'], {'concluido': True})
+
+            # Marcação fora do fluxo do serviço: contadores ficam defasados
+            db.session.execute(
+                POPExecucaoItem.__table__.update()
+                .where(POPExecucaoItem.execucao_id == execucao['id'])
+                .values(concluido=True)
+            )
+            db.session.commit()
+
+            result = app.test_cli_runner().invoke(args=['verify-pop-progress', '--dry-run'])
+            assert result.exit_code == 0
+            assert '1 execução(ões) divergente(s) encontrada(s)' in result.output
+
+            divergencias = services.reconciliar_progresso_pop_execucoes(dias=1)
+            assert divergencias[0]['antes']['tarefas_concluidas'] == 3
+            assert divergencias[0]['depois']['progresso'] == 100
+
+            db.session.expire_all()
+            execucao = db.session.get(POPExecucao, execucao['id'])
+            assert (execucao.tarefas_concluidas, execucao.progresso) == (4, 100)
+            assert services.reconciliar_progresso_pop_execucoes() == []
+
+
+class TestInicioExecucao:
+
+    def test_start_em_lote(self, app, pop_lista, count_queries):
+        with app.app_context():
+            user_id, lista_id = pop_lista
+            with count_queries() as contador:
+                execucao, status = services.start_pop_execucao(user_id, {'lista_id': lista_id})
+            assert status == 201
+            # Usuário, lista, checagem de duplicata, tarefas+templates, execução, itens
+            assert contador.count <= 7
+            assert sum('pop_templates' in sql for sql in contador.statements) == 1
+            assert [item['titulo'] for item in execucao['itens']] == [
+                'Temperatura câmara', 'Tarefa 0', 'Tarefa 1', 'Tarefa 2'
+            ]
+            assert execucao['total_tarefas'] == 4
+
+            db.session.expire_all()
+            assert services.get_pop_execucao(user_id, execucao['id'])[0]['itens'] == execucao['itens']
+            assert services.start_pop_execucao(user_id, {'lista_id': lista_id})[1] == 400
+
+    def test_pre_materializar_execucoes(self, app, client, pop_lista):
+        with app.app_context():
+            admin_id, lista_id = pop_lista
+            restaurante = Restaurante.query.first()
+            lista = db.session.get(POPLista, lista_id)
+            colaboradores = [
+                create_user(f'Colab {i}', f'colab-pop-{i}@test.com', 'senha123', UserRoles.COLLABORATOR,
+                            restaurante_id=restaurante.id)
+                for i in range(3)
+            ]
+            for colaborador in colaboradores:
+                lista.colaboradores.append(colaborador)
+            db.session.commit()
+            services.start_pop_execucao(colaboradores[0].id, {'lista_id': lista_id})
+
+        from .conftest import get_auth_token
+        token = get_auth_token(client, 'admin-pop@test.com', 'senha123')
+        resposta = client.post('/api/admin/pop-execucoes/pre-materializar',
+                               headers={'Authorization': f'Bearer {token}'})
+        assert resposta.status_code == 201
+        assert resposta.get_json()['execucoes_criadas'] == 2
+        assert resposta.get_json()['itens_criados'] == 8
+
+        with app.app_context():
+            execucoes = POPExecucao.query.filter_by(lista_id=lista_id).all()
+            assert len(execucoes) == 3
+            assert all(e.total_tarefas == 4 and e.itens.count() == 4 for e in execucoes)
+
+            result = app.test_cli_runner().invoke(args=['materialize-pop-executions'])
+            assert result.exit_code == 0
+            assert '0 execução(ões)' in result.output
+
+
+class TestListagemExecucoes:
+
+    def _criar_execucoes(self, admin_id, lista_id, dias):
+        from datetime import timedelta
+        from kaizen_app.models import brasilia_now
+        hoje = brasilia_now().date()
+        for dia in range(dias):
+            data = (hoje - timedelta(days=dia)).isoformat()
+            assert services.start_pop_execucao(admin_id, {'lista_id': lista_id, 'data_referencia': data})[1] == 201
+
+    def test_paginacao_keyset(self, app, client, pop_lista, count_queries):
+        with app.app_context():
+            admin_id, lista_id = pop_lista
+            self._criar_execucoes(admin_id, lista_id, 7)
+            restaurante_id = Restaurante.query.first().id
+
+            vistos, cursor = [], None
+            while True:
+                with count_queries() as contador:
+                    pagina, status = services.list_pop_execucoes_admin(restaurante_id, {'limit': 3, 'cursor': cursor})
+                assert status == 200
+                assert contador.count == 1
+                vistos += pagina['execucoes']
+                cursor = pagina['next_cursor']
+                if not pagina['has_more']:
+                    break
+
+            datas = [e['data_referencia'] for e in vistos]
+            assert len(vistos) == 7 and datas == sorted(datas, reverse=True)
+            assert all(e['lista_nome'] == 'Abertura' and e['usuario_nome'] == 'Admin POP' for e in vistos)
+            assert services.list_pop_execucoes_admin(restaurante_id, {'cursor': 'x'})[1] == 400
+
+        from .conftest import get_auth_token
+        token = get_auth_token(client, 'admin-pop@test.com', 'senha123')
+        resposta = client.get('/api/collaborator/pop-execucoes?limit=5', headers={'Authorization': f'Bearer {token}'})
+        assert resposta.status_code == 200
+        assert len(resposta.get_json()['execucoes']) == 5
+        assert resposta.get_json()['has_more'] is True
+
+    def test_hoje_nao_pagina(self, app, client, pop_lista, monkeypatch):
+        from .conftest import get_auth_token
+
+        with app.app_context():
+            admin_id, lista_id = pop_lista
+            self._criar_execucoes(admin_id, lista_id, 2)
+            restaurante_id = Restaurante.query.first().id
+            template_id = POPTemplate.query.first().id
+            for nome in ('Fechamento', 'Limpeza'):
+                lista = POPLista(nome=nome, restaurante_id=restaurante_id)
+                db.session.add(lista)
+                db.session.flush()
+                db.session.add(POPListaTarefa(lista_id=lista.id, template_id=template_id, ordem=0))
+                db.session.commit()
+                assert services.start_pop_execucao(admin_id, {'lista_id': lista.id})[1] == 201
+
+        monkeypatch.setattr(services, '_POP_EXECUCOES_PAGE_LIMIT', 1)
+        token = get_auth_token(client, 'admin-pop@test.com', 'senha123')
+        resposta = client.get('/api/collaborator/pop-execucoes/hoje', headers={'Authorization': f'Bearer {token}'})
+
+        assert resposta.status_code == 200
+        dados = resposta.get_json()
+        assert len(dados['execucoes']) == 3
+        assert dados['next_cursor'] is None
+
+    def test_listagem_admin_arquiva_depois_da_resposta_quando_vencido(self, app, client, pop_lista):
+        from datetime import timedelta
+        from kaizen_app.models import POPConfiguracao, brasilia_now
+        from .conftest import get_auth_token
+
+        with app.app_context():
+            admin_id, lista_id = pop_lista
+            self._criar_execucoes(admin_id, lista_id, 10)
+            restaurante_id = Restaurante.query.first().id
+            db.session.add(POPConfiguracao(
+                restaurante_id=restaurante_id, ultimo_auto_arquivamento_em=brasilia_now() - timedelta(days=1)
+            ))
+            db.session.commit()
+
+        token = get_auth_token(client, 'admin-pop@test.com', 'senha123')
+        headers = {'Authorization': f'Bearer {token}'}
+
+        # Dentro do intervalo: a listagem não escreve nada
+        resposta = client.get('/api/admin/pop-execucoes', headers=headers)
+        assert len(resposta.get_json()['execucoes']) == 10
+        resposta.close()
+        with app.app_context():
+            assert POPExecucao.query.filter_by(arquivado=True).count() == 0
+            config = POPConfiguracao.query.filter_by(restaurante_id=restaurante_id).one()
+            config.ultimo_auto_arquivamento_em = brasilia_now() - timedelta(days=8)
+            db.session.commit()
+
+        # Vencido: a resposta sai antes do arquivamento, que roda quando o
+        # servidor WSGI fecha a resposta
+        resposta = client.get('/api/admin/pop-execucoes', headers=headers)
+        assert len(resposta.get_json()['execucoes']) == 10
+        with app.app_context():
+            assert POPExecucao.query.filter_by(arquivado=True).count() == 0
+        resposta.close()
+        with app.app_context():
+            assert POPExecucao.query.filter_by(arquivado=True).count() == 3
+
+    def test_listagem_nao_arquiva_e_tarefa_agendada_arquiva(self, app, pop_lista):
+        with app.app_context():
+            admin_id, lista_id = pop_lista
+            self._criar_execucoes(admin_id, lista_id, 10)
+            restaurante_id = Restaurante.query.first().id
+
+            assert len(services.list_pop_execucoes_admin(restaurante_id, {})[0]['execucoes']) == 10
+            assert POPExecucao.query.filter_by(arquivado=True).count() == 0
+
+            result = app.test_cli_runner().invoke(args=['archive-pop-executions'])
+            assert result.exit_code == 0
+            # Período padrão de 7 dias: datas de 7 a 9 dias atrás
+            assert '3 execução(ões) POP arquivada(s)' in result.output
+            assert len(services.list_pop_execucoes_admin(restaurante_id, {})[0]['execucoes']) == 7
+
+    def test_worker_de_jobs_agenda_o_auto_arquivamento(self, app, pop_lista):
+        from kaizen_app import jobs
+
+        with app.app_context():
+            admin_id, lista_id = pop_lista
+            self._criar_execucoes(admin_id, lista_id, 10)
+
+            app.config.update(
+                POP_AUTO_ARCHIVE_INTERVAL_SECONDS=0,
+                APP_LOGS_PARTITION_INTERVAL_SECONDS=0,
+                APP_LOGS_ARCHIVE_INTERVAL_SECONDS=0,
+                JOBS_RESULT_CLEANUP_INTERVAL_SECONDS=0,
+            )
+            assert jobs.executar_manutencoes() == []
+            assert POPExecucao.query.filter_by(arquivado=True).count() == 0
+
+            app.config['POP_AUTO_ARCHIVE_INTERVAL_SECONDS'] = 3600
+            ultimas = {}
+            assert jobs.executar_manutencoes(ultimas) == ['arquivar_pop_execucoes']
+            assert POPExecucao.query.filter_by(arquivado=True).count() == 3
+            # Dentro do intervalo o laço do worker não repete a manutenção
+            assert jobs.executar_manutencoes(ultimas) == []
+
+            result = app.test_cli_runner().invoke(args=['run-jobs', '--uma-vez'])
+            assert result.exit_code == 0
+            assert 'Manutenção executada: arquivar_pop_execucoes.' in result.output
+
+
+class TestFotosExecucao:
+
+    @pytest.fixture
+    def execucao_item(self, app, pop_lista, tmp_path):
+        from kaizen_app import photo_storage
+        app.config['POP_FOTOS_DIR'] = str(tmp_path / 'fotos')
+        photo_storage.init_photo_storage(app)
+        with app.app_context():
+            admin_id, lista_id = pop_lista
+            execucao, _ = services.start_pop_execucao(admin_id, {'lista_id': lista_id})
+            return execucao['id'], execucao['itens'][0]['id']
+
+    @staticmethod
+    def _jpeg(cor, tamanho=(1600, 1200)):
+        import io
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new('RGB', tamanho, cor).save(buffer, 'JPEG')
+        return buffer.getvalue()
+
+    def test_upload_deduplicado_miniatura_etag_e_range(self, app, client, execucao_item, tmp_path):
+        import hashlib
+        import io
+        from PIL import Image
+        from kaizen_app import photo_storage
+        from .conftest import get_auth_token
+
+        execucao_id, item_id = execucao_item
+        headers = {'Authorization': f"Bearer {get_auth_token(client, 'admin-pop@test.com', 'senha123')}"}
+        url = f'/api/collaborator/pop-execucoes/{execucao_id}/itens/{item_id}/foto'
+        foto = self._jpeg('red')
+
+        resposta = client.post(url, data=foto, headers=headers, content_type='image/jpeg')
+        assert resposta.status_code == 201
+        assert resposta.get_json()['foto_url'] == url
+        with app.app_context():
+            chave = db.session.get(POPExecucaoItem, item_id).foto_path
+        assert chave == hashlib.sha256(foto).hexdigest()
+
+        # Mesma foto via multipart: mesmo arquivo, sem duplicar
+        resposta = client.post(url, data={'foto': (io.BytesIO(foto), 'foto.jpg')}, headers=headers,
+                               content_type='multipart/form-data')
+        assert resposta.status_code == 201
+        originais = [p for p in (tmp_path / 'fotos').rglob(chave)]
+        assert len(originais) == 1
+        assert not list((tmp_path / 'fotos' / 'tmp').iterdir())
+
+        original = client.get(url, headers=headers)
+        assert original.status_code == 200
+        assert original.mimetype == 'image/jpeg'
+        assert original.get_data() == foto
+        assert 'private' in original.headers['Cache-Control']
+
+        assert client.get(url, headers={**headers, 'If-None-Match': f'"{chave}"'}).status_code == 304
+        parcial = client.get(url, headers={**headers, 'Range': 'bytes=0-99'})
+        assert parcial.status_code == 206
+        assert parcial.get_data() == foto[:100]
+
+        photo_storage.agendar_miniatura(chave, app).result(timeout=10)
+        miniatura = client.get(f'{url}?miniatura=1', headers=headers)
+        assert miniatura.status_code == 200
+        assert miniatura.headers['ETag'] == f'"{chave}-320"'
+        with Image.open(io.BytesIO(miniatura.get_data())) as imagem:
+            assert max(imagem.size) == 320
+
+    def test_upload_recusado(self, app, client, execucao_item):
+        from .conftest import get_auth_token
+
+        execucao_id, item_id = execucao_item
+        headers = {'Authorization': f"Bearer {get_auth_token(client, 'admin-pop@test.com', 'senha123')}"}
+        url = f'/api/collaborator/pop-execucoes/{execucao_id}/itens/{item_id}/foto'
+
+        assert client.post(url, data=b'nao sou imagem', headers=headers, content_type='image/jpeg').status_code == 400
+        assert client.get(url, headers=headers).status_code == 404
+
+        app.config['POP_FOTOS_MAX_BYTES'] = 1024
+        assert client.post(url, data=self._jpeg('blue'), headers=headers, content_type='image/jpeg').status_code == 413
+
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            create_user('Outro Colab', 'outro-colab-pop@test.com', 'senha123', UserRoles.COLLABORATOR,
+                        restaurante_id=restaurante.id)
+        outro = {'Authorization': f"Bearer {get_auth_token(client, 'outro-colab-pop@test.com', 'senha123')}"}
+        assert client.get(url, headers=outro).status_code == 403
+
+    def test_backend_incompleto_falha_ao_instanciar(self):
+        from kaizen_app import photo_storage
+
+        class SemMiniaturas(photo_storage.ArmazenamentoFotos):
+            def salvar(self, stream, max_bytes=photo_storage.DEFAULT_MAX_BYTES):
+                return None
+
+            def caminho(self, chave):
+                return None
+
+        with pytest.raises(TypeError):
+            SemMiniaturas()
+
+    def test_cabecalho_em_leituras_curtas(self, tmp_path):
+        import io
+        from kaizen_app import photo_storage
+
+        class LeituraCurta(io.BytesIO):
+            def read(self, n=-1):
+                return super().read(min(n, 5))
+
+        armazenamento = photo_storage.ArmazenamentoLocal(str(tmp_path))
+        webp = b'RIFF\x24\x00\x00\x00WEBPVP8 ' + b'\x00' * 32
+        assert armazenamento.salvar(LeituraCurta(webp))[1:] == ('image/webp', len(webp))
+        assert armazenamento.salvar(LeituraCurta(self._jpeg('green')))[1] == 'image/jpeg'
+        with pytest.raises(photo_storage.FotoInvalida):
+            armazenamento.salvar(LeituraCurta(b'RIFF\x24\x00\x00\x00AVI LIST'))
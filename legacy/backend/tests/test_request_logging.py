@@ -0,0 +1,84 @@
+"""
+Testes do log estruturado de requisições (kaizen_app/request_logging.py).
+"""
+import json
+import logging
+
+import pytest
+
+from kaizen_app import create_app, request_logging
+from kaizen_app.config import TestingConfig
+
+
+class _Captura(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.DEBUG)
+        self.registros = []
+
+    def emit(self, record):
+        self.registros.append(record)
+
+
+@pytest.fixture
+def captura():
+    handler = _Captura()
+    logger = logging.getLogger(request_logging.LOGGER_NAME)
+    logger.addHandler(handler)
+    yield handler
+    logger.removeHandler(handler)
+
+
+def _criar_app(monkeypatch, **config):
+    for chave, valor in config.items():
+        monkeypatch.setattr(TestingConfig, chave, valor, raising=False)
+    return create_app('testing')
+
+
+class TestRequestLogging:
+
+    def test_registro_estruturado(self, monkeypatch, captura):
+        app = _criar_app(monkeypatch, REQUEST_LOG_SAMPLE_RATE=1.0)
+
+        resposta = app.test_client().get('/api/v1/health', headers={'X-Request-ID': 'abc123'})
+
+        assert resposta.headers['X-Request-ID'] == 'abc123'
+        dados = captura.registros[-1].dados
+        assert dados['endpoint'] == 'api_health'
+        assert dados['status'] == 200
+        assert dados['request_id'] == 'abc123'
+        assert dados['duration_ms'] >= 0
+        assert 'headers' not in dados and 'body' not in dados
+
+        linha = json.loads(request_logging.JsonFormatter().format(captura.registros[-1]))
+        assert linha['path'] == '/api/v1/health'
+        assert linha['level'] == 'INFO'
+
+    def test_amostragem_mantem_erros(self, monkeypatch, captura):
+        app = _criar_app(monkeypatch, REQUEST_LOG_SAMPLE_RATE=0.0)
+        client = app.test_client()
+
+        client.get('/api/v1/health')
+        assert captura.registros == []
+
+        client.post('/api/auth/login', json={})
+        assert [r.dados['status'] for r in captura.registros] == [400]
+        assert captura.registros[0].levelno == logging.WARNING
+
+    def test_corpo_apenas_em_endpoint_de_debug(self, monkeypatch, captura):
+        app = _criar_app(
+            monkeypatch,
+            REQUEST_LOG_DEBUG_ENDPOINTS='auth_bp.login',
+            REQUEST_LOG_BODY_MAX_BYTES=20,
+        )
+        client = app.test_client()
+        corpo = {'email': '', 'senha': 'x' * 500}
+
+        client.post('/api/auth/login', json=corpo, headers={'Authorization': 'Bearer segredo'})
+        dados = captura.registros[-1].dados
+        assert dados['body'].startswith(json.dumps(corpo)[:20])
+        assert 'caracteres omitidos' in dados['body']
+        assert 'Authorization' not in dados['headers']
+        assert 'response_body' in dados
+
+        client.post('/api/auth/register', json=corpo)
+        assert 'body' not in captura.registros[-1].dados
@@ -0,0 +1,139 @@
+"""
+Testes da retenção de app_logs e da poda da navbar (kaizen_app/retention.py).
+"""
+import gzip
+import json
+import os
+from datetime import date, datetime, timedelta
+
+from kaizen_app import db, retention, services
+from kaizen_app.models import AppLog, NavbarActivity, UserRoles, brasilia_now
+from .conftest import create_user
+
+
+def _log(criado_em, acao='login'):
+    db.session.add(AppLog(criado_em=criado_em, acao=acao, meta={}))
+
+
+def _meses_atras(meses):
+    inicio = retention.inicio_do_mes(brasilia_now().date())
+    for _ in range(meses):
+        inicio = (inicio - timedelta(days=1)).replace(day=1)
+    return inicio
+
+
+class TestArquivarAppLogs:
+
+    def test_meses_para_arquivar(self, app):
+        with app.app_context():
+            _log(datetime(2024, 1, 15, 10))
+            _log(datetime(2024, 3, 2, 8))
+            _log(datetime(2025, 6, 1, 8))
+            db.session.commit()
+
+            meses = retention.meses_para_arquivar(retencao_meses=12, hoje=date(2025, 4, 10))
+
+            assert meses == [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)]
+
+    def test_comando_exporta_e_remove_meses_antigos(self, app, tmp_path):
+        with app.app_context():
+            antigo = datetime.combine(_meses_atras(14), datetime.min.time()) + timedelta(days=3)
+            recente = brasilia_now() - timedelta(days=1)
+            for _ in range(3):
+                _log(antigo)
+            _log(antigo + timedelta(days=40), acao='logout')
+            _log(recente)
+            db.session.commit()
+
+            result = app.test_cli_runner().invoke(args=['archive-app-logs', '--destino', str(tmp_path)])
+
+            assert result.exit_code == 0, result.output
+            arquivo = tmp_path / f"app_logs-{antigo:%Y-%m}.ndjson.gz"
+            with gzip.open(arquivo, 'rt', encoding='utf-8') as f:
+                linhas = [json.loads(linha) for linha in f]
+            assert len(linhas) == 3
+            assert {linha['acao'] for linha in linhas} == {'login'}
+            assert linhas[0]['criado_em'].startswith(antigo.date().isoformat())
+            assert not [nome for nome in os.listdir(tmp_path) if nome.endswith('.tmp')]
+
+            restantes = AppLog.query.all()
+            assert [log.criado_em.date() for log in restantes] == [recente.date()]
+
+    def test_dry_run_nao_altera_nada(self, app, tmp_path):
+        with app.app_context():
+            _log(datetime.combine(_meses_atras(20), datetime.min.time()))
+            db.session.commit()
+
+            result = app.test_cli_runner().invoke(
+                args=['archive-app-logs', '--destino', str(tmp_path), '--dry-run']
+            )
+
+            assert result.exit_code == 0
+            assert '1 log(s) seriam arquivados' in result.output
+            assert os.listdir(tmp_path) == []
+            assert AppLog.query.count() == 1
+
+    def test_sem_meses_fora_da_retencao(self, app, tmp_path):
+        with app.app_context():
+            _log(brasilia_now())
+            db.session.commit()
+
+            assert retention.arquivar_app_logs(str(tmp_path)) == []
+            assert AppLog.query.count() == 1
+
+    def test_worker_de_jobs_agenda_o_arquivamento(self, app, tmp_path):
+        from kaizen_app import jobs
+
+        with app.app_context():
+            antigo = _meses_atras(20)
+            _log(datetime.combine(antigo, datetime.min.time()))
+            _log(brasilia_now())
+            db.session.commit()
+            app.config.update(
+                APP_LOGS_ARCHIVE_DIR=str(tmp_path),
+                POP_AUTO_ARCHIVE_INTERVAL_SECONDS=0,
+                JOBS_RESULT_CLEANUP_INTERVAL_SECONDS=0,
+            )
+
+            executadas = jobs.executar_manutencoes()
+
+            assert executadas == ['garantir_particoes_app_logs', 'arquivar_app_logs']
+            assert f'app_logs-{antigo:%Y-%m}.ndjson.gz' in os.listdir(tmp_path)
+            assert AppLog.query.count() == 1
+
+
+class TestPodarNavbarActivities:
+
+    def test_log_navbar_activity_mantem_limite(self, app):
+        with app.app_context():
+            usuario = create_user('Navbar', 'navbar@test.com', 'senha123', UserRoles.ADMIN)
+            for i in range(retention.NAVBAR_ACTIVITY_LIMITE + 5):
+                _, status = services.log_navbar_activity(usuario.id, {'item_key': f'item-{i}'})
+                assert status == 200
+
+            chaves = {a.item_key for a in NavbarActivity.query.filter_by(usuario_id=usuario.id)}
+            assert len(chaves) == retention.NAVBAR_ACTIVITY_LIMITE
+            assert 'item-0' not in chaves
+            assert f'item-{retention.NAVBAR_ACTIVITY_LIMITE + 4}' in chaves
+
+    def test_comando_poda_todos_os_usuarios(self, app):
+        with app.app_context():
+            base = brasilia_now()
+            usuarios = [
+                create_user('Navbar A', 'navbar-a@test.com', 'senha123', UserRoles.ADMIN),
+                create_user('Navbar B', 'navbar-b@test.com', 'senha123', UserRoles.COLLABORATOR),
+            ]
+            for usuario in usuarios:
+                for i in range(8):
+                    db.session.add(NavbarActivity(
+                        usuario_id=usuario.id, item_key=f'item-{i}', criado_em=base + timedelta(minutes=i)
+                    ))
+            db.session.commit()
+
+            result = app.test_cli_runner().invoke(args=['prune-navbar-activity', '--manter', '3'])
+
+            assert result.exit_code == 0
+            assert '10 registro(s) removido(s)' in result.output
+            for usuario in usuarios:
+                chaves = {a.item_key for a in NavbarActivity.query.filter_by(usuario_id=usuario.id)}
+                assert chaves == {'item-5', 'item-6', 'item-7'}
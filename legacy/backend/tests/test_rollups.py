@@ -0,0 +1,143 @@
+"""
+Testes do rollup diário de métricas (kaizen_app/rollups.py).
+"""
+from sqlalchemy import func
+
+from kaizen_app import db, rollups, services
+from kaizen_app.models import (
+    DailyMetric,
+    Lista,
+    ListaItemRef,
+    ListaMaeItem,
+    Pedido,
+    PedidoStatus,
+    Restaurante,
+    Submissao,
+    SubmissaoStatus,
+    UserRoles,
+    brasilia_now,
+)
+from .conftest import create_user
+
+
+def _metricas(restaurante_id):
+    return {
+        m.metrica: m.valor
+        for m in DailyMetric.query.filter_by(restaurante_id=restaurante_id).all()
+    }
+
+
+def _criar_submissao(restaurante, usuario):
+    lista = Lista(nome='Lista Rollup', restaurante_id=restaurante.id)
+    item = ListaMaeItem(nome='Arroz Rollup', unidade='kg', restaurante_id=restaurante.id)
+    db.session.add_all([lista, item])
+    db.session.flush()
+    submissao = Submissao(lista_id=lista.id, usuario_id=usuario.id)
+    db.session.add(submissao)
+    db.session.flush()
+    pedido = Pedido(
+        submissao_id=submissao.id,
+        lista_mae_item_id=item.id,
+        quantidade_solicitada=2,
+        usuario_id=usuario.id
+    )
+    db.session.add(pedido)
+    db.session.commit()
+    return submissao, pedido
+
+
+class TestRollupIncremental:
+    """O rollup acompanha as escritas na mesma transação"""
+
+    def test_login_incrementa_logins(self, app):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            create_user('Colab', 'colab-rollup@test.com', 'senha123', UserRoles.COLLABORATOR)
+
+            services.authenticate_user({'email': 'colab-rollup@test.com', 'senha': 'senha123'})
+            services.authenticate_user({'email': 'colab-rollup@test.com', 'senha': 'senha123'})
+
+            assert _metricas(restaurante.id)[rollups.METRICA_LOGINS] == 2
+
+    def test_submissao_arquivamento_e_aprovacao(self, app):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            usuario = create_user('Colab', 'colab-sub@test.com', 'senha123', UserRoles.COLLABORATOR)
+            submissao, pedido = _criar_submissao(restaurante, usuario)
+
+            metricas = _metricas(restaurante.id)
+            assert metricas['submissoes.PENDENTE'] == 1
+            assert metricas[rollups.METRICA_PEDIDOS] == 1
+
+            services.aprovar_pedido(pedido.id)
+            metricas = _metricas(restaurante.id)
+            assert metricas['pedidos.APROVADO'] == 1
+            assert metricas['submissoes.PENDENTE'] == 0
+            assert metricas['submissoes.APROVADO'] == 1
+
+            services.arquivar_submissao(submissao.id)
+            assert _metricas(restaurante.id)['submissoes.APROVADO'] == 0
+
+            services.desarquivar_submissao(submissao.id)
+            assert _metricas(restaurante.id)['submissoes.APROVADO'] == 1
+
+    def test_edicao_e_exclusao_de_submissao_acompanham_count_de_pedidos(self, app):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            usuario = create_user('Colab', 'colab-edit@test.com', 'senha123', UserRoles.COLLABORATOR)
+            submissao, pedido = _criar_submissao(restaurante, usuario)
+            submissao_id, item_id = submissao.id, pedido.lista_mae_item_id
+            db.session.add(ListaItemRef(lista_id=submissao.lista_id, item_id=item_id, quantidade_minima=5))
+            db.session.commit()
+
+            def total_rollup():
+                return db.session.query(func.coalesce(func.sum(DailyMetric.valor), 0)).filter(
+                    DailyMetric.metrica == rollups.METRICA_PEDIDOS
+                ).scalar()
+
+            for quantidade in (1, 0):
+                _, status = services.editar_quantidades_submissao(
+                    submissao_id, [{'item_id': item_id, 'quantidade_atual': quantidade}]
+                )
+                assert status == 200
+                assert Pedido.query.count() == 1
+                assert total_rollup() == Pedido.query.count()
+
+            services.arquivar_submissao(submissao_id)
+            _, status = services.deletar_submissao_permanente(submissao_id)
+            assert status == 200
+            assert Pedido.query.count() == 0
+            assert total_rollup() == 0
+
+    def test_backfill_reproduz_valores_incrementais(self, app):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            usuario = create_user('Colab', 'colab-bf@test.com', 'senha123', UserRoles.COLLABORATOR)
+            _, pedido = _criar_submissao(restaurante, usuario)
+            services.authenticate_user({'email': 'colab-bf@test.com', 'senha': 'senha123'})
+            # Aprovado e depois rejeitado: só o status atual conta, no dia do pedido
+            services.aprovar_pedido(pedido.id)
+            services.rejeitar_submissao(pedido.submissao_id)
+            metricas = _metricas(restaurante.id)
+            assert metricas['pedidos.APROVADO'] == 0
+            assert metricas['pedidos.REJEITADO'] == 1
+            incremental = {k: v for k, v in _metricas(restaurante.id).items() if v}
+
+            DailyMetric.query.delete()
+            db.session.commit()
+            rollups.reconstruir_metricas_diarias()
+
+            assert {k: v for k, v in _metricas(restaurante.id).items() if v} == incremental
+
+    def test_comando_backfill(self, app):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            usuario = create_user('Colab', 'colab-cli@test.com', 'senha123', UserRoles.COLLABORATOR)
+            _criar_submissao(restaurante, usuario)
+            hoje = brasilia_now().date().isoformat()
+
+            result = app.test_cli_runner().invoke(args=['backfill-daily-metrics', '--desde', hoje])
+
+            assert result.exit_code == 0
+            assert 'daily_metrics reconstruída' in result.output
+            assert _metricas(restaurante.id)['submissoes.PENDENTE'] == 1
@@ -137,6 +137,31 @@ class TestAdminRoutes:
             assert user.ativo is False
 
 
+    def test_listar_submissoes_falha_no_meio_nao_trunca_json(self, client, app, monkeypatch):
+        """Sem paginação, erro ao ler uma página vira 500 em vez de JSON truncado com 200"""
+        from kaizen_app import services
+        with app.app_context():
+            create_user('Admin', 'admin@example.com', 'senha', UserRoles.ADMIN, aprovado=True)
+            token = get_auth_token(client, 'admin@example.com', 'senha')
+
+        chamadas = []
+
+        def pagina_instavel(*args, **kwargs):
+            chamadas.append(kwargs)
+            if len(chamadas) > 1:
+                raise RuntimeError("conexão perdida")
+            return {"items": [{"id": 1}], "next_cursor": "proxima", "has_more": True}, 200
+
+        monkeypatch.setattr(services, 'get_submissoes_page', pagina_instavel)
+        app.config['PROPAGATE_EXCEPTIONS'] = False
+
+        response = client.get('/api/admin/submissoes',
+            headers={'Authorization': f'Bearer {token}'})
+
+        assert response.status_code == 500
+        assert len(chamadas) == 2
+
+
 class TestItemRoutes:
     """Testes para rotas de itens"""
     
@@ -4,7 +4,7 @@ Testa as funções de negócio sem dependência de rotas.
 """
 import pytest
 from decimal import Decimal
-from datetime import datetime
+from datetime import datetime, timedelta
 from kaizen_app import services, db
 from kaizen_app.models import (
     Usuario,
@@ -14,12 +14,19 @@ from kaizen_app.models import (
     Fornecedor,
     Estoque,
     Lista,
+    ListaItemRef,
     ListaMaeItem,
     Restaurante,
     SolicitacaoRestaurante,
     StatusSolicitacaoRestaurante,
     Submissao,
     SubmissaoStatus,
+    Pedido,
+    PedidoStatus,
+    DailyMetric,
+    ListaRapida,
+    ListaRapidaItem,
+    StatusListaRapida,
     AppLog,
     brasilia_now
 )
@@ -279,6 +286,44 @@ class TestSuperDashboardData:
             assert data['temporal']['submission_status_distribution']['data'][0] == 1
             assert data['temporal']['users_active_per_month']['data'][-1] == 2
 
+    def test_super_dashboard_resumo_em_um_unico_statement(self, app, count_queries):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            outro = Restaurante(nome='Outro', slug='outro-dashboard', ativo=True)
+            db.session.add(outro)
+            db.session.flush()
+            db.session.add_all([
+                Usuario(nome='Admin', email='adm-resumo@example.com', senha_hash='h',
+                        role=UserRoles.ADMIN, aprovado=True, restaurante_id=restaurante.id),
+                Usuario(nome='Pendente', email='pend-resumo@example.com', senha_hash='h',
+                        role=UserRoles.COLLABORATOR, aprovado=False, restaurante_id=restaurante.id),
+                Usuario(nome='Outro', email='outro-resumo@example.com', senha_hash='h',
+                        role=UserRoles.COLLABORATOR, aprovado=True, restaurante_id=outro.id),
+                Lista(nome='Lista A', restaurante_id=restaurante.id),
+                Lista(nome='Lista B', restaurante_id=outro.id),
+                ListaMaeItem(nome='Arroz', unidade='kg', restaurante_id=restaurante.id),
+            ])
+            db.session.commit()
+            restaurante_id = restaurante.id
+
+            with count_queries() as counter:
+                counts = services._get_super_dashboard_summary_counts(restaurante_id)
+            assert counter.count == 1
+
+            assert counts['total_restaurantes'] == 1
+            assert counts['total_users'] == 2
+            assert counts['users_admin'] == 1
+            assert counts['users_collaborator'] == 1
+            assert counts['users_super_admin'] == 0
+            assert counts['pending_approvals'] == 1
+            assert counts['total_listas'] == 1
+            assert counts['total_itens'] == 1
+
+            todos = services._get_super_dashboard_summary_counts()
+            assert todos['total_restaurantes'] == 2
+            assert todos['total_users'] == 3
+            assert todos['total_listas'] == 2
+
     def test_login_senha_incorreta(self, app):
         """Testa login com senha incorreta"""
         with app.app_context():
@@ -301,6 +346,76 @@ class TestSuperDashboardData:
             assert status == 401
 
 
+class TestListarLogs:
+    """Paginação por cursor e carga em lote dos relacionados em listar_logs"""
+
+    def _seed(self):
+        restaurante = Restaurante.query.first()
+        admin = Usuario(nome='Admin', email='adm-logs@example.com', senha_hash='h',
+                        role=UserRoles.ADMIN, aprovado=True, restaurante_id=restaurante.id)
+        superadmin = Usuario(nome='Super', email='super-logs@example.com', senha_hash='h',
+                             role=UserRoles.SUPER_ADMIN, aprovado=True)
+        db.session.add_all([admin, superadmin])
+        db.session.flush()
+        mesmo_instante = brasilia_now()
+        db.session.add_all([
+            AppLog(acao='login' if n % 2 else 'update', usuario_id=admin.id,
+                   impersonator_id=superadmin.id if n == 0 else None,
+                   restaurante_id=restaurante.id, criado_em=mesmo_instante - timedelta(minutes=n // 2))
+            for n in range(7)
+        ] + [AppLog(acao='login', usuario_id=superadmin.id)])
+        db.session.commit()
+        return restaurante, admin, superadmin
+
+    def test_cursor_percorre_todos_sem_repetir(self, app, count_queries):
+        with app.app_context():
+            restaurante, admin, superadmin = self._seed()
+            restaurante_id, superadmin_id = restaurante.id, superadmin.id
+
+            vistos, cursor, paginas = [], None, 0
+            while True:
+                with count_queries() as counter:
+                    data, status = services.listar_logs(
+                        {'restaurante_id': restaurante_id, 'limit': 3, 'cursor': cursor, 'count': 'none'}
+                    )
+                assert status == 200
+                # página + usuários + restaurantes, sem lazy load por linha
+                assert counter.count <= 3
+                paginas += 1
+                vistos.extend((log['criado_em'], log['id']) for log in data['logs'])
+                cursor = data['next_cursor']
+                if not data['has_more']:
+                    break
+
+            assert paginas == 3
+            assert len(vistos) == len(set(vistos)) == 7
+            assert vistos == sorted(vistos, reverse=True)
+            assert data['total'] is None
+
+            data, _ = services.listar_logs({'restaurante_id': restaurante_id, 'limit': 10})
+            primeiro = next(log for log in data['logs'] if log.get('impersonator'))
+            assert primeiro['usuario']['email'] == 'adm-logs@example.com'
+            assert primeiro['restaurante']['id'] == restaurante_id
+            assert primeiro['impersonator'] == {'id': superadmin_id, 'nome': 'Super', 'email': 'super-logs@example.com'}
+
+    def test_contagem_e_cursor_invalido(self, app):
+        with app.app_context():
+            self._seed()
+
+            data, _ = services.listar_logs({'acao': 'login', 'count': 'exact'})
+            assert data['total'] == 4
+            assert data['total_estimado'] is False
+
+            data, _ = services.listar_logs({'limit': 2})
+            assert data['total'] == 8
+            assert len(data['logs']) == 2
+
+            _, status = services.listar_logs({'cursor': 'nao-e-cursor'})
+            assert status == 400
+            _, status = services.listar_logs({'count': 'talvez'})
+            assert status == 400
+
+
 class TestGetAllUsers:
     """Testes para o serviço de listagem de usuários"""
 
@@ -454,6 +569,477 @@ class TestListaServices:
             assert lista_db.data_delecao is not None
 
 
+class TestVinculoItensEmLote:
+    """Motor de vínculo de nomes à lista (catálogo pré-carregado, inserts em lote)"""
+
+    def test_importar_items_em_lote(self, app, count_queries):
+        with app.app_context():
+            from kaizen_app.models import ListaItemRef
+            restaurante = Restaurante.query.first()
+            lista = Lista(nome="Lista Lote", restaurante_id=restaurante.id)
+            existente = ListaMaeItem(nome="Açúcar Refinado", unidade="kg", restaurante_id=restaurante.id)
+            db.session.add_all([lista, existente])
+            db.session.commit()
+
+            nomes = ["acucar  refinado", "Arroz", "ARROZ", "x"] + [f"Item {i}" for i in range(40)]
+            with count_queries() as counter:
+                result, status = services.importar_items_em_lote(
+                    lista.id, {"nomes": nomes}, restaurante.id
+                )
+
+            assert status == 201
+            assert result["items_criados"] == 41
+            assert result["items_vinculados"] == 42
+            assert result["items_duplicados"] == 1
+            assert counter.count < 15
+            assert ListaItemRef.query.filter_by(lista_id=lista.id, item_id=existente.id).count() == 1
+
+            # Reimportar não duplica vínculos nem itens
+            result, status = services.importar_items_em_lote(lista.id, {"nomes": ["Arroz"]}, restaurante.id)
+            assert result["items_criados"] == 0
+            assert result["items_duplicados"] == 1
+
+    def test_create_lista_from_csv(self, app):
+        with app.app_context():
+            from kaizen_app.models import ListaItemRef
+            restaurante = Restaurante.query.first()
+            db.session.add(ListaMaeItem(nome="Feijão", unidade="kg", restaurante_id=restaurante.id))
+            db.session.commit()
+
+            csv_content = "nome,unidade,quantidade_atual,quantidade_minima\nfeijao,kg,2,5\nMilho,un,,\n"
+            result, status = services.create_lista_from_csv("Lista CSV", None, csv_content, restaurante.id)
+
+            assert status == 201
+            assert result["itens_vinculados"] == 2
+            assert result["itens_criados"] == 1
+            refs = {ref.item.nome: ref for ref in ListaItemRef.query.filter_by(lista_id=result["lista_id"])}
+            assert refs["Feijão"].quantidade_minima == 5
+            assert refs["Milho"].quantidade_minima == 1.0
+
+
+class TestSubmissoesPaginadas:
+    """Listagem admin de submissões com paginação keyset"""
+
+    def _seed(self, restaurante, usuario, inicio):
+        lista = Lista(nome="Lista Paginada", restaurante_id=restaurante.id)
+        item = ListaMaeItem(nome="Tomate", unidade="kg", restaurante_id=restaurante.id)
+        db.session.add_all([lista, item])
+        db.session.flush()
+        for i in range(3):
+            db.session.add(Submissao(
+                lista_id=lista.id, usuario_id=usuario.id,
+                data_submissao=inicio + timedelta(hours=2 * i)
+            ))
+        for i in range(2):
+            rapida = ListaRapida(
+                nome=f"Rápida {i}", usuario_id=usuario.id,
+                status=StatusListaRapida.PENDENTE,
+                submetido_em=inicio + timedelta(hours=2 * i + 1)
+            )
+            db.session.add(rapida)
+            db.session.flush()
+            db.session.add(ListaRapidaItem(lista_rapida_id=rapida.id, item_global_id=item.id))
+        # Mesmo instante de uma submissão tradicional: desempate estável
+        db.session.add(ListaRapida(
+            nome="Rápida empate", usuario_id=usuario.id,
+            status=StatusListaRapida.PENDENTE, submetido_em=inicio
+        ))
+        db.session.commit()
+
+    def test_paginas_cobrem_listagem_completa(self, app):
+        with app.app_context():
+            from .conftest import create_user
+            restaurante = Restaurante.query.first()
+            usuario = create_user("Colab", "colab-pag@test.com", "senha123", UserRoles.COLLABORATOR,
+                                  restaurante_id=restaurante.id)
+            self._seed(restaurante, usuario, datetime(2025, 1, 1, 8, 0))
+
+            completa, status = services.get_all_submissoes()
+            assert status == 200
+            assert len(completa) == 6
+            datas = [s["data_submissao"] for s in completa]
+            assert datas == sorted(datas, reverse=True)
+            rapidas = [s for s in completa if s["tipo_lista"] == "LISTA_RAPIDA" and s["total_pedidos"]]
+            assert rapidas[0]["pedidos"][0]["item_nome"] == "Tomate"
+
+            paginas, cursor = [], None
+            while True:
+                page, status = services.get_submissoes_page(limit=2, cursor=cursor)
+                assert status == 200
+                paginas.extend(page["items"])
+                cursor = page["next_cursor"]
+                if not cursor:
+                    break
+            assert paginas == completa
+
+    def test_filtro_por_restaurante_e_cursor_invalido(self, app):
+        with app.app_context():
+            from .conftest import create_user
+            restaurante = Restaurante.query.first()
+            outro = Restaurante(nome="Outro", slug="outro-pag")
+            db.session.add(outro)
+            db.session.commit()
+            usuario = create_user("Colab", "colab-rest@test.com", "senha123", UserRoles.COLLABORATOR,
+                                  restaurante_id=restaurante.id)
+            self._seed(restaurante, usuario, datetime(2025, 1, 1, 8, 0))
+
+            proprio, _ = services.get_all_submissoes(restaurante_id=restaurante.id)
+            alheio, _ = services.get_all_submissoes(restaurante_id=outro.id)
+            assert len(proprio) == 6
+            assert alheio == []
+
+            response, status = services.get_submissoes_page(cursor="invalido")
+            assert status == 400
+
+
+class TestTransicoesPedidosLote:
+    """Aprovação/rejeição em lote com UPDATE ... RETURNING"""
+
+    def _seed(self, restaurante, usuario, submissoes=3, pedidos=4):
+        lista = Lista(nome="Lista Lote", restaurante_id=restaurante.id)
+        item = ListaMaeItem(nome="Cebola Lote", unidade="kg", restaurante_id=restaurante.id)
+        db.session.add_all([lista, item])
+        db.session.flush()
+        ids = []
+        for _ in range(submissoes):
+            submissao = Submissao(lista_id=lista.id, usuario_id=usuario.id)
+            db.session.add(submissao)
+            db.session.flush()
+            grupo = [
+                Pedido(submissao_id=submissao.id, lista_mae_item_id=item.id,
+                       quantidade_solicitada=1, usuario_id=usuario.id)
+                for _ in range(pedidos)
+            ]
+            db.session.add_all(grupo)
+            db.session.flush()
+            ids.append([p.id for p in grupo])
+        db.session.commit()
+        return lista, ids
+
+    def _metricas(self, restaurante_id):
+        return {
+            m.metrica: m.valor
+            for m in DailyMetric.query.filter_by(restaurante_id=restaurante_id).all() if m.valor
+        }
+
+    def test_aprovar_e_rejeitar_lote(self, app):
+        with app.app_context():
+            from .conftest import create_user
+            restaurante = Restaurante.query.first()
+            usuario = create_user("Colab", "colab-lote@test.com", "senha123", UserRoles.COLLABORATOR,
+                                  restaurante_id=restaurante.id)
+            _, ids = self._seed(restaurante, usuario)
+
+            response, status = services.aprovar_pedidos_lote(ids[0] + ids[1][:2] + [999999])
+            assert status == 200
+            assert response["aprovados"] == 6
+            assert response["erros"] == ["Pedido 999999 não encontrado"]
+
+            response, _ = services.rejeitar_pedidos_lote(ids[1] + [ids[0][0]])
+            assert response["rejeitados"] == 2
+            assert response["erros"] == [
+                f"Pedido {ids[1][0]} não está pendente",
+                f"Pedido {ids[1][1]} não está pendente",
+                f"Pedido {ids[0][0]} não está pendente",
+            ]
+
+            status_por_submissao = [
+                db.session.get(Submissao, db.session.get(Pedido, grupo[0]).submissao_id).status for grupo in ids
+            ]
+            assert status_por_submissao == [
+                SubmissaoStatus.APROVADO, SubmissaoStatus.PARCIALMENTE_APROVADO, SubmissaoStatus.PENDENTE
+            ]
+            metricas = self._metricas(restaurante.id)
+            assert metricas["pedidos.APROVADO"] == 6
+            assert metricas["pedidos.REJEITADO"] == 2
+            assert metricas["submissoes.APROVADO"] == 1
+            assert metricas["submissoes.PARCIALMENTE_APROVADO"] == 1
+            assert metricas["submissoes.PENDENTE"] == 1
+
+            # Os deltas aplicados batem com a reconstrução a partir das tabelas
+            from kaizen_app import rollups
+            rollups.reconstruir_metricas_diarias()
+            reconstruidas = self._metricas(restaurante.id)
+            for metrica in ("submissoes.APROVADO", "submissoes.PARCIALMENTE_APROVADO", "submissoes.PENDENTE"):
+                assert reconstruidas[metrica] == metricas[metrica]
+
+    def test_lote_grande_com_queries_constantes(self, app, count_queries):
+        with app.app_context():
+            from .conftest import create_user
+            restaurante = Restaurante.query.first()
+            usuario = create_user("Colab", "colab-lote2@test.com", "senha123", UserRoles.COLLABORATOR,
+                                  restaurante_id=restaurante.id)
+            _, ids = self._seed(restaurante, usuario, submissoes=20, pedidos=10)
+            todos = [pedido_id for grupo in ids for pedido_id in grupo]
+
+            with count_queries() as contador:
+                response, _ = services.aprovar_pedidos_lote(todos)
+
+            assert response["aprovados"] == 200
+            assert contador.count <= 8, contador.statements
+            assert Submissao.query.filter_by(status=SubmissaoStatus.APROVADO).count() == 20
+
+    def test_aprovar_submissao_e_todos_da_lista(self, app):
+        with app.app_context():
+            from .conftest import create_user
+            restaurante = Restaurante.query.first()
+            usuario = create_user("Colab", "colab-lote3@test.com", "senha123", UserRoles.COLLABORATOR,
+                                  restaurante_id=restaurante.id)
+            lista, ids = self._seed(restaurante, usuario, submissoes=2, pedidos=3)
+            services.rejeitar_pedidos_lote([ids[0][0]])
+
+            submissao_id = db.session.get(Pedido, ids[0][0]).submissao_id
+            response, status = services.aprovar_submissao(submissao_id)
+            assert status == 200
+            assert {p.status for p in Pedido.query.filter(Pedido.id.in_(ids[0]))} == {PedidoStatus.APROVADO}
+            assert db.session.get(Submissao, submissao_id).status == SubmissaoStatus.APROVADO
+
+            response, status = services.aprovar_todos_pedidos_lista(lista.id, restaurante.id)
+            assert status == 200
+            assert response["pedidos_aprovados"] == 3
+            response, status = services.aprovar_todos_pedidos_lista(lista.id, restaurante.id)
+            assert status == 404
+            assert Submissao.query.filter_by(status=SubmissaoStatus.APROVADO).count() == 2
+
+
+class TestFornecedorConsolidado:
+    """Pedidos consolidados e cotação a partir do estoque em consultas agrupadas"""
+
+    def _seed(self, restaurante, usuario, itens=12):
+        fornecedor = Fornecedor(nome="Fornecedor Consolidado", restaurante_id=restaurante.id)
+        areas = [Area(nome="Área Consolidado 1"), Area(nome="Área Consolidado 2")]
+        db.session.add_all([fornecedor, *areas])
+        db.session.flush()
+        catalogo = []
+        for i in range(itens):
+            item = Item(nome=f"Item Consolidado {i}", unidade_medida="un", fornecedor_id=fornecedor.id)
+            mae = ListaMaeItem(nome=f"Mãe Consolidado {i}", unidade="kg", restaurante_id=restaurante.id)
+            db.session.add_all([item, mae])
+            db.session.flush()
+            catalogo.append(mae)
+            # Falta de 2 na primeira área; a segunda só conta nos itens pares
+            db.session.add(Estoque(item_id=item.id, area_id=areas[0].id, quantidade_atual=1, quantidade_minima=3))
+            db.session.add(Estoque(item_id=item.id, area_id=areas[1].id,
+                                   quantidade_atual=0 if i % 2 == 0 else 9, quantidade_minima=4))
+            for quantidade in (1, 2):
+                db.session.add(Pedido(lista_mae_item_id=mae.id, fornecedor_id=fornecedor.id,
+                                      quantidade_solicitada=quantidade, usuario_id=usuario.id))
+        db.session.add(Pedido(lista_mae_item_id=catalogo[0].id, fornecedor_id=fornecedor.id,
+                              quantidade_solicitada=5, usuario_id=usuario.id, status=PedidoStatus.APROVADO))
+        db.session.commit()
+        return fornecedor.id
+
+    def test_pedidos_consolidados(self, app, count_queries):
+        with app.app_context():
+            from .conftest import create_user
+            restaurante = Restaurante.query.first()
+            usuario = create_user("Colab", "colab-cons@test.com", "senha123", UserRoles.COLLABORATOR,
+                                  restaurante_id=restaurante.id)
+            fornecedor_id = self._seed(restaurante, usuario)
+            restaurante_id = restaurante.id
+
+            with count_queries() as contador:
+                response, status = services.get_pedidos_fornecedor_consolidado(fornecedor_id, restaurante_id)
+
+            assert status == 200
+            assert contador.count == 3
+            assert response["total_pedidos"] == 24
+            assert response["pedidos"][0]["item_nome"] == "Mãe Consolidado 0"
+            assert response["pedidos"][0]["usuario"] == "Colab"
+            assert response["itens_consolidados"][0]["quantidade_total"] == 3.0
+            assert response["itens_consolidados"][0]["total_pedidos"] == 2
+
+            outro = Restaurante(nome="Outro", slug="outro-cons")
+            db.session.add(outro)
+            db.session.commit()
+            assert services.get_pedidos_fornecedor_consolidado(fornecedor_id, outro.id)[1] == 404
+
+    def test_cotacao_do_estoque_em_lote(self, app, count_queries):
+        with app.app_context():
+            from .conftest import create_user
+            restaurante = Restaurante.query.first()
+            usuario = create_user("Colab", "colab-cot@test.com", "senha123", UserRoles.COLLABORATOR,
+                                  restaurante_id=restaurante.id)
+            fornecedor_id = self._seed(restaurante, usuario)
+            restaurante_id = restaurante.id
+
+            with count_queries() as contador:
+                response, status = services.create_quotation_from_stock(fornecedor_id, restaurante_id)
+
+            assert status == 201
+            assert contador.count <= 8
+            quantidades = [item["quantidade"] for item in response["itens"]]
+            assert quantidades == [6.0 if i % 2 == 0 else 2.0 for i in range(12)]
+            assert response["itens"][0]["item"]["nome"] == "Item Consolidado 0"
+            assert response["fornecedor"]["nome"] == "Fornecedor Consolidado"
+
+
+class TestEstatisticas:
+    """Estatísticas de itens por lista (agregação em SQL)"""
+
+    def _seed(self, restaurante, listas):
+        area = Area(nome="Cozinha Estatísticas")
+        db.session.add(area)
+        db.session.flush()
+        itens = [
+            ListaMaeItem(nome=f"Item Est {i}", unidade="un", restaurante_id=restaurante.id)
+            for i in range(4)
+        ]
+        db.session.add_all(itens)
+        db.session.flush()
+        for n in range(listas):
+            lista = Lista(nome=f"Lista Est {n}", restaurante_id=restaurante.id,
+                          area_id=area.id if n % 2 == 0 else None)
+            db.session.add(lista)
+            db.session.flush()
+            db.session.add_all([
+                ListaItemRef(lista_id=lista.id, item_id=itens[0].id, quantidade_atual=5, quantidade_minima=2),
+                ListaItemRef(lista_id=lista.id, item_id=itens[1].id, quantidade_atual=1, quantidade_minima=3),
+                ListaItemRef(lista_id=lista.id, item_id=itens[2].id, quantidade_atual=0, quantidade_minima=n),
+                # quantidade_minima = 0 é ignorada
+                ListaItemRef(lista_id=lista.id, item_id=itens[3].id, quantidade_atual=0, quantidade_minima=0),
+            ])
+        db.session.add(Lista(nome="Lista Vazia", restaurante_id=restaurante.id))
+        db.session.commit()
+
+    def test_contadores_por_lista(self, app):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            restaurante_id = restaurante.id
+            self._seed(restaurante, 3)
+
+            data, status = services.get_estatisticas(restaurante_id)
+
+            assert status == 200
+            # lista 0: item 2 tem mínimo 0 -> 2 itens; listas 1 e 2: 3 itens
+            assert data["resumo"] == {
+                "total_listas": 3, "total_itens": 8, "itens_ok": 3, "itens_faltantes": 5
+            }
+            assert [l["itens_faltantes"] for l in data["por_lista"]] == [2, 2, 1]
+            areas = {l["lista_nome"]: l["area_nome"] for l in data["por_lista"]}
+            assert areas == {
+                "Lista Est 0": "Cozinha Estatísticas", "Lista Est 1": None, "Lista Est 2": "Cozinha Estatísticas"
+            }
+            assert len(data["itens"]) == 8
+            assert data["itens"][0]["item_nome"] == "Item Est 0"
+
+            paginado, _ = services.get_estatisticas(restaurante_id, itens_limit=3, itens_offset=6)
+            assert [i["item_id"] for i in paginado["itens"]] == [i["item_id"] for i in data["itens"][6:]]
+            assert paginado["itens_paginacao"] == {"total": 8, "limit": 3, "offset": 6}
+
+            sem_itens, _ = services.get_estatisticas(restaurante_id, incluir_itens=False)
+            assert sem_itens["itens"] == []
+
+    def test_numero_de_queries_constante(self, app, count_queries):
+        with app.app_context():
+            restaurante = Restaurante.query.first()
+            restaurante_id = restaurante.id
+            self._seed(restaurante, 12)
+
+            with count_queries() as counter:
+                services.get_estatisticas(restaurante_id)
+
+            assert counter.count == 3
+
+
+class TestStatusListasAgregado:
+    """Status de listas/áreas com agregados agrupados (sem N+1)"""
+
+    def _seed(self, restaurante, usuario, listas):
+        from kaizen_app.models import Pedido, PedidoStatus
+        area = Area(nome="Área Status")
+        fornecedor = Fornecedor(nome="Fornecedor Status", restaurante_id=restaurante.id)
+        db.session.add_all([area, fornecedor])
+        db.session.flush()
+        item = Item(nome="Item Status", unidade_medida="un", fornecedor_id=fornecedor.id)
+        item_global = ListaMaeItem(nome="Item Status", unidade="un", restaurante_id=restaurante.id)
+        db.session.add_all([item, item_global])
+        db.session.flush()
+        criadas = []
+        for n in range(listas):
+            lista = Lista(nome=f"Lista Status {n}", restaurante_id=restaurante.id)
+            db.session.add(lista)
+            db.session.flush()
+            lista.colaboradores.append(usuario)
+            db.session.add(Estoque(
+                lista_id=lista.id, item_id=item.id, area_id=area.id,
+                quantidade_atual=0, quantidade_minima=n,
+                data_ultima_submissao=datetime(2025, 1, 1 + n, 10, 0)
+            ))
+            submissao = Submissao(lista_id=lista.id, usuario_id=usuario.id)
+            db.session.add(submissao)
+            db.session.flush()
+            for i in range(n):
+                db.session.add(Pedido(
+                    submissao_id=submissao.id, lista_mae_item_id=item_global.id,
+                    quantidade_solicitada=1, usuario_id=usuario.id,
+                    status=PedidoStatus.PENDENTE if i % 2 == 0 else PedidoStatus.APROVADO,
+                    data_pedido=datetime(2025, 2, 1 + i, 9, 0)
+                ))
+            criadas.append(lista)
+        rapida = ListaRapida(nome="Rápida Status", usuario_id=usuario.id, status=StatusListaRapida.PENDENTE)
+        db.session.add(rapida)
+        db.session.flush()
+        db.session.add_all([
+            ListaRapidaItem(lista_rapida_id=rapida.id, item_global_id=item_global.id),
+            ListaRapidaItem(lista_rapida_id=rapida.id, item_nome_temp="Temporário"),
+        ])
+        db.session.commit()
+        return criadas
+
+    def test_listas_status_submissoes(self, app, count_queries):
+        with app.app_context():
+            from .conftest import create_user
+            restaurante = Restaurante.query.first()
+            restaurante_id = restaurante.id
+            usuario = create_user("Colab", "colab-status@test.com", "senha123", UserRoles.COLLABORATOR,
+                                  restaurante_id=restaurante_id)
+            self._seed(restaurante, usuario, 4)
+
+            with count_queries() as counter:
+                resultado, status = services.get_listas_status_submissoes(restaurante_id)
+
+            assert status == 200
+            assert counter.count == 2
+            comuns = [r for r in resultado if r["tipo"] == "lista_comum"]
+            # Lista 0 não tem pedidos pendentes
+            assert [(r["nome"], r["pending_submissions"]) for r in comuns] == [
+                ("Lista Status 1", 1), ("Lista Status 2", 1), ("Lista Status 3", 2)
+            ]
+            assert comuns[0]["last_submission"] == "2025-01-02T10:00:00"
+            rapidas = [r for r in resultado if r["tipo"] == "lista_rapida"]
+            assert rapidas[0]["pending_submissions"] == 2
+            assert rapidas[0]["area"] == "Lista Rápida - Colab"
+
+            outro, _ = services.get_listas_status_submissoes(restaurante_id + 1000)
+            assert outro == []
+
+    def test_minhas_listas_e_areas_status(self, app, count_queries):
+        with app.app_context():
+            from .conftest import create_user
+            restaurante = Restaurante.query.first()
+            usuario = create_user("Colab", "colab-minhas@test.com", "senha123", UserRoles.COLLABORATOR,
+                                  restaurante_id=restaurante.id)
+            user_id = usuario.id
+            self._seed(restaurante, usuario, 5)
+            db.session.expire_all()
+
+            with count_queries() as counter:
+                listas, status = services.get_minhas_listas_status(user_id)
+            assert status == 200
+            assert counter.count == 3  # usuário, listas atribuídas, agregado
+            assert [l["pending_items"] for l in listas] == [0, 1, 1, 1, 1]
+            assert listas[4]["last_submission"] == "2025-01-05T10:00:00"
+
+            with count_queries() as counter:
+                areas, status = services.get_minhas_areas_status(user_id)
+            assert counter.count <= 2  # usuário (já no identity map) e agregado
+            assert [(a["area"], a["pending_items"]) for a in areas] == [
+                ("Lista Status 1", 1), ("Lista Status 2", 1), ("Lista Status 3", 2), ("Lista Status 4", 2)
+            ]
+            assert areas[-1]["last_submission"] == "2025-02-04 09:00"
+
+
 class TestDeletarRestaurante:
     """Testes para deleção de restaurante (hard delete)"""
 
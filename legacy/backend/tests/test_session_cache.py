@@ -0,0 +1,136 @@
+"""
+Testes do cache de estado de sessão (kaizen_app/session_cache.py).
+"""
+import sqlite3
+
+import pytest
+
+from kaizen_app import db, services, session_cache
+from kaizen_app.models import Fornecedor, Restaurante, UserRoles
+from .conftest import create_user, get_auth_token
+
+
+@pytest.fixture(autouse=True)
+def cache_limpo(app):
+    with app.app_context():
+        cache = session_cache._cache()
+        cache.clear()
+        cache.reset_stats()
+    yield
+
+
+def _sessao(client, token):
+    return client.get('/api/auth/session', headers={'Authorization': f'Bearer {token}'})
+
+
+class TestCacheSessao:
+
+    def test_requisicoes_seguintes_nao_consultam_usuario(self, client, app, count_queries):
+        with app.app_context():
+            create_user('Colab', 'colab-cache@test.com', 'senha123', UserRoles.COLLABORATOR)
+            token = get_auth_token(client, 'colab-cache@test.com', 'senha123')
+            assert _sessao(client, token).status_code == 200
+
+            with count_queries() as counter:
+                for _ in range(3):
+                    assert _sessao(client, token).status_code == 200
+
+            assert counter.count == 0
+            assert session_cache.estatisticas()['lookups_evitados'] == 3
+
+    def test_novo_login_invalida_token_anterior(self, client, app):
+        with app.app_context():
+            create_user('Colab', 'colab-relogin@test.com', 'senha123', UserRoles.COLLABORATOR)
+            antigo = get_auth_token(client, 'colab-relogin@test.com', 'senha123')
+            assert _sessao(client, antigo).status_code == 200
+
+            novo = get_auth_token(client, 'colab-relogin@test.com', 'senha123')
+
+            resposta = _sessao(client, antigo)
+            assert resposta.status_code == 401
+            assert resposta.get_json()['code'] == 'SESSION_SUPERSEDED'
+            assert _sessao(client, novo).status_code == 200
+
+    def test_desativacao_e_troca_de_senha_invalidam(self, app):
+        with app.app_context():
+            usuario = create_user('Colab', 'colab-desativa@test.com', 'senha123', UserRoles.COLLABORATOR)
+            usuario_id = usuario.id
+            cache = session_cache._cache()
+
+            assert session_cache.obter_estado_sessao(usuario_id)['ativo'] is True
+            services.alterar_senha_usuario(usuario_id, 'nova-senha', usuario_id)
+            assert cache.get(str(usuario_id)) is None
+
+            session_cache.obter_estado_sessao(usuario_id)
+            services.deactivate_user(usuario_id, UserRoles.SUPER_ADMIN.value)
+            assert session_cache.obter_estado_sessao(usuario_id)['ativo'] is False
+
+    def test_acerto_no_sqlite_e_somente_leitura(self, app, tmp_path):
+        path = str(tmp_path / 'sessao.sqlite3')
+        with app.app_context():
+            usuario = create_user('Colab', 'colab-sqlite@test.com', 'senha123', UserRoles.COLLABORATOR)
+            usuario_id = usuario.id
+            app.config.update(SESSION_TOKEN_CACHE_BACKEND='sqlite', SESSION_TOKEN_CACHE_PATH=path)
+            try:
+                assert session_cache._cache().touch_interval == 0
+                session_cache.obter_estado_sessao(usuario_id)
+                with sqlite3.connect(path) as conn:
+                    antes = conn.execute("SELECT accessed_at FROM cache_entries").fetchall()
+
+                for _ in range(3):
+                    assert session_cache.obter_estado_sessao(usuario_id)['ativo'] is True
+
+                with sqlite3.connect(path) as conn:
+                    depois = conn.execute("SELECT accessed_at FROM cache_entries").fetchall()
+                assert depois == antes
+                assert session_cache.estatisticas()['lookups_evitados'] == 3
+            finally:
+                app.config.update(SESSION_TOKEN_CACHE_BACKEND='memory', SESSION_TOKEN_CACHE_PATH=None)
+
+    def test_impersonacao_invalida(self, app):
+        with app.app_context():
+            super_admin = create_user('Super', 'super-cache@test.com', 'senha123', UserRoles.SUPER_ADMIN)
+            usuario = create_user('Colab', 'colab-imp@test.com', 'senha123', UserRoles.COLLABORATOR)
+            super_admin_id, usuario_id = super_admin.id, usuario.id
+            cache = session_cache._cache()
+            session_cache.obter_estado_sessao(usuario_id)
+            session_cache.obter_estado_sessao(super_admin_id)
+
+            services.iniciar_impersonacao(super_admin_id, usuario_id)
+            assert cache.get(str(usuario_id)) is None
+
+            services.encerrar_impersonacao(super_admin_id)
+            assert cache.get(str(super_admin_id)) is None
+
+    def test_supplier_required_acompanha_aprovacao(self, client, app):
+        with app.app_context():
+            usuario = create_user('Forn', 'forn-cache@test.com', 'senha123', UserRoles.SUPPLIER)
+            fornecedor = Fornecedor(
+                nome='Fornecedor Cache', usuario_id=usuario.id,
+                restaurante_id=Restaurante.query.first().id, aprovado=False
+            )
+            db.session.add(fornecedor)
+            db.session.commit()
+            token = get_auth_token(client, 'forn-cache@test.com', 'senha123')
+            headers = {'Authorization': f'Bearer {token}'}
+
+            assert client.get('/api/supplier/perfil', headers=headers).status_code == 403
+
+            fornecedor.aprovado = True
+            db.session.commit()
+
+            assert client.get('/api/supplier/perfil', headers=headers).status_code == 200
+
+    def test_endpoint_estatisticas(self, client, app):
+        with app.app_context():
+            create_user('Super', 'super-stats@test.com', 'senha123', UserRoles.SUPER_ADMIN)
+            token = get_auth_token(client, 'super-stats@test.com', 'senha123')
+            headers = {'Authorization': f'Bearer {token}'}
+            client.get('/api/admin/session-cache/stats', headers=headers)
+
+            resposta = client.get('/api/admin/session-cache/stats', headers=headers)
+
+            assert resposta.status_code == 200
+            dados = resposta.get_json()
+            assert dados['lookups_evitados'] >= 1
+            assert dados['backend'] == 'memory'
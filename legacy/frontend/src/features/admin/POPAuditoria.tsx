@@ -17,6 +17,8 @@ interface POPExecucao {
 
 const POPAuditoria: React.FC = () => {
   const [execucoes, setExecucoes] = useState<POPExecucao[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [config, setConfig] = useState({ auto_arquivar: true, periodo_arquivamento_dias: 7 });
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
@@ -33,6 +35,7 @@ const POPAuditoria: React.FC = () => {
         api.get('/admin/pop-configuracoes')
       ]);
       setExecucoes(execucoesRes.data.execucoes || []);
+      setNextCursor(execucoesRes.data.next_cursor || null);
       if (configRes.data) {
         setConfig({
           auto_arquivar: Boolean(configRes.data.auto_arquivar),
@@ -50,6 +53,21 @@ const POPAuditoria: React.FC = () => {
     fetchExecucoes();
   }, [fetchExecucoes]);
 
+  // A API devolve paginas (keyset): as seguintes vem de next_cursor
+  const handleLoadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const response = await api.get('/admin/pop-execucoes', { params: { ...filters, cursor: nextCursor } });
+      setExecucoes((atuais) => [...atuais, ...(response.data.execucoes || [])]);
+      setNextCursor(response.data.next_cursor || null);
+    } catch (err: any) {
+      setError(err.response?.data?.error || 'Erro ao carregar execucoes');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleReview = (execucao: POPExecucao) => {
     setSelectedExecucao(execucao);
     setReviewText('');
@@ -219,6 +237,13 @@ const POPAuditoria: React.FC = () => {
               </tbody>
             </Table>
           )}
+          {!loading && nextCursor && (
+            <div className="text-center mt-3">
+              <Button variant="outline-primary" onClick={handleLoadMore} disabled={loadingMore}>
+                {loadingMore ? 'Carregando...' : 'Carregar mais'}
+              </Button>
+            </div>
+          )}
         </Card.Body>
       </Card>
 
@@ -17,6 +17,8 @@ interface POPExecucao {
 
 const HistoricoPOPExecucoes: React.FC = () => {
   const [execucoes, setExecucoes] = useState<POPExecucao[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filters, setFilters] = useState({ data_inicio: '', data_fim: '' });
   const [error, setError] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
@@ -27,6 +29,7 @@ const HistoricoPOPExecucoes: React.FC = () => {
       setLoading(true);
       const response = await api.get('/collaborator/pop-execucoes', { params: filters });
       setExecucoes(response.data.execucoes || []);
+      setNextCursor(response.data.next_cursor || null);
     } catch (err: any) {
       setError(err.response?.data?.error || 'Erro ao carregar historico');
     } finally {
@@ -38,6 +41,21 @@ const HistoricoPOPExecucoes: React.FC = () => {
     fetchExecucoes();
   }, [fetchExecucoes]);
 
+  // A API devolve paginas (keyset): as seguintes vem de next_cursor
+  const handleLoadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const response = await api.get('/collaborator/pop-execucoes', { params: { ...filters, cursor: nextCursor } });
+      setExecucoes((atuais) => [...atuais, ...(response.data.execucoes || [])]);
+      setNextCursor(response.data.next_cursor || null);
+    } catch (err: any) {
+      setError(err.response?.data?.error || 'Erro ao carregar historico');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   return (
     <Container fluid className="py-4">
       <div className={styles.header}>
@@ -122,6 +140,13 @@ const HistoricoPOPExecucoes: React.FC = () => {
               </tbody>
             </Table>
           )}
+          {!loading && nextCursor && (
+            <div className="text-center mt-3">
+              <Button variant="outline-primary" onClick={handleLoadMore} disabled={loadingMore}>
+                {loadingMore ? 'Carregando...' : 'Carregar mais'}
+              </Button>
+            </div>
+          )}
         </Card.Body>
       </Card>
     </Container>